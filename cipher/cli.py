@@ -291,7 +291,7 @@ async def semantic_search(query: str, limit: int = 20, threshold: float = 0.5):
         await brain.close()
 
 
-async def embed_backfill(batch_size: int = 100, limit: int = None):
+async def embed_backfill(batch_size: int = 100, limit: int = None, restart: bool = False):
     """Backfill embeddings for existing claims."""
     from tools.cipher_brain import CipherBrain
 
@@ -301,12 +301,26 @@ async def embed_backfill(batch_size: int = 100, limit: int = None):
     brain = CipherBrain(config.db.connection_string)
     await brain.connect()
 
+    def show(stats):
+        print(f"\r  {stats['claims']}/{stats['pending']} claims  "
+              f"{stats['claims_per_s']} claims/s  {stats['failed']} failed", end="", flush=True)
+
     try:
-        updated = await brain.embed_existing_claims(
+        stats = await brain.backfill_embeddings(
             batch_size=batch_size,
-            limit=limit
+            limit=limit,
+            resume=not restart,
+            progress=show
         )
-        print(f"\nCompleted! Updated {updated} claims with embeddings.")
+        print()
+        if stats['resumed_from']:
+            print(f"Resumed after claim {stats['resumed_from']}")
+        print(f"\nCompleted! Updated {stats['claims']} claims with embeddings "
+              f"in {stats['seconds']:.1f}s ({stats['claims_per_s']} claims/s).")
+        print(f"  Busy time: fetch {stats['fetch_s']:.1f}s, encode {stats['encode_s']:.1f}s, "
+              f"write {stats['write_s']:.1f}s")
+        if stats['failed']:
+            print(f"  {stats['failed']} claims failed to embed (retried on the next run)")
 
     finally:
         await brain.close()
@@ -1072,7 +1086,7 @@ async def communities(limit: int = 20):
 
     try:
         await engine.load_graph()
-        comms = engine.detect_communities()
+        comms = await engine.refresh_communities()
 
         if not comms:
             print("\nNo communities detected.")
@@ -1178,10 +1192,10 @@ async def cross_domain_hubs(min_domains: int = 2, limit: int = 20):
 
 
 async def all_paths(source_id: int, target_id: int, max_depth: int = 5, limit: int = 10):
-    """Find all paths between two claims."""
+    """Find the k shortest paths between two claims (Yen's algorithm)."""
     from tools.graph_engine import GraphEngine
 
-    print(f"Finding all paths from claim {source_id} to {target_id}")
+    print(f"Finding {limit} shortest paths from claim {source_id} to {target_id}")
     print(f"Max depth: {max_depth}")
     print("=" * 60)
 
@@ -1189,7 +1203,8 @@ async def all_paths(source_id: int, target_id: int, max_depth: int = 5, limit: i
     await engine.connect()
 
     try:
-        paths = await engine.find_all_paths_cte(source_id, target_id, max_depth, limit)
+        await engine.load_graph()
+        paths = engine.find_k_shortest_paths(source_id, target_id, k=limit, max_depth=max_depth)
 
         if not paths:
             print(f"\nNo paths found between claims {source_id} and {target_id}")
@@ -1199,7 +1214,7 @@ async def all_paths(source_id: int, target_id: int, max_depth: int = 5, limit: i
 
         for i, path in enumerate(paths, 1):
             cross = " (cross-domain)" if path.path_type == 'cross_domain' else ""
-            print(f"{i}. {len(path.nodes)} hops, weight={path.total_weight:.3f}{cross}")
+            print(f"{i}. {len(path.edges)} hops, weight={path.total_weight:.3f}{cross}")
             print(f"   {' -> '.join(str(n) for n in path.nodes)}")
 
     finally:
@@ -1624,6 +1639,7 @@ LLM Integration Commands:
     backfill = subparsers.add_parser('embed-backfill', help='Generate embeddings for existing claims')
     backfill.add_argument('--batch-size', type=int, default=100, help='Batch size')
     backfill.add_argument('--limit', type=int, default=None, help='Max claims to process')
+    backfill.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start from the first claim')
 
     # Embedding Stats
     subparsers.add_parser('embed-stats', help='Show embedding statistics')
@@ -1725,7 +1741,7 @@ LLM Integration Commands:
                             help='Path type')
 
     # All Paths
-    all_paths_parser = subparsers.add_parser('all-paths', help='Find all paths between two claims')
+    all_paths_parser = subparsers.add_parser('all-paths', help='Find the k shortest paths between two claims')
     all_paths_parser.add_argument('source', type=int, help='Source claim ID')
     all_paths_parser.add_argument('target', type=int, help='Target claim ID')
     all_paths_parser.add_argument('--max-depth', type=int, default=5, help='Maximum path depth')
@@ -1797,7 +1813,7 @@ LLM Integration Commands:
     elif args.command == 'semantic-search':
         asyncio.run(semantic_search(args.query, args.n, args.threshold))
     elif args.command == 'embed-backfill':
-        asyncio.run(embed_backfill(args.batch_size, args.limit))
+        asyncio.run(embed_backfill(args.batch_size, args.limit, args.restart))
     elif args.command == 'embed-stats':
         asyncio.run(embedding_stats())
     elif args.command == 'find-bridges':
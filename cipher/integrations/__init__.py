@@ -3,7 +3,8 @@ CIPHER API Integrations
 Academic paper sources: OpenAlex, arXiv, PubMed, Semantic Scholar
 """
 
-from .base import AcademicSource, Paper
+from .base import AcademicSource, Paper, OfflineCacheMiss
+from .cache import ResponseCache, get_response_cache
 from .openalex import OpenAlexClient
 from .arxiv import ArxivClient
 from .pubmed import PubMedClient
@@ -12,6 +13,9 @@ from .semantic_scholar import SemanticScholarClient
 __all__ = [
     'AcademicSource',
     'Paper',
+    'OfflineCacheMiss',
+    'ResponseCache',
+    'get_response_cache',
     'OpenAlexClient',
     'ArxivClient',
     'PubMedClient',
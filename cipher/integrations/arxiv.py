@@ -38,6 +38,8 @@ class ArxivClient(AcademicSource):
     - stat.* - Statistics
     """
 
+    cache_ttl = 6 * 3600  # new submissions announced daily
+
     def __init__(self, requests_per_second: float = 1.0):
         """
         Initialize arXiv client.
@@ -4,15 +4,38 @@ Base classes for academic API integrations
 
 import asyncio
 import aiohttp
+import json
+import os
+import random
+import time
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Optional, List, Dict, Any, AsyncIterator
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple, Union
 from enum import Enum
 import logging
 
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from .cache import CachedResponse, ResponseCache, get_response_cache, offline_mode
+
 logger = logging.getLogger(__name__)
 
+# Retries for transient failures (429, 5xx, connection errors)
+MAX_RETRIES = 5
+RETRY_BASE = 1.0           # seconds, doubled per attempt, jittered
+RETRY_MAX = 60.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+STREAM_PREFETCH = 3        # pages fetched ahead of the consumer
+
+
+class OfflineCacheMiss(aiohttp.ClientError):
+    """Offline replay mode and the response was never cached."""
+
 
 class SourceType(Enum):
     """Academic source types"""
@@ -116,13 +139,75 @@ class RateLimiter:
                 self.tokens -= 1
 
 
+@dataclass
+class StreamCheckpoint:
+    """
+    Resumable stream position: the page at `cursor` was consumed up to `skip`.
+    Saved as JSON next to the caller's data; removed when the stream completes.
+    """
+    source: str
+    query: str
+    cursor: Any = None
+    skip: int = 0
+    yielded: int = 0
+    updated: float = 0.0
+
+    @classmethod
+    def load(cls, path: Path, source: str, query: str) -> 'StreamCheckpoint':
+        try:
+            data = json.loads(Path(path).read_text())
+            if data.get('source') == source and data.get('query') == query:
+                return cls(**data)
+        except (OSError, ValueError, TypeError):
+            pass
+        return cls(source=source, query=query)
+
+    def save(self, path: Path):
+        self.updated = time.time()
+        path = Path(path)
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_text(json.dumps(asdict(self)))
+        os.replace(tmp, path)
+
+
+def retry_delay(attempt: int, error: Exception) -> float:
+    """Retry-After when the server sent one, else jittered exponential backoff."""
+    headers = getattr(error, 'headers', None) or {}
+    retry_after = headers.get('Retry-After')
+    if retry_after:
+        try:
+            return min(RETRY_MAX, max(0.0, float(retry_after)))
+        except ValueError:
+            try:
+                when = parsedate_to_datetime(retry_after)
+                return min(RETRY_MAX, max(0.0, (when - datetime.now(timezone.utc)).total_seconds()))
+            except (TypeError, ValueError):
+                pass
+    return min(RETRY_MAX, RETRY_BASE * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+def is_retryable(error: Exception) -> bool:
+    """429 / 5xx, connection errors, truncated bodies and timeouts."""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in RETRY_STATUSES
+    return isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError,
+                              asyncio.TimeoutError))
+
+
 class AcademicSource(ABC):
     """
     Abstract base class for academic paper sources.
 
     All API clients inherit from this and implement the search/fetch methods.
+
+    GET responses go through the shared ResponseCache (see cache.py):
+    fresh hits never reach the rate limiter.
     """
 
+    # Seconds a response stays fresh / a 404 is remembered. Override per source.
+    cache_ttl: float = 86400
+    negative_ttl: float = 3600
+
     def __init__(
         self,
         base_url: str,
@@ -133,6 +218,8 @@ class AcademicSource(ABC):
         self.rate_limiter = RateLimiter(requests_per_second)
         self.timeout = aiohttp.ClientTimeout(total=timeout)
         self._session: Optional[aiohttp.ClientSession] = None
+        self.cache: Optional[ResponseCache] = get_response_cache()
+        self.offline = offline_mode()
 
     @property
     @abstractmethod
@@ -162,33 +249,107 @@ class AcademicSource(ABC):
 
     async def _get(self, url: str, params: Optional[Dict] = None) -> Dict:
         """
-        Make a rate-limited GET request.
+        Make a cached, rate-limited GET request.
         """
-        await self.rate_limiter.acquire()
-        session = await self.get_session()
-
-        try:
-            async with session.get(url, params=params) as response:
-                response.raise_for_status()
-                return await response.json()
-        except aiohttp.ClientError as e:
-            logger.error(f"API request failed: {url} - {e}")
-            raise
+        return json.loads(await self._fetch(url, params))
 
     async def _get_xml(self, url: str, params: Optional[Dict] = None) -> str:
         """
-        Make a rate-limited GET request expecting XML response.
+        Make a cached, rate-limited GET request expecting XML response.
+        """
+        return (await self._fetch(url, params)).decode('utf-8', errors='replace')
+
+    async def _fetch(self, url: str, params: Optional[Dict] = None) -> bytes:
+        """
+        Response body from the cache when fresh (or offline), else from the network.
+        Concurrent identical requests share one download.
+        """
+        cache = self.cache
+        key = cache.key(url, params) if cache else None
+        entry = cache.get(key) if cache else None
+
+        if self.offline:
+            if entry is None:
+                if cache:
+                    cache.stats['offline_misses'] += 1
+                raise OfflineCacheMiss(f"Not in cache (offline mode): {url}")
+            return self._replay(entry, url)
+
+        if entry is not None and entry.fresh:
+            cache.stats['negative_hits' if entry.status == 404 else 'hits'] += 1
+            return self._replay(entry, url)
+
+        if cache is None:
+            return await self._download(url, params)
+
+        cache.stats['misses'] += 1
+        body, _ = await cache.coalesce(key, lambda: self._download(url, params, key, entry))
+        return body
+
+    def _replay(self, entry: CachedResponse, url: str) -> bytes:
+        if entry.status == 404:
+            raise aiohttp.ClientResponseError(
+                aiohttp.RequestInfo(URL(url), 'GET', CIMultiDictProxy(CIMultiDict()), URL(url)),
+                (), status=404, message='Not Found (cached)'
+            )
+        return entry.body
+
+    async def _download(
+        self,
+        url: str,
+        params: Optional[Dict] = None,
+        key: Optional[str] = None,
+        entry: Optional[CachedResponse] = None
+    ) -> bytes:
         """
+        Network GET; revalidates a stale entry, stores the result under key.
+        Transient failures are retried (Retry-After, else jittered backoff).
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                return await self._download_once(url, params, key, entry)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt < MAX_RETRIES and is_retryable(e):
+                    delay = retry_delay(attempt, e)
+                    logger.warning(f"API request failed ({e}), retry {attempt + 1}/{MAX_RETRIES} in {delay:.1f}s: {url}")
+                    await asyncio.sleep(delay)
+                    continue
+                # stale-if-error: an old answer beats none (not for a resource now gone)
+                if entry is not None and entry.status != 404 and getattr(e, 'status', None) != 404:
+                    self.cache.stats['stale_served'] += 1
+                    logger.warning(f"API request failed, serving stale cache: {url} - {e}")
+                    return entry.body
+                logger.error(f"API request failed: {url} - {e}")
+                raise
+
+    async def _download_once(
+        self,
+        url: str,
+        params: Optional[Dict],
+        key: Optional[str],
+        entry: Optional[CachedResponse]
+    ) -> bytes:
         await self.rate_limiter.acquire()
         session = await self.get_session()
+        headers = entry.validators() if entry is not None else {}
 
-        try:
-            async with session.get(url, params=params) as response:
-                response.raise_for_status()
-                return await response.text()
-        except aiohttp.ClientError as e:
-            logger.error(f"API request failed: {url} - {e}")
-            raise
+        async with session.get(url, params=params, headers=headers) as response:
+            if response.status == 304 and entry is not None:
+                self.cache.stats['revalidated'] += 1
+                return self.cache.refresh(key, entry, self.cache_ttl).body
+
+            if response.status == 404 and key is not None:
+                self.cache.put(key, self.source_type.value, str(response.url), 404, b'', self.negative_ttl)
+
+            response.raise_for_status()
+            body = await response.read()
+
+            if key is not None and 'no-store' not in response.headers.get('Cache-Control', ''):
+                self.cache.put(
+                    key, self.source_type.value, str(response.url), response.status, body,
+                    self.cache_ttl, response.headers.get('ETag'), response.headers.get('Last-Modified')
+                )
+            return body
 
     @abstractmethod
     async def search(
@@ -225,11 +386,30 @@ class AcademicSource(ABC):
         """
         pass
 
+    async def _page(
+        self,
+        query: str,
+        limit: int,
+        cursor: Any = None,
+        **kwargs
+    ) -> Tuple[List[Paper], Any]:
+        """
+        One page of a stream: (papers, next cursor or None at the end).
+
+        Default: offset paging over search(). Sources with cursor paging
+        (OpenAlex cursor=*, Semantic Scholar bulk token) override this.
+        """
+        offset = cursor or 0
+        papers = await self.search(query=query, limit=limit, offset=offset, **kwargs)
+        return papers, (offset + len(papers) if papers else None)
+
     async def stream(
         self,
         query: str,
         max_results: int = 1000,
         batch_size: int = 100,
+        prefetch: int = STREAM_PREFETCH,
+        checkpoint: Optional[Union[str, Path]] = None,
         **kwargs
     ) -> AsyncIterator[Paper]:
         """
@@ -237,43 +417,82 @@ class AcademicSource(ABC):
 
         This is the preferred method for large-scale fetching.
         Yields papers one at a time to minimize memory usage.
+        The next `prefetch` pages are fetched in the background while
+        the consumer works; transient errors are retried by _download.
 
         Args:
             query: Search query
             max_results: Maximum total results
             batch_size: Results per API call
+            prefetch: Pages buffered ahead of the consumer
+            checkpoint: JSON file to resume from / save progress to
             **kwargs: Source-specific parameters
 
         Yields:
             Paper objects
-        """
-        offset = 0
-        total_yielded = 0
 
-        while total_yielded < max_results:
+        Raises:
+            The page error once retries are exhausted (progress is in the checkpoint)
+        """
+        state = (StreamCheckpoint.load(checkpoint, self.source_type.value, query) if checkpoint
+                 else StreamCheckpoint(self.source_type.value, query))
+        if state.yielded:
+            logger.info(f"Resuming {self.source_type.value} stream '{query}' after {state.yielded} papers")
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, prefetch))
+        done = object()
+
+        async def produce():
+            cursor, fetched = state.cursor, state.yielded - state.skip
             try:
-                papers = await self.search(
-                    query=query,
-                    limit=min(batch_size, max_results - total_yielded),
-                    offset=offset,
-                    **kwargs
-                )
+                while fetched < max_results:
+                    papers, next_cursor = await self._page(
+                        query, min(batch_size, max_results - fetched), cursor, **kwargs
+                    )
+                    await queue.put((cursor, papers, next_cursor))
+                    fetched += len(papers)
+                    if not papers or next_cursor is None:
+                        break
+                    cursor = next_cursor
+                await queue.put(done)
+            except Exception as e:
+                await queue.put(e)
 
-                if not papers:
+        producer = asyncio.create_task(produce())
+        finished = False
+        try:
+            while state.yielded < max_results:
+                item = await queue.get()
+                if item is done:
+                    finished = True
                     break
-
-                for paper in papers:
+                if isinstance(item, Exception):
+                    logger.error(f"Stream error at {state.cursor!r} after {state.yielded} papers: {item}")
+                    raise item
+
+                cursor, papers, next_cursor = item
+                state.cursor = cursor
+                for paper in papers[state.skip:]:
+                    state.skip += 1
+                    state.yielded += 1
                     yield paper
-                    total_yielded += 1
-
-                    if total_yielded >= max_results:
+                    if state.yielded >= max_results:
                         break
-
-                offset += len(papers)
-
-            except Exception as e:
-                logger.error(f"Stream error at offset {offset}: {e}")
-                break
+                else:
+                    if next_cursor is None:
+                        finished = True
+                        break
+                    state.cursor, state.skip = next_cursor, 0
+                    if checkpoint:
+                        state.save(checkpoint)
+            else:
+                finished = True
+        finally:
+            producer.cancel()
+            if checkpoint:
+                if finished:
+                    Path(checkpoint).unlink(missing_ok=True)
+                else:
+                    state.save(checkpoint)
 
     async def search_by_concepts(
         self,
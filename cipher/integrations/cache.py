@@ -0,0 +1,241 @@
+"""
+HTTP response cache for academic API integrations
+
+Used by AcademicSource._get / _get_xml:
+- on-disk store (sqlite + zlib bodies) keyed by normalized URL and params
+- per-source TTL; stale entries are revalidated with ETag / Last-Modified
+- 404s are cached too (negative TTL)
+- concurrent identical fetches share one request
+- offline replay: serve whatever is cached, never touch the network
+
+Environment:
+    CIPHER_HTTP_CACHE=<dir>   cache directory (default ~/.cache/cipher/http), "off" to disable
+    CIPHER_OFFLINE=1          offline replay mode
+
+Self-check against a local aiohttp stub server:
+    python -m integrations.selftest
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "cipher" / "http"
+
+# Identity / credential params: same response, never part of the key
+IGNORED_PARAMS = frozenset({'api_key', 'mailto', 'email', 'tool'})
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    source TEXT,
+    url TEXT,
+    status INTEGER,
+    body BLOB,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_expires ON responses(expires_at);
+"""
+
+
+@dataclass
+class CachedResponse:
+    """One stored response (status 404 = negative entry)."""
+    status: int
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+    expires_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidation."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+def normalize_url(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Lowercased scheme/host, merged and sorted query params, identity params dropped."""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    for name, value in (params or {}).items():
+        if value is None:
+            continue
+        values = value if isinstance(value, (list, tuple)) else [value]
+        query.extend((name, str(v)) for v in values)
+    query = sorted((k, v) for k, v in query if k not in IGNORED_PARAMS)
+    return urlunsplit((
+        parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/') or '/',
+        urlencode(query), ''
+    ))
+
+
+class ResponseCache:
+    """
+    On-disk HTTP response store shared by all AcademicSource instances.
+    sqlite calls are short (one row by primary key) and run inline.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / "responses.sqlite"
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'negative_hits': 0,
+            'revalidated': 0,
+            'coalesced': 0,
+            'stale_served': 0,
+            'offline_misses': 0,
+            'stored': 0,
+        }
+
+    @staticmethod
+    def key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        return hashlib.sha256(normalize_url(url, params).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, body, etag, last_modified, stored_at, expires_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        status, body, etag, last_modified, stored_at, expires_at = row
+        return CachedResponse(status, zlib.decompress(body) if body else b'',
+                              etag, last_modified, stored_at, expires_at)
+
+    def put(self, key: str, source: str, url: str, status: int, body: bytes,
+            ttl: float, etag: Optional[str] = None, last_modified: Optional[str] = None) -> CachedResponse:
+        now = time.time()
+        entry = CachedResponse(status, body, etag, last_modified, now, now + ttl)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, source, url, status, zlib.compress(body, 6) if body else b'',
+                 etag, last_modified, now, now + ttl)
+            )
+            self._db.commit()
+        self.stats['stored'] += 1
+        return entry
+
+    def refresh(self, key: str, entry: CachedResponse, ttl: float) -> CachedResponse:
+        """304 Not Modified: same body, new expiry."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE responses SET stored_at = ?, expires_at = ? WHERE key = ?", (now, now + ttl, key)
+            )
+            self._db.commit()
+        entry.stored_at, entry.expires_at = now, now + ttl
+        return entry
+
+    async def coalesce(self, key: str, fetch) -> Tuple[Any, bool]:
+        """
+        Run fetch() once per key among concurrent callers.
+        Returns (result, shared) - shared=True for callers that waited.
+        """
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(fut), True
+
+        fut = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fetch()
+            fut.set_result(result)
+            return result, False
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # retrieved: no warning when nobody else waited
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def purge(self, older_than: float = 30 * 86400) -> int:
+        """Drop entries expired for more than older_than seconds."""
+        with self._lock:
+            n = self._db.execute(
+                "DELETE FROM responses WHERE expires_at < ?", (time.time() - older_than,)
+            ).rowcount
+            self._db.commit()
+        return n
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        lookups = self.stats['hits'] + self.stats['misses']
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM responses"
+            ).fetchone()
+        return {
+            **self.stats,
+            'hit_rate': self.stats['hits'] / lookups if lookups else 0.0,
+            'entries': entries,
+            'bytes': size,
+        }
+
+
+_cache: Optional[ResponseCache] = None
+_cache_checked = False
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Process-wide cache (None if CIPHER_HTTP_CACHE=off or the directory is unusable)."""
+    global _cache, _cache_checked
+    if not _cache_checked:
+        _cache_checked = True
+        setting = os.getenv("CIPHER_HTTP_CACHE", "")
+        if setting.lower() not in ("off", "0", "false"):
+            try:
+                _cache = ResponseCache(Path(setting) if setting else DEFAULT_CACHE_DIR)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"HTTP cache disabled: {e}")
+    return _cache
+
+
+def offline_mode() -> bool:
+    return os.getenv("CIPHER_OFFLINE", "").lower() in ("1", "true", "yes")
+
+
+if __name__ == "__main__":
+    cache = get_response_cache()
+    print(cache.cache_stats() if cache else "HTTP cache disabled")
@@ -8,7 +8,7 @@ No API key required. Very generous rate limits (10+ rps with polite email).
 
 import logging
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 
 from .base import AcademicSource, Paper, Author, SourceType
 
@@ -29,6 +29,8 @@ class OpenAlexClient(AcademicSource):
     All data is free and openly licensed (CC0).
     """
 
+    cache_ttl = 86400  # works change slowly (citation counts, daily snapshot)
+
     def __init__(
         self,
         email: str = "cipher@pwnd.icu",
@@ -143,33 +145,17 @@ class OpenAlexClient(AcademicSource):
 
         return ' '.join(words)
 
-    async def search(
+    def _works_params(
         self,
         query: str,
-        limit: int = 100,
-        offset: int = 0,
+        limit: int,
         concept_ids: Optional[List[str]] = None,
         from_date: Optional[str] = None,
         to_date: Optional[str] = None,
         is_oa: Optional[bool] = None,
         sort: str = "relevance_score:desc"
-    ) -> List[Paper]:
-        """
-        Search OpenAlex works.
-
-        Args:
-            query: Search query (searches title, abstract)
-            limit: Max results (max 200 per request)
-            offset: Pagination offset
-            concept_ids: Filter by OpenAlex concept IDs
-            from_date: Filter by publication date (YYYY-MM-DD)
-            to_date: Filter by publication date (YYYY-MM-DD)
-            is_oa: Filter to open access only
-            sort: Sort order (relevance_score:desc, cited_by_count:desc, publication_date:desc)
-
-        Returns:
-            List of Paper objects
-        """
+    ) -> Dict[str, Any]:
+        """/works query parameters shared by search() and cursor paging."""
         # Build filter string
         filters = []
         search_query = None
@@ -193,7 +179,6 @@ class OpenAlexClient(AcademicSource):
 
         params = {
             'per_page': min(limit, 200),
-            'page': (offset // min(limit, 200)) + 1,
             'sort': sort,
             'mailto': self.email
         }
@@ -204,6 +189,38 @@ class OpenAlexClient(AcademicSource):
         if filters:
             params['filter'] = ','.join(filters)
 
+        return params
+
+    async def search(
+        self,
+        query: str,
+        limit: int = 100,
+        offset: int = 0,
+        concept_ids: Optional[List[str]] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        is_oa: Optional[bool] = None,
+        sort: str = "relevance_score:desc"
+    ) -> List[Paper]:
+        """
+        Search OpenAlex works.
+
+        Args:
+            query: Search query (searches title, abstract)
+            limit: Max results (max 200 per request)
+            offset: Pagination offset
+            concept_ids: Filter by OpenAlex concept IDs
+            from_date: Filter by publication date (YYYY-MM-DD)
+            to_date: Filter by publication date (YYYY-MM-DD)
+            is_oa: Filter to open access only
+            sort: Sort order (relevance_score:desc, cited_by_count:desc, publication_date:desc)
+
+        Returns:
+            List of Paper objects
+        """
+        params = self._works_params(query, limit, concept_ids, from_date, to_date, is_oa, sort)
+        params['page'] = (offset // min(limit, 200)) + 1
+
         url = f"{self.base_url}/works"
 
         try:
@@ -214,6 +231,21 @@ class OpenAlexClient(AcademicSource):
             logger.error(f"OpenAlex search failed: {e}")
             return []
 
+    async def _page(
+        self,
+        query: str,
+        limit: int,
+        cursor: Any = None,
+        **kwargs
+    ) -> Tuple[List[Paper], Any]:
+        """Cursor paging (cursor=*): no deep-page penalty, stable across pages."""
+        params = self._works_params(query, limit, **kwargs)
+        params['cursor'] = cursor or '*'
+        data = await self._get(f"{self.base_url}/works", params)
+        works = data.get('results', [])
+        next_cursor = data.get('meta', {}).get('next_cursor')
+        return [self._parse_work(w) for w in works], (next_cursor if works else None)
+
     async def fetch(self, paper_id: str) -> Optional[Paper]:
         """
         Fetch a single work by OpenAlex ID or DOI.
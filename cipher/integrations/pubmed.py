@@ -5,18 +5,154 @@ https://www.ncbi.nlm.nih.gov/books/NBK25501/
 PubMed provides access to biomedical literature from MEDLINE,
 life science journals, and online books.
 API key optional but recommended for higher rate limits.
+
+Batch engine:
+- PMID lookups from concurrent callers (search, fetch, get_related) are
+  queued for a short window and sent as full efetch batches, each PMID
+  once while in flight
+- large result sets go through the history server (usehistory=y,
+  WebEnv/query_key) instead of shipping PMID lists back and forth
+- efetch XML is parsed incrementally; finished articles are dropped
+  from the tree, so memory stays bounded by one article
+
+Self-check and papers/s benchmark against a local stub:
+    python -m integrations.selftest
 """
 
 import logging
 import xml.etree.ElementTree as ET
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator, Awaitable, Callable, Iterable, Tuple
 import asyncio
+import json
+
+import aiohttp
 
-from .base import AcademicSource, Paper, Author, SourceType
+from .base import (
+    AcademicSource, Paper, Author, SourceType,
+    MAX_RETRIES, retry_delay, is_retryable
+)
 
 logger = logging.getLogger(__name__)
 
+EFETCH_BATCH = 200          # PMIDs per efetch by id (NCBI: POST beyond 200)
+BATCH_WINDOW = 0.02         # seconds a partial batch waits for other callers
+HISTORY_THRESHOLD = 500     # search limit above which the history server is used
+HISTORY_BATCH = 500         # records per efetch from the history server
+STREAM_CHUNK = 64 * 1024    # bytes fed to the XML parser at a time
+
+
+class _ArticleParser:
+    """
+    Incremental PubmedArticleSet parser.
+    feed() returns the PubmedArticle elements completed by the chunk and
+    detaches them from the root, so the tree never holds more than the
+    article being parsed.
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=('start', 'end'))
+        self.root: Optional[ET.Element] = None
+
+    def _collect(self) -> List[ET.Element]:
+        articles = []
+        for event, elem in self._parser.read_events():
+            if event == 'start':
+                if self.root is None:
+                    self.root = elem
+            elif elem.tag == 'PubmedArticle':
+                articles.append(elem)
+                if self.root is not None and len(self.root) and self.root[0] is elem:
+                    del self.root[0]  # completed in document order
+        return articles
+
+    def feed(self, data: bytes) -> List[ET.Element]:
+        self._parser.feed(data)
+        return self._collect()
+
+    def close(self) -> List[ET.Element]:
+        self._parser.close()
+        return self._collect()
+
+
+class PMIDBatcher:
+    """
+    Aggregates PMID lookups across concurrent callers into efetch batches.
+
+    get() queues the PMIDs it is not already waiting for; a batch is sent
+    as soon as it is full, the remainder after `window` seconds. Every
+    caller waiting on a PMID shares the same future. Failed batches
+    resolve to None (logged), like the former per-call fetches.
+    """
+
+    def __init__(
+        self,
+        fetch_batch: Callable[[List[str]], Awaitable[Dict[str, Paper]]],
+        batch_size: int = EFETCH_BATCH,
+        window: float = BATCH_WINDOW
+    ):
+        self._fetch_batch = fetch_batch
+        self.batch_size = batch_size
+        self.window = window
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self.stats = {'requested': 0, 'deduped': 0, 'batches': 0, 'fetched': 0}
+
+    async def get(self, pmids: Iterable[str]) -> Dict[str, Optional[Paper]]:
+        loop = asyncio.get_running_loop()
+        futures: Dict[str, asyncio.Future] = {}
+        for pmid in pmids:
+            if pmid in futures:
+                continue
+            self.stats['requested'] += 1
+            fut = self._inflight.get(pmid) or self._pending.get(pmid)
+            if fut is not None:
+                self.stats['deduped'] += 1
+            else:
+                fut = self._pending[pmid] = loop.create_future()
+                if len(self._pending) >= self.batch_size:
+                    self._flush(full_only=True)
+            futures[pmid] = fut
+
+        if self._pending and self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        # shield: a cancelled caller must not cancel a lookup others share
+        papers = await asyncio.gather(*(asyncio.shield(f) for f in futures.values()))
+        return dict(zip(futures, papers))
+
+    def _flush(self, full_only: bool = False):
+        if not full_only and self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending and (len(self._pending) >= self.batch_size or not full_only):
+            batch = {}
+            for pmid in list(self._pending)[:self.batch_size]:
+                batch[pmid] = self._inflight[pmid] = self._pending.pop(pmid)
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: Dict[str, asyncio.Future]):
+        self.stats['batches'] += 1
+        papers: Dict[str, Paper] = {}
+        try:
+            papers = await self._fetch_batch(list(batch))
+            self.stats['fetched'] += len(papers)
+        except asyncio.CancelledError:
+            for fut in batch.values():
+                fut.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"PubMed fetch failed ({len(batch)} PMIDs): {e}")
+        finally:
+            for pmid, fut in batch.items():
+                self._inflight.pop(pmid, None)
+                if not fut.done():
+                    fut.set_result(papers.get(pmid))
+
 
 class PubMedClient(AcademicSource):
     """
@@ -31,6 +167,8 @@ class PubMedClient(AcademicSource):
     - With API key: 10 requests/second
     """
 
+    cache_ttl = 6 * 3600  # esearch results grow daily; efetch records rarely change
+
     def __init__(
         self,
         api_key: Optional[str] = None,
@@ -51,6 +189,7 @@ class PubMedClient(AcademicSource):
         )
         self.api_key = api_key
         self.email = email
+        self._batcher = PMIDBatcher(self._efetch_batch)
 
     @property
     def source_type(self) -> SourceType:
@@ -216,26 +355,24 @@ class PubMedClient(AcademicSource):
             }
         )
 
-    async def _search_ids(
+    def _mesh_query(self, query: str, mesh_terms: Optional[List[str]]) -> str:
+        """Add MeSH term filters to a query."""
+        if not mesh_terms:
+            return query
+        mesh_query = ' AND '.join(f'{term}[MeSH Terms]' for term in mesh_terms)
+        return f'({query}) AND ({mesh_query})' if query else mesh_query
+
+    def _esearch_params(
         self,
         query: str,
-        limit: int = 100,
-        offset: int = 0,
         sort: str = "relevance",
         mindate: Optional[str] = None,
         maxdate: Optional[str] = None
-    ) -> List[str]:
-        """
-        Search for PMIDs matching a query.
-
-        Returns list of PMID strings.
-        """
+    ) -> Dict[str, Any]:
         params = {
             **self._base_params(),
             'db': 'pubmed',
             'term': query,
-            'retmax': min(limit, 10000),
-            'retstart': offset,
             'retmode': 'json',
             'sort': sort
         }
@@ -248,6 +385,28 @@ class PubMedClient(AcademicSource):
             params['maxdate'] = maxdate
             params['datetype'] = 'pdat'
 
+        return params
+
+    async def _search_ids(
+        self,
+        query: str,
+        limit: int = 100,
+        offset: int = 0,
+        sort: str = "relevance",
+        mindate: Optional[str] = None,
+        maxdate: Optional[str] = None
+    ) -> List[str]:
+        """
+        Search for PMIDs matching a query.
+
+        Returns list of PMID strings.
+        """
+        params = {
+            **self._esearch_params(query, sort, mindate, maxdate),
+            'retmax': min(limit, 10000),
+            'retstart': offset
+        }
+
         url = f"{self.base_url}/esearch.fcgi"
 
         try:
@@ -257,13 +416,38 @@ class PubMedClient(AcademicSource):
             logger.error(f"PubMed search failed: {e}")
             return []
 
-    async def _fetch_details(self, pmids: List[str]) -> List[Paper]:
+    async def _history_search(
+        self,
+        query: str,
+        sort: str = "relevance",
+        mindate: Optional[str] = None,
+        maxdate: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
-        Fetch paper details for a list of PMIDs.
+        Run a search on the history server (usehistory=y).
+
+        Returns {'webenv', 'query_key', 'count', 'retstart'}: the result set
+        stays on NCBI's side and is read back with efetch. Never cached,
+        a WebEnv only lives for the session.
         """
-        if not pmids:
-            return []
+        params = {
+            **self._esearch_params(query, sort, mindate, maxdate),
+            'usehistory': 'y',
+            'retmax': 0
+        }
+        body = await self._download(f"{self.base_url}/esearch.fcgi", params)
+        result = json.loads(body).get('esearchresult', {})
+        if 'webenv' not in result:
+            raise ValueError(f"esearch returned no WebEnv: {result.get('ERROR') or result}")
+        return {
+            'webenv': result['webenv'],
+            'query_key': result['querykey'],
+            'count': int(result.get('count', 0)),
+            'retstart': 0
+        }
 
+    async def _efetch_batch(self, pmids: List[str]) -> Dict[str, Paper]:
+        """One efetch by id (cached), parsed incrementally: {pmid: Paper}."""
         params = {
             **self._base_params(),
             'db': 'pubmed',
@@ -271,23 +455,95 @@ class PubMedClient(AcademicSource):
             'retmode': 'xml',
             'rettype': 'full'
         }
+        body = await self._fetch(f"{self.base_url}/efetch.fcgi", params)
+
+        parser = _ArticleParser()
+        papers = {}
+        for i in range(0, len(body), STREAM_CHUNK):
+            for article in parser.feed(body[i:i + STREAM_CHUNK]):
+                paper = self._parse_article(article)
+                papers[paper.raw_metadata['pmid']] = paper
+        for article in parser.close():
+            paper = self._parse_article(article)
+            papers[paper.raw_metadata['pmid']] = paper
+        return papers
 
-        url = f"{self.base_url}/efetch.fcgi"
-
-        try:
-            xml_response = await self._get_xml(url, params)
-            root = ET.fromstring(xml_response)
-
-            papers = []
-            for article in root.findall('.//PubmedArticle'):
-                papers.append(self._parse_article(article))
-
-            return papers
+    async def _efetch_stream(self, params: Dict[str, Any]) -> AsyncIterator[Paper]:
+        """Stream one efetch response through the incremental parser."""
+        await self.rate_limiter.acquire()
+        session = await self.get_session()
+        async with session.get(f"{self.base_url}/efetch.fcgi", params=params) as response:
+            response.raise_for_status()
+            parser = _ArticleParser()
+            async for chunk in response.content.iter_chunked(STREAM_CHUNK):
+                for article in parser.feed(chunk):
+                    yield self._parse_article(article)
+            for article in parser.close():
+                yield self._parse_article(article)
+
+    async def _efetch_history(
+        self,
+        history: Dict[str, Any],
+        start: int,
+        limit: int
+    ) -> AsyncIterator[Paper]:
+        """
+        Yield records [start, start + limit) of a history search, HISTORY_BATCH
+        per efetch. A transfer cut short is retried from the first record
+        not yet parsed; PMIDs already yielded are skipped.
+        """
+        end = min(history['count'], start + limit)
+        position = start
+        seen = set()
+
+        while position < end:
+            retmax = min(HISTORY_BATCH, end - position)
+            parsed = 0
+            for attempt in range(MAX_RETRIES + 1):
+                params = {
+                    **self._base_params(),
+                    'db': 'pubmed',
+                    'WebEnv': history['webenv'],
+                    'query_key': history['query_key'],
+                    'retstart': position + parsed,
+                    'retmax': retmax - parsed,
+                    'retmode': 'xml',
+                    'rettype': 'full'
+                }
+                try:
+                    async for paper in self._efetch_stream(params):
+                        parsed += 1
+                        if paper.external_id not in seen:
+                            seen.add(paper.external_id)
+                            yield paper
+                    break
+                except (aiohttp.ClientError, asyncio.TimeoutError, ET.ParseError) as e:
+                    if attempt < MAX_RETRIES and (is_retryable(e) or isinstance(e, ET.ParseError)):
+                        delay = retry_delay(attempt, e)
+                        logger.warning(f"PubMed efetch failed ({e}), retry {attempt + 1}/{MAX_RETRIES} "
+                                       f"in {delay:.1f}s at record {position + parsed}")
+                        await asyncio.sleep(delay)
+                        continue
+                    raise
+
+            if parsed == 0:
+                # expired WebEnv or empty range: NCBI answers 200 with an <ERROR>
+                logger.warning(f"PubMed history returned no records at {position}/{history['count']}")
+                return
+            position += retmax
 
-        except Exception as e:
-            logger.error(f"PubMed fetch failed: {e}")
+    async def _fetch_details(self, pmids: List[str]) -> List[Paper]:
+        """
+        Fetch paper details for a list of PMIDs (batched with concurrent
+        callers, in PMID order, unknown PMIDs dropped).
+        """
+        if not pmids:
             return []
 
+        pmids = list(dict.fromkeys(pmids))
+        found = await self._batcher.get(pmids)
+        return [found[pmid] for pmid in pmids if found[pmid] is not None]
+
     async def search(
         self,
         query: str,
@@ -320,13 +576,21 @@ class PubMedClient(AcademicSource):
             - "Nature[Journal]" - Journal search
             - "neuroscience[MeSH Terms]" - MeSH term search
         """
-        # Add MeSH terms to query if specified
-        if mesh_terms:
-            mesh_query = ' AND '.join(f'{term}[MeSH Terms]' for term in mesh_terms)
-            if query:
-                query = f'({query}) AND ({mesh_query})'
-            else:
-                query = mesh_query
+        query = self._mesh_query(query, mesh_terms)
+
+        # Large result sets stay on the history server
+        if limit > HISTORY_THRESHOLD and not self.offline:
+            papers = []
+            try:
+                history = await self._history_search(query, sort, from_date, to_date)
+                async for paper in self._efetch_history(history, offset, limit):
+                    papers.append(paper)
+                return papers
+            except Exception as e:
+                if papers:
+                    logger.error(f"PubMed history fetch failed after {len(papers)} papers: {e}")
+                    return papers
+                logger.warning(f"PubMed history search failed ({e}), falling back to PMID lists")
 
         # Search for IDs first
         pmids = await self._search_ids(
@@ -338,23 +602,40 @@ class PubMedClient(AcademicSource):
             maxdate=to_date
         )
 
-        if not pmids:
-            return []
+        return await self._fetch_details(pmids)
 
-        # Fetch details in batches of 200
-        papers = []
-        batch_size = 200
-
-        for i in range(0, len(pmids), batch_size):
-            batch = pmids[i:i + batch_size]
-            batch_papers = await self._fetch_details(batch)
-            papers.extend(batch_papers)
-
-            # Small delay between batches
-            if i + batch_size < len(pmids):
-                await asyncio.sleep(0.1)
-
-        return papers
+    async def _page(
+        self,
+        query: str,
+        limit: int,
+        cursor: Any = None,
+        mesh_terms: Optional[List[str]] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        sort: str = "relevance"
+    ) -> Tuple[List[Paper], Any]:
+        """
+        Stream page over the history server. The cursor is the history
+        handle plus the next record index; a resumed stream whose WebEnv
+        has expired searches again.
+        """
+        if self.offline or isinstance(cursor, int):
+            return await super()._page(query, limit, cursor, mesh_terms=mesh_terms,
+                                       from_date=from_date, to_date=to_date, sort=sort)
+
+        query = self._mesh_query(query, mesh_terms)
+        history = cursor or await self._history_search(query, sort, from_date, to_date)
+        start = history['retstart']
+        papers = [p async for p in self._efetch_history(history, start, limit)]
+
+        if not papers and cursor is not None and start < history['count']:
+            history = {**await self._history_search(query, sort, from_date, to_date), 'retstart': start}
+            papers = [p async for p in self._efetch_history(history, start, limit)]
+
+        next_start = start + limit
+        if not papers or next_start >= history['count']:
+            return papers, None
+        return papers, {**history, 'retstart': next_start}
 
     async def fetch(self, paper_id: str) -> Optional[Paper]:
         """
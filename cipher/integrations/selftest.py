@@ -0,0 +1,295 @@
+"""
+Self-check of the AcademicSource HTTP layer against a local aiohttp stub server
+(no network, no API quota):
+
+- response cache: hits, rate-limiter bypass, ETag revalidation, negative
+  caching, coalescing, offline replay
+- stream: ordering, prefetch throughput, Retry-After, checkpoint resume
+- PubMed batch engine: cross-caller efetch batching and dedup, history
+  server paging, bounded incremental parse, papers/s benchmark
+
+Usage (from cipher/):
+    python -m integrations.selftest
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+from .base import AcademicSource, SourceType, Paper
+from .cache import ResponseCache
+from .pubmed import PubMedClient, _ArticleParser, EFETCH_BATCH, HISTORY_BATCH
+
+PAGE_SIZE = 10
+PAGES = 10
+PAGE_LATENCY = 0.1      # server delay per page
+CONSUMER_WORK = 0.01    # consumer time per paper (0.1 s per page)
+
+PUBMED_COUNT = 1200     # records behind the stub WebEnv
+EFETCH_LATENCY = 0.05   # server delay per efetch
+
+
+class StubSource(AcademicSource):
+    """Cursor-paged source over the stub server."""
+
+    cache_ttl = 60
+
+    @property
+    def source_type(self):
+        return SourceType.OPENALEX
+
+    async def search(self, query, limit=100, offset=0, **kwargs):
+        return []
+
+    async def fetch(self, paper_id):
+        return None
+
+    async def _page(self, query, limit, cursor=None, **kwargs):
+        data = await self._get(f"{self.base_url}/pages", {'cursor': cursor or 0, 'q': query})
+        papers = [Paper(external_id=str(i), source_type=self.source_type, title=f"paper {i}")
+                  for i in data['results']]
+        return papers, data['next']
+
+
+def stub_app(hits):
+    async def works(request):
+        hits['works'] += 1
+        if request.headers.get('If-None-Match') == '"v1"':
+            hits['conditional'] += 1
+            return web.Response(status=304, headers={'ETag': '"v1"'})
+        return web.json_response({'results': [1, 2, 3], 'q': request.query.get('q')},
+                                 headers={'ETag': '"v1"'})
+
+    async def missing(request):
+        hits['missing'] += 1
+        return web.Response(status=404)
+
+    async def slow(request):
+        hits['slow'] += 1
+        await asyncio.sleep(0.2)
+        return web.Response(text="<feed/>", content_type='application/xml')
+
+    async def pages(request):
+        cursor = int(request.query['cursor'])
+        hits['pages'] += 1
+        if cursor == 2 * PAGE_SIZE and not hits['throttled']:
+            hits['throttled'] = True
+            return web.Response(status=429, headers={'Retry-After': '1'})
+        await asyncio.sleep(PAGE_LATENCY)
+        end = min(cursor + PAGE_SIZE, PAGE_SIZE * PAGES)
+        return web.json_response({'results': list(range(cursor, end)),
+                                  'next': end if end < PAGE_SIZE * PAGES else None},
+                                 headers={'Cache-Control': 'no-store'})
+
+    async def esearch(request):
+        hits['esearch'] += 1
+        return web.json_response({'esearchresult': {
+            'count': str(PUBMED_COUNT), 'retmax': '0', 'retstart': '0', 'idlist': [],
+            'querykey': '1', 'webenv': 'STUB_WEBENV'
+        }})
+
+    async def efetch(request):
+        query = request.query
+        if 'WebEnv' in query:
+            start = int(query['retstart'])
+            pmids = range(start + 1, min(start + int(query['retmax']), PUBMED_COUNT) + 1)
+            hits['efetch_history'].append(start)
+        else:
+            pmids = [int(pmid) for pmid in query['id'].split(',')]
+            hits['efetch_ids'].append(len(pmids))
+        await asyncio.sleep(EFETCH_LATENCY)
+        return web.Response(body=pubmed_xml(pmids), content_type='text/xml')
+
+    app = web.Application()
+    app.router.add_get('/works', works)
+    app.router.add_get('/missing', missing)
+    app.router.add_get('/slow', slow)
+    app.router.add_get('/pages', pages)
+    app.router.add_get('/esearch.fcgi', esearch)
+    app.router.add_get('/efetch.fcgi', efetch)
+    return app
+
+
+def pubmed_xml(pmids) -> bytes:
+    articles = ''.join(
+        f"<PubmedArticle><MedlineCitation><PMID>{pmid}</PMID><Article>"
+        f"<Journal><Title>Stub Journal</Title></Journal><ArticleTitle>paper {pmid}</ArticleTitle>"
+        f"<Abstract><AbstractText>{'stub abstract text ' * 40}</AbstractText></Abstract>"
+        f"</Article></MedlineCitation></PubmedArticle>"
+        for pmid in pmids
+    )
+    return f"<?xml version=\"1.0\"?><PubmedArticleSet>{articles}</PubmedArticleSet>".encode()
+
+
+async def check_cache(source, hits):
+    base = source.base_url
+    checks = []
+
+    first = await source._get(f"{base}/works", {'q': 'x', 'mailto': 'a@b'})
+    t0 = time.perf_counter()
+    second = await source._get(f"{base}/works", {'mailto': 'c@d', 'q': 'x'})
+    hit_time = time.perf_counter() - t0
+    checks.append(("identical request served from cache", first == second and hits['works'] == 1))
+    checks.append(("cache hit bypasses the rate limiter", hit_time < 0.5))
+
+    source.cache_ttl = 0
+    await source._get(f"{base}/works", {'q': 'y'})
+    await source._get(f"{base}/works", {'q': 'y'})
+    checks.append(("stale entry revalidated with ETag (304)", hits['conditional'] == 1))
+    source.cache_ttl = 60
+
+    status = None
+    for _ in range(2):
+        try:
+            await source._get(f"{base}/missing")
+        except Exception as e:
+            status = getattr(e, 'status', None)
+    checks.append(("404 cached negatively", hits['missing'] == 1 and status == 404))
+
+    texts = await asyncio.gather(*(source._get_xml(f"{base}/slow") for _ in range(5)))
+    checks.append(("concurrent identical fetches coalesced", hits['slow'] == 1 and len(set(texts)) == 1))
+
+    source.offline = True
+    before = dict(hits)
+    replay = await source._get(f"{base}/works", {'q': 'x'})
+    try:
+        await source._get(f"{base}/works", {'q': 'never-fetched'})
+        miss_raised = False
+    except Exception:
+        miss_raised = True
+    source.offline = False
+    checks.append(("offline replay, no network", replay == first and hits == before and miss_raised))
+    return checks
+
+
+async def check_stream(source, hits, tmp):
+    checks = []
+    total = PAGE_SIZE * PAGES
+
+    async def consume(agen, stop=None):
+        ids = []
+        async for paper in agen:
+            ids.append(int(paper.external_id))
+            await asyncio.sleep(CONSUMER_WORK)
+            if stop is not None and len(ids) >= stop:
+                break
+        await agen.aclose()
+        return ids
+
+    t0 = time.perf_counter()
+    ids = await consume(source.stream("q", max_results=total, batch_size=PAGE_SIZE))
+    elapsed = time.perf_counter() - t0
+    serial = PAGES * (PAGE_LATENCY + PAGE_SIZE * CONSUMER_WORK) + 1.0  # + Retry-After
+    checks.append(("stream yields every paper in order", ids == list(range(total))))
+    checks.append(("429 retried after Retry-After", hits['throttled'] and elapsed >= 1.0))
+    checks.append((f"prefetch overlaps fetch and work ({elapsed:.2f}s vs {serial:.2f}s serial)",
+                   elapsed < serial * 0.8))
+    print(f"  stream: {total / elapsed:.0f} papers/s, {PAGES / elapsed:.1f} pages/s")
+
+    checkpoint = Path(tmp) / "stream.json"
+    head = await consume(source.stream("q", max_results=total, batch_size=PAGE_SIZE,
+                                       checkpoint=checkpoint), stop=25)
+    saved = checkpoint.exists()
+    rest = await consume(source.stream("q", max_results=total, batch_size=PAGE_SIZE,
+                                       checkpoint=checkpoint))
+    checks.append(("checkpoint resumes mid-page without gaps or duplicates",
+                   saved and head + rest == list(range(total)) and not checkpoint.exists()))
+    return checks
+
+
+async def check_pubmed(client, hits, tmp):
+    checks = []
+
+    parser, peak, parsed = _ArticleParser(), 0, 0
+    body = pubmed_xml(range(1, PUBMED_COUNT + 1))
+    for i in range(0, len(body), 4096):
+        parsed += len(parser.feed(body[i:i + 4096]))
+        peak = max(peak, len(parser.root or []))
+    parsed += len(parser.close())
+    checks.append(("incremental parse keeps at most one article in the tree",
+                   parsed == PUBMED_COUNT and peak <= 1))
+
+    batch = [str(i) for i in range(1, EFETCH_BATCH + 51)]
+    results = await asyncio.gather(client.fetch("PMID:1"), client.fetch("2"), client.fetch("1"),
+                                   client._fetch_details(batch))
+    single = [p.external_id if p else None for p in results[:3]]
+    checks.append(("concurrent lookups merged into full efetch batches, duplicates fetched once",
+                   hits['efetch_ids'] == [EFETCH_BATCH, 50]
+                   and single == ["PMID:1", "PMID:2", "PMID:1"]
+                   and [p.external_id for p in results[3]] == [f"PMID:{i}" for i in batch]))
+
+    t0 = time.perf_counter()
+    papers = await client.search("stub", limit=PUBMED_COUNT)
+    elapsed = time.perf_counter() - t0
+    checks.append(("large search read from the history server in order",
+                   hits['esearch'] == 1
+                   and hits['efetch_history'] == list(range(0, PUBMED_COUNT, HISTORY_BATCH))
+                   and [p.external_id for p in papers] == [f"PMID:{i}" for i in range(1, PUBMED_COUNT + 1)]))
+    print(f"  pubmed history search: {len(papers) / elapsed:.0f} papers/s")
+
+    ids = [str(i) for i in range(1, 2 * EFETCH_BATCH + 1)]
+    client.cache.clear()
+    before = len(hits['efetch_ids'])
+    t0 = time.perf_counter()
+    fetched = await asyncio.gather(*(client.fetch(pmid) for pmid in ids))
+    elapsed = time.perf_counter() - t0
+    checks.append((f"{len(ids)} concurrent fetch() calls in {len(hits['efetch_ids']) - before} efetch requests",
+                   all(fetched) and len(hits['efetch_ids']) - before == 2))
+    print(f"  pubmed batched fetch: {len(ids) / elapsed:.0f} papers/s "
+          f"(unbatched floor {1 / EFETCH_LATENCY:.0f} papers/s per connection)")
+
+    checkpoint = Path(tmp) / "pubmed.json"
+    streamed = []
+    for stop in (450, None):
+        agen = client.stream("stub", max_results=700, batch_size=300, checkpoint=checkpoint)
+        async for paper in agen:
+            streamed.append(paper.external_id)
+            if len(streamed) == stop:
+                break
+        await agen.aclose()
+    checks.append(("stream pages the history server and resumes from its checkpoint",
+                   streamed == [f"PMID:{i}" for i in range(1, 701)] and not checkpoint.exists()))
+    print(f"  pubmed batcher: {client._batcher.stats}")
+    return checks
+
+
+async def main() -> bool:
+    hits = {'works': 0, 'missing': 0, 'slow': 0, 'conditional': 0, 'pages': 0, 'throttled': False,
+            'esearch': 0, 'efetch_ids': [], 'efetch_history': []}
+    runner = web.AppRunner(stub_app(hits))
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = StubSource(f"http://127.0.0.1:{port}", requests_per_second=1.0)
+        source.cache = ResponseCache(Path(tmp))
+        try:
+            checks = await check_cache(source, hits)
+            source.rate_limiter.rate = source.rate_limiter.tokens = 100.0
+            checks += await check_stream(source, hits, tmp)
+            print(f"  cache: {source.cache.cache_stats()}")
+
+            pubmed = PubMedClient(requests_per_second=100.0)
+            pubmed.base_url = source.base_url
+            pubmed.cache = ResponseCache(Path(tmp) / "pubmed")
+            try:
+                checks += await check_pubmed(pubmed, hits, tmp)
+            finally:
+                await pubmed.close()
+        finally:
+            await source.close()
+            await runner.cleanup()
+
+    for name, ok in checks:
+        print(f"  {'ok  ' if ok else 'FAIL'} {name}")
+    return all(ok for _, ok in checks)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
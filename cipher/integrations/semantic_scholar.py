@@ -8,7 +8,7 @@ about academic papers. Free tier available, API key for higher limits.
 
 import logging
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 
 from .base import AcademicSource, Paper, Author, SourceType
 
@@ -30,6 +30,8 @@ class SemanticScholarClient(AcademicSource):
     - With API key: 1000+ requests/5 minutes
     """
 
+    cache_ttl = 86400  # strict unauthenticated quota: cache aggressively
+
     def __init__(
         self,
         api_key: Optional[str] = None,
@@ -131,6 +133,35 @@ class SemanticScholarClient(AcademicSource):
             }
         )
 
+    def _search_params(
+        self,
+        query: str,
+        fields: List[str],
+        year: Optional[str] = None,
+        fields_of_study: Optional[List[str]] = None,
+        open_access_only: bool = False,
+        min_citation_count: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Query parameters shared by /paper/search and /paper/search/bulk."""
+        params = {
+            'query': query,
+            'fields': ','.join(fields)
+        }
+
+        if year:
+            params['year'] = year
+
+        if fields_of_study:
+            params['fieldsOfStudy'] = ','.join(fields_of_study)
+
+        if open_access_only:
+            params['openAccessPdf'] = ''
+
+        if min_citation_count is not None:
+            params['minCitationCount'] = min_citation_count
+
+        return params
+
     async def search(
         self,
         query: str,
@@ -164,24 +195,10 @@ class SemanticScholarClient(AcademicSource):
             'openAccessPdf', 'fieldsOfStudy', 'url', 'externalIds', 'tldr'
         ]
 
-        params = {
-            'query': query,
-            'limit': min(limit, 100),
-            'offset': offset,
-            'fields': ','.join(fields)
-        }
-
-        if year:
-            params['year'] = year
-
-        if fields_of_study:
-            params['fieldsOfStudy'] = ','.join(fields_of_study)
-
-        if open_access_only:
-            params['openAccessPdf'] = ''
-
-        if min_citation_count is not None:
-            params['minCitationCount'] = min_citation_count
+        params = self._search_params(query, fields, year, fields_of_study,
+                                     open_access_only, min_citation_count)
+        params['limit'] = min(limit, 100)
+        params['offset'] = offset
 
         url = f"{self.base_url}/paper/search"
 
@@ -194,6 +211,31 @@ class SemanticScholarClient(AcademicSource):
             logger.error(f"Semantic Scholar search failed: {e}")
             return []
 
+    async def _page(
+        self,
+        query: str,
+        limit: int,
+        cursor: Any = None,
+        **kwargs
+    ) -> Tuple[List[Paper], Any]:
+        """
+        Bulk search with continuation token: up to 1000 papers per call and
+        no offset ceiling. Pages are not trimmed to limit; stream() stops at max_results.
+        """
+        fields = [
+            'paperId', 'title', 'abstract', 'authors', 'year',
+            'publicationDate', 'venue', 'journal', 'citationCount',
+            'referenceCount', 'influentialCitationCount', 'isOpenAccess',
+            'openAccessPdf', 'fieldsOfStudy', 'url', 'externalIds'
+        ]
+        params = self._search_params(query, fields, **kwargs)
+        if cursor:
+            params['token'] = cursor
+
+        data = await self._get(f"{self.base_url}/paper/search/bulk", params)
+        papers = [self._parse_paper(p) for p in data.get('data', []) if p]
+        return papers, (data.get('token') if papers else None)
+
     async def fetch(self, paper_id: str) -> Optional[Paper]:
         """
         Fetch a single paper by ID.
@@ -26,6 +26,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 from config.settings import config
 from tools.cipher_brain import CipherBrain, Domain
 from tools.domain_learner import DomainLearner
+from tools.graph_engine import GraphEngine
 from tools.pattern_detector import PatternDetector
 from tools.senses_bridge import SensesBridge, sensory_learning_loop
 
@@ -263,6 +264,12 @@ async def run_daemon():
 
     bridge = SensesBridge()
 
+    # Knowledge graph kept current in memory and on disk (CLI graph commands
+    # then load the snapshot with only a small delta)
+    graph = GraphEngine(config.db.connection_string)
+    await graph.connect()
+    await graph.load_graph()
+
     # Mode change logging
     def on_mode_change(old_mode, new_mode):
         logger.info(f"[SENSES] Mode shift: {old_mode.value} -> {new_mode.value}")
@@ -280,6 +287,8 @@ async def run_daemon():
     signal.signal(signal.SIGINT, shutdown)
     signal.signal(signal.SIGTERM, shutdown)
 
+    graph_task = asyncio.create_task(graph.run_refresher())
+
     try:
         # Start both the watcher and learning loop
         watcher_task = asyncio.create_task(bridge.watch(interval=0.5))
@@ -298,6 +307,12 @@ async def run_daemon():
         logger.info("Daemon cancelled")
     finally:
         bridge.stop()
+        graph_task.cancel()
+        try:
+            await graph_task
+        except asyncio.CancelledError:
+            pass
+        await graph.close()
         await learner.close()
         await brain.close()
 
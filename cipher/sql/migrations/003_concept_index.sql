@@ -0,0 +1,195 @@
+-- ============================================================================
+-- CIPHER Migration: Concept-Domain Co-occurrence Index
+-- Version: 003
+-- Date: 2026-10-19
+-- Description: Incremental concept → {domain: count, sample claims} index,
+--              maintained by triggers on synthesis.claims, so bridge hunts
+--              read precomputed rows instead of re-tokenizing every claim
+-- ============================================================================
+
+-- (concept, domain) → number of claims + a few sample claim ids
+CREATE TABLE IF NOT EXISTS synthesis.concept_domains (
+    concept TEXT NOT NULL,
+    domain_id INTEGER NOT NULL,
+    claim_count INTEGER NOT NULL DEFAULT 0,
+    sample_claim_ids INTEGER[] NOT NULL DEFAULT '{}',   -- at most 5
+    PRIMARY KEY (concept, domain_id)
+);
+
+-- One row per concept: domain spread, kept in sync by the same triggers
+CREATE TABLE IF NOT EXISTS synthesis.concepts (
+    concept TEXT PRIMARY KEY,
+    n_domains INTEGER NOT NULL DEFAULT 0,
+    mentions INTEGER NOT NULL DEFAULT 0
+);
+
+-- Top-k multi-domain concepts = index scan, independent of corpus size
+CREATE INDEX IF NOT EXISTS idx_concepts_spread
+    ON synthesis.concepts(n_domains DESC, mentions DESC)
+    WHERE n_domains >= 2;
+
+-- Tokenizer: same rules as the former in-query tokenization
+-- (split on spaces, words longer than 5 chars, letters only, lowercased)
+CREATE OR REPLACE FUNCTION synthesis.concept_tokens(txt TEXT)
+RETURNS TEXT[] AS $$
+    SELECT COALESCE(array_agg(DISTINCT t ORDER BY t), '{}')
+    FROM (
+        SELECT LOWER(regexp_replace(word, '[^a-zA-Z]', '', 'g')) AS t
+        FROM unnest(string_to_array(txt, ' ')) AS word
+        WHERE length(word) > 5
+    ) w
+    WHERE length(t) >= 4
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION synthesis.concept_index_add(p_claim INTEGER, p_text TEXT, p_domains INTEGER[])
+RETURNS VOID AS $$
+DECLARE
+    pair RECORD;
+    inserted BOOLEAN;
+BEGIN
+    FOR pair IN
+        SELECT DISTINCT t AS concept, dm AS domain_id
+        FROM unnest(synthesis.concept_tokens(p_text)) t, unnest(p_domains) dm
+        WHERE dm IS NOT NULL
+        ORDER BY 1, 2  -- fixed lock order: no deadlocks between concurrent inserts
+    LOOP
+        INSERT INTO synthesis.concept_domains AS cd (concept, domain_id, claim_count, sample_claim_ids)
+        VALUES (pair.concept, pair.domain_id, 1, ARRAY[p_claim])
+        ON CONFLICT (concept, domain_id) DO UPDATE
+        SET claim_count = cd.claim_count + 1,
+            sample_claim_ids = CASE WHEN cardinality(cd.sample_claim_ids) < 5
+                                    THEN cd.sample_claim_ids || p_claim
+                                    ELSE cd.sample_claim_ids END
+        RETURNING (xmax = 0) INTO inserted;
+
+        INSERT INTO synthesis.concepts AS c (concept, n_domains, mentions)
+        VALUES (pair.concept, 1, 1)
+        ON CONFLICT (concept) DO UPDATE
+        SET n_domains = c.n_domains + CASE WHEN inserted THEN 1 ELSE 0 END,
+            mentions = c.mentions + 1;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION synthesis.concept_index_remove(p_claim INTEGER, p_text TEXT, p_domains INTEGER[])
+RETURNS VOID AS $$
+DECLARE
+    pair RECORD;
+    remaining INTEGER;
+BEGIN
+    FOR pair IN
+        SELECT DISTINCT t AS concept, dm AS domain_id
+        FROM unnest(synthesis.concept_tokens(p_text)) t, unnest(p_domains) dm
+        WHERE dm IS NOT NULL
+        ORDER BY 1, 2
+    LOOP
+        UPDATE synthesis.concept_domains
+        SET claim_count = claim_count - 1,
+            sample_claim_ids = array_remove(sample_claim_ids, p_claim)
+        WHERE concept = pair.concept AND domain_id = pair.domain_id
+        RETURNING claim_count INTO remaining;
+
+        CONTINUE WHEN NOT FOUND;
+
+        IF remaining <= 0 THEN
+            DELETE FROM synthesis.concept_domains
+            WHERE concept = pair.concept AND domain_id = pair.domain_id;
+        END IF;
+
+        UPDATE synthesis.concepts
+        SET n_domains = n_domains - CASE WHEN remaining <= 0 THEN 1 ELSE 0 END,
+            mentions = mentions - 1
+        WHERE concept = pair.concept;
+    END LOOP;
+
+    DELETE FROM synthesis.concepts
+    WHERE concept = ANY(synthesis.concept_tokens(p_text)) AND n_domains <= 0;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION synthesis.concept_index_trigger()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM synthesis.concept_index_remove(OLD.id, OLD.claim_text, OLD.domains);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM synthesis.concept_index_add(NEW.id, NEW.claim_text, NEW.domains);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_claims_concepts_insdel ON synthesis.claims;
+CREATE TRIGGER trg_claims_concepts_insdel
+    AFTER INSERT OR DELETE ON synthesis.claims
+    FOR EACH ROW EXECUTE FUNCTION synthesis.concept_index_trigger();
+
+DROP TRIGGER IF EXISTS trg_claims_concepts_upd ON synthesis.claims;
+CREATE TRIGGER trg_claims_concepts_upd
+    AFTER UPDATE OF claim_text, domains ON synthesis.claims
+    FOR EACH ROW
+    WHEN (OLD.claim_text IS DISTINCT FROM NEW.claim_text OR OLD.domains IS DISTINCT FROM NEW.domains)
+    EXECUTE FUNCTION synthesis.concept_index_trigger();
+
+-- Full rebuild (initial backfill, or repair), set-based
+CREATE OR REPLACE FUNCTION synthesis.rebuild_concept_index()
+RETURNS BIGINT AS $$
+DECLARE
+    total BIGINT;
+BEGIN
+    LOCK TABLE synthesis.claims IN SHARE MODE;  -- no inserts during the rebuild
+    TRUNCATE synthesis.concept_domains, synthesis.concepts;
+
+    INSERT INTO synthesis.concept_domains (concept, domain_id, claim_count, sample_claim_ids)
+    SELECT t, dm, COUNT(*), (array_agg(c.id ORDER BY c.id))[1:5]
+    FROM synthesis.claims c,
+         unnest(synthesis.concept_tokens(c.claim_text)) t,
+         unnest(ARRAY(SELECT DISTINCT x FROM unnest(c.domains) x WHERE x IS NOT NULL)) dm
+    GROUP BY t, dm;
+
+    INSERT INTO synthesis.concepts (concept, n_domains, mentions)
+    SELECT concept, COUNT(*), SUM(claim_count)
+    FROM synthesis.concept_domains
+    GROUP BY concept;
+
+    GET DIAGNOSTICS total = ROW_COUNT;
+    RETURN total;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT synthesis.rebuild_concept_index();
+
+-- Multi-domain concepts with their domains and sample claims.
+-- ORDER BY n_domains DESC, mentions DESC LIMIT k walks idx_concepts_spread:
+-- the sub-selects only run for the k rows returned.
+CREATE OR REPLACE VIEW synthesis.concept_bridges AS
+SELECT
+    c.concept,
+    c.n_domains,
+    c.mentions,
+    ARRAY(
+        SELECT d.name
+        FROM synthesis.concept_domains cd
+        JOIN synthesis.domains d ON d.id = cd.domain_id
+        WHERE cd.concept = c.concept
+        ORDER BY d.name
+    ) AS domains,
+    ARRAY(
+        SELECT DISTINCT s
+        FROM synthesis.concept_domains cd, unnest(cd.sample_claim_ids) s
+        WHERE cd.concept = c.concept
+        ORDER BY s
+        LIMIT 5
+    ) AS sample_claim_ids
+FROM synthesis.concepts c
+WHERE c.n_domains >= 2;
+
+-- Comments
+COMMENT ON TABLE synthesis.concept_domains IS 'Concept/domain co-occurrence counts, maintained by triggers on claims';
+COMMENT ON TABLE synthesis.concepts IS 'Per-concept domain spread (n_domains) for top-k bridge lookups';
+COMMENT ON VIEW synthesis.concept_bridges IS 'Concepts shared by 2+ domains, with sample claim ids';
+
+-- ============================================================================
+-- Migration complete
+-- ============================================================================
@@ -0,0 +1,59 @@
+-- ============================================================================
+-- CIPHER Migration: Claim Polarity Index
+-- Version: 004
+-- Date: 2026-10-19
+-- Description: (subject, predicate, polarity, object) tuples per claim and
+--              domain, filled at ingest by tools/claim_polarity.py, so
+--              contradiction hunts are indexed equi-joins instead of
+--              LIKE sweeps over synthesis.claims
+-- ============================================================================
+
+-- One row per tuple and domain of the claim.
+-- predicate = first word of an opposite pair ('increase' for increase/decrease),
+-- polarity = +1 for that word, -1 for its opposite or a negated form.
+CREATE TABLE IF NOT EXISTS synthesis.claim_polarity (
+    claim_id INTEGER NOT NULL REFERENCES synthesis.claims(id) ON DELETE CASCADE,
+    domain_id INTEGER NOT NULL,
+    subject TEXT NOT NULL,
+    predicate TEXT NOT NULL,
+    polarity SMALLINT NOT NULL CHECK (polarity IN (-1, 1)),
+    object TEXT NOT NULL,
+    PRIMARY KEY (claim_id, domain_id, subject, predicate, polarity, object)
+);
+
+-- Contradiction join: same (subject, object, domain, predicate), opposite polarity
+CREATE INDEX IF NOT EXISTS idx_claim_polarity_subject_object
+    ON synthesis.claim_polarity(subject, object, domain_id, predicate, polarity);
+
+-- Claims not indexed yet (inserted by other paths, or text changed)
+ALTER TABLE synthesis.claims ADD COLUMN IF NOT EXISTS polarity_indexed_at TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS idx_claims_polarity_pending
+    ON synthesis.claims(id)
+    WHERE polarity_indexed_at IS NULL;
+
+-- Text or domains changed: tuples are stale, back to the pending queue
+CREATE OR REPLACE FUNCTION synthesis.claim_polarity_reset()
+RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM synthesis.claim_polarity WHERE claim_id = NEW.id;
+    NEW.polarity_indexed_at := NULL;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_claims_polarity_reset ON synthesis.claims;
+CREATE TRIGGER trg_claims_polarity_reset
+    BEFORE UPDATE OF claim_text, domains ON synthesis.claims
+    FOR EACH ROW
+    WHEN (OLD.claim_text IS DISTINCT FROM NEW.claim_text OR OLD.domains IS DISTINCT FROM NEW.domains)
+    EXECUTE FUNCTION synthesis.claim_polarity_reset();
+
+-- Comments
+COMMENT ON TABLE synthesis.claim_polarity IS 'Claim (subject, predicate, polarity, object) tuples per domain, for contradiction joins';
+COMMENT ON COLUMN synthesis.claims.polarity_indexed_at IS 'When claim_polarity was filled for this claim (NULL = pending)';
+
+-- ============================================================================
+-- Migration complete
+-- Backfill: python3 tools/claim_polarity.py backfill
+-- ============================================================================
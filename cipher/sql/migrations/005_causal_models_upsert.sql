@@ -0,0 +1,71 @@
+-- ============================================================================
+-- CIPHER Migration: Incremental Causal Model Extraction
+-- Version: 005
+-- Date: 2026-10-19
+-- Description: Unique (cause, effect) on synthesis.causal_models so the
+--              understanding cycle can upsert relations set-based, plus a
+--              claim-id watermark so each cycle only reads new claims
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS synthesis.causal_models (
+    id SERIAL PRIMARY KEY,
+    cause TEXT NOT NULL,
+    effect TEXT NOT NULL,
+    mechanism TEXT,
+    domain_ids INTEGER[],
+    confidence FLOAT DEFAULT 0.5,
+    evidence_for INTEGER DEFAULT 1,
+    evidence_against INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Merge duplicate (cause, effect) rows into the oldest one
+WITH groups AS (
+    SELECT cause, effect, MIN(id) AS keep_id,
+           SUM(evidence_for) AS total_for,
+           SUM(evidence_against) AS total_against
+    FROM synthesis.causal_models
+    GROUP BY cause, effect
+    HAVING COUNT(*) > 1
+), doms AS (
+    SELECT c.cause, c.effect, array_agg(DISTINCT x ORDER BY x) AS domain_ids
+    FROM synthesis.causal_models c
+    JOIN groups g USING (cause, effect), unnest(c.domain_ids) x
+    GROUP BY c.cause, c.effect
+)
+UPDATE synthesis.causal_models m
+SET evidence_for = g.total_for,
+    evidence_against = g.total_against,
+    domain_ids = COALESCE(d.domain_ids, m.domain_ids)
+FROM groups g
+LEFT JOIN doms d USING (cause, effect)
+WHERE m.id = g.keep_id;
+
+DELETE FROM synthesis.causal_models m
+USING synthesis.causal_models k
+WHERE m.cause = k.cause AND m.effect = k.effect AND m.id > k.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_causal_models_cause_effect
+    ON synthesis.causal_models(cause, effect);
+
+-- Last claim id consumed by each incremental pipeline
+CREATE TABLE IF NOT EXISTS synthesis.pipeline_watermarks (
+    name TEXT PRIMARY KEY,
+    last_claim_id INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Existing causal models were rebuilt from every claim on each cycle:
+-- start after the current corpus instead of counting it once more
+INSERT INTO synthesis.pipeline_watermarks (name, last_claim_id)
+SELECT 'causal_models', COALESCE(MAX(id), 0) FROM synthesis.claims
+WHERE EXISTS (SELECT 1 FROM synthesis.causal_models)
+ON CONFLICT (name) DO NOTHING;
+
+-- Comments
+COMMENT ON TABLE synthesis.pipeline_watermarks IS 'Claim-id watermark per incremental pipeline (causal_models, ...)';
+
+-- ============================================================================
+-- Migration complete
+-- ============================================================================
@@ -0,0 +1,44 @@
+-- ============================================================================
+-- CIPHER Migration: Persisted Graph Communities
+-- Version: 006
+-- Date: 2026-10-19
+-- Description: Multi-level community partitions computed by
+--              tools/graph_communities.py, stamped with the graph version
+--              they were computed on, so GraphEngine reuses them while the
+--              graph is unchanged and warm-starts from them after ingest
+-- ============================================================================
+
+-- One row per detection run
+CREATE TABLE IF NOT EXISTS synthesis.graph_partitions (
+    id SERIAL PRIMARY KEY,
+    graph_version TEXT NOT NULL,
+    resolution FLOAT NOT NULL DEFAULT 1.0,
+    levels SMALLINT NOT NULL,
+    modularity FLOAT[] NOT NULL,
+    node_count INTEGER NOT NULL,
+    edge_count INTEGER NOT NULL,
+    changed_nodes INTEGER NOT NULL DEFAULT 0,
+    seconds FLOAT,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_graph_partitions_version
+    ON synthesis.graph_partitions(graph_version, resolution);
+
+-- community_ids[i] = community at level i (finest first);
+-- weighted_degree detects changed claims on the next warm start
+CREATE TABLE IF NOT EXISTS synthesis.graph_communities (
+    partition_id INTEGER NOT NULL REFERENCES synthesis.graph_partitions(id) ON DELETE CASCADE,
+    claim_id INTEGER NOT NULL,
+    community_ids INTEGER[] NOT NULL,
+    weighted_degree FLOAT NOT NULL,
+    PRIMARY KEY (partition_id, claim_id)
+);
+
+-- Comments
+COMMENT ON TABLE synthesis.graph_partitions IS 'Community detection runs, stamped with the graph content version';
+COMMENT ON TABLE synthesis.graph_communities IS 'Per-claim multi-level community membership of a partition';
+
+-- ============================================================================
+-- Migration complete
+-- ============================================================================
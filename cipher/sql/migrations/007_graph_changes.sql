@@ -0,0 +1,84 @@
+-- ============================================================================
+-- CIPHER Migration: Graph Change Tracking
+-- Version: 007
+-- Date: 2026-10-19
+-- Description: updated_at on claims and connections maintained by triggers,
+--              plus a deletion log, so tools/graph_snapshot.py can bring an
+--              on-disk graph snapshot up to date from the rows changed since
+--              its watermark instead of reloading the whole graph
+-- ============================================================================
+
+ALTER TABLE synthesis.connections ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT NOW();
+
+CREATE INDEX IF NOT EXISTS idx_claims_updated ON synthesis.claims(updated_at);
+CREATE INDEX IF NOT EXISTS idx_connections_updated ON synthesis.connections(updated_at);
+
+-- Bump updated_at when a column the graph reads changes
+-- (embedding backfills and other writes leave it alone)
+CREATE OR REPLACE FUNCTION synthesis.touch_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at := NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_claims_graph_touch ON synthesis.claims;
+CREATE TRIGGER trg_claims_graph_touch
+    BEFORE UPDATE OF claim_text, claim_type, domains, confidence ON synthesis.claims
+    FOR EACH ROW
+    WHEN (OLD.claim_text IS DISTINCT FROM NEW.claim_text
+          OR OLD.claim_type IS DISTINCT FROM NEW.claim_type
+          OR OLD.domains IS DISTINCT FROM NEW.domains
+          OR OLD.confidence IS DISTINCT FROM NEW.confidence)
+    EXECUTE FUNCTION synthesis.touch_updated_at();
+
+DROP TRIGGER IF EXISTS trg_connections_graph_touch ON synthesis.connections;
+CREATE TRIGGER trg_connections_graph_touch
+    BEFORE UPDATE OF source_claim_id, target_claim_id, connection_type, strength, cross_domain, reasoning
+    ON synthesis.connections
+    FOR EACH ROW EXECUTE FUNCTION synthesis.touch_updated_at();
+
+-- Deleted claim and connection ids (cascaded connection deletes included).
+-- Entries older than DELETION_RETENTION (7 days, tools/graph_snapshot.py) are
+-- purged by GraphEngine.run_refresher; older snapshots then reload in full.
+-- Without a running daemon, prune with:
+--   DELETE FROM synthesis.graph_deletions WHERE deleted_at < LOCALTIMESTAMP - INTERVAL '7 days';
+CREATE TABLE IF NOT EXISTS synthesis.graph_deletions (
+    id BIGSERIAL PRIMARY KEY,
+    table_name VARCHAR(20) NOT NULL,            -- claims, connections
+    row_id INTEGER NOT NULL,
+    deleted_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_graph_deletions_time ON synthesis.graph_deletions(deleted_at);
+
+-- Statement-level: one insert per DELETE statement, however many rows
+CREATE OR REPLACE FUNCTION synthesis.log_graph_deletions()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO synthesis.graph_deletions (table_name, row_id)
+    SELECT TG_TABLE_NAME, id FROM old_rows;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_claims_graph_delete ON synthesis.claims;
+CREATE TRIGGER trg_claims_graph_delete
+    AFTER DELETE ON synthesis.claims
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION synthesis.log_graph_deletions();
+
+DROP TRIGGER IF EXISTS trg_connections_graph_delete ON synthesis.connections;
+CREATE TRIGGER trg_connections_graph_delete
+    AFTER DELETE ON synthesis.connections
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION synthesis.log_graph_deletions();
+
+-- Comments
+COMMENT ON TABLE synthesis.graph_deletions IS 'Deleted claim/connection ids, read by graph snapshot delta loads; kept 7 days';
+COMMENT ON FUNCTION synthesis.touch_updated_at IS 'Sets updated_at on graph-relevant updates';
+
+-- ============================================================================
+-- Migration complete
+-- ============================================================================
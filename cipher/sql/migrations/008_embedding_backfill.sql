@@ -0,0 +1,18 @@
+-- ============================================================================
+-- CIPHER Migration: Embedding Backfill Index
+-- Version: 008
+-- Date: 2026-10-19
+-- Description: Partial index over claims still missing an embedding, so the
+--              keyset pages of CipherBrain.backfill_embeddings
+--              (WHERE embedding IS NULL AND id > $1 ORDER BY id LIMIT n) and
+--              its pending count only visit those claims. Checkpoints use
+--              synthesis.pipeline_watermarks (migration 005), name 'embeddings'
+-- ============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_claims_embedding_pending
+    ON synthesis.claims(id)
+    WHERE embedding IS NULL;
+
+-- ============================================================================
+-- Migration complete
+-- ============================================================================
@@ -28,6 +28,13 @@ from .nlp_extractor import (
     ScientificEntity,
     ExtractedClaim
 )
+from .claim_polarity import (
+    OPPOSITES,
+    extract_polarities,
+    index_claim as index_claim_polarity,
+    index_pending as index_pending_polarity,
+    find_contradictions
+)
 from .temporal_tracker import (
     TemporalTracker,
     get_temporal_tracker,
@@ -117,6 +124,13 @@ __all__ = [
     'ScientificEntity',
     'ExtractedClaim',
 
+    # Claim Polarity
+    'OPPOSITES',
+    'extract_polarities',
+    'index_claim_polarity',
+    'index_pending_polarity',
+    'find_contradictions',
+
     # Temporal Tracking
     'TemporalTracker',
     'get_temporal_tracker',
@@ -17,15 +17,17 @@ Principles:
 import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
+from typing import Optional, List, Dict, Any, AsyncIterator, Callable, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 import json
 import re
+import time
 
 import asyncpg
 
 from .hash_learning import HashLearning, EntropyScore
+from .claim_polarity import has_polarity_index, index_claim as index_claim_polarity
 from .embeddings import EmbeddingService, get_embedding_service
 from .nlp_extractor import (
     NLPExtractor, get_nlp_extractor,
@@ -38,6 +40,11 @@ from .nlp_extractor import (
 
 logger = logging.getLogger(__name__)
 
+# Embedding backfill
+EMBED_WATERMARK = 'embeddings'  # synthesis.pipeline_watermarks (migration 005)
+EMBED_QUEUE_DEPTH = 2           # batches buffered between reader, encoder and writer
+EMBED_PROGRESS_SECONDS = 5.0
+
 # Stopwords to filter from pattern detection
 STOPWORDS = frozenset({
     # Articles & determiners
@@ -196,6 +203,9 @@ class CipherBrain:
                 logger.warning(f"NLP extractor not available: {e}. Falling back to regex.")
                 self._use_nlp = False
 
+        # Claim polarity index available? (checked on first save)
+        self._polarity_index: Optional[bool] = None
+
         # Learning state
         self.session_id: Optional[str] = None
         self.thoughts: List[Thought] = []
@@ -1020,6 +1030,15 @@ class CipherBrain:
                 claim.entropy_hash,
                 embedding_str
             )
+
+            # Polarity tuples for contradiction joins (migration 004)
+            if self._polarity_index is None:
+                self._polarity_index = await has_polarity_index(conn)
+            if self._polarity_index:
+                await index_claim_polarity(
+                    conn, result['id'], claim.text,
+                    [d.value for d in claim.domains], claim.causal_relations
+                )
             return result['id']
 
     async def _save_connection(self, conn: Connection):
@@ -1310,59 +1329,171 @@ class CipherBrain:
         Returns:
             Number of claims updated
         """
-        total_updated = 0
+        stats = await self.backfill_embeddings(batch_size=batch_size, limit=limit)
+        return stats['claims']
 
-        async with self.pool.acquire() as conn:
-            # Count claims without embeddings
-            count = await conn.fetchval('''
-                SELECT COUNT(*) FROM synthesis.claims
-                WHERE embedding IS NULL
-            ''')
-            logger.info(f"Found {count} claims without embeddings")
+    async def backfill_embeddings(
+        self,
+        batch_size: int = 100,
+        limit: int = None,
+        resume: bool = True,
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Backfill embeddings for claims without one, as a three-stage pipeline
+        joined by bounded queues so the database and the encoder work at the
+        same time:
+        - reader: keyset pages (id > last id) of claims with embedding IS NULL
+        - encoder: batch encode (the model runs in the executor)
+        - writer: COPY into a staging table, one UPDATE ... FROM and the
+          checkpoint, in one transaction per batch
+
+        The checkpoint (pipeline_watermarks 'embeddings') lets an interrupted
+        run resume after the last written claim; a run that reaches the end
+        resets it, so claims skipped by a failed batch are retried next time.
 
-            if limit:
-                count = min(count, limit)
+        Args:
+            batch_size: Claims per page / encode batch / write
+            limit: Maximum claims to process (None = all)
+            resume: Start after the checkpoint instead of the first claim
+            progress: Called with the running stats after each write
 
-        offset = 0
-        while offset < count:
-            async with self.pool.acquire() as conn:
-                # Fetch batch
-                rows = await conn.fetch('''
-                    SELECT id, claim_text
-                    FROM synthesis.claims
-                    WHERE embedding IS NULL
-                    ORDER BY id
-                    LIMIT $1 OFFSET $2
-                ''', batch_size, offset)
-
-                if not rows:
+        Returns:
+            Stats: claims, batches, failed, pending, resumed_from, seconds,
+            claims_per_s and per-stage busy time (fetch_s, encode_s, write_s)
+        """
+        stats = {'claims': 0, 'batches': 0, 'failed': 0, 'pending': 0, 'resumed_from': 0,
+                 'fetch_s': 0.0, 'encode_s': 0.0, 'write_s': 0.0, 'seconds': 0.0, 'claims_per_s': 0}
+        started = time.perf_counter()
+
+        async with self.pool.acquire() as conn:
+            checkpoints = await conn.fetchval(
+                "SELECT to_regclass('synthesis.pipeline_watermarks') IS NOT NULL"
+            )
+            if checkpoints and resume:
+                stats['resumed_from'] = await conn.fetchval(
+                    "SELECT last_claim_id FROM synthesis.pipeline_watermarks WHERE name = $1", EMBED_WATERMARK
+                ) or 0
+            stats['pending'] = await conn.fetchval(
+                "SELECT COUNT(*) FROM synthesis.claims WHERE embedding IS NULL AND id > $1",
+                stats['resumed_from']
+            )
+        if limit:
+            stats['pending'] = min(stats['pending'], limit)
+        logger.info(f"Found {stats['pending']} claims without embeddings"
+                    + (f" after claim {stats['resumed_from']}" if stats['resumed_from'] else ""))
+
+        pages: asyncio.Queue = asyncio.Queue(EMBED_QUEUE_DEPTH)
+        encoded: asyncio.Queue = asyncio.Queue(EMBED_QUEUE_DEPTH)
+        exhausted = False
+
+        async def read():
+            nonlocal exhausted
+            last_id, remaining = stats['resumed_from'], limit
+            while remaining is None or remaining > 0:
+                size = batch_size if remaining is None else min(batch_size, remaining)
+                t0 = time.perf_counter()
+                async with self.pool.acquire() as conn:
+                    rows = await conn.fetch("""
+                        SELECT id, claim_text
+                        FROM synthesis.claims
+                        WHERE embedding IS NULL AND id > $1
+                        ORDER BY id
+                        LIMIT $2
+                    """, last_id, size)
+                stats['fetch_s'] += time.perf_counter() - t0
+                if rows:
+                    await pages.put(rows)
+                    last_id = rows[-1]['id']
+                    if remaining is not None:
+                        remaining -= len(rows)
+                if len(rows) < size:
+                    exhausted = True
                     break
+            await pages.put(None)
 
-                # Generate embeddings
-                texts = [row['claim_text'] for row in rows]
+        async def encode():
+            while (rows := await pages.get()) is not None:
+                t0 = time.perf_counter()
                 try:
-                    embedding_results = await self.embedding_service.embed_batch(
-                        texts, show_progress=True
+                    results = await self.embedding_service.embed_batch(
+                        [row['claim_text'] for row in rows], cache=False
                     )
-
-                    # Update database
-                    for row, emb_result in zip(rows, embedding_results):
-                        embedding_str = '[' + ','.join(str(x) for x in emb_result.vector) + ']'
-                        await conn.execute('''
-                            UPDATE synthesis.claims
-                            SET embedding = $1::vector
-                            WHERE id = $2
-                        ''', embedding_str, row['id'])
-
-                    total_updated += len(rows)
-                    logger.info(f"Updated {total_updated}/{count} claims with embeddings")
-
+                    vectors = ['[' + ','.join(str(x) for x in r.vector) + ']' for r in results]
                 except Exception as e:
-                    logger.error(f"Error embedding batch at offset {offset}: {e}")
-
-            offset += batch_size
+                    logger.error(f"Error embedding claims {rows[0]['id']}-{rows[-1]['id']}: {e}")
+                    stats['failed'] += len(rows)
+                    vectors = None
+                stats['encode_s'] += time.perf_counter() - t0
+                await encoded.put((rows, vectors))
+            await encoded.put(None)
+
+        async def write():
+            reported = time.perf_counter()
+            async with self.pool.acquire() as conn:
+                while (item := await encoded.get()) is not None:
+                    rows, vectors = item
+                    t0 = time.perf_counter()
+                    async with conn.transaction():
+                        if vectors:
+                            await conn.execute("""
+                                CREATE TEMP TABLE embedding_staging (id INTEGER, embedding TEXT) ON COMMIT DROP
+                            """)
+                            await conn.copy_records_to_table(
+                                'embedding_staging',
+                                records=[(row['id'], vector) for row, vector in zip(rows, vectors)],
+                                columns=['id', 'embedding']
+                            )
+                            await conn.execute("""
+                                UPDATE synthesis.claims c
+                                SET embedding = s.embedding::vector
+                                FROM embedding_staging s
+                                WHERE c.id = s.id
+                            """)
+                        if checkpoints:
+                            await self._set_embedding_checkpoint(conn, rows[-1]['id'])
+                    stats['write_s'] += time.perf_counter() - t0
+                    if vectors:
+                        stats['claims'] += len(rows)
+                    stats['batches'] += 1
+
+                    now = time.perf_counter()
+                    stats['seconds'] = round(now - started, 3)
+                    stats['claims_per_s'] = round(stats['claims'] / (now - started)) if now > started else 0
+                    if progress:
+                        progress(stats)
+                    if now - reported >= EMBED_PROGRESS_SECONDS:
+                        reported = now
+                        logger.info(f"Embedded {stats['claims']}/{stats['pending']} claims "
+                                    f"({stats['claims_per_s']} claims/s)")
+
+        tasks = [asyncio.create_task(stage()) for stage in (read, encode, write)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
 
-        return total_updated
+        if exhausted and checkpoints:
+            async with self.pool.acquire() as conn:
+                await self._set_embedding_checkpoint(conn, 0)
+
+        elapsed = time.perf_counter() - started
+        stats['seconds'] = round(elapsed, 3)
+        stats['claims_per_s'] = round(stats['claims'] / elapsed) if elapsed > 0 else 0
+        for stage in ('fetch_s', 'encode_s', 'write_s'):
+            stats[stage] = round(stats[stage], 3)
+        logger.info(f"Embedding backfill: {stats['claims']} claims in {stats['seconds']}s "
+                    f"({stats['claims_per_s']} claims/s, {stats['failed']} failed)")
+        return stats
+
+    async def _set_embedding_checkpoint(self, conn, claim_id: int):
+        await conn.execute("""
+            INSERT INTO synthesis.pipeline_watermarks (name, last_claim_id)
+            VALUES ($1, $2)
+            ON CONFLICT (name) DO UPDATE
+            SET last_claim_id = EXCLUDED.last_claim_id, updated_at = NOW()
+        """, EMBED_WATERMARK, claim_id)
 
     async def find_cross_domain_by_embedding(
         self,
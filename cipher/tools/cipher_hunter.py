@@ -10,13 +10,61 @@ Je chasse LA connexion.
 import asyncio
 import asyncpg
 import math
+import numpy as np
 from datetime import datetime
 from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass
 from pathlib import Path
 
+try:
+    from tools.claim_polarity import OPPOSITES, has_polarity_index, index_pending, find_contradictions
+except ImportError:  # lancé depuis tools/
+    from claim_polarity import OPPOSITES, has_polarity_index, index_pending, find_contradictions
+
 MIND_PATH = Path("/opt/cipher/mind")
 
+BRIDGE_CANDIDATES = 100  # Concepts multi-domaines lus par chasse
+CONTRADICTION_CANDIDATES = 10  # (sujet, prédicat, objet, domaine) de polarités opposées
+
+# Index concept → domaines (sql/migrations/003_concept_index.sql)
+BRIDGES_FROM_INDEX = """
+    SELECT b.concept, b.domains,
+           ARRAY(SELECT c.claim_text FROM synthesis.claims c
+                 WHERE c.id = ANY(b.sample_claim_ids) ORDER BY c.id) AS sample_claims
+    FROM synthesis.concept_bridges b
+    ORDER BY b.n_domains DESC, b.mentions DESC
+    LIMIT $1
+"""
+
+# Ancien calcul complet (base sans la migration 003): re-tokenise tout le corpus
+BRIDGES_FULL_SCAN = """
+    WITH claim_domains AS (
+        SELECT
+            c.id,
+            c.claim_text,
+            d.name as domain_name
+        FROM synthesis.claims c
+        JOIN synthesis.domains d ON d.id = ANY(c.domains)
+        WHERE c.claim_text IS NOT NULL
+    ),
+    shared_concepts AS (
+        SELECT
+            LOWER(regexp_replace(word, '[^a-zA-Z]', '', 'g')) as concept,
+            array_agg(DISTINCT domain_name) as domains,
+            array_agg(DISTINCT claim_text) as claims
+        FROM claim_domains,
+             unnest(string_to_array(claim_text, ' ')) as word
+        WHERE length(word) > 5
+        GROUP BY LOWER(regexp_replace(word, '[^a-zA-Z]', '', 'g'))
+        HAVING COUNT(DISTINCT domain_name) >= 2
+    )
+    SELECT concept, domains, claims[1:5] as sample_claims
+    FROM shared_concepts
+    WHERE array_length(domains, 1) >= 2
+    ORDER BY array_length(domains, 1) DESC
+    LIMIT $1
+"""
+
 
 @dataclass
 class Lead:
@@ -83,6 +131,8 @@ class CipherHunter:
         self.conn = None
         self.leads: List[Lead] = []
         self.hunt_count = 0
+        self.has_concept_index: Optional[bool] = None
+        self.has_polarity_index: Optional[bool] = None
 
     async def connect(self):
         self.conn = await asyncpg.connect(self.db_url)
@@ -96,6 +146,33 @@ class CipherHunter:
         key = tuple(sorted([d1.lower(), d2.lower()]))
         return self.DOMAIN_DISTANCES.get(key, 0.5)
 
+    def domain_distance_matrix(self, names: List[str]) -> np.ndarray:
+        """Matrice symétrique des distances entre `names` (diagonale nulle)."""
+        n = len(names)
+        matrix = np.zeros((n, n))
+        for i in range(n):
+            for j in range(i + 1, n):
+                matrix[i, j] = matrix[j, i] = self.get_domain_distance(names[i], names[j])
+        return matrix
+
+    def improbabilities(self, domain_lists: List[List[str]]) -> np.ndarray:
+        """
+        Distance moyenne entre paires de domaines, pour toutes les pistes d'un coup:
+        appartenance M (pistes × domaines), somme des paires = ½·diag(M D Mᵀ).
+        """
+        names = sorted({d for domains in domain_lists for d in domains})
+        if not names:
+            return np.zeros(len(domain_lists))
+        index = {name: i for i, name in enumerate(names)}
+        membership = np.zeros((len(domain_lists), len(names)))
+        for row, domains in enumerate(domain_lists):
+            membership[row, [index[d] for d in set(domains)]] = 1.0
+
+        pair_sums = ((membership @ self.domain_distance_matrix(names)) * membership).sum(axis=1) / 2
+        k = membership.sum(axis=1)
+        pairs = k * (k - 1) / 2
+        return np.divide(pair_sums, pairs, out=np.zeros_like(pair_sums), where=pairs > 0)
+
     def assess_medical_impact(self, text: str) -> float:
         """Est-ce que ça pourrait aider des malades ?"""
         text_lower = text.lower()
@@ -117,53 +194,23 @@ class CipherHunter:
 
         leads = []
 
-        # Trouver les claims qui apparaissent dans des domaines éloignés
-        query = """
-            WITH claim_domains AS (
-                SELECT
-                    c.id,
-                    c.claim_text,
-                    d.name as domain_name
-                FROM synthesis.claims c
-                JOIN synthesis.domains d ON d.id = ANY(c.domains)
-                WHERE c.claim_text IS NOT NULL
-            ),
-            shared_concepts AS (
-                SELECT
-                    LOWER(regexp_replace(word, '[^a-zA-Z]', '', 'g')) as concept,
-                    array_agg(DISTINCT domain_name) as domains,
-                    array_agg(DISTINCT claim_text) as claims
-                FROM claim_domains,
-                     unnest(string_to_array(claim_text, ' ')) as word
-                WHERE length(word) > 5
-                GROUP BY LOWER(regexp_replace(word, '[^a-zA-Z]', '', 'g'))
-                HAVING COUNT(DISTINCT domain_name) >= 2
+        # Concepts partagés par des domaines éloignés: lus dans l'index
+        # concept → domaines tenu à jour à l'insertion des claims
+        if self.has_concept_index is None:
+            self.has_concept_index = await self.conn.fetchval(
+                "SELECT to_regclass('synthesis.concept_bridges') IS NOT NULL"
             )
-            SELECT concept, domains, claims[1:5] as sample_claims
-            FROM shared_concepts
-            WHERE array_length(domains, 1) >= 2
-            ORDER BY array_length(domains, 1) DESC
-            LIMIT 100
-        """
+        query = BRIDGES_FROM_INDEX if self.has_concept_index else BRIDGES_FULL_SCAN
+        rows = [r for r in await self.conn.fetch(query, BRIDGE_CANDIDATES) if len(r['concept']) >= 4]
 
-        rows = await self.conn.fetch(query)
+        # Improbabilité = distance moyenne entre domaines, vectorisée
+        improbabilities = self.improbabilities([list(r['domains']) for r in rows])
 
-        for row in rows:
+        for row, improbability in zip(rows, improbabilities):
             concept = row['concept']
             domains = row['domains']
             sample_claims = row['sample_claims']
-
-            if len(concept) < 4:
-                continue
-
-            # Calculer l'improbabilité (distance moyenne entre domaines)
-            improbability = 0
-            count = 0
-            for i, d1 in enumerate(domains):
-                for d2 in domains[i+1:]:
-                    improbability += self.get_domain_distance(d1, d2)
-                    count += 1
-            improbability = improbability / count if count > 0 else 0
+            improbability = float(improbability)
 
             # Évaluer l'impact médical potentiel
             all_text = ' '.join(sample_claims or [])
@@ -237,17 +284,35 @@ class CipherHunter:
         """
         print("\n⚔️ HUNTING: Contradictions (hidden truths)...")
 
+        if self.has_polarity_index is None:
+            self.has_polarity_index = await has_polarity_index(self.conn)
+        if not self.has_polarity_index:
+            return await self._contradictions_full_scan()
+
+        # Claims insérés hors cipher_brain (core, philosophie): rattrapage
+        await index_pending(self.conn)
+
         leads = []
+        for row in await find_contradictions(self.conn, limit=CONTRADICTION_CANDIDATES):
+            lead = Lead(
+                description=(f"Potential contradiction: {row['subject']} ⇄ {row['object']} "
+                             f"('{row['predicate']}' {row['n_pos']} vs {row['n_neg']} claims) in {row['domain']}"),
+                domains=[row['domain']],
+                improbability=0.8,
+                potential_impact=0.7,
+                novelty=0.7,
+                evidence=[row['pos_text'], row['neg_text']]
+            )
+            leads.append(lead)
 
-        # Chercher des claims avec des mots opposés
-        opposites = [
-            ('increase', 'decrease'), ('enhance', 'inhibit'),
-            ('cause', 'prevent'), ('promote', 'suppress'),
-            ('activate', 'deactivate'), ('positive', 'negative'),
-            ('beneficial', 'harmful'), ('protect', 'damage')
-        ]
+        return leads
 
-        for word1, word2 in opposites:
+    async def _contradictions_full_scan(self) -> List[Lead]:
+        """Ancienne chasse par LIKE (base sans la migration 004)."""
+        leads = []
+
+        # Chercher des claims avec des mots opposés
+        for word1, word2 in OPPOSITES:
             rows1 = await self.conn.fetch("""
                 SELECT c.claim_text, d.name as domain
                 FROM synthesis.claims c
@@ -210,7 +210,8 @@ class EmbeddingService:
     async def embed_batch(
         self,
         texts: List[str],
-        show_progress: bool = False
+        show_progress: bool = False,
+        cache: bool = True
     ) -> List[EmbeddingResult]:
         """
         Embed multiple texts efficiently.
@@ -218,12 +219,14 @@ class EmbeddingService:
         Args:
             texts: List of texts to embed
             show_progress: Whether to log progress
+            cache: Use the in-memory cache (off for one-pass bulk backfills)
 
         Returns:
             List of EmbeddingResults
         """
         if not texts:
             return []
+        use_cache = self.cache_enabled and cache
 
         # Separate cached and uncached
         results = [None] * len(texts)
@@ -238,7 +241,7 @@ class EmbeddingService:
                     model=self.model_name,
                     dimensions=self.dimensions
                 )
-            elif self.cache_enabled:
+            elif use_cache:
                 cache_key = self._cache_key(text)
                 if cache_key in self._cache:
                     results[i] = EmbeddingResult(
@@ -263,7 +266,7 @@ class EmbeddingService:
 
             for idx, text, vector in zip(uncached_indices, uncached_texts, vectors):
                 # Cache
-                if self.cache_enabled:
+                if use_cache:
                     self._cache[self._cache_key(text)] = vector
 
                 results[idx] = EmbeddingResult(
@@ -0,0 +1,507 @@
+"""
+CIPHER Graph Communities
+Louvain/Leiden community detection on the CSR snapshot.
+
+All per-node work is vectorized over edge arrays:
+1. Local moving: every active node evaluates all neighbouring communities
+   at once (modularity gains aggregated with sort + bincount), a random
+   half of the improving nodes moves per round
+2. Leiden refinement: communities are split into well-connected,
+   connected sub-communities before aggregation
+3. Aggregation into a weighted community graph, repeated per level
+   (multi-level output)
+4. Warm start from a previous partition: only nodes whose weighted degree
+   changed (and their neighbours) are moved, only their communities refined
+
+Benchmark and checks on a synthetic planted-partition graph:
+    python tools/graph_communities.py [nodes] [communities]
+"""
+
+import logging
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .graph_csr import CSRGraph
+except ImportError:  # run from tools/
+    from graph_csr import CSRGraph
+
+logger = logging.getLogger(__name__)
+
+MOVE_FRACTION = 0.5     # share of improving nodes moved per round (avoids swap oscillation)
+MIN_GAIN = 1e-12        # a move must improve modularity by more than this
+MAX_LEVELS = 10
+MAX_ROUNDS = 50         # local-moving rounds per level (stops earlier once nothing improves)
+DEGREE_TOLERANCE = 1e-6  # weighted degree change that marks a node as changed
+
+
+@dataclass
+class WeightedGraph:
+    """Symmetric weighted adjacency (CSR), self-loops allowed."""
+    n: int
+    indptr: np.ndarray
+    indices: np.ndarray
+    weights: np.ndarray
+
+    @property
+    def src(self) -> np.ndarray:
+        return np.repeat(np.arange(self.n), np.diff(self.indptr))
+
+    @property
+    def degree(self) -> np.ndarray:
+        return np.bincount(self.src, weights=self.weights, minlength=self.n)
+
+
+@dataclass
+class Partition:
+    """
+    Multi-level community assignment of a graph version.
+    levels[i][p] = community of node position p at level i (finest first).
+    """
+    graph_version: str
+    claim_ids: np.ndarray
+    degrees: np.ndarray
+    levels: List[np.ndarray]
+    modularity: List[float]
+    resolution: float = 1.0
+    changed_nodes: int = 0
+    seconds: float = 0.0
+    stats: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def labels(self) -> np.ndarray:
+        return self.levels[-1]
+
+
+def _coalesce(n: int, rows: np.ndarray, cols: np.ndarray, weights: np.ndarray) -> WeightedGraph:
+    """Sum duplicate (row, col) entries into a CSR graph."""
+    key = rows.astype(np.int64) * n + cols
+    key, inverse = np.unique(key, return_inverse=True)
+    summed = np.bincount(inverse, weights=weights)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(key // n, minlength=n), out=indptr[1:])
+    return WeightedGraph(n, indptr, (key % n).astype(np.int64), summed)
+
+
+def undirected(graph: CSRGraph) -> WeightedGraph:
+    """A_ij = A_ji = total strength of the connections between i and j."""
+    src = graph.edge_src.astype(np.int64)
+    dst = graph.indices.astype(np.int64)
+    weight = graph.strength.astype(np.float64)
+    return _coalesce(graph.n, np.concatenate([src, dst]), np.concatenate([dst, src]),
+                     np.concatenate([weight, weight]))
+
+
+def _relabel(labels: np.ndarray) -> np.ndarray:
+    """Compact labels to 0..c-1 in order of first appearance."""
+    _, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+    rank = np.empty(len(first), dtype=np.int64)
+    rank[np.argsort(first, kind='stable')] = np.arange(len(first))
+    return rank[inverse]
+
+
+def modularity(g: WeightedGraph, labels: np.ndarray, resolution: float = 1.0) -> float:
+    two_m = g.weights.sum()
+    if two_m == 0:
+        return 0.0
+    src = g.src
+    inside = labels[src] == labels[g.indices]
+    internal = np.bincount(labels[src][inside], weights=g.weights[inside], minlength=labels.max() + 1)
+    total = np.bincount(labels, weights=g.degree, minlength=labels.max() + 1)
+    return float(internal.sum() / two_m - resolution * ((total / two_m) ** 2).sum())
+
+
+def _neighbours(g: WeightedGraph, nodes: np.ndarray) -> np.ndarray:
+    if nodes.size == 0:
+        return nodes
+    starts = g.indptr[nodes]
+    counts = g.indptr[nodes + 1] - starts
+    total = int(counts.sum())
+    positions = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(total)
+    return np.unique(g.indices[positions])
+
+
+def _move_nodes(
+    g: WeightedGraph,
+    labels: np.ndarray,
+    active: np.ndarray,
+    resolution: float,
+    rng: np.random.Generator,
+    max_rounds: int,
+    constraint: Optional[np.ndarray] = None,
+    movable: Optional[np.ndarray] = None,
+    singletons_only: bool = False
+) -> Tuple[np.ndarray, int]:
+    """
+    Local moving phase. Each round scores every (active node, neighbouring
+    community) pair at once:
+        gain(i -> c) = w(i, c) - resolution * k_i * tot(c \\ i) / 2m
+    and moves a random share of the nodes whose best community beats their
+    own. Neighbours of moved nodes become active for the next round.
+
+    constraint: only communities with the same constraint label (refinement)
+    movable: only these nodes may move (refinement: well-connected nodes)
+    singletons_only: a node that has been joined stops moving (refinement)
+    Returns (labels, number of moves).
+    """
+    labels = labels.copy()
+    n = g.n
+    two_m = g.weights.sum()
+    if two_m == 0:
+        return labels, 0
+    k = g.degree
+    total = np.bincount(labels, weights=k, minlength=n)
+    span = int(labels.max()) + 1  # labels only move between existing values
+    moves = 0
+
+    for _ in range(max_rounds):
+        if movable is not None:
+            active = active[movable[active]]
+        if singletons_only:
+            active = active[np.bincount(labels)[labels[active]] == 1]
+        if active.size == 0:
+            break
+        starts = g.indptr[active]
+        counts = g.indptr[active + 1] - starts
+        positions = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(int(counts.sum()))
+        node = np.repeat(active, counts)
+        nbr = g.indices[positions]
+        weight = g.weights[positions]
+        keep = nbr != node
+        if constraint is not None:
+            keep &= constraint[nbr] == constraint[node]
+        node, comm, weight = node[keep], labels[nbr[keep]], weight[keep]
+
+        key, inverse = np.unique(node * span + comm, return_inverse=True)
+        w_to = np.bincount(inverse, weights=weight)
+        node, comm = key // span, key % span
+        own = labels[node] == comm
+        gain = w_to - resolution * k[node] * (total[comm] - np.where(own, k[node], 0.0)) / two_m
+
+        # staying: gain of the own community (no neighbour there: w = 0)
+        stay = -resolution * k * (total[labels] - k) / two_m
+        stay[node[own]] = gain[own]
+
+        order = np.lexsort((-gain, node))
+        node, comm, gain = node[order], comm[order], gain[order]
+        first = np.ones(len(node), dtype=bool)
+        first[1:] = node[1:] != node[:-1]
+        node, comm, gain = node[first], comm[first], gain[first]
+
+        improving = (comm != labels[node]) & (gain > stay[node] + MIN_GAIN)
+        improving &= rng.random(len(node)) < MOVE_FRACTION
+        movers, targets = node[improving], comm[improving]
+        if movers.size == 0:
+            # nothing picked this round: stop only when nothing could improve
+            if not ((comm != labels[node]) & (gain > stay[node] + MIN_GAIN)).any():
+                break
+            continue
+
+        labels[movers] = targets
+        total = np.bincount(labels, weights=k, minlength=n)
+        moves += int(movers.size)
+        active = np.union1d(movers, _neighbours(g, movers))
+
+    return labels, moves
+
+
+def _connected_within(g: WeightedGraph, labels: np.ndarray) -> np.ndarray:
+    """Split each label into connected components (min-label propagation with pointer jumping)."""
+    src, dst = g.src, g.indices
+    inside = labels[src] == labels[dst]
+    src, dst = src[inside], dst[inside]
+    component = np.arange(g.n)
+    while True:
+        proposal = component.copy()
+        np.minimum.at(proposal, src, component[dst])
+        proposal = proposal[proposal]
+        if np.array_equal(proposal, component):
+            return component
+        component = proposal
+
+
+def _refine(
+    g: WeightedGraph,
+    labels: np.ndarray,
+    resolution: float,
+    rng: np.random.Generator,
+    max_rounds: int,
+    refine: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Leiden refinement. Within each community, nodes start as singletons and
+    merge into sub-communities of the same community; only nodes that are
+    well connected to their community take part:
+        w(v, C \\ v) >= resolution * k_v * (K_C - k_v) / 2m
+    Sub-communities are then split into connected components, so every
+    aggregate node is connected.
+
+    refine: communities to refine (warm start); the others stay whole.
+    """
+    n = g.n
+    two_m = g.weights.sum()
+    k = g.degree
+    src = g.src
+    inside = (labels[src] == labels[g.indices]) & (src != g.indices)
+    w_inside = np.bincount(src[inside], weights=g.weights[inside], minlength=n)
+    total = np.bincount(labels, weights=k, minlength=n)
+    well_connected = w_inside >= resolution * k * (total[labels] - k) / two_m if two_m else np.ones(n, bool)
+
+    refined = np.arange(n)
+    candidates = np.arange(n)
+    if refine is not None:
+        keep_whole = ~refine[labels]
+        refined[keep_whole] = n + labels[keep_whole]  # whole community as one label
+        candidates = candidates[~keep_whole]
+    if candidates.size:
+        refined, _ = _move_nodes(g, refined, candidates, resolution, rng, max_rounds,
+                                 constraint=labels, movable=well_connected, singletons_only=True)
+    return _connected_within(g, refined)
+
+
+def _aggregate(g: WeightedGraph, labels: np.ndarray) -> Tuple[WeightedGraph, np.ndarray]:
+    """Community graph (internal weight on the diagonal) and node -> aggregate map."""
+    compact = _relabel(labels)
+    c = int(compact.max()) + 1 if compact.size else 0
+    return _coalesce(c, compact[g.src], compact[g.indices], g.weights), compact
+
+
+def detect(
+    graph: CSRGraph,
+    resolution: float = 1.0,
+    max_rounds: int = MAX_ROUNDS,
+    previous: Optional[Partition] = None,
+    seed: int = 0
+) -> Partition:
+    """
+    Multi-level Leiden on the undirected strength graph.
+
+    With `previous` (same claims mostly), its final partition is the
+    starting point and only the changed region is re-optimized: nodes new
+    to the graph or whose weighted degree moved, plus their neighbours.
+    """
+    t0 = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    base = undirected(graph)
+    degrees = base.degree
+    n = base.n
+    if n == 0:
+        return Partition(graph.version(), graph.ids.copy(), degrees, [np.zeros(0, dtype=np.int64)], [0.0],
+                         resolution=resolution)
+
+    labels = np.arange(n)
+    active = np.arange(n)
+    refine_mask = None
+    changed_count = n
+    if previous is not None and len(previous.claim_ids) == 0:
+        previous = None
+    if previous is not None:
+        pos = np.minimum(np.searchsorted(previous.claim_ids, graph.ids), len(previous.claim_ids) - 1)
+        known = previous.claim_ids[pos] == graph.ids
+        old = np.where(known, previous.labels[pos], -1)
+        labels = np.where(known, old, old.max(initial=-1) + 1 + np.arange(n))
+        changed = ~known | (np.abs(degrees - np.where(known, previous.degrees[pos], 0.0)) > DEGREE_TOLERANCE)
+        changed_nodes = np.flatnonzero(changed)
+        changed_count = int(changed_nodes.size)
+        if changed_count == 0 and len(previous.claim_ids) == n:
+            return Partition(graph.version(), graph.ids.copy(), degrees, previous.levels, previous.modularity,
+                             resolution=resolution, seconds=time.perf_counter() - t0,
+                             stats={'moves': 0, 'levels': len(previous.levels)})
+        active = np.union1d(changed_nodes, _neighbours(base, changed_nodes))
+        labels = _relabel(labels)
+
+    levels: List[np.ndarray] = []
+    scores: List[float] = []
+    g, membership = base, np.arange(n)
+    stats = {'moves': 0, 'levels': 0}
+
+    for level in range(MAX_LEVELS):
+        before = labels
+        labels, moves = _move_nodes(g, labels, active, resolution, rng, max_rounds)
+        stats['moves'] += moves
+        assignment = _relabel(labels[membership])
+        if levels and np.array_equal(assignment, levels[-1]):
+            break
+        score = modularity(base, assignment, resolution)
+        if scores and score < scores[-1]:
+            break  # parallel moves overshot: keep the better coarser level below
+        levels.append(assignment)
+        scores.append(score)
+
+        if level == 0 and previous is not None:
+            # communities that gained or lost a node of the changed region
+            touched = np.zeros(g.n, dtype=bool)
+            touched[labels[active]] = True
+            touched[before[active]] = True
+            refine_mask = touched
+        else:
+            refine_mask = None
+        refined = _refine(g, labels, resolution, rng, max_rounds, refine_mask)
+        aggregate, node_of = _aggregate(g, refined)
+        if aggregate.n == g.n:
+            break
+        parent = np.empty(aggregate.n, dtype=np.int64)
+        parent[node_of] = labels
+        g, labels, membership = aggregate, _relabel(parent), node_of[membership]
+        active = np.arange(g.n)
+
+    if not levels:
+        levels.append(_relabel(labels[membership]))
+        scores.append(modularity(base, levels[0], resolution))
+    stats['levels'] = len(levels)
+
+    return Partition(
+        graph_version=graph.version(),
+        claim_ids=graph.ids.copy(),
+        degrees=degrees,
+        levels=levels,
+        modularity=scores,
+        resolution=resolution,
+        changed_nodes=changed_count,
+        seconds=time.perf_counter() - t0,
+        stats=stats
+    )
+
+
+def summarize(graph: CSRGraph, labels: np.ndarray, top_domains: int = 3) -> Dict[str, object]:
+    """
+    Per-community properties in one pass over the edge arrays:
+    size, directed edge density, bridge nodes (an outgoing edge leaving the
+    community), mean claim confidence and most frequent domains.
+    """
+    c = int(labels.max()) + 1 if labels.size else 0
+    src, dst = graph.edge_src, graph.indices
+    same = labels[src] == labels[dst]
+    size = np.bincount(labels, minlength=c)
+    internal = np.bincount(labels[src][same], minlength=c)
+    pairs = size * (size - 1)
+    density = np.divide(internal, pairs, out=np.zeros(c), where=pairs > 0)
+
+    bridge = np.zeros(graph.n, dtype=bool)
+    bridge[src[~same]] = True
+
+    confidence = np.bincount(labels, weights=graph.confidence, minlength=c) / np.maximum(size, 1)
+    coherence = np.where(size < 2, 1.0, confidence)
+
+    bits = graph.node_domains
+    present = [b for b in range(64) if (bits >> np.uint64(b) & np.uint64(1)).any()]
+    counts = np.zeros((c, len(present)))
+    for j, b in enumerate(present):
+        counts[:, j] = np.bincount(labels, weights=(bits >> np.uint64(b) & np.uint64(1)).astype(np.float64),
+                                   minlength=c)
+    order = np.argsort(-counts, axis=1, kind='stable')[:, :top_domains]
+    domains = [[present[j] for j in row if counts[i, j] > 0] for i, row in enumerate(order)]
+
+    return {
+        'size': size,
+        'density': density,
+        'bridge': bridge,
+        'coherence': coherence,
+        'domains': domains,
+    }
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def planted_graph(n: int, communities: int, in_degree: float = 8.0, out_degree: float = 1.0, seed: int = 3):
+    """Directed planted-partition graph: dense inside blocks, sparse between."""
+    rng = np.random.default_rng(seed)
+    truth = rng.integers(0, communities, size=n)
+    by_block = np.argsort(truth, kind='stable')
+    block_size = np.bincount(truth, minlength=communities)
+    block_start = np.cumsum(block_size) - block_size
+
+    src_in = rng.integers(0, n, size=int(n * in_degree))
+    blocks = truth[src_in]
+    dst_in = by_block[block_start[blocks] + (rng.random(len(src_in)) * block_size[blocks]).astype(np.int64)]
+    src_out = rng.integers(0, n, size=int(n * out_degree))
+    dst_out = rng.integers(0, n, size=len(src_out))
+
+    src = np.concatenate([src_in, src_out])
+    dst = np.concatenate([dst_in, dst_out])
+    keep = src != dst
+    src, dst = src[keep], dst[keep]
+    ids = np.arange(1, n + 1)
+    domains = [[int(t) % 7 + 1] for t in truth.tolist()]
+    strength = rng.uniform(0.3, 1.0, size=len(src))
+    cross = (truth[src] % 7) != (truth[dst] % 7)
+    graph, _ = CSRGraph.from_edges(ids, domains, ids[src], ids[dst], strength, cross, ['supports'] * len(src))
+    return graph, truth
+
+
+def _agreement(labels: np.ndarray, truth: np.ndarray) -> float:
+    """Share of nodes whose community's majority truth label is their own."""
+    key = labels.astype(np.int64) * (truth.max() + 1) + truth
+    values, counts = np.unique(key, return_counts=True)
+    best = {}
+    for v, cnt in zip(values.tolist(), counts.tolist()):
+        comm = v // (truth.max() + 1)
+        best[comm] = max(best.get(comm, 0), cnt)
+    return sum(best.values()) / len(labels)
+
+
+def benchmark(n: int = 50000, communities: int = 50) -> bool:
+    checks = []
+    graph, truth = planted_graph(n, communities)
+    print(f"Planted graph: {graph.n:,} nodes, {graph.m:,} edges, {communities} planted communities")
+
+    cold = detect(graph)
+    print(f"  cold   {cold.seconds:6.2f}s  levels={len(cold.levels)}  "
+          f"communities={[int(l.max()) + 1 for l in cold.levels]}  Q={cold.modularity[-1]:.4f}")
+    checks.append(("planted communities recovered (>= 95% agreement)", _agreement(cold.labels, truth) >= 0.95))
+    checks.append(("modularity does not decrease across levels",
+                   all(b >= a - 1e-9 for a, b in zip(cold.modularity, cold.modularity[1:]))))
+
+    split = _connected_within(undirected(graph), cold.labels)
+    checks.append(("every community is connected", len(np.unique(split)) == len(np.unique(cold.labels))))
+
+    again = detect(graph, previous=cold)
+    print(f"  warm (unchanged) {again.seconds:6.2f}s  changed={again.changed_nodes}  moves={again.stats['moves']}")
+    checks.append(("warm start on an unchanged graph moves nothing",
+                   again.changed_nodes == 0 and again.stats['moves'] == 0
+                   and np.array_equal(_relabel(again.labels), _relabel(cold.labels))))
+
+    # ingest: new claims attached to one planted community
+    rng = np.random.default_rng(9)
+    extra = n // 100
+    target = 0
+    members = np.flatnonzero(truth == target)
+    ids = np.concatenate([graph.ids, np.arange(n + 1, n + extra + 1)])
+    new_src = np.repeat(np.arange(n, n + extra), 6)
+    new_dst = members[rng.integers(0, len(members), size=len(new_src))]
+    src = np.concatenate([graph.edge_src, new_src])
+    dst = np.concatenate([graph.indices, new_dst])
+    strength = np.concatenate([graph.strength, rng.uniform(0.5, 1.0, size=len(new_src))])
+    domains = [[int(t) % 7 + 1] for t in truth.tolist()] + [[target % 7 + 1]] * extra
+    grown, _ = CSRGraph.from_edges(ids, domains, ids[src], ids[dst], strength,
+                                   [False] * len(src), ['supports'] * len(src))
+    grown_truth = np.concatenate([truth, np.full(extra, target)])
+
+    t_cold = detect(grown)
+    warm = detect(grown, previous=cold)
+    print(f"  after ingest of {extra} claims: cold {t_cold.seconds:6.2f}s  warm {warm.seconds:6.2f}s  "
+          f"(changed {warm.changed_nodes} nodes, Q {t_cold.modularity[-1]:.4f} vs {warm.modularity[-1]:.4f})")
+    checks.append(("warm start places new claims in their community",
+                   _agreement(warm.labels, grown_truth) >= 0.95
+                   and len(np.unique(warm.labels[n:])) == 1))
+    checks.append(("warm start modularity within 1% of cold",
+                   warm.modularity[-1] >= t_cold.modularity[-1] - 0.01))
+
+    info = summarize(grown, warm.labels)
+    checks.append(("summaries cover every node", int(info['size'].sum()) == grown.n))
+
+    for name, ok in checks:
+        print(f"  {'ok  ' if ok else 'FAIL'} {name}")
+    return all(ok for _, ok in checks)
+
+
+if __name__ == "__main__":
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    blocks = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    sys.exit(0 if benchmark(nodes, blocks) else 1)
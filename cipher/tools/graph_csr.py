@@ -0,0 +1,537 @@
+"""
+CIPHER Graph CSR
+Compact adjacency snapshot and path queries for GraphEngine.
+
+The knowledge graph is held as CSR arrays (forward and reverse) indexed by
+dense node positions instead of dict-of-lists keyed by claim id:
+1. Bidirectional BFS (vectorized frontier expansion) for hop-shortest paths
+2. Bidirectional Dijkstra on -log(strength) costs for strongest paths
+3. Yen's k-shortest loopless paths instead of all-paths enumeration
+4. Domain-constrained search pruned by per-node domain bitmasks
+
+Benchmarks and correctness checks on a synthetic 1M-edge graph:
+    python tools/graph_csr.py [edges] [queries]
+"""
+
+import hashlib
+import heapq
+import logging
+import sys
+import time
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INF = float('inf')
+MIN_STRENGTH = 1e-6         # strength floor before -log (a 0-strength edge is not free)
+HOP_COST = 1e-9             # tie-break: equal-strength paths prefer fewer hops
+CROSS_DOMAIN_DISCOUNT = 0.5  # cost factor on cross-domain edges for cross-domain paths
+
+# (cost, node positions, edge positions)
+PathResult = Tuple[float, List[int], List[int]]
+
+
+def domain_bits(domains: Iterable[int]) -> int:
+    """Bitmask of domain ids (ids beyond 63 share bits modulo 64)."""
+    bits = 0
+    for domain in domains:
+        bits |= 1 << (int(domain) % 64)
+    return bits
+
+
+class CSRGraph:
+    """
+    Directed graph in compressed sparse row form.
+
+    Nodes are dense positions 0..n-1 over the sorted claim ids; edges are
+    positions in the forward arrays (sorted by source, then target). The
+    reverse arrays map back to forward edge positions, so both search
+    directions share edge attributes.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        strength: np.ndarray,
+        cross_domain: np.ndarray,
+        conn_type: np.ndarray,
+        type_names: Sequence[str],
+        node_domains: np.ndarray,
+        confidence: Optional[np.ndarray] = None
+    ):
+        self.ids = ids
+        self.indptr = indptr
+        self.indices = indices
+        self.strength = strength
+        self.cross_domain = cross_domain
+        self.conn_type = conn_type
+        self.type_names = list(type_names)
+        self.node_domains = node_domains
+        self.confidence = confidence if confidence is not None else np.full(len(ids), 0.5, dtype=np.float32)
+        self.n = len(ids)
+        self.m = len(indices)
+
+        self.edge_src = np.repeat(np.arange(self.n, dtype=np.int32), np.diff(indptr))
+        order = np.argsort(indices, kind='stable')
+        self.rindptr = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(indices, minlength=self.n), out=self.rindptr[1:])
+        self.rindices = self.edge_src[order]
+        self.redge = order.astype(np.int64)
+
+        self.cost = -np.log(np.clip(strength.astype(np.float64), MIN_STRENGTH, 1.0)) + HOP_COST
+        self._lists: Optional[Dict[str, list]] = None
+        self._masks: Dict[FrozenSet[int], Tuple[np.ndarray, list]] = {}
+        self._costs: Dict[str, list] = {}
+
+    @classmethod
+    def from_edges(
+        cls,
+        node_ids: Sequence[int],
+        node_domains: Sequence[Iterable[int]],
+        sources: Sequence[int],
+        targets: Sequence[int],
+        strength: Sequence[float],
+        cross_domain: Sequence[bool],
+        conn_types: Sequence[str],
+        confidence: Optional[Sequence[float]] = None
+    ) -> Tuple['CSRGraph', np.ndarray]:
+        """
+        Build from claim ids and edge lists (edges must join listed ids).
+        Returns (graph, order): graph edge p is input edge order[p].
+        """
+        ids = np.asarray(node_ids, dtype=np.int64)
+        by_id = np.argsort(ids, kind='stable')
+        ids = ids[by_id]
+        bits = np.fromiter((domain_bits(d) for d in node_domains), dtype=np.uint64, count=len(by_id))[by_id]
+
+        src = np.searchsorted(ids, np.asarray(sources, dtype=np.int64)).astype(np.int32)
+        dst = np.searchsorted(ids, np.asarray(targets, dtype=np.int64)).astype(np.int32)
+        order = np.lexsort((dst, src))
+
+        type_names = sorted(set(conn_types))
+        type_code = {name: i for i, name in enumerate(type_names)}
+        codes = np.fromiter((type_code[t] for t in conn_types), dtype=np.int16, count=len(conn_types))
+
+        n = len(ids)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+
+        graph = cls(
+            ids=ids,
+            indptr=indptr,
+            indices=dst[order],
+            strength=np.asarray(strength, dtype=np.float32)[order],
+            cross_domain=np.asarray(cross_domain, dtype=bool)[order],
+            conn_type=codes[order],
+            type_names=type_names,
+            node_domains=bits,
+            confidence=None if confidence is None else np.asarray(confidence, dtype=np.float32)[by_id]
+        )
+        return graph, order
+
+    # =========================================================================
+    # LOOKUPS
+    # =========================================================================
+
+    def index(self, node_id: int) -> Optional[int]:
+        """Dense position of a claim id (None if absent)."""
+        i = int(np.searchsorted(self.ids, node_id))
+        return i if i < self.n and self.ids[i] == node_id else None
+
+    def node_id(self, index: int) -> int:
+        return int(self.ids[index])
+
+    def version(self) -> str:
+        """Content stamp of the graph (nodes, edges, strengths, domains)."""
+        digest = hashlib.sha1()
+        for array in (self.ids, self.indptr, self.indices, self.strength, self.node_domains):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        return digest.hexdigest()[:16]
+
+    def domain_mask(self, domains: Iterable[int]) -> Tuple[np.ndarray, list]:
+        """Nodes tagged with any of the domains, as (bool array, list), cached per domain set."""
+        key = frozenset(int(d) for d in domains)
+        cached = self._masks.get(key)
+        if cached is None:
+            mask = (self.node_domains & np.uint64(domain_bits(key))) != 0
+            cached = self._masks[key] = (mask, mask.tolist())
+        return cached
+
+    def costs(self, kind: str = 'strength') -> list:
+        """
+        Edge costs for the heap searches, cached per kind:
+        'strength' -log(strength), 'hops' 1 per edge, 'cross_domain'
+        -log(strength) discounted on cross-domain edges.
+        """
+        cached = self._costs.get(kind)
+        if cached is None:
+            if kind == 'strength':
+                cached = self._adjacency_lists()['cost']
+            elif kind == 'hops':
+                cached = [1.0] * self.m
+            elif kind == 'cross_domain':
+                cached = (self.cost * np.where(self.cross_domain, CROSS_DOMAIN_DISCOUNT, 1.0)).tolist()
+            else:
+                raise ValueError(f"Unknown cost: {kind}")
+            self._costs[kind] = cached
+        return cached
+
+    def _adjacency_lists(self) -> Dict[str, list]:
+        """Python-list views for the heap searches (list indexing beats numpy scalars)."""
+        if self._lists is None:
+            self._lists = {
+                'indptr': self.indptr.tolist(),
+                'indices': self.indices.tolist(),
+                'rindptr': self.rindptr.tolist(),
+                'rindices': self.rindices.tolist(),
+                'redge': self.redge.tolist(),
+                'edge_src': self.edge_src.tolist(),
+                'cost': self.cost.tolist(),
+            }
+        return self._lists
+
+    # =========================================================================
+    # BIDIRECTIONAL BFS
+    # =========================================================================
+
+    @staticmethod
+    def _expand(frontier: np.ndarray, indptr: np.ndarray) -> np.ndarray:
+        """Positions of every edge leaving the frontier, without a Python loop."""
+        starts = indptr[frontier]
+        counts = indptr[frontier + 1] - starts
+        total = int(counts.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+        offsets = np.cumsum(counts) - counts
+        return np.repeat(starts - offsets, counts) + np.arange(total)
+
+    def bidirectional_bfs(
+        self,
+        source: int,
+        target: int,
+        allowed: Optional[np.ndarray] = None,
+        max_hops: Optional[int] = None
+    ) -> Optional[PathResult]:
+        """
+        Hop-shortest path. Each step expands the side whose frontier has
+        fewer outgoing edges; nodes outside `allowed` are never reached
+        (source and target always are).
+        """
+        if source == target:
+            return 0.0, [source], []
+
+        # pred: -1 unseen, -2 root, -3 pruned, >= 0 forward edge toward the root
+        pred = [np.full(self.n, -1, dtype=np.int64), np.full(self.n, -1, dtype=np.int64)]
+        depth = [np.zeros(self.n, dtype=np.int32), np.zeros(self.n, dtype=np.int32)]
+        if allowed is not None:
+            for side in pred:
+                side[~allowed] = -3
+        pred[0][source] = pred[1][target] = -2
+        frontier = [np.array([source], dtype=np.int64), np.array([target], dtype=np.int64)]
+        level = [0, 0]
+        ptrs = (self.indptr, self.rindptr)
+
+        while frontier[0].size and frontier[1].size:
+            if max_hops is not None and level[0] + level[1] >= max_hops:
+                return None
+            work = [int((ptrs[s][frontier[s] + 1] - ptrs[s][frontier[s]]).sum()) for s in (0, 1)]
+            side = 0 if work[0] <= work[1] else 1
+
+            positions = self._expand(frontier[side], ptrs[side])
+            if side == 0:
+                edges, reached = positions, self.indices[positions]
+            else:
+                edges = self.redge[positions]
+                reached = self.rindices[positions]
+            fresh = pred[side][reached] == -1
+            reached, first = np.unique(reached[fresh], return_index=True)
+            pred[side][reached] = edges[fresh][first]
+            level[side] += 1
+            depth[side][reached] = level[side]
+            frontier[side] = reached
+
+            other = 1 - side
+            seen = pred[other][reached]
+            meets = reached[(seen >= 0) | (seen == -2)]
+            if meets.size:
+                meet = int(meets[np.argmin(depth[other][meets])])
+                return self._join(meet, pred[0].__getitem__, pred[1].__getitem__, source, target)
+        return None
+
+    def _join(self, meet, pred_forward, pred_backward, source, target) -> PathResult:
+        """Path through the meeting node from both predecessor maps."""
+        edges = []
+        v = meet
+        while v != source:
+            e = int(pred_forward(v))
+            edges.append(e)
+            v = int(self.edge_src[e])
+        edges.reverse()
+        v = meet
+        while v != target:
+            e = int(pred_backward(v))
+            edges.append(e)
+            v = int(self.indices[e])
+        nodes = [source] + [int(self.indices[e]) for e in edges]
+        return float(len(edges)), nodes, edges
+
+    # =========================================================================
+    # BIDIRECTIONAL DIJKSTRA
+    # =========================================================================
+
+    def bidirectional_dijkstra(
+        self,
+        source: int,
+        target: int,
+        cost: Optional[list] = None,
+        allowed: Optional[list] = None,
+        blocked_nodes: Optional[Set[int]] = None,
+        blocked_edges: Optional[Set[int]] = None
+    ) -> Optional[PathResult]:
+        """
+        Minimum-cost path (default cost -log(strength): the strongest path is
+        the one with the highest product of strengths). Costs must be >= 0.
+        Stops when the two heap tops together reach the best meeting cost.
+        """
+        if source == target:
+            return 0.0, [source], []
+
+        lists = self._adjacency_lists()
+        cost = lists['cost'] if cost is None else cost
+        blocked_nodes = blocked_nodes or set()
+        blocked_edges = blocked_edges or set()
+        ptrs = (lists['indptr'], lists['rindptr'])
+        adj = (lists['indices'], lists['rindices'])
+        redge = lists['redge']
+
+        dist = ({source: 0.0}, {target: 0.0})
+        pred = ({source: -1}, {target: -1})
+        settled = (set(), set())
+        heaps = ([(0.0, source)], [(0.0, target)])
+        best, meet = INF, -1
+
+        while heaps[0] and heaps[1]:
+            if heaps[0][0][0] + heaps[1][0][0] >= best:
+                break
+            side = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+            d, u = heapq.heappop(heaps[side])
+            if u in settled[side]:
+                continue
+            settled[side].add(u)
+
+            mine, other = dist[side], dist[1 - side]
+            ptr, nbrs = ptrs[side], adj[side]
+            for p in range(ptr[u], ptr[u + 1]):
+                e = p if side == 0 else redge[p]
+                v = nbrs[p]
+                if e in blocked_edges or v in blocked_nodes or (allowed is not None and not allowed[v]):
+                    continue
+                nd = d + cost[e]
+                if nd < mine.get(v, INF):
+                    mine[v] = nd
+                    pred[side][v] = e
+                    heapq.heappush(heaps[side], (nd, v))
+                    through = nd + other.get(v, INF)
+                    if through < best:
+                        best, meet = through, v
+
+        if meet < 0:
+            return None
+        _, nodes, edges = self._join(meet, pred[0].__getitem__, pred[1].__getitem__, source, target)
+        return best, nodes, edges
+
+    # =========================================================================
+    # YEN'S K-SHORTEST PATHS
+    # =========================================================================
+
+    def k_shortest_paths(
+        self,
+        source: int,
+        target: int,
+        k: int,
+        cost: Optional[list] = None,
+        allowed: Optional[list] = None,
+        max_hops: Optional[int] = None
+    ) -> List[PathResult]:
+        """
+        Yen's algorithm: the k cheapest loopless paths, in cost order, each
+        with a distinct node sequence. Spur searches are bidirectional
+        Dijkstra with the root path's nodes and the already used next hops
+        blocked, so the work is k * path length searches instead of an
+        enumeration of every path.
+        """
+        lists = self._adjacency_lists()
+        cost = lists['cost'] if cost is None else cost
+        indptr, indices = lists['indptr'], lists['indices']
+
+        first = self.bidirectional_dijkstra(source, target, cost, allowed)
+        if first is None or (max_hops is not None and len(first[2]) > max_hops):
+            return []
+        found = [first]
+        candidates: list = []
+        seen = {tuple(first[1])}
+
+        while len(found) < k:
+            _, last_nodes, last_edges = found[-1]
+            for i in range(len(last_edges)):
+                spur = last_nodes[i]
+                root = last_nodes[:i + 1]
+                next_hops = {nodes[i + 1] for _, nodes, _ in found
+                             if len(nodes) > i + 1 and nodes[:i + 1] == root}
+                blocked_edges = {p for p in range(indptr[spur], indptr[spur + 1]) if indices[p] in next_hops}
+                spur_path = self.bidirectional_dijkstra(
+                    spur, target, cost, allowed, set(root[:-1]), blocked_edges
+                )
+                if spur_path is None:
+                    continue
+                spur_cost, spur_nodes, spur_edges = spur_path
+                nodes = root[:-1] + spur_nodes
+                edges = last_edges[:i] + spur_edges
+                key = tuple(nodes)
+                if key in seen or (max_hops is not None and len(edges) > max_hops):
+                    continue
+                seen.add(key)
+                total = sum(cost[e] for e in last_edges[:i]) + spur_cost
+                heapq.heappush(candidates, (total, len(edges), nodes, edges))
+            if not candidates:
+                break
+            total, _, nodes, edges = heapq.heappop(candidates)
+            found.append((total, nodes, edges))
+        return found
+
+
+# =============================================================================
+# BENCHMARKS
+# =============================================================================
+
+def synthetic_graph(num_edges: int, avg_degree: float = 5.0, num_domains: int = 7, seed: int = 7):
+    """Random directed graph with hub-heavy sources (Zipf-like), 1-2 domains per node."""
+    rng = np.random.default_rng(seed)
+    n = max(2, int(num_edges / avg_degree))
+    popularity = 1.0 / np.arange(1, n + 1) ** 0.8
+    popularity /= popularity.sum()
+    hubs = rng.permutation(n)
+    src = hubs[rng.choice(n, size=num_edges, p=popularity)]
+    dst = rng.integers(0, n, size=num_edges)
+    keep = src != dst
+    src, dst = src[keep], dst[keep]
+    ids = np.arange(1, n + 1) * 3  # sparse, claim-like ids
+    domains = [[int(d) for d in rng.choice(np.arange(1, num_domains + 1), size=rng.integers(1, 3), replace=False)]
+               for _ in range(n)]
+    strength = rng.uniform(0.3, 1.0, size=len(src))
+    bits = [domain_bits(d) for d in domains]
+    cross = [bits[s] != bits[t] for s, t in zip(src.tolist(), dst.tolist())]
+    types = rng.choice(['supports', 'extends', 'causal', 'analogous'], size=len(src)).tolist()
+    return CSRGraph.from_edges(ids, domains, ids[src], ids[dst], strength, cross, types)
+
+
+def _reference_bfs(graph: CSRGraph, source: int, target: int) -> Optional[int]:
+    """Single-direction BFS over dict-of-lists, as GraphEngine did: hop count."""
+    adjacency = graph._reference_adjacency
+    queue = deque([(source, [source])])
+    visited = {source}
+    while queue:
+        current, path = queue.popleft()
+        if current == target:
+            return len(path) - 1
+        for neighbor in adjacency[current]:
+            if neighbor not in visited:
+                visited.add(neighbor)
+                queue.append((neighbor, path + [neighbor]))
+    return None
+
+
+def _reference_dijkstra(graph: CSRGraph, source: int, target: int) -> Optional[float]:
+    """Single-direction Dijkstra over dict-of-lists: cost to target."""
+    adjacency = graph._reference_weighted
+    dist = {source: 0.0}
+    pq = [(0.0, source)]
+    while pq:
+        d, current = heapq.heappop(pq)
+        if current == target:
+            return d
+        if d > dist.get(current, INF):
+            continue
+        for neighbor, weight in adjacency[current]:
+            nd = d + weight
+            if nd < dist.get(neighbor, INF):
+                dist[neighbor] = nd
+                heapq.heappush(pq, (nd, neighbor))
+    return None
+
+
+def benchmark(num_edges: int = 1_000_000, queries: int = 20, seed: int = 11) -> bool:
+    def timed(fn, pairs):
+        t0 = time.perf_counter()
+        out = [fn(s, t) for s, t in pairs]
+        return out, (time.perf_counter() - t0) / len(pairs) * 1000
+
+    t0 = time.perf_counter()
+    graph, _ = synthetic_graph(num_edges)
+    print(f"Synthetic graph: {graph.n:,} nodes, {graph.m:,} edges ({time.perf_counter() - t0:.2f}s to build)")
+
+    t0 = time.perf_counter()
+    lists = graph._adjacency_lists()
+    adjacency = [[] for _ in range(graph.n)]
+    weighted = [[] for _ in range(graph.n)]
+    for e, (s, t) in enumerate(zip(lists['edge_src'], lists['indices'])):
+        adjacency[s].append(t)
+        weighted[s].append((t, lists['cost'][e]))
+    graph._reference_adjacency, graph._reference_weighted = adjacency, weighted
+    print(f"Reference dict-of-lists adjacency: {time.perf_counter() - t0:.2f}s")
+
+    rng = np.random.default_rng(seed)
+    pairs = [tuple(int(x) for x in rng.integers(0, graph.n, size=2)) for _ in range(queries)]
+    checks = []
+
+    ref_hops, ref_ms = timed(lambda s, t: _reference_bfs(graph, s, t), pairs)
+    bi, bi_ms = timed(graph.bidirectional_bfs, pairs)
+    print(f"  hop-shortest   single BFS {ref_ms:8.2f} ms   bidirectional {bi_ms:8.2f} ms   x{ref_ms / bi_ms:.1f}")
+    checks.append(("bidirectional BFS matches single-direction hop counts",
+                   [None if p is None else len(p[2]) for p in bi] == ref_hops))
+
+    ref_cost, ref_ms = timed(lambda s, t: _reference_dijkstra(graph, s, t), pairs)
+    bd, bd_ms = timed(graph.bidirectional_dijkstra, pairs)
+    print(f"  strongest      Dijkstra   {ref_ms:8.2f} ms   bidirectional {bd_ms:8.2f} ms   x{ref_ms / bd_ms:.1f}")
+    checks.append(("bidirectional Dijkstra matches single-direction costs",
+                   all((a is None and b is None) or (a is not None and b is not None and abs(a - b[0]) < 1e-9)
+                       for a, b in zip(ref_cost, bd))))
+    checks.append(("strongest path edges chain source to target",
+                   all(p is None or (p[1][0] == s and p[1][-1] == t and all(
+                       graph.edge_src[e] == p[1][i] and graph.indices[e] == p[1][i + 1]
+                       for i, e in enumerate(p[2])))
+                       for p, (s, t) in zip(bd, pairs))))
+
+    hops = graph.costs('hops')
+    yen, yen_ms = timed(lambda s, t: graph.k_shortest_paths(s, t, 10, cost=hops, max_hops=8), pairs[:5])
+    print(f"  k-shortest     Yen k=10, <= 8 hops  {yen_ms:8.2f} ms")
+    checks.append(("Yen paths are loopless, distinct and in cost order",
+                   all(len(set(tuple(p[1]) for p in ps)) == len(ps)
+                       and all(len(set(p[1])) == len(p[1]) for p in ps)
+                       and all(a[0] <= b[0] for a, b in zip(ps, ps[1:]))
+                       for ps in yen)))
+
+    allowed, allowed_list = graph.domain_mask([1, 2])
+    inside = np.flatnonzero(allowed)
+    constrained = [tuple(int(x) for x in rng.choice(inside, size=2)) for _ in range(queries)]
+    dm, dm_ms = timed(lambda s, t: graph.bidirectional_dijkstra(s, t, allowed=allowed_list), constrained)
+    db, db_ms = timed(lambda s, t: graph.bidirectional_bfs(s, t, allowed=allowed), constrained)
+    print(f"  domain-masked  Dijkstra   {dm_ms:8.2f} ms   BFS           {db_ms:8.2f} ms   "
+          f"({allowed.mean():.0%} of nodes allowed)")
+    checks.append(("domain-constrained paths stay inside the mask",
+                   all(p is None or all(allowed[v] for v in p[1]) for p in dm + db)))
+
+    for name, ok in checks:
+        print(f"  {'ok  ' if ok else 'FAIL'} {name}")
+    return all(ok for _, ok in checks)
+
+
+if __name__ == "__main__":
+    edges = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    sys.exit(0 if benchmark(edges, count) else 1)
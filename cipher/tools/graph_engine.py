@@ -3,10 +3,11 @@ CIPHER Graph Engine
 Native graph operations for the knowledge network.
 
 Provides graph-native querying and algorithms using:
-1. PostgreSQL recursive CTEs for path finding
-2. In-memory graph algorithms for complex operations
+1. CSR path queries (bidirectional BFS/Dijkstra, Yen's k-shortest, domain masks)
+2. In-memory graph loaded from a memory-mapped snapshot plus a delta
+   of the rows changed since (tools/graph_snapshot.py)
 3. Centrality measures for identifying key claims
-4. Community detection for finding knowledge clusters
+4. Community detection for finding knowledge clusters (Leiden, persisted partitions)
 5. Cross-domain bridge analysis
 
 Cross-domain bridge: Math (graph theory) ↔ Neuro (connectomics) ↔ Biology (networks)
@@ -15,12 +16,20 @@ Cross-domain bridge: Math (graph theory) ↔ Neuro (connectomics) ↔ Biology (n
 import asyncio
 import logging
 import math
+import time
 from collections import defaultdict, deque
 from datetime import datetime
 from typing import Optional, List, Dict, Any, Set, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
-import heapq
+
+import numpy as np
+
+from .graph_csr import CSRGraph, PathResult
+from .graph_snapshot import (
+    GraphSnapshot, get_snapshot_store, has_change_tracking, purge_deletions, sync_snapshot
+)
+from .graph_communities import MAX_ROUNDS, Partition, detect as detect_partition, summarize as summarize_communities
 
 logger = logging.getLogger(__name__)
 
@@ -105,9 +114,9 @@ class GraphEngine:
     Graph-native operations for the CIPHER knowledge network.
 
     Implements graph algorithms optimized for knowledge synthesis:
-    - Path finding (shortest, strongest connections)
+    - Path finding (shortest, strongest, k-shortest, domain-constrained)
     - Centrality measures (degree, betweenness, PageRank)
-    - Community detection (Louvain-like algorithm)
+    - Community detection (multi-level Leiden, warm-started)
     - Cross-domain bridge analysis
     """
 
@@ -119,6 +128,11 @@ class GraphEngine:
     # Community detection parameters
     COMMUNITY_RESOLUTION = 1.0  # Higher = more communities
 
+    # Refresher: rewrite the on-disk snapshot at most this often (seconds)
+    SNAPSHOT_SAVE_INTERVAL = 300.0
+    # Refresher: prune the deletion log (graph_snapshot.DELETION_RETENTION) this often
+    DELETION_PURGE_INTERVAL = 3600.0
+
     def __init__(self, db_connection_string: str):
         """
         Initialize the Graph Engine.
@@ -129,12 +143,28 @@ class GraphEngine:
         self.db_connection_string = db_connection_string
         self._conn = None
 
-        # In-memory graph representation
-        self._nodes: Dict[int, GraphNode] = {}
-        self._adjacency: Dict[int, List[Tuple[int, GraphEdge]]] = defaultdict(list)
-        self._reverse_adjacency: Dict[int, List[Tuple[int, GraphEdge]]] = defaultdict(list)
+        # Columnar graph (all claims) and the min_confidence selection in use
+        self._snapshot: Optional[GraphSnapshot] = None
+        self._view: Optional[GraphSnapshot] = None
+        self._min_confidence = 0.0
+        self._tracked: Optional[bool] = None
+        self._store = get_snapshot_store()
+        self._saved_at = 0.0
         self._loaded = False
 
+        # CSR snapshot for path queries and communities (built per load)
+        self._csr: Optional[CSRGraph] = None
+
+        # Dict-of-lists representation, materialized on first use
+        self._node_map: Optional[Dict[int, GraphNode]] = None
+        self._adjacency_map: Optional[Dict[int, List[Tuple[int, GraphEdge]]]] = None
+        self._reverse_map: Optional[Dict[int, List[Tuple[int, GraphEdge]]]] = None
+        self._community_labels = None
+
+        # Last community partition (warm start for the next detection)
+        self._partition: Optional[Partition] = None
+        self._has_partitions: Optional[bool] = None
+
     async def connect(self):
         """Establish database connection."""
         import asyncpg
@@ -150,66 +180,200 @@ class GraphEngine:
         """
         Load the knowledge graph into memory.
 
+        The on-disk snapshot is memory-mapped and brought up to date with
+        the rows changed since its watermark; without one (or without
+        migration 007) every claim and connection is read once.
+
         Args:
             min_confidence: Minimum claim confidence to include
         """
         logger.info("Loading knowledge graph into memory...")
 
-        # Load nodes (claims)
-        rows = await self._conn.fetch("""
-            SELECT id, claim_text, claim_type, domains, confidence
-            FROM synthesis.claims
-            WHERE confidence >= $1
-        """, min_confidence)
-
-        for row in rows:
-            self._nodes[row['id']] = GraphNode(
-                id=row['id'],
-                claim_text=row['claim_text'],
-                claim_type=row['claim_type'] or 'unknown',
-                domains=row['domains'] or [],
-                confidence=row['confidence'] or 0.5
-            )
-
-        # Load edges (connections)
-        edges = await self._conn.fetch("""
-            SELECT source_claim_id, target_claim_id, connection_type,
-                   strength, cross_domain, reasoning
-            FROM synthesis.connections
-        """)
+        self._tracked = await has_change_tracking(self._conn)
+        snapshot = self._store.load() if self._store and self._tracked else None
+        snapshot, stats = await sync_snapshot(self._conn, snapshot, self._tracked)
+        if stats['changed'] and self._tracked:
+            self._save_snapshot(snapshot)
+
+        self._snapshot = snapshot
+        self._select(min_confidence)
+        logger.info(
+            f"Loaded {self._csr.n} nodes and {self._csr.m} edges "
+            f"({stats['mode']}: {stats['claims']} claims, {stats['connections']} connections, "
+            f"{stats['deleted']} deletions read in {stats['seconds']:.2f}s)"
+        )
 
-        for row in edges:
-            source_id = row['source_claim_id']
-            target_id = row['target_claim_id']
+    async def refresh_graph(self) -> bool:
+        """Apply the rows changed since the last load/refresh (a full reload without
+        migration 007). Returns True if the graph changed."""
+        self._ensure_loaded()
+        snapshot, stats = await sync_snapshot(self._conn, self._snapshot, self._tracked)
+        if not stats['changed']:
+            self._snapshot = snapshot  # watermark moved
+            return False
+        if self._tracked and time.monotonic() - self._saved_at >= self.SNAPSHOT_SAVE_INTERVAL:
+            self._save_snapshot(snapshot)
+        self._snapshot = snapshot
+        self._select(self._min_confidence)
+        logger.info(f"Graph refreshed: {stats['claims']} claims, {stats['connections']} connections, "
+                    f"{stats['deleted']} deletions")
+        return True
+
+    async def run_refresher(self, interval: float = 60.0):
+        """Keep the graph (and the on-disk snapshot) current; run as a daemon task.
+
+        Returns at once without change tracking (migration 007): every refresh
+        would be a full reload. Also prunes the deletion log hourly.
+        """
+        self._ensure_loaded()
+        if not self._tracked:
+            logger.info("Graph change tracking not installed (migration 007), periodic refresh disabled")
+            return
+        purged_at = 0.0
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh_graph()
+            except Exception as e:
+                logger.warning(f"Graph refresh failed: {e}")
+            if time.monotonic() - purged_at >= self.DELETION_PURGE_INTERVAL:
+                purged_at = time.monotonic()
+                try:
+                    purged = await purge_deletions(self._conn)
+                    if purged:
+                        logger.info(f"Graph deletion log: purged {purged} old entries")
+                except Exception as e:
+                    logger.warning(f"Graph deletion log purge failed: {e}")
+
+    def _save_snapshot(self, snapshot: GraphSnapshot):
+        if self._store is None:
+            return
+        try:
+            self._store.save(snapshot)
+            self._saved_at = time.monotonic()
+        except OSError as e:
+            logger.warning(f"Graph snapshot not saved: {e}")
+
+    def _select(self, min_confidence: float):
+        """Vector-mask the claims for min_confidence and rebuild the CSR view."""
+        self._min_confidence = min_confidence
+        self._view = self._snapshot.select(min_confidence)
+        self._csr = self._view.csr()
+        self._node_map = self._adjacency_map = self._reverse_map = None
+        self._community_labels = None
+        self._loaded = True
 
-            if source_id not in self._nodes or target_id not in self._nodes:
-                continue
+    def _ensure_loaded(self):
+        """Ensure graph is loaded."""
+        if not self._loaded:
+            raise RuntimeError("Graph not loaded. Call load_graph() first.")
 
-            edge = GraphEdge(
-                source_id=source_id,
-                target_id=target_id,
-                connection_type=row['connection_type'] or 'related',
-                strength=row['strength'] or 0.5,
-                cross_domain=row['cross_domain'] or False,
-                reasoning=row['reasoning']
+    def _ensure_csr(self) -> CSRGraph:
+        """CSR snapshot of the loaded graph."""
+        self._ensure_loaded()
+        return self._csr
+
+    @property
+    def _nodes(self) -> Dict[int, GraphNode]:
+        if self._node_map is None:
+            self._materialize()
+        return self._node_map
+
+    @property
+    def _adjacency(self) -> Dict[int, List[Tuple[int, GraphEdge]]]:
+        if self._adjacency_map is None:
+            self._materialize()
+        return self._adjacency_map
+
+    @property
+    def _reverse_adjacency(self) -> Dict[int, List[Tuple[int, GraphEdge]]]:
+        if self._reverse_map is None:
+            self._materialize()
+        return self._reverse_map
+
+    def _materialize(self):
+        """GraphNode/GraphEdge dicts for the dict-based algorithms (centrality, clustering)."""
+        self._ensure_loaded()
+        view = self._view
+        ids = view.ids.tolist()
+        out_degree = np.bincount(view.src, minlength=view.n).tolist()
+        in_degree = np.bincount(view.dst, minlength=view.n).tolist()
+        confidence = view.node_confidence().tolist()
+        types = [view.claim_types[c] for c in view.claim_type.tolist()]
+        communities = self._community_labels.tolist() if self._community_labels is not None else None
+
+        self._node_map = {
+            node_id: GraphNode(
+                id=node_id,
+                claim_text=view.claim_text(i),
+                claim_type=types[i],
+                domains=view.domains(i),
+                confidence=confidence[i],
+                degree=out_degree[i] + in_degree[i],
+                in_degree=in_degree[i],
+                out_degree=out_degree[i],
+                community_id=communities[i] if communities else None
             )
+            for i, node_id in enumerate(ids)
+        }
+
+        self._adjacency_map = defaultdict(list)
+        self._reverse_map = defaultdict(list)
+        for e in range(view.m):
+            edge = self._edge(e)
+            self._adjacency_map[edge.source_id].append((edge.target_id, edge))
+            self._reverse_map[edge.target_id].append((edge.source_id, edge))
+
+    def _edge(self, e: int) -> GraphEdge:
+        """GraphEdge for CSR edge position e."""
+        view = self._view
+        return GraphEdge(
+            source_id=int(view.ids[view.src[e]]),
+            target_id=int(view.ids[view.dst[e]]),
+            connection_type=view.conn_types[view.conn_type[e]],
+            strength=float(view.strength[e]),
+            cross_domain=bool(view.cross_domain[e]),
+            reasoning=view.edge_reasoning(e)
+        )
 
-            self._adjacency[source_id].append((target_id, edge))
-            self._reverse_adjacency[target_id].append((source_id, edge))
+    def _csr_path(self, result: Optional[PathResult], path_type: str) -> Optional[GraphPath]:
+        """GraphPath from CSR node/edge positions."""
+        if result is None:
+            return None
+        _, positions, edge_positions = result
+        path = [self._csr.node_id(i) for i in positions]
+        edges = [self._edge(e) for e in edge_positions]
 
-            # Update degrees
-            self._nodes[source_id].out_degree += 1
-            self._nodes[target_id].in_degree += 1
-            self._nodes[source_id].degree += 1
-            self._nodes[target_id].degree += 1
+        domains = set()
+        for i in positions:
+            domains.update(self._view.domains(i))
 
-        self._loaded = True
-        logger.info(f"Loaded {len(self._nodes)} nodes and {sum(len(adj) for adj in self._adjacency.values())} edges")
+        return GraphPath(
+            nodes=path,
+            edges=edges,
+            total_weight=sum(e.strength for e in edges),
+            path_type=path_type,
+            domains_traversed=domains
+        )
 
-    def _ensure_loaded(self):
-        """Ensure graph is loaded."""
-        if not self._loaded:
-            raise RuntimeError("Graph not loaded. Call load_graph() first.")
+    def _csr_endpoints(self, source_id: int, target_id: int) -> Optional[Tuple[int, int]]:
+        csr = self._ensure_csr()
+        source, target = csr.index(source_id), csr.index(target_id)
+        if source is None or target is None:
+            return None
+        return source, target
+
+    def _domain_filter(self, domains: Optional[List[int]], source: int, target: int):
+        """Domain mask (bool array, list) or (None, None) when unconstrained."""
+        if not domains:
+            return None, None
+        mask, allowed = self._csr.domain_mask(domains)
+        if not (allowed[source] and allowed[target]):
+            # endpoints are always allowed
+            mask = mask.copy()
+            mask[[source, target]] = True
+            allowed = mask.tolist()
+        return mask, allowed
 
     # =========================================================================
     # PATH FINDING - Using PostgreSQL Recursive CTEs
@@ -310,7 +474,12 @@ class GraphEngine:
         max_depth: int = 5,
         limit: int = 10
     ) -> List[GraphPath]:
-        """Find all paths between two nodes (limited)."""
+        """
+        Find all paths between two nodes (limited).
+
+        Enumerates every path up to max_depth in the database, which explodes
+        on dense hubs; prefer find_k_shortest_paths() on a loaded graph.
+        """
         rows = await self._conn.fetch("""
             WITH RECURSIVE path_search AS (
                 SELECT
@@ -363,197 +532,128 @@ class GraphEngine:
     def find_shortest_path(
         self,
         source_id: int,
-        target_id: int
+        target_id: int,
+        domains: Optional[List[int]] = None,
+        max_hops: Optional[int] = None
     ) -> Optional[GraphPath]:
         """
-        Find shortest path using BFS (in-memory).
+        Find shortest path (fewest hops) using bidirectional BFS.
 
         Args:
             source_id: Starting node ID
             target_id: Target node ID
+            domains: Only traverse claims tagged with one of these domains
+            max_hops: Give up beyond this many hops
 
         Returns:
             GraphPath if path exists, None otherwise
         """
-        self._ensure_loaded()
-
-        if source_id not in self._nodes or target_id not in self._nodes:
+        endpoints = self._csr_endpoints(source_id, target_id)
+        if endpoints is None:
             return None
+        source, target = endpoints
+        mask, _ = self._domain_filter(domains, source, target)
 
-        # BFS
-        queue = deque([(source_id, [source_id], [])])
-        visited = {source_id}
-
-        while queue:
-            current, path, edges = queue.popleft()
-
-            if current == target_id:
-                domains = set()
-                for nid in path:
-                    domains.update(self._nodes[nid].domains)
-
-                return GraphPath(
-                    nodes=path,
-                    edges=edges,
-                    total_weight=sum(e.strength for e in edges),
-                    path_type='shortest',
-                    domains_traversed=domains
-                )
-
-            for neighbor, edge in self._adjacency[current]:
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    queue.append((neighbor, path + [neighbor], edges + [edge]))
-
-        return None
+        result = self._csr.bidirectional_bfs(source, target, allowed=mask, max_hops=max_hops)
+        return self._csr_path(result, 'shortest')
 
     def find_strongest_path(
         self,
         source_id: int,
-        target_id: int
+        target_id: int,
+        domains: Optional[List[int]] = None
     ) -> Optional[GraphPath]:
         """
-        Find path with maximum total strength using Dijkstra (inverted weights).
+        Find the strongest path using bidirectional Dijkstra.
+
+        Edge cost is -log(strength), so the path maximizes the product of
+        strengths: a chain is only as strong as all its links together.
 
         Args:
             source_id: Starting node ID
             target_id: Target node ID
+            domains: Only traverse claims tagged with one of these domains
 
         Returns:
             GraphPath with maximum strength
         """
-        self._ensure_loaded()
-
-        if source_id not in self._nodes or target_id not in self._nodes:
+        endpoints = self._csr_endpoints(source_id, target_id)
+        if endpoints is None:
             return None
+        source, target = endpoints
+        _, allowed = self._domain_filter(domains, source, target)
 
-        # Dijkstra with inverted weights (1 - strength)
-        dist = {source_id: 0}
-        prev = {}
-        prev_edge = {}
-        pq = [(0, source_id)]
-
-        while pq:
-            d, current = heapq.heappop(pq)
-
-            if current == target_id:
-                break
-
-            if d > dist.get(current, float('inf')):
-                continue
-
-            for neighbor, edge in self._adjacency[current]:
-                # Invert strength so higher strength = lower cost
-                weight = 1.0 - edge.strength
-                new_dist = d + weight
-
-                if new_dist < dist.get(neighbor, float('inf')):
-                    dist[neighbor] = new_dist
-                    prev[neighbor] = current
-                    prev_edge[neighbor] = edge
-                    heapq.heappush(pq, (new_dist, neighbor))
-
-        if target_id not in prev:
-            return None
-
-        # Reconstruct path
-        path = []
-        edges = []
-        current = target_id
-
-        while current != source_id:
-            path.append(current)
-            edges.append(prev_edge[current])
-            current = prev[current]
-        path.append(source_id)
-        path.reverse()
-        edges.reverse()
-
-        domains = set()
-        for nid in path:
-            domains.update(self._nodes[nid].domains)
-
-        return GraphPath(
-            nodes=path,
-            edges=edges,
-            total_weight=sum(e.strength for e in edges),
-            path_type='strongest',
-            domains_traversed=domains
-        )
+        result = self._csr.bidirectional_dijkstra(source, target, allowed=allowed)
+        return self._csr_path(result, 'strongest')
 
     def find_cross_domain_path(
         self,
         source_id: int,
-        target_id: int
+        target_id: int,
+        domains: Optional[List[int]] = None
     ) -> Optional[GraphPath]:
         """
-        Find path that maximizes domain diversity.
+        Find a strong path that prefers crossing domains.
 
-        Prefers paths that cross multiple domains.
+        Cross-domain edges cost half their -log(strength), so bridges are
+        favoured while the search stays a non-negative-weight Dijkstra.
+        By default only claims in the source or target domains are
+        traversed (domain masks prune the rest).
         """
-        self._ensure_loaded()
-
-        if source_id not in self._nodes or target_id not in self._nodes:
+        endpoints = self._csr_endpoints(source_id, target_id)
+        if endpoints is None:
             return None
+        source, target = endpoints
+        if domains is None:
+            domains = self._view.domains(source) + self._view.domains(target)
+        _, allowed = self._domain_filter(domains, source, target)
 
-        # Modified Dijkstra: prefer cross-domain edges
-        dist = {source_id: 0}
-        prev = {}
-        prev_edge = {}
-        pq = [(0, source_id, set(self._nodes[source_id].domains))]
-
-        while pq:
-            d, current, domains_seen = heapq.heappop(pq)
-
-            if current == target_id:
-                break
-
-            if d > dist.get(current, float('inf')):
-                continue
-
-            for neighbor, edge in self._adjacency[current]:
-                neighbor_domains = set(self._nodes[neighbor].domains)
-                new_domains = domains_seen | neighbor_domains
-
-                # Reward crossing into new domains
-                domain_bonus = len(new_domains - domains_seen) * 0.5
-                weight = (1.0 - edge.strength) - domain_bonus
-
-                new_dist = d + weight
-
-                if new_dist < dist.get(neighbor, float('inf')):
-                    dist[neighbor] = new_dist
-                    prev[neighbor] = current
-                    prev_edge[neighbor] = edge
-                    heapq.heappush(pq, (new_dist, neighbor, new_domains))
-
-        if target_id not in prev:
-            return None
+        result = self._csr.bidirectional_dijkstra(
+            source, target, cost=self._csr.costs('cross_domain'), allowed=allowed
+        )
+        return self._csr_path(result, 'cross_domain')
 
-        # Reconstruct path
-        path = []
-        edges = []
-        current = target_id
+    def find_k_shortest_paths(
+        self,
+        source_id: int,
+        target_id: int,
+        k: int = 10,
+        max_depth: Optional[int] = None,
+        weight: str = 'hops',
+        domains: Optional[List[int]] = None
+    ) -> List[GraphPath]:
+        """
+        Find the k best loopless paths using Yen's algorithm.
 
-        while current != source_id:
-            path.append(current)
-            edges.append(prev_edge[current])
-            current = prev[current]
-        path.append(source_id)
-        path.reverse()
-        edges.reverse()
+        Replaces all-paths enumeration: cost is k spur searches per path
+        instead of every path up to max_depth.
 
-        domains = set()
-        for nid in path:
-            domains.update(self._nodes[nid].domains)
+        Args:
+            source_id: Starting node ID
+            target_id: Target node ID
+            k: Number of paths
+            max_depth: Maximum path length in hops
+            weight: 'hops' (fewest hops first) or 'strength' (strongest first)
+            domains: Only traverse claims tagged with one of these domains
+        """
+        if weight not in ('hops', 'strength'):
+            raise ValueError(f"Unknown weight: {weight}")
+        endpoints = self._csr_endpoints(source_id, target_id)
+        if endpoints is None:
+            return []
+        source, target = endpoints
+        _, allowed = self._domain_filter(domains, source, target)
 
-        return GraphPath(
-            nodes=path,
-            edges=edges,
-            total_weight=sum(e.strength for e in edges),
-            path_type='cross_domain',
-            domains_traversed=domains
+        results = self._csr.k_shortest_paths(
+            source, target, k, cost=self._csr.costs(weight), allowed=allowed, max_hops=max_depth
         )
+        paths = []
+        for result in results:
+            path = self._csr_path(result, 'shortest' if weight == 'hops' else 'strongest')
+            if any(e.cross_domain for e in path.edges):
+                path.path_type = 'cross_domain'
+            paths.append(path)
+        return paths
 
     # =========================================================================
     # CENTRALITY MEASURES
@@ -694,195 +794,136 @@ class GraphEngine:
     # COMMUNITY DETECTION
     # =========================================================================
 
-    def detect_communities(self, max_iterations: int = 10) -> List[Community]:
+    def detect_communities(self, max_iterations: int = MAX_ROUNDS, level: int = -1) -> List[Community]:
         """
-        Detect communities using a Louvain-like algorithm.
+        Detect communities with multi-level Leiden on the CSR snapshot.
 
-        Groups claims into coherent clusters.
+        Warm-starts from the last partition (this session or the one loaded
+        by refresh_communities): only claims that are new or whose weighted
+        degree changed, plus their neighbours, are moved again.
 
         Args:
-            max_iterations: Maximum iterations for convergence (default 10)
+            max_iterations: Maximum local-moving rounds per level
+            level: Partition level to report (0 = finest, -1 = coarsest)
         """
-        self._ensure_loaded()
-
-        # Skip community detection for very large graphs
-        edge_count = sum(len(adj) for adj in self._adjacency.values())
-        if edge_count > 20000:
-            logger.warning(f"Graph too large ({edge_count} edges) for community detection. Returning empty.")
-            return []
-
-        # Initialize: each node is its own community
-        community = {nid: nid for nid in self._nodes}
-        total_weight = sum(
-            sum(e.strength for _, e in adj)
-            for adj in self._adjacency.values()
-        )
-
-        if total_weight == 0:
-            # No edges, each node is its own community
-            communities = []
-            for nid, node in self._nodes.items():
-                communities.append(Community(
-                    id=nid,
-                    node_ids=[nid],
-                    size=1,
-                    density=0.0,
-                    dominant_domains=node.domains[:2] if node.domains else [],
-                    bridge_nodes=[],
-                    coherence=1.0
-                ))
-            return communities
-
-        improved = True
-        iteration = 0
-        while improved and iteration < max_iterations:
-            improved = False
-            iteration += 1
-
-            for node_id in self._nodes:
-                current_comm = community[node_id]
-
-                # Calculate modularity gain for each neighbor's community
-                best_comm = current_comm
-                best_gain = 0.0
-
-                neighbor_comms = set()
-                for neighbor, edge in self._adjacency[node_id]:
-                    neighbor_comms.add(community[neighbor])
-                for neighbor, edge in self._reverse_adjacency[node_id]:
-                    neighbor_comms.add(community[neighbor])
-
-                for new_comm in neighbor_comms:
-                    if new_comm == current_comm:
-                        continue
-
-                    # Calculate modularity gain (simplified)
-                    gain = self._modularity_gain(
-                        node_id, new_comm, community, total_weight
-                    )
-
-                    if gain > best_gain:
-                        best_gain = gain
-                        best_comm = new_comm
-
-                if best_comm != current_comm:
-                    community[node_id] = best_comm
-                    improved = True
-
-        # Build community objects
-        comm_nodes = defaultdict(list)
-        for node_id, comm_id in community.items():
-            comm_nodes[comm_id].append(node_id)
-            self._nodes[node_id].community_id = comm_id
-
-        communities = []
-        for comm_id, node_ids in comm_nodes.items():
-            if not node_ids:
-                continue
-
-            # Calculate community properties
-            density = self._compute_community_density(node_ids)
-            dominant_domains = self._get_dominant_domains(node_ids)
-            bridge_nodes = self._find_bridge_nodes(node_ids, community)
-            coherence = self._compute_community_coherence(node_ids)
-
-            communities.append(Community(
-                id=comm_id,
+        graph = self._ensure_csr()
+        previous = self._partition
+        if previous is not None and previous.graph_version == graph.version() \
+                and previous.resolution == self.COMMUNITY_RESOLUTION:
+            partition = previous
+        else:
+            partition = detect_partition(graph, self.COMMUNITY_RESOLUTION, max_iterations, previous)
+            logger.info(
+                f"Communities: {len(partition.levels)} levels, Q={partition.modularity[-1]:.4f}, "
+                f"{partition.changed_nodes} changed claims, {partition.seconds:.2f}s"
+            )
+        self._partition = partition
+        return self._build_communities(graph, partition.levels[level])
+
+    def _build_communities(self, graph: CSRGraph, labels) -> List[Community]:
+        """Community objects from dense-position labels (one pass over the edges)."""
+        info = summarize_communities(graph, labels)
+        members = defaultdict(list)
+        bridges = defaultdict(list)
+        self._community_labels = labels
+        for node_id, label, bridge in zip(graph.ids.tolist(), labels.tolist(), info['bridge'].tolist()):
+            members[label].append(node_id)
+            if self._node_map is not None:
+                self._node_map[node_id].community_id = label
+            if bridge:
+                bridges[label].append(node_id)
+
+        communities = [
+            Community(
+                id=label,
                 node_ids=node_ids,
                 size=len(node_ids),
-                density=density,
-                dominant_domains=dominant_domains,
-                bridge_nodes=bridge_nodes,
-                coherence=coherence
-            ))
-
+                density=float(info['density'][label]),
+                dominant_domains=info['domains'][label],
+                bridge_nodes=bridges[label],
+                coherence=float(info['coherence'][label])
+            )
+            for label, node_ids in members.items()
+        ]
         communities.sort(key=lambda c: c.size, reverse=True)
         return communities
 
-    def _modularity_gain(
-        self,
-        node_id: int,
-        new_comm: int,
-        community: Dict[int, int],
-        total_weight: float
-    ) -> float:
-        """Calculate modularity gain for moving a node to a new community."""
-        if total_weight == 0:
-            return 0.0
-
-        # Sum of edge weights to new community
-        k_in = 0.0
-        for neighbor, edge in self._adjacency[node_id]:
-            if community[neighbor] == new_comm:
-                k_in += edge.strength
-        for neighbor, edge in self._reverse_adjacency[node_id]:
-            if community[neighbor] == new_comm:
-                k_in += edge.strength
-
-        # Node degree
-        k_i = sum(e.strength for _, e in self._adjacency[node_id])
-        k_i += sum(e.strength for _, e in self._reverse_adjacency[node_id])
-
-        # Community total degree
-        sigma_tot = sum(
-            sum(e.strength for _, e in self._adjacency[n]) +
-            sum(e.strength for _, e in self._reverse_adjacency[n])
-            for n, c in community.items() if c == new_comm
-        )
-
-        return k_in / total_weight - (sigma_tot * k_i) / (2 * total_weight ** 2)
-
-    def _compute_community_density(self, node_ids: List[int]) -> float:
-        """Compute edge density within a community."""
-        if len(node_ids) < 2:
-            return 0.0
-
-        node_set = set(node_ids)
-        internal_edges = 0
-
-        for node_id in node_ids:
-            for neighbor, _ in self._adjacency[node_id]:
-                if neighbor in node_set:
-                    internal_edges += 1
-
-        max_edges = len(node_ids) * (len(node_ids) - 1)
-        return internal_edges / max_edges if max_edges > 0 else 0.0
+    async def refresh_communities(self, max_iterations: int = MAX_ROUNDS, level: int = -1) -> List[Community]:
+        """
+        detect_communities backed by synthesis.graph_partitions.
 
-    def _get_dominant_domains(self, node_ids: List[int]) -> List[int]:
-        """Get the most common domains in a community."""
-        domain_counts = defaultdict(int)
-        for node_id in node_ids:
-            for domain in self._nodes[node_id].domains:
-                domain_counts[domain] += 1
+        The stored partition is reused as is while the graph version matches,
+        otherwise it seeds the warm start and the new partition replaces it.
+        Without migration 006 this is detect_communities.
+        """
+        if self._has_partitions is None:
+            self._has_partitions = await self._conn.fetchval(
+                "SELECT to_regclass('synthesis.graph_partitions') IS NOT NULL"
+            )
+        if not self._has_partitions:
+            return self.detect_communities(max_iterations, level)
+
+        if self._partition is None:
+            self._partition = await self._load_partition()
+        stored = self._partition.graph_version if self._partition else None
+        communities = self.detect_communities(max_iterations, level)
+        if self._partition.graph_version != stored:
+            await self._save_partition(self._partition)
+        return communities
 
-        sorted_domains = sorted(domain_counts.items(), key=lambda x: x[1], reverse=True)
-        return [d for d, _ in sorted_domains[:3]]
+    async def _load_partition(self) -> Optional[Partition]:
+        """Latest stored partition at the engine's resolution."""
+        run = await self._conn.fetchrow("""
+            SELECT id, graph_version, resolution, modularity
+            FROM synthesis.graph_partitions
+            WHERE resolution = $1
+            ORDER BY id DESC LIMIT 1
+        """, self.COMMUNITY_RESOLUTION)
+        if run is None:
+            return None
+        rows = await self._conn.fetch("""
+            SELECT claim_id, community_ids, weighted_degree
+            FROM synthesis.graph_communities
+            WHERE partition_id = $1
+            ORDER BY claim_id
+        """, run['id'])
+        if not rows:
+            return None
+        levels = np.array([r['community_ids'] for r in rows], dtype=np.int64).T
+        return Partition(
+            graph_version=run['graph_version'],
+            claim_ids=np.array([r['claim_id'] for r in rows], dtype=np.int64),
+            degrees=np.array([r['weighted_degree'] for r in rows], dtype=np.float64),
+            levels=list(levels),
+            modularity=list(run['modularity']),
+            resolution=run['resolution']
+        )
 
-    def _find_bridge_nodes(
-        self,
-        node_ids: List[int],
-        community: Dict[int, int]
-    ) -> List[int]:
-        """Find nodes that connect to other communities."""
-        node_set = set(node_ids)
-        bridges = []
-
-        for node_id in node_ids:
-            for neighbor, _ in self._adjacency[node_id]:
-                if neighbor not in node_set:
-                    bridges.append(node_id)
-                    break
-
-        return bridges
-
-    def _compute_community_coherence(self, node_ids: List[int]) -> float:
-        """Compute semantic coherence of a community based on claim similarity."""
-        if len(node_ids) < 2:
-            return 1.0
-
-        # Average confidence as proxy for coherence
-        total_conf = sum(self._nodes[nid].confidence for nid in node_ids)
-        return total_conf / len(node_ids)
+    async def _save_partition(self, partition: Partition):
+        """Store a partition and drop the older ones at its resolution."""
+        graph = self._ensure_csr()
+        levels = np.stack(partition.levels, axis=1).tolist()
+        async with self._conn.transaction():
+            partition_id = await self._conn.fetchval("""
+                INSERT INTO synthesis.graph_partitions
+                    (graph_version, resolution, levels, modularity, node_count,
+                     edge_count, changed_nodes, seconds)
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+                RETURNING id
+            """, partition.graph_version, partition.resolution, len(partition.levels),
+                partition.modularity, graph.n, graph.m, partition.changed_nodes, partition.seconds)
+            await self._conn.copy_records_to_table(
+                'graph_communities',
+                schema_name='synthesis',
+                records=[(partition_id, claim_id, community_ids, degree)
+                         for claim_id, community_ids, degree
+                         in zip(partition.claim_ids.tolist(), levels, partition.degrees.tolist())],
+                columns=['partition_id', 'claim_id', 'community_ids', 'weighted_degree']
+            )
+            await self._conn.execute("""
+                DELETE FROM synthesis.graph_partitions
+                WHERE resolution = $1 AND id <> $2
+            """, partition.resolution, partition_id)
 
     # =========================================================================
     # CROSS-DOMAIN ANALYSIS
@@ -990,8 +1031,9 @@ class GraphEngine:
         """
         self._ensure_loaded()
 
-        node_count = len(self._nodes)
-        edge_count = sum(len(adj) for adj in self._adjacency.values())
+        csr = self._csr
+        node_count = csr.n
+        edge_count = csr.m
 
         if node_count == 0:
             return GraphStats(
@@ -1004,14 +1046,11 @@ class GraphEngine:
         max_edges = node_count * (node_count - 1)
         density = edge_count / max_edges if max_edges > 0 else 0.0
 
-        # Average degree
-        avg_degree = sum(n.degree for n in self._nodes.values()) / node_count
+        # Average degree (in + out)
+        avg_degree = 2 * edge_count / node_count
 
         # Cross-domain edge ratio (always compute - it's fast)
-        cross_domain_edges = sum(
-            1 for adj in self._adjacency.values()
-            for _, edge in adj if edge.cross_domain
-        )
+        cross_domain_edges = int(csr.cross_domain.sum())
         cross_domain_ratio = cross_domain_edges / edge_count if edge_count > 0 else 0.0
 
         # Skip expensive operations for large graphs or fast mode
@@ -0,0 +1,629 @@
+"""
+CIPHER Graph Snapshot
+On-disk columnar snapshot of the knowledge graph for GraphEngine.load_graph.
+
+Instead of re-fetching every claim and connection on each engine start:
+1. Node and edge columns (CSR order) are stored as .npy files and
+   memory-mapped at startup; strings and domain lists are offsets into
+   shared byte/int blobs, decoded only when a node is looked at
+2. Rows changed since the snapshot watermark (updated_at, plus the
+   deletion log of migration 007) are fetched and applied as a delta
+3. min_confidence filtering is a vector mask over the columns
+4. A refresher (GraphEngine.run_refresher) keeps a daemon's graph and the
+   on-disk snapshot current, so CLI commands start with a small delta, and
+   prunes the deletion log past DELETION_RETENTION (older snapshots reload)
+
+Environment:
+    CIPHER_GRAPH_SNAPSHOT=<dir>   snapshot directory (default ~/.cache/cipher/graph), "off" to disable
+
+Benchmark and checks on a synthetic graph:
+    python tools/graph_snapshot.py [claims] [connections]
+"""
+
+import fcntl
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from .graph_csr import CSRGraph, domain_bits
+except ImportError:  # run from tools/
+    from graph_csr import CSRGraph, domain_bits
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_DIR = Path.home() / ".cache" / "cipher" / "graph"
+SNAPSHOT_FORMAT = 1
+
+# Rows are re-read from (watermark - overlap): a transaction that commits
+# after the snapshot read can carry an older NOW(). Re-applying is idempotent.
+DELTA_OVERLAP = timedelta(minutes=10)
+
+# Deletion log entries older than this are purged; a snapshot whose watermark
+# is older than the retained log takes a full load instead of a delta.
+DELETION_RETENTION = timedelta(days=7)
+
+DEFAULT_CONFIDENCE = 0.5
+DEFAULT_STRENGTH = 0.5
+
+ARRAY_FIELDS = (
+    'ids', 'confidence', 'claim_type', 'domain_bits',
+    'domain_start', 'domain_end', 'domain_values', 'text_start', 'text_end', 'text',
+    'conn_ids', 'src', 'dst', 'strength', 'cross_domain', 'conn_type',
+    'reason_start', 'reason_end', 'reasoning',
+)
+
+CLAIM_COLUMNS = "id, claim_text, claim_type, domains, confidence"
+CONNECTION_COLUMNS = """id, source_claim_id, target_claim_id, connection_type,
+                       strength, cross_domain, reasoning"""
+
+
+def _int64(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.int64)
+
+
+def _pack_strings(values: Sequence[Optional[str]], offset: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(start, end, utf-8 blob); None -> start = end = -1."""
+    encoded = [v.encode('utf-8') if v is not None else b'' for v in values]
+    lengths = _int64([len(b) for b in encoded])
+    end = np.cumsum(lengths) + offset
+    start = end - lengths
+    missing = _int64([i for i, v in enumerate(values) if v is None])
+    start[missing] = -1
+    end[missing] = -1
+    return start, end, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+
+def _gather(start: np.ndarray, end: np.ndarray, blob: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Copy the referenced slices into a fresh contiguous blob (drops garbage)."""
+    present = start >= 0
+    lengths = np.where(present, end - start, 0)
+    new_end = np.cumsum(lengths)
+    new_start = new_end - lengths
+    total = int(lengths.sum())
+    positions = np.repeat(start[present] - new_start[present], lengths[present]) + np.arange(total)
+    return (np.where(present, new_start, -1), np.where(present, new_end, -1),
+            np.asarray(blob)[positions] if total else blob[:0].copy())
+
+
+def _codes(values: Sequence[str], names: List[str]) -> Tuple[np.ndarray, List[str]]:
+    """Type codes for values, extending names with unseen ones."""
+    names = list(names)
+    index = {name: i for i, name in enumerate(names)}
+    for value in values:
+        if value not in index:
+            index[value] = len(names)
+            names.append(value)
+    return np.fromiter((index[v] for v in values), dtype=np.int16, count=len(values)), names
+
+
+@dataclass
+class GraphSnapshot:
+    """
+    Columnar knowledge graph.
+
+    Node columns are over claim ids in ascending order; edge columns are in
+    CSR order (source position, target position, connection id). Claim text,
+    reasoning and domain lists are (start, end) offsets into shared blobs,
+    so column selections share the blobs instead of copying them.
+    confidence keeps NULL as NaN (the min_confidence filter is SQL's);
+    strength, connection and claim types are stored with load defaults.
+    """
+    ids: np.ndarray
+    confidence: np.ndarray
+    claim_type: np.ndarray
+    domain_bits: np.ndarray
+    domain_start: np.ndarray
+    domain_end: np.ndarray
+    domain_values: np.ndarray
+    text_start: np.ndarray
+    text_end: np.ndarray
+    text: np.ndarray
+    conn_ids: np.ndarray
+    src: np.ndarray
+    dst: np.ndarray
+    strength: np.ndarray
+    cross_domain: np.ndarray
+    conn_type: np.ndarray
+    reason_start: np.ndarray
+    reason_end: np.ndarray
+    reasoning: np.ndarray
+    claim_types: List[str] = field(default_factory=list)
+    conn_types: List[str] = field(default_factory=list)
+    watermark: Optional[datetime] = None
+
+    @property
+    def n(self) -> int:
+        return len(self.ids)
+
+    @property
+    def m(self) -> int:
+        return len(self.conn_ids)
+
+    @classmethod
+    def empty(cls) -> 'GraphSnapshot':
+        i64 = np.zeros(0, dtype=np.int64)
+        return cls(
+            ids=i64, confidence=np.zeros(0, np.float32), claim_type=np.zeros(0, np.int16),
+            domain_bits=np.zeros(0, np.uint64), domain_start=i64, domain_end=i64,
+            domain_values=np.zeros(0, np.int32), text_start=i64, text_end=i64, text=np.zeros(0, np.uint8),
+            conn_ids=i64, src=np.zeros(0, np.int32), dst=np.zeros(0, np.int32),
+            strength=np.zeros(0, np.float32), cross_domain=np.zeros(0, bool), conn_type=np.zeros(0, np.int16),
+            reason_start=i64, reason_end=i64, reasoning=np.zeros(0, np.uint8)
+        )
+
+    @classmethod
+    def from_rows(cls, claims: Sequence[Mapping], connections: Sequence[Mapping]) -> 'GraphSnapshot':
+        return cls.empty().apply(claims, connections)
+
+    # =========================================================================
+    # DELTAS
+    # =========================================================================
+
+    def apply(
+        self,
+        claims: Sequence[Mapping] = (),
+        connections: Sequence[Mapping] = (),
+        deleted_claims: Sequence[int] = (),
+        deleted_connections: Sequence[int] = ()
+    ) -> 'GraphSnapshot':
+        """
+        New snapshot with claim/connection rows upserted and deletions
+        applied. Connections whose endpoints are not (or no longer) claims
+        are dropped, as the full load does.
+        """
+        # ids are never reused: a deletion wins over an upsert of the same row
+        if len(deleted_claims):
+            dead = set(deleted_claims)
+            claims = [r for r in claims if r['id'] not in dead]
+        if len(deleted_connections):
+            dead = set(deleted_connections)
+            connections = [r for r in connections if r['id'] not in dead]
+
+        # ---- nodes: drop replaced/deleted rows, append new ones, sort by id
+        new_ids = _int64([r['id'] for r in claims])
+        gone = np.union1d(new_ids, _int64(deleted_claims))
+        keep = ~np.isin(self.ids, gone)
+
+        domain_lists = [[int(d) for d in (r['domains'] or []) if d is not None] for r in claims]
+        lengths = _int64([len(d) for d in domain_lists])
+        d_end = np.cumsum(lengths) + len(self.domain_values)
+        t_start, t_end, t_blob = _pack_strings([r['claim_text'] for r in claims], len(self.text))
+        types, claim_types = _codes([r['claim_type'] or 'unknown' for r in claims], self.claim_types)
+
+        ids = np.concatenate([self.ids[keep], new_ids])
+        order = np.argsort(ids, kind='stable')
+        nodes = {
+            'ids': ids,
+            'confidence': np.concatenate([self.confidence[keep], np.array(
+                [np.nan if r['confidence'] is None else r['confidence'] for r in claims], dtype=np.float32)]),
+            'claim_type': np.concatenate([self.claim_type[keep], types]),
+            'domain_bits': np.concatenate([self.domain_bits[keep], np.fromiter(
+                (domain_bits(d) for d in domain_lists), dtype=np.uint64, count=len(domain_lists))]),
+            'domain_start': np.concatenate([self.domain_start[keep], d_end - lengths]),
+            'domain_end': np.concatenate([self.domain_end[keep], d_end]),
+            'text_start': np.concatenate([self.text_start[keep], t_start]),
+            'text_end': np.concatenate([self.text_end[keep], t_end]),
+        }
+        nodes = {name: column[order] for name, column in nodes.items()}
+        ids = nodes['ids']
+
+        # ---- edges: kept ones stay in CSR order (the position remap is
+        # monotonic), new ones are sorted and merged in
+        n = len(ids)
+        old_to_new = np.full(self.n, -1, dtype=np.int64)
+        if self.n and n:
+            pos = np.minimum(np.searchsorted(ids, self.ids), n - 1)
+            old_to_new = np.where(ids[pos] == self.ids, pos, -1)
+
+        new_conn = _int64([r['id'] for r in connections])
+        gone = np.union1d(new_conn, _int64(deleted_connections))
+        keep = ~np.isin(self.conn_ids, gone)
+        src = old_to_new[self.src]
+        dst = old_to_new[self.dst]
+        keep &= (src >= 0) & (dst >= 0)
+        kept = {
+            'conn_ids': self.conn_ids[keep], 'src': src[keep], 'dst': dst[keep],
+            'strength': self.strength[keep], 'cross_domain': self.cross_domain[keep],
+            'conn_type': self.conn_type[keep], 'reason_start': self.reason_start[keep],
+            'reason_end': self.reason_end[keep],
+        }
+
+        r_start, r_end, r_blob = _pack_strings([r['reasoning'] for r in connections], len(self.reasoning))
+        ctypes, conn_types = _codes([r['connection_type'] or 'related' for r in connections], self.conn_types)
+        src_ids = _int64([r['source_claim_id'] for r in connections])
+        dst_ids = _int64([r['target_claim_id'] for r in connections])
+        src = np.minimum(np.searchsorted(ids, src_ids), max(n - 1, 0))
+        dst = np.minimum(np.searchsorted(ids, dst_ids), max(n - 1, 0))
+        valid = (ids[src] == src_ids) & (ids[dst] == dst_ids) if n else np.zeros(len(src_ids), bool)
+        added = {
+            'conn_ids': new_conn, 'src': src, 'dst': dst,
+            'strength': np.array([r['strength'] or DEFAULT_STRENGTH for r in connections], dtype=np.float32),
+            'cross_domain': np.array([bool(r['cross_domain']) for r in connections], dtype=bool),
+            'conn_type': ctypes, 'reason_start': r_start, 'reason_end': r_end,
+        }
+        order = np.flatnonzero(valid)
+        order = order[np.lexsort((new_conn[order], dst[order], src[order]))]
+        added = {name: column[order] for name, column in added.items()}
+
+        # insertion points in (src, dst, conn_id) order
+        kept_key = kept['src'] * n + kept['dst']
+        added_key = added['src'] * n + added['dst']
+        at = np.searchsorted(kept_key, added_key, side='left')
+        ties = np.flatnonzero(np.searchsorted(kept_key, added_key, side='right') > at)
+        for i in ties.tolist():  # same claim pair, another connection type: rare
+            j = at[i]
+            while j < len(kept_key) and kept_key[j] == added_key[i] and kept['conn_ids'][j] < added['conn_ids'][i]:
+                j += 1
+            at[i] = j
+        edges = {name: np.insert(kept[name], at, added[name]) for name in kept}
+        edges['src'] = edges['src'].astype(np.int32)
+        edges['dst'] = edges['dst'].astype(np.int32)
+
+        return GraphSnapshot(
+            **nodes,
+            **edges,
+            domain_values=np.concatenate([self.domain_values, np.fromiter(
+                (d for ds in domain_lists for d in ds), dtype=np.int32, count=int(lengths.sum()))]),
+            text=np.concatenate([self.text, t_blob]),
+            reasoning=np.concatenate([self.reasoning, r_blob]),
+            claim_types=claim_types,
+            conn_types=conn_types,
+            watermark=self.watermark
+        )
+
+    # =========================================================================
+    # VIEWS
+    # =========================================================================
+
+    def select(self, min_confidence: float = 0.0) -> 'GraphSnapshot':
+        """Claims with confidence >= min_confidence (NULL excluded) and the edges between them."""
+        keep = self.confidence >= min_confidence
+        if keep.all():
+            return self
+        position = np.cumsum(keep) - 1
+        edges = keep[self.src] & keep[self.dst]
+        return replace(
+            self,
+            ids=self.ids[keep], confidence=self.confidence[keep], claim_type=self.claim_type[keep],
+            domain_bits=self.domain_bits[keep], domain_start=self.domain_start[keep],
+            domain_end=self.domain_end[keep], text_start=self.text_start[keep], text_end=self.text_end[keep],
+            conn_ids=self.conn_ids[edges], src=position[self.src[edges]].astype(np.int32),
+            dst=position[self.dst[edges]].astype(np.int32), strength=self.strength[edges],
+            cross_domain=self.cross_domain[edges], conn_type=self.conn_type[edges],
+            reason_start=self.reason_start[edges], reason_end=self.reason_end[edges]
+        )
+
+    def node_confidence(self) -> np.ndarray:
+        """Confidence as GraphNode reports it (NULL or 0 -> 0.5)."""
+        conf = self.confidence
+        return np.where(np.isnan(conf) | (conf == 0), DEFAULT_CONFIDENCE, conf).astype(np.float32)
+
+    def csr(self) -> CSRGraph:
+        """CSR snapshot for GraphEngine (edge p of the CSR is edge p here)."""
+        indptr = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.src, minlength=self.n), out=indptr[1:])
+        return CSRGraph(
+            ids=self.ids,
+            indptr=indptr,
+            indices=self.dst,
+            strength=self.strength,
+            cross_domain=self.cross_domain,
+            conn_type=self.conn_type,
+            type_names=self.conn_types,
+            node_domains=self.domain_bits,
+            confidence=self.node_confidence()
+        )
+
+    def claim_text(self, i: int) -> str:
+        return bytes(self.text[self.text_start[i]:self.text_end[i]]).decode('utf-8')
+
+    def edge_reasoning(self, e: int) -> Optional[str]:
+        if self.reason_start[e] < 0:
+            return None
+        return bytes(self.reasoning[self.reason_start[e]:self.reason_end[e]]).decode('utf-8')
+
+    def domains(self, i: int) -> List[int]:
+        return self.domain_values[self.domain_start[i]:self.domain_end[i]].tolist()
+
+    def compact(self) -> 'GraphSnapshot':
+        """Copy with blobs holding only referenced bytes (before saving)."""
+        d_start, d_end, d_values = _gather(self.domain_start, self.domain_end, self.domain_values)
+        t_start, t_end, text = _gather(self.text_start, self.text_end, self.text)
+        r_start, r_end, reasoning = _gather(self.reason_start, self.reason_end, self.reasoning)
+        return replace(self, domain_start=d_start, domain_end=d_end, domain_values=d_values,
+                       text_start=t_start, text_end=t_end, text=text,
+                       reason_start=r_start, reason_end=r_end, reasoning=reasoning)
+
+
+# =============================================================================
+# ON-DISK STORE
+# =============================================================================
+
+class SnapshotStore:
+    """
+    Snapshot generations under one directory. Each save writes a new
+    generation directory and then swaps the CURRENT pointer, so readers
+    (which memory-map) never see a partial snapshot. Saves from several
+    processes (daemon, CLI) are serialized by a flock on LOCK.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def load(self, attempts: int = 3) -> Optional[GraphSnapshot]:
+        """Memory-map the current generation (None if absent or unreadable).
+
+        A concurrent save may remove the generation between reading CURRENT
+        and mapping its files; the pointer is then re-read.
+        """
+        for _ in range(attempts):
+            try:
+                generation = (self.directory / "CURRENT").read_text().strip()
+                path = self.directory / generation
+                meta = json.loads((path / "meta.json").read_text())
+                if meta.get('format') != SNAPSHOT_FORMAT:
+                    return None
+                arrays = {name: np.load(path / f"{name}.npy", mmap_mode='r') for name in ARRAY_FIELDS}
+                break
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError) as e:
+                logger.warning(f"Graph snapshot unreadable, reloading: {e}")
+                return None
+        else:
+            return None
+        return GraphSnapshot(
+            **arrays,
+            claim_types=meta['claim_types'],
+            conn_types=meta['conn_types'],
+            watermark=datetime.fromisoformat(meta['watermark']) if meta.get('watermark') else None
+        )
+
+    def save(self, snapshot: GraphSnapshot):
+        snapshot = snapshot.compact()
+        with open(self.directory / "LOCK", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            current = self._current_watermark()
+            if current and (snapshot.watermark is None or current > snapshot.watermark):
+                return  # a concurrent save already stored a newer graph
+            path = Path(tempfile.mkdtemp(prefix="g", dir=self.directory))
+            for name in ARRAY_FIELDS:
+                np.save(path / f"{name}.npy", np.ascontiguousarray(getattr(snapshot, name)))
+            (path / "meta.json").write_text(json.dumps({
+                'format': SNAPSHOT_FORMAT,
+                'watermark': snapshot.watermark.isoformat() if snapshot.watermark else None,
+                'claim_types': snapshot.claim_types,
+                'conn_types': snapshot.conn_types,
+                'nodes': snapshot.n,
+                'edges': snapshot.m,
+            }))
+            pointer = self.directory / "CURRENT.tmp"
+            pointer.write_text(path.name)
+            os.replace(pointer, self.directory / "CURRENT")
+
+            # older generations (open memory maps stay valid after unlink)
+            for old in self.directory.iterdir():
+                if old.is_dir() and old != path:
+                    shutil.rmtree(old, ignore_errors=True)
+
+    def _current_watermark(self) -> Optional[datetime]:
+        try:
+            generation = (self.directory / "CURRENT").read_text().strip()
+            meta = json.loads((self.directory / generation / "meta.json").read_text())
+        except (OSError, ValueError):
+            return None
+        if meta.get('format') != SNAPSHOT_FORMAT or not meta.get('watermark'):
+            return None
+        return datetime.fromisoformat(meta['watermark'])
+
+
+_store: Optional[SnapshotStore] = None
+_store_checked = False
+
+
+def get_snapshot_store() -> Optional[SnapshotStore]:
+    """Process-wide store (None if CIPHER_GRAPH_SNAPSHOT=off or the directory is unusable)."""
+    global _store, _store_checked
+    if not _store_checked:
+        _store_checked = True
+        setting = os.getenv("CIPHER_GRAPH_SNAPSHOT", "")
+        if setting.lower() not in ("off", "0", "false"):
+            try:
+                _store = SnapshotStore(Path(setting) if setting else DEFAULT_SNAPSHOT_DIR)
+            except OSError as e:
+                logger.warning(f"Graph snapshot disabled: {e}")
+    return _store
+
+
+# =============================================================================
+# DATABASE SYNC
+# =============================================================================
+
+async def has_change_tracking(conn) -> bool:
+    """Migration 007 applied (updated_at triggers and deletion log)."""
+    return await conn.fetchval("SELECT to_regclass('synthesis.graph_deletions') IS NOT NULL")
+
+
+async def purge_deletions(conn, retention: timedelta = DELETION_RETENTION) -> int:
+    """Drop deletion log entries older than retention. Returns rows removed."""
+    status = await conn.execute(
+        "DELETE FROM synthesis.graph_deletions WHERE deleted_at < LOCALTIMESTAMP - $1::interval", retention)
+    return int(status.split()[-1])
+
+
+async def sync_snapshot(
+    conn,
+    snapshot: Optional[GraphSnapshot],
+    tracked: Optional[bool] = None
+) -> Tuple[GraphSnapshot, Dict[str, Any]]:
+    """
+    Bring a snapshot up to date with the database.
+
+    No snapshot (or no change tracking, or a watermark older than the
+    retained deletion log): full load. Otherwise only claims and connections
+    updated since the watermark, and the deletions logged since then, are
+    read and applied.
+    Returns (snapshot, stats) with stats['mode'] in 'full', 'delta'.
+    """
+    t0 = time.perf_counter()
+    if tracked is None:
+        tracked = await has_change_tracking(conn)
+    full = snapshot is None or snapshot.watermark is None or not tracked
+
+    async with conn.transaction(isolation='repeatable_read', readonly=True):
+        watermark = await conn.fetchval("SELECT LOCALTIMESTAMP") if tracked else None
+        if not full and snapshot.watermark - DELTA_OVERLAP < watermark - DELETION_RETENTION:
+            full = True  # deletions since then may already be purged
+        if full:
+            claims = await conn.fetch(f"SELECT {CLAIM_COLUMNS} FROM synthesis.claims")
+            connections = await conn.fetch(f"SELECT {CONNECTION_COLUMNS} FROM synthesis.connections")
+            deleted_claims, deleted_connections = [], []
+        else:
+            since = snapshot.watermark - DELTA_OVERLAP
+            claims = await conn.fetch(
+                f"SELECT {CLAIM_COLUMNS} FROM synthesis.claims WHERE updated_at > $1", since)
+            connections = await conn.fetch(
+                f"SELECT {CONNECTION_COLUMNS} FROM synthesis.connections WHERE updated_at > $1", since)
+            deletions = await conn.fetch("""
+                SELECT table_name, row_id FROM synthesis.graph_deletions WHERE deleted_at > $1
+            """, since)
+            deleted_claims = [r['row_id'] for r in deletions if r['table_name'] == 'claims']
+            deleted_connections = [r['row_id'] for r in deletions if r['table_name'] == 'connections']
+
+    if full:
+        result = GraphSnapshot.from_rows(claims, connections)
+    elif claims or connections or deleted_claims or deleted_connections:
+        result = snapshot.apply(claims, connections, deleted_claims, deleted_connections)
+    else:
+        result = snapshot
+    result.watermark = watermark
+
+    return result, {
+        'mode': 'full' if full else 'delta',
+        'claims': len(claims),
+        'connections': len(connections),
+        'deleted': len(deleted_claims) + len(deleted_connections),
+        'changed': full or result is not snapshot,
+        'seconds': time.perf_counter() - t0,
+    }
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def synthetic_rows(claims: int, connections: int, seed: int = 5) -> Tuple[List[dict], List[dict]]:
+    rng = np.random.default_rng(seed)
+    types = ['finding', 'hypothesis', 'method', None]
+    conf = rng.uniform(0, 1, size=claims).round(3)
+    claim_rows = [
+        {'id': i + 1, 'claim_text': f"claim {i} about ∂ndomain {i % 97}", 'claim_type': types[i % 4],
+         'domains': [int(d) for d in rng.integers(1, 8, size=i % 3)] or None,
+         'confidence': None if i % 50 == 0 else float(conf[i])}
+        for i in range(claims)
+    ]
+    src = rng.integers(1, claims + 1, size=connections)
+    dst = rng.integers(1, claims + 1, size=connections)
+    strength = rng.uniform(0, 1, size=connections).round(3)
+    ctypes = ['supports', 'extends', 'contradicts', None]
+    conn_rows = [
+        {'id': j + 1, 'source_claim_id': int(src[j]), 'target_claim_id': int(dst[j]),
+         'connection_type': ctypes[j % 4], 'strength': float(strength[j]), 'cross_domain': j % 3 == 0,
+         'reasoning': None if j % 2 else f"because {j}"}
+        for j in range(connections)
+    ]
+    return claim_rows, conn_rows
+
+
+def _same(a: GraphSnapshot, b: GraphSnapshot) -> bool:
+    """Equal graphs (blob layout may differ)."""
+    a, b = a.compact(), b.compact()
+    a_types = np.asarray(a.conn_types, dtype=object)[a.conn_type] if a.m else []
+    b_types = np.asarray(b.conn_types, dtype=object)[b.conn_type] if b.m else []
+    return (np.array_equal(a.ids, b.ids) and np.array_equal(a.src, b.src) and np.array_equal(a.dst, b.dst)
+            and np.array_equal(a.conn_ids, b.conn_ids) and np.array_equal(a.strength, b.strength)
+            and np.array_equal(a.confidence, b.confidence, equal_nan=True)
+            and np.array_equal(a.text, b.text) and np.array_equal(a.reasoning, b.reasoning)
+            and np.array_equal(a.domain_values, b.domain_values) and np.array_equal(a.domain_bits, b.domain_bits)
+            and list(a_types) == list(b_types))
+
+
+def benchmark(claims: int = 500000, connections: int = 2000000) -> bool:
+    checks = []
+    claim_rows, conn_rows = synthetic_rows(claims, connections)
+    print(f"Synthetic graph: {claims:,} claims, {connections:,} connections")
+
+    t0 = time.perf_counter()
+    snapshot = GraphSnapshot.from_rows(claim_rows, conn_rows)
+    print(f"  build from rows     {time.perf_counter() - t0:6.2f}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SnapshotStore(Path(tmp))
+        t0 = time.perf_counter()
+        store.save(snapshot)
+        print(f"  save                {time.perf_counter() - t0:6.2f}s")
+
+        t0 = time.perf_counter()
+        loaded = store.load()
+        view = loaded.select(0.0)
+        csr = view.csr()
+        cold = time.perf_counter() - t0
+        print(f"  mmap load + CSR     {cold:6.3f}s  ({csr.n:,} nodes, {csr.m:,} edges)")
+        checks.append(("cold start under a second", cold < 1.0))
+        checks.append(("loaded snapshot equals the built one", _same(loaded, snapshot)))
+
+        # delta: 1% updated claims, new claims and connections, some deletions
+        rng = np.random.default_rng(1)
+        updated = [dict(claim_rows[i], confidence=0.99, claim_text=f"revised {i}")
+                   for i in rng.choice(claims, size=claims // 100, replace=False).tolist()]
+        added = [dict(claim_rows[0], id=claims + k + 1, confidence=0.8) for k in range(1000)]
+        new_conn = [dict(conn_rows[0], id=connections + k + 1, source_claim_id=claims + k + 1,
+                         target_claim_id=k + 1) for k in range(1000)]
+        deleted = rng.choice(np.arange(1, claims + 1), size=100, replace=False).tolist()
+        deleted_conn = rng.choice(np.arange(1, connections + 1), size=1000, replace=False).tolist()
+
+        t0 = time.perf_counter()
+        delta = loaded.apply(updated + added, new_conn, deleted, deleted_conn)
+        print(f"  delta apply         {time.perf_counter() - t0:6.2f}s  "
+              f"({len(updated) + len(added):,} claims, {len(new_conn):,} connections, "
+              f"{len(deleted) + len(deleted_conn):,} deletions)")
+
+        by_id = {r['id']: r for r in claim_rows}
+        for row in updated + added:
+            by_id[row['id']] = row
+        for claim_id in deleted:
+            by_id.pop(claim_id, None)
+        dead = set(deleted_conn)
+        expected = GraphSnapshot.from_rows(list(by_id.values()),
+                                           [r for r in conn_rows if r['id'] not in dead] + new_conn)
+        checks.append(("delta equals a full rebuild", _same(delta, expected)))
+
+        filtered = delta.select(0.5)
+        keep = {r['id'] for r in by_id.values() if r['confidence'] is not None and r['confidence'] >= 0.5}
+        checks.append(("min_confidence mask matches the SQL filter", set(filtered.ids.tolist()) == keep))
+        checks.append(("filtered edges join kept claims only",
+                       bool(np.isin(filtered.ids[filtered.src], list(keep)).all())))
+        sample = int(filtered.ids[3])
+        checks.append(("claim text decodes after selection", filtered.claim_text(3) == by_id[sample]['claim_text']))
+
+    for name, ok in checks:
+        print(f"  {'ok  ' if ok else 'FAIL'} {name}")
+    return all(ok for _, ok in checks)
+
+
+if __name__ == "__main__":
+    n_claims = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    n_connections = int(sys.argv[2]) if len(sys.argv) > 2 else 2000000
+    sys.exit(0 if benchmark(n_claims, n_connections) else 1)
@@ -10,8 +10,11 @@ from datetime import datetime
 from pathlib import Path
 from collections import Counter
 
+from .segments import SegmentLog
+
 BILE_DIR = Path("/opt/flow-chat/corps/digestion")
 BILE_DIR.mkdir(exist_ok=True)
+DIGEST_RETENTION_DAYS = 30
 
 class Bile:
     def __init__(self):
@@ -21,6 +24,8 @@ class Bile:
             'protease': self.decomposer_proteines,  # extrait les concepts
             'amylase': self.decomposer_sucres    # simplifie le complexe
         }
+        # digestions: segments horaires (BILE_DIR/digest-*.seg)
+        self.journal = SegmentLog(BILE_DIR, 'digest', retention_days=DIGEST_RETENTION_DAYS)
 
     def decomposer_gras(self, text):
         """enlève le gras = le verbeux inutile"""
@@ -67,11 +72,14 @@ class Bile:
         }
 
         # sauvegarder
-        digest_file = BILE_DIR / f"digest_{int(datetime.now().timestamp())}.json"
-        digest_file.write_text(json.dumps(nutriments, indent=2, ensure_ascii=False))
+        self.journal.append(nutriments)
 
         return nutriments
 
+    def digestions(self, start=None, end=None):
+        """relit les digestions entre deux instants: (timestamp, nutriments)"""
+        return self.journal.iter_range(start, end)
+
     def acidite(self):
         """retourne le pH actuel"""
         return self.ph
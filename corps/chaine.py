@@ -20,6 +20,8 @@ Cryptographie:
 
 Fichiers:
 - Chaîne: /opt/flow-chat/adn/chaine.jsonl (un bloc JSON par ligne)
+- Index: /opt/flow-chat/adn/chaine.idx (offsets, mmap) + chaine_paths.sqlite
+- Checkpoints: /opt/flow-chat/adn/chaine_checkpoints.jsonl (Merkle signés)
 - Clés: /opt/flow-chat/adn/pqc_keys.json (privée + publique)
 
 Communication:
@@ -28,7 +30,8 @@ Communication:
 
 API [EXEC:chaine]:
 - status              État de la chaîne
-- verify              Vérifier intégrité + signatures
+- verify              Vérifier depuis le dernier checkpoint
+- audit               Vérifier toute la chaîne (parallèle)
 - history [path]      Historique des blocs
 - sync                Synchroniser avec intégrité
 - add <act> <path>    Ajouter un bloc manuellement
@@ -36,10 +39,18 @@ API [EXEC:chaine]:
 
 import os
 import json
+import mmap
+import fcntl
+import struct
+import sqlite3
 import secrets
 import hashlib
+import threading
 from pathlib import Path
 from datetime import datetime
+from contextlib import contextmanager
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Optional
 from dataclasses import dataclass, asdict
 
@@ -249,6 +260,125 @@ class Block:
         return keypair.verify(self.block_hash, self.signature)
 
 
+# =============================================================================
+# STOCKAGE: SEGMENT + INDEX + CHECKPOINTS
+# =============================================================================
+
+_OFFSET = struct.Struct("<Q")  # un offset (uint64) par bloc dans chaine.idx
+
+
+def _parse_block(line: bytes) -> Block:
+    """Désérialise une ligne JSONL du segment."""
+    return Block(**json.loads(line))
+
+
+def merkle_root(hashes: List[str]) -> str:
+    """
+    Racine de Merkle SHAKE256 d'une liste de block_hash.
+
+    Niveau impair: le dernier hash est dupliqué (comme Bitcoin).
+    """
+    if not hashes:
+        return hash_pqc("")
+    level = list(hashes)
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [hash_pqc(level[i] + level[i + 1]) for i in range(0, len(level), 2)]
+    return level[0]
+
+
+def _checkpoint_digest(cp: Dict) -> str:
+    """Message signé d'un checkpoint."""
+    return hash_pqc(f"{cp['start']}{cp['upto']}{cp['root']}{cp['last_hash']}{cp['timestamp']}")
+
+
+def _audit_segment(chain_file: str, start: int, end: int, first_index: int) -> Dict:
+    """
+    Vérifie une tranche d'octets du segment [start, end).
+
+    Exécuté dans un process du pool pour les audits complets: relit la
+    tranche lui-même (rien de lourd à sérialiser), recalcule hashs et
+    signatures, vérifie le chaînage interne et calcule la racine Merkle.
+    Le chaînage entre tranches est vérifié par l'appelant via
+    first_prev/last_hash.
+    """
+    with open(chain_file, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    errors = []
+    hashes = []
+    first_prev = None
+    prev = None
+    i = first_index
+    for line in data.split(b'\n'):
+        if not line.strip():
+            continue
+        try:
+            block = _parse_block(line)
+        except (ValueError, TypeError):
+            errors.append(f"Block {i}: unreadable")
+            i += 1
+            continue
+
+        if block.compute_hash() != block.block_hash:
+            errors.append(f"Block {i}: hash mismatch")
+        if prev is None:
+            first_prev = block.prev_hash
+        elif block.prev_hash != prev:
+            errors.append(f"Block {i}: chain broken")
+        if block.signature and not block.verify_signature(flow_keys):
+            errors.append(f"Block {i}: invalid signature")
+
+        prev = block.block_hash
+        hashes.append(prev)
+        i += 1
+
+    return {
+        "errors": errors,
+        "first_prev": first_prev,
+        "last_hash": prev,
+        "root": merkle_root(hashes),
+        "count": len(hashes),
+    }
+
+
+class BlockView(Sequence):
+    """
+    Vue paresseuse sur les blocs de la chaîne.
+
+    Remplace l'ancienne liste en mémoire: len(), indexation et slices
+    lisent le segment via l'index d'offsets, sans charger la chaîne.
+    """
+
+    ITER_CHUNK = 4096
+
+    def __init__(self, chaine: "Chaine"):
+        self._chaine = chaine
+
+    def __len__(self) -> int:
+        return self._chaine._length()
+
+    def __getitem__(self, key):
+        n = len(self)
+        if isinstance(key, slice):
+            start, stop, step = key.indices(n)
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return self._chaine._read_range(start, stop)
+        if key < 0:
+            key += n
+        if not 0 <= key < n:
+            raise IndexError("block index out of range")
+        return self._chaine._read_block(key)
+
+    def __iter__(self):
+        n = len(self)
+        for start in range(0, n, self.ITER_CHUNK):
+            yield from self._chaine._read_range(start, min(start + self.ITER_CHUNK, n))
+
+
 # =============================================================================
 # BLOCKCHAIN
 # =============================================================================
@@ -263,41 +393,332 @@ class Chaine:
     - Signée: chaque bloc est signé asymétriquement
     - Vérifiable: on peut vérifier toute la chaîne
 
-    Fichier:
-        /opt/flow-chat/adn/chaine.jsonl
-        Format JSONL (un objet JSON par ligne) pour append efficace
+    Stockage (coût constant au démarrage, quelle que soit la taille):
+    - chaine.jsonl: segment append-only, un bloc JSON par ligne
+    - chaine.idx: offset (uint64) de chaque bloc, lu par mmap
+    - chaine_paths.sqlite: index secondaire path → blocs (get_history)
+    - chaine_checkpoints.jsonl: racine Merkle signée tous les
+      CHECKPOINT_EVERY blocs; la vérification de routine repart du
+      dernier checkpoint de confiance, l'audit complet (full=True)
+      revérifie tout en parallèle
+
+    Seul le dernier bloc est gardé en mémoire. Les index sont rattrapés
+    depuis le segment s'ils sont en retard (crash, autre process, ancienne
+    chaîne sans index).
+
+    Plusieurs process (daemon, veille) partagent ces fichiers: toute
+    écriture (segment, chaine.idx, checkpoints) se fait sous flock sur
+    chaine.idx, après relecture de sa longueur.
     """
 
     CHAIN_FILE = "/opt/flow-chat/adn/chaine.jsonl"
+    INDEX_FILE = "/opt/flow-chat/adn/chaine.idx"
+    PATHS_FILE = "/opt/flow-chat/adn/chaine_paths.sqlite"
+    CHECKPOINTS_FILE = "/opt/flow-chat/adn/chaine_checkpoints.jsonl"
     GENESIS_HASH = "0" * 128  # 512 bits de zéros pour le premier bloc
+    CHECKPOINT_EVERY = 1000   # blocs par checkpoint Merkle
 
     def __init__(self):
-        """Charge la chaîne ou crée le bloc genesis."""
-        self.blocks: List[Block] = []
+        """Ouvre le stockage ou crée le bloc genesis."""
+        self.blocks = BlockView(self)
+        self._lock = threading.RLock()
+        self._count = 0                    # blocs indexés
+        self._size = 0                     # octets du segment couverts par l'index
+        self._last: Optional[Block] = None
+        self._checkpoints: List[Dict] = []
+        self._checkpoints_size = 0
+        self._checkpoint_blocked = -1      # début d'un segment refusé au checkpoint
+        self._idx_mm: Optional[mmap.mmap] = None
+        self._idx_mapped = 0
+        self._flocked = False
         self._load()
-        if not self.blocks:
-            self._create_genesis()
+
+    # -------------------------------------------------------------------------
+    # Chargement / rattrapage des index
+    # -------------------------------------------------------------------------
 
     def _load(self):
-        """Charge la chaîne depuis le fichier JSONL."""
-        chain_path = Path(self.CHAIN_FILE)
-        if not chain_path.exists():
+        """Ouvre segment + index, rattrape ce qui manque à l'index."""
+        Path(self.CHAIN_FILE).parent.mkdir(parents=True, exist_ok=True)
+        Path(self.CHAIN_FILE).touch(exist_ok=True)
+        Path(self.INDEX_FILE).touch(exist_ok=True)
+
+        self._seg_fd = os.open(self.CHAIN_FILE, os.O_RDONLY)
+        self._idx_out = open(self.INDEX_FILE, 'ab')
+        self._paths = sqlite3.connect(self.PATHS_FILE, check_same_thread=False)
+        self._paths.execute("PRAGMA journal_mode=WAL")
+        self._paths.execute("PRAGMA synchronous=NORMAL")
+        self._paths.execute("""
+            CREATE TABLE IF NOT EXISTS block_paths (
+                path TEXT, idx INTEGER, PRIMARY KEY (path, idx)
+            ) WITHOUT ROWID
+        """)
+        self._paths.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        self._paths.commit()
+
+        with self._index_lock():
+            self._load_checkpoints()
+
+            idx_size = os.path.getsize(self.INDEX_FILE)
+            n = idx_size // _OFFSET.size
+            if idx_size % _OFFSET.size:
+                os.truncate(self.INDEX_FILE, n * _OFFSET.size)  # écriture interrompue
+
+            if n:
+                self._map_index()
+                last_offset = self._offset(n - 1)
+                line = self._read_line(last_offset)
+                if line is None:
+                    print("[chaine] Index incohérent avec le segment, reconstruction")
+                    self._reset_index()
+                else:
+                    try:
+                        self._last = _parse_block(line)
+                        self._count = n
+                        self._size = last_offset + len(line) + 1
+                    except (ValueError, TypeError):
+                        print("[chaine] Index incohérent avec le segment, reconstruction")
+                        self._reset_index()
+
+            self._catch_up(truncate_partial=True)
+            self._index_paths()
+            self._checkpoint_backlog()
+            if not self._count:
+                self._create_genesis()
+
+    def _load_checkpoints(self):
+        """(Re)lit les checkpoints (quelques milliers de lignes au plus)."""
+        self._checkpoints = []
+        cp_path = Path(self.CHECKPOINTS_FILE)
+        if not cp_path.exists():
+            self._checkpoints_size = 0
             return
+        data = cp_path.read_bytes()
+        self._checkpoints_size = len(data)
+        for line in data.split(b'\n'):
+            if line.strip():
+                try:
+                    self._checkpoints.append(json.loads(line))
+                except ValueError:
+                    print("[chaine] Checkpoint illisible ignoré")
+
+    @contextmanager
+    def _index_lock(self):
+        """Verrou inter-process sur chaine.idx (réentrant dans ce process)."""
+        if self._flocked:
+            yield
+            return
+        fcntl.flock(self._idx_out.fileno(), fcntl.LOCK_EX)
+        self._flocked = True
+        try:
+            yield
+        finally:
+            self._flocked = False
+            fcntl.flock(self._idx_out.fileno(), fcntl.LOCK_UN)
 
+    def _adopt_index(self):
+        """
+        Aligne l'état en mémoire sur chaine.idx (sous verrou): un autre
+        process a pu indexer des blocs depuis notre dernière lecture, ou
+        reconstruire l'index.
+        """
+        n = os.fstat(self._idx_out.fileno()).st_size // _OFFSET.size
+        if n == self._count:
+            return
+        self._map_index()
+        if not n:
+            self._count, self._size, self._last = 0, 0, None
+            return
+        offset = self._offset(n - 1)
+        line = self._read_line(offset)
         try:
-            for line in chain_path.read_text().strip().split('\n'):
-                if line:
-                    data = json.loads(line)
-                    block = Block(**data)
-                    self.blocks.append(block)
-        except (json.JSONDecodeError, TypeError) as e:
-            print(f"[chaine] Load error: {e}")
-
-    def _save_block(self, block: Block):
-        """Ajoute un bloc au fichier (append)."""
-        Path(self.CHAIN_FILE).parent.mkdir(parents=True, exist_ok=True)
-        with open(self.CHAIN_FILE, 'a') as f:
-            f.write(json.dumps(asdict(block)) + '\n')
+            self._last = _parse_block(line)
+        except (ValueError, TypeError):
+            print("[chaine] Index incohérent avec le segment, reconstruction")
+            self._reset_index()
+            return
+        self._count = n
+        self._size = offset + len(line) + 1
+
+    def _reset_index(self):
+        """Vide les index dérivés (le segment reste la source de vérité)."""
+        self._idx_out.truncate(0)
+        self._idx_out.flush()
+        self._map_index()
+        self._paths.execute("DELETE FROM block_paths")
+        self._paths.execute("DELETE FROM meta")
+        self._paths.commit()
+        self._count = 0
+        self._size = 0
+        self._last = None
+
+    def _catch_up(self, truncate_partial: bool = False):
+        """
+        Indexe les blocs du segment au-delà de self._size.
+
+        Une dernière ligne sans '\\n' est une écriture interrompue (crash):
+        elle est ignorée, et tronquée au démarrage.
+        """
+        with self._index_lock():
+            self._adopt_index()
+            self._index_segment(truncate_partial)
+
+    def _index_segment(self, truncate_partial: bool):
+        offsets = bytearray()
+        paths = []
+        pos = self._size
+        with open(self.CHAIN_FILE, 'rb') as f:
+            f.seek(pos)
+            tail = b""
+            for chunk in iter(lambda: f.read(1 << 22), b""):
+                lines = (tail + chunk).split(b'\n')
+                tail = lines.pop()
+                for line in lines:
+                    start = pos
+                    pos += len(line) + 1
+                    if not line.strip():
+                        continue
+                    try:
+                        block = _parse_block(line)
+                    except (ValueError, TypeError) as e:
+                        print(f"[chaine] Load error at byte {start}: {e}")
+                        continue
+                    offsets += _OFFSET.pack(start)
+                    paths.append((block.path, self._count))
+                    self._count += 1
+                    self._last = block
+
+        if tail and truncate_partial:
+            print(f"[chaine] Bloc partiel tronqué ({len(tail)} octets)")
+            os.truncate(self.CHAIN_FILE, pos)
+        self._size = pos
+
+        if offsets:
+            self._idx_out.write(offsets)
+            self._idx_out.flush()
+            self._add_paths(paths)
+
+    def _index_paths(self):
+        """Rattrape l'index path → blocs s'il est en retard sur chaine.idx."""
+        row = self._paths.execute("SELECT value FROM meta WHERE key = 'indexed'").fetchone()
+        indexed = row[0] if row else 0
+        if indexed > self._count:
+            self._paths.execute("DELETE FROM block_paths WHERE idx >= ?", (self._count,))
+            self._set_indexed(self._count)
+            self._paths.commit()
+        for start in range(indexed, self._count, BlockView.ITER_CHUNK):
+            end = min(start + BlockView.ITER_CHUNK, self._count)
+            self._add_paths([(b.path, start + i) for i, b in enumerate(self._read_range(start, end))])
+
+    def _add_paths(self, rows: List[tuple]):
+        self._paths.executemany("INSERT OR IGNORE INTO block_paths VALUES (?, ?)", rows)
+        self._set_indexed(self._count)
+        self._paths.commit()
+
+    def _set_indexed(self, count: int):
+        self._paths.execute("INSERT OR REPLACE INTO meta VALUES ('indexed', ?)", (count,))
+
+    def _refresh(self):
+        """Rattrape les blocs ajoutés par un autre process (un fstat si rien)."""
+        size = os.fstat(self._seg_fd).st_size
+        if size != self._size:
+            with self._index_lock():
+                if size < self._size:
+                    print("[chaine] Segment raccourci, reconstruction de l'index")
+                    self._reset_index()
+                self._catch_up()
+        self._refresh_checkpoints()
+
+    def _refresh_checkpoints(self):
+        cp_path = Path(self.CHECKPOINTS_FILE)
+        cp_size = cp_path.stat().st_size if cp_path.exists() else 0
+        if cp_size != self._checkpoints_size:
+            self._load_checkpoints()
+
+    # -------------------------------------------------------------------------
+    # Lecture
+    # -------------------------------------------------------------------------
+
+    def _map_index(self):
+        """(Re)mappe chaine.idx après croissance."""
+        if self._idx_mm is not None:
+            self._idx_mm.close()
+        self._idx_mm = None
+        self._idx_mapped = 0
+        size = os.path.getsize(self.INDEX_FILE)
+        if size:
+            with open(self.INDEX_FILE, 'rb') as f:
+                self._idx_mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._idx_mapped = size // _OFFSET.size
+
+    def _offset(self, i: int) -> int:
+        if i >= self._idx_mapped:
+            self._map_index()
+        return _OFFSET.unpack_from(self._idx_mm, i * _OFFSET.size)[0]
+
+    def _end_offset(self, i: int) -> int:
+        """Fin (exclusive) du bloc i-1, c'est-à-dire début du bloc i."""
+        return self._offset(i) if i < self._count else self._size
+
+    def _read_line(self, offset: int) -> Optional[bytes]:
+        """Lit une ligne complète à partir d'un offset (None si incomplète)."""
+        parts = []
+        pos = offset
+        while True:
+            chunk = os.pread(self._seg_fd, 65536, pos)
+            if not chunk:
+                return None
+            nl = chunk.find(b'\n')
+            if nl >= 0:
+                parts.append(chunk[:nl])
+                return b''.join(parts)
+            parts.append(chunk)
+            pos += len(chunk)
+
+    def _read_block(self, i: int) -> Block:
+        return _parse_block(self._read_line(self._offset(i)))
+
+    def _read_range(self, start: int, stop: int) -> List[Block]:
+        """Lit les blocs [start, stop) en un seul pread."""
+        if start >= stop:
+            return []
+        begin = self._offset(start)
+        data = os.pread(self._seg_fd, self._end_offset(stop) - begin, begin)
+        blocks = []
+        for line in data.split(b'\n'):
+            if line.strip():
+                try:
+                    blocks.append(_parse_block(line))
+                except (ValueError, TypeError):
+                    pass
+        return blocks
+
+    def _length(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self._count
+
+    # -------------------------------------------------------------------------
+    # Écriture
+    # -------------------------------------------------------------------------
+
+    def _append(self, block: Block):
+        """Ajoute un bloc au segment puis aux index (sous _index_lock)."""
+        line = (json.dumps(asdict(block)) + '\n').encode('utf-8')
+        with open(self.CHAIN_FILE, 'ab') as f:
+            offset = f.tell()  # mode append: positionné en fin de fichier
+            f.write(line)
+
+        self._idx_out.write(_OFFSET.pack(offset))
+        self._idx_out.flush()
+        self._count += 1
+        self._size = offset + len(line)
+        self._last = block
+        self._add_paths([(block.path, self._count - 1)])
+
+        last_upto = self._checkpoints[-1]["upto"] if self._checkpoints else 0
+        if self._count - last_upto >= self.CHECKPOINT_EVERY:
+            self._checkpoint_backlog()
 
     def _create_genesis(self):
         """Crée le bloc genesis (bloc 0)."""
@@ -313,8 +734,8 @@ class Chaine:
         )
         genesis.block_hash = genesis.compute_hash()
         # Le genesis n'est pas signé (pas de bloc précédent à vérifier)
-        self.blocks.append(genesis)
-        self._save_block(genesis)
+        with self._lock:
+            self._append(genesis)
 
     def add_block(self, action: str, path: str, hash_before: str,
                   hash_after: str, description: str = "") -> Block:
@@ -331,75 +752,203 @@ class Chaine:
         Returns:
             Le bloc créé et ajouté
         """
-        prev_block = self.blocks[-1]
-
-        block = Block(
-            index=len(self.blocks),
-            timestamp=datetime.now().isoformat(),
-            action=action,
-            path=path,
-            hash_before=hash_before[:32] if hash_before else "",
-            hash_after=hash_after[:32] if hash_after else "",
-            description=description[:100],
-            prev_hash=prev_block.block_hash
-        )
+        with self._lock, self._index_lock():
+            self._refresh()
+            prev_block = self._last
+
+            block = Block(
+                index=self._count,
+                timestamp=datetime.now().isoformat(),
+                action=action,
+                path=path,
+                hash_before=hash_before[:32] if hash_before else "",
+                hash_after=hash_after[:32] if hash_after else "",
+                description=description[:100],
+                prev_hash=prev_block.block_hash
+            )
 
-        # Signer le bloc avec les clés PQC de Flow
-        block.sign(flow_keys)
+            # Signer le bloc avec les clés PQC de Flow
+            block.sign(flow_keys)
 
-        self.blocks.append(block)
-        self._save_block(block)
+            self._append(block)
 
         return block
 
-    def verify_chain(self) -> tuple:
+    # -------------------------------------------------------------------------
+    # Checkpoints Merkle
+    # -------------------------------------------------------------------------
+
+    def _checkpoint_backlog(self):
+        """
+        Signe les checkpoints manquants, par tranches de CHECKPOINT_EVERY.
+
+        Chaque tranche est vérifiée (hash, chaînage, signatures) avant
+        d'être signée: un checkpoint ne blanchit jamais un bloc invalide.
+        Une tranche refusée n'est pas retentée à chaque ajout.
         """
-        Vérifie l'intégrité de toute la chaîne.
+        with self._index_lock():
+            self._refresh_checkpoints()
+            self._sign_backlog()
+
+    def _sign_backlog(self):
+        last = self._checkpoints[-1] if self._checkpoints else None
+        upto = last["upto"] if last else 0
+        prev_hash = last["last_hash"] if last else None
+
+        while self._count - upto >= self.CHECKPOINT_EVERY and upto != self._checkpoint_blocked:
+            end = upto + self.CHECKPOINT_EVERY
+            audit = _audit_segment(self.CHAIN_FILE, self._offset(upto), self._end_offset(end), upto)
+            if (audit["errors"] or audit["count"] != self.CHECKPOINT_EVERY
+                    or (prev_hash and audit["first_prev"] != prev_hash)):
+                print(f"[chaine] Checkpoint refusé: blocs {upto}-{end} invalides")
+                self._checkpoint_blocked = upto
+                break
+            self._write_checkpoint(upto, end, audit["root"], audit["last_hash"])
+            upto, prev_hash = end, audit["last_hash"]
+
+    def _write_checkpoint(self, start: int, upto: int, root: str, last_hash: str):
+        cp = {
+            "start": start,
+            "upto": upto,
+            "root": root,
+            "last_hash": last_hash,
+            "timestamp": datetime.now().isoformat(),
+        }
+        cp["signature"] = flow_keys.sign(_checkpoint_digest(cp))
+        cp["signer"] = flow_keys.get_public_key()
+
+        line = (json.dumps(cp) + '\n').encode('utf-8')
+        with open(self.CHECKPOINTS_FILE, 'ab') as f:
+            f.write(line)
+        self._checkpoints.append(cp)
+        self._checkpoints_size += len(line)
+
+    def _trusted_checkpoint(self, errors: List[str]) -> Optional[Dict]:
+        """
+        Dernier checkpoint de confiance: signature valide et dernier bloc
+        couvert toujours identique sur disque. Sinon on recule.
+        """
+        for cp in reversed(self._checkpoints):
+            upto = cp["upto"]
+            if upto > self._count:
+                errors.append(f"Checkpoint {upto}: beyond chain end")
+                continue
+            if not flow_keys.verify(_checkpoint_digest(cp), cp.get("signature", "")):
+                errors.append(f"Checkpoint {upto}: invalid signature")
+                continue
+            try:
+                block = self._read_block(upto - 1)
+            except (ValueError, TypeError):
+                block = None
+            if block is None or block.block_hash != cp["last_hash"]:
+                errors.append(f"Checkpoint {upto}: block mismatch")
+                continue
+            return cp
+        return None
+
+    # -------------------------------------------------------------------------
+    # Vérification
+    # -------------------------------------------------------------------------
+
+    def verify_chain(self, full: bool = False, workers: Optional[int] = None) -> tuple:
+        """
+        Vérifie l'intégrité de la chaîne.
 
         Vérifie:
         1. Le hash de chaque bloc est correct
         2. Le chaînage (prev_hash) est correct
         3. Les signatures sont valides
 
+        Par défaut seuls les blocs depuis le dernier checkpoint de
+        confiance sont revérifiés (coût borné par CHECKPOINT_EVERY).
+        full=True audite toute la chaîne dans un pool de process et
+        recontrôle les racines Merkle de chaque checkpoint.
+
+        Args:
+            full: Audit complet depuis genesis
+            workers: Taille du pool pour l'audit complet (défaut: CPU)
+
         Returns:
             Tuple (valid: bool, errors: list)
         """
-        errors = []
+        with self._lock:
+            self._refresh()
+            if full:
+                return self._audit(workers)
+
+            errors = []
+            cp = self._trusted_checkpoint(errors)
+            start = cp["upto"] if cp else 0
+            if start < self._count:
+                audit = _audit_segment(self.CHAIN_FILE, self._offset(start), self._size, start)
+                if cp and audit["first_prev"] != cp["last_hash"]:
+                    errors.append(f"Block {start}: chain broken")
+                errors.extend(audit["errors"])
 
-        for i, block in enumerate(self.blocks):
-            # Vérifier le hash du bloc
-            computed = block.compute_hash()
-            if computed != block.block_hash:
-                errors.append(f"Block {i}: hash mismatch")
+        return len(errors) == 0, errors
 
-            # Vérifier le chaînage
-            if i > 0:
-                if block.prev_hash != self.blocks[i-1].block_hash:
-                    errors.append(f"Block {i}: chain broken")
+    def _audit(self, workers: Optional[int] = None) -> tuple:
+        """Audit complet, tranches alignées sur les checkpoints, en parallèle."""
+        by_start = {cp["start"]: cp for cp in self._checkpoints if cp["upto"] <= self._count}
+        ranges = []
+        pos = 0
+        while pos < self._count:
+            cp = by_start.get(pos)
+            end = cp["upto"] if cp else min(pos + self.CHECKPOINT_EVERY, self._count)
+            ranges.append((pos, end, cp))
+            pos = end
+
+        jobs = [(self.CHAIN_FILE, self._offset(s), self._end_offset(e), s) for s, e, _ in ranges]
+        workers = workers or os.cpu_count() or 1
+        if len(jobs) > 1 and workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_audit_segment, *zip(*jobs),
+                                        chunksize=max(1, len(jobs) // (workers * 4))))
+        else:
+            results = [_audit_segment(*job) for job in jobs]
 
-            # Vérifier la signature (si présente)
-            if block.signature and not block.verify_signature(flow_keys):
-                errors.append(f"Block {i}: invalid signature")
+        errors = []
+        prev = None
+        for (start, end, cp), result in zip(ranges, results):
+            if prev is not None and result["first_prev"] != prev:
+                errors.append(f"Block {start}: chain broken")
+            errors.extend(result["errors"])
+            if cp:
+                if not flow_keys.verify(_checkpoint_digest(cp), cp.get("signature", "")):
+                    errors.append(f"Checkpoint {end}: invalid signature")
+                elif result["root"] != cp["root"]:
+                    errors.append(f"Checkpoint {end}: merkle root mismatch")
+            prev = result["last_hash"]
 
         return len(errors) == 0, errors
 
+    # -------------------------------------------------------------------------
+    # Lecture haut niveau
+    # -------------------------------------------------------------------------
+
     def get_history(self, path: str = None, limit: int = 20) -> List[Dict]:
         """
         Retourne l'historique des blocs.
 
         Args:
-            path: Filtrer par fichier (None = tous)
+            path: Filtrer par fichier (None = tous), via l'index path → blocs
             limit: Nombre max de blocs à retourner
 
         Returns:
             Liste de dicts (blocs sérialisés), plus récents en premier
         """
-        if path:
-            blocks = [b for b in self.blocks if b.path == path][-limit:]
-        else:
-            blocks = self.blocks[-limit:]
-
-        return [asdict(b) for b in reversed(blocks)]
+        with self._lock:
+            self._refresh()
+            if path:
+                rows = self._paths.execute(
+                    "SELECT idx FROM block_paths WHERE path = ? ORDER BY idx DESC LIMIT ?",
+                    (path, limit)
+                ).fetchall()
+                blocks = [self._read_block(idx) for (idx,) in rows]
+            else:
+                blocks = list(reversed(self._read_range(max(0, self._count - limit), self._count)))
+
+        return [asdict(b) for b in blocks]
 
     def record_from_integrite(self, anomalies: List[Dict]):
         """
@@ -427,19 +976,23 @@ class Chaine:
             Dict avec compteurs, validité, dernier bloc, genesis
         """
         valid, errors = self.verify_chain()
-        last_block = self.blocks[-1] if self.blocks else None
+        with self._lock:
+            last_block = self._last
+            count = self._count
+            genesis = self._read_block(0) if count else None
 
         return {
             "organ": "chaine",
-            "blocks": len(self.blocks),
+            "blocks": count,
             "valid": valid,
             "errors": len(errors),
+            "checkpoints": len(self._checkpoints),
             "last_block": {
                 "index": last_block.index,
                 "action": last_block.action,
                 "hash": last_block.block_hash[:16]
             } if last_block else None,
-            "genesis": self.blocks[0].block_hash[:16] if self.blocks else None
+            "genesis": genesis.block_hash[:16] if genesis else None
         }
 
 
@@ -501,7 +1054,8 @@ def exec_chaine(cmd: str) -> str:
 
     Commandes disponibles:
     - status                État de la chaîne
-    - verify                Vérifier intégrité et signatures
+    - verify                Vérifier depuis le dernier checkpoint
+    - audit                 Vérifier toute la chaîne (pool de process)
     - history [path]        Historique (filtré par path optionnel)
     - sync                  Synchroniser avec intégrité
     - add <action> <path>   Ajouter un bloc manuellement
@@ -523,8 +1077,8 @@ Valide: {s['valid']}
 Dernier: #{s['last_block']['index']} {s['last_block']['action']} ({s['last_block']['hash']})
 Genesis: {s['genesis']}"""
 
-    elif action == "verify":
-        valid, errors = chaine.verify_chain()
+    elif action in ("verify", "audit"):
+        valid, errors = chaine.verify_chain(full=(action == "audit"))
         if valid:
             return f"Chain valid: {len(chaine.blocks)} blocks, all signatures OK"
         return f"Chain INVALID:\n" + "\n".join(errors[:5])
@@ -553,7 +1107,8 @@ Genesis: {s['genesis']}"""
     else:
         return """Usage:
   status              État de la chaîne
-  verify              Vérifier intégrité + signatures
+  verify              Vérifier depuis le dernier checkpoint
+  audit               Vérifier toute la chaîne
   history [path]      Historique des blocs
   sync                Synchroniser avec intégrité
   add <act> <path>    Ajouter un bloc"""
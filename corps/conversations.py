@@ -1,51 +1,197 @@
 #!/usr/bin/env python3
-"""conversations.py - persistance des conversations de Flow"""
+"""conversations.py - persistance des conversations de Flow
+
+- un fichier JSONL append-only par conversation (un message par ligne)
+- index sqlite compact (cid, titre, nb messages, dernier message)
+- au plus MAX_RESIDENT conversations gardées en mémoire (LRU)
+- get_history lit la fin du fichier, sans charger la conversation
+- compaction en tâche de fond: migration des anciens .json, lignes
+  tronquées par un crash, index réconcilié avec le disque
+le démarrage n'ouvre que l'index: coût indépendant du nombre de conversations
+"""
 
 import json
 import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
-from collections import defaultdict
 
 CONV_DIR = "/opt/flow-chat/adn/conversations"
 LOG_FILE = "/opt/flow-chat/adn/conversation_log.jsonl"
+INDEX_DB = os.path.join(CONV_DIR, "index.sqlite")
+
+MAX_RESIDENT = 64          # conversations gardées en mémoire
+COMPACT_INTERVAL = 600     # secondes entre deux passes de compaction
+TAIL_BLOCK = 8192
+
+
+def _tail_lines(path, n):
+    """lit les n dernières lignes complètes d'un fichier en partant de la fin"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        buf = b''
+        while pos > 0 and buf.count(b'\n') <= n:
+            step = min(TAIL_BLOCK, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+    lines = buf.split(b'\n')
+    lines.pop()  # après le dernier '\n': vide, ou écriture en cours
+    lines = [l for l in lines if l.strip()]
+    return lines[-n:] if n else []
+
+
+def _parse_lines(lines):
+    """décode les messages, ignore une ligne tronquée"""
+    msgs = []
+    for line in lines:
+        try:
+            msgs.append(json.loads(line))
+        except ValueError:
+            pass
+    return msgs
+
 
 class ConversationStore:
     """stockage persistant des conversations"""
 
     def __init__(self):
         os.makedirs(CONV_DIR, exist_ok=True)
-        self.convs = defaultdict(list)
-        self._load_all()
+        self._lock = threading.RLock()
+        self._resident = OrderedDict()  # cid -> messages (LRU)
+        self._index = sqlite3.connect(INDEX_DB, check_same_thread=False)
+        self._index.execute("PRAGMA journal_mode=WAL")
+        self._index.execute("PRAGMA synchronous=NORMAL")
+        self._index.execute("""
+            CREATE TABLE IF NOT EXISTS convs (
+                cid TEXT PRIMARY KEY,
+                title TEXT,
+                messages INTEGER DEFAULT 0,
+                last TEXT,
+                updated TEXT
+            )
+        """)
+        self._index.commit()
+
+        self._compactor = threading.Thread(target=self._compact_loop, name="conv-compact", daemon=True)
+        self._compactor.start()
+
+    def _safe_cid(self, cid):
+        return "".join(c if c.isalnum() or c in "-_" else "_" for c in cid)
 
     def _conv_path(self, cid):
-        """chemin du fichier pour une conversation"""
-        safe_cid = "".join(c if c.isalnum() or c in "-_" else "_" for c in cid)
-        return os.path.join(CONV_DIR, f"{safe_cid}.json")
+        """chemin du journal JSONL d'une conversation"""
+        return os.path.join(CONV_DIR, f"{self._safe_cid(cid)}.jsonl")
+
+    def _legacy_path(self, cid):
+        """ancien format: conversation complète en JSON"""
+        return os.path.join(CONV_DIR, f"{self._safe_cid(cid)}.json")
 
-    def _load_all(self):
-        """charge toutes les conversations existantes"""
-        if not os.path.exists(CONV_DIR):
+    # === MIGRATION / COMPACTION ===
+
+    def _migrate_legacy(self, cid):
+        """convertit un ancien .json en .jsonl + entrée d'index"""
+        legacy = self._legacy_path(cid)
+        try:
+            with open(legacy, 'r') as fd:
+                data = json.load(fd)
+        except Exception:
             return
-        for f in os.listdir(CONV_DIR):
-            if f.endswith('.json'):
-                cid = f[:-5]
-                try:
-                    with open(os.path.join(CONV_DIR, f), 'r') as fd:
-                        data = json.load(fd)
-                        self.convs[cid] = data.get('messages', [])
-                except Exception:
-                    pass
-
-    def _save_conv(self, cid):
-        """sauvegarde une conversation"""
-        path = self._conv_path(cid)
-        data = {
-            'cid': cid,
-            'messages': self.convs[cid],
-            'updated': datetime.now().isoformat()
-        }
-        with open(path, 'w') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        msgs = data.get('messages', [])
+        tmp = self._conv_path(cid) + '.tmp'
+        with open(tmp, 'w') as f:
+            for m in msgs:
+                f.write(json.dumps(m, ensure_ascii=False) + '\n')
+        os.replace(tmp, self._conv_path(cid))
+        self._index_set(cid, msgs, data.get('updated'))
+        os.remove(legacy)
+
+    def _ensure_migrated(self, cid):
+        if not os.path.exists(self._conv_path(cid)) and os.path.exists(self._legacy_path(cid)):
+            with self._lock:
+                self._migrate_legacy(cid)
+
+    def _index_set(self, cid, msgs, updated=None):
+        """(ré)écrit l'entrée d'index à partir des messages"""
+        title = next((m['content'][:60] for m in msgs if m.get('role') == 'user'), '')
+        self._index.execute(
+            "INSERT OR REPLACE INTO convs VALUES (?, ?, ?, ?, ?)",
+            (cid, title, len(msgs), msgs[-1]['content'][:100] if msgs else '',
+             updated or datetime.now().isoformat())
+        )
+        self._index.commit()
+
+    def compact(self):
+        """une passe de compaction (appelée en tâche de fond)"""
+        for name in os.listdir(CONV_DIR):
+            path = os.path.join(CONV_DIR, name)
+            if name.endswith('.json'):
+                cid = name[:-5]
+                if not os.path.exists(self._conv_path(cid)):
+                    with self._lock:
+                        self._migrate_legacy(cid)
+            elif name.endswith('.jsonl'):
+                with self._lock:
+                    self._repair_tail(path)
+            time.sleep(0)  # laisser la main aux requêtes
+
+        # index: entrées dont le journal a disparu
+        with self._lock:
+            rows = self._index.execute("SELECT cid FROM convs").fetchall()
+            gone = [(cid,) for (cid,) in rows if not os.path.exists(self._conv_path(cid))]
+            if gone:
+                self._index.executemany("DELETE FROM convs WHERE cid = ?", gone)
+                self._index.commit()
+
+    def _repair_tail(self, path):
+        """tronque une dernière ligne incomplète (crash pendant un append)"""
+        size = os.path.getsize(path)
+        if not size:
+            return
+        with open(path, 'rb+') as f:
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return
+            pos = size
+            while pos > 0:
+                step = min(TAIL_BLOCK, pos)
+                pos -= step
+                f.seek(pos)
+                nl = f.read(step).rfind(b'\n')
+                if nl >= 0:
+                    f.truncate(pos + nl + 1)
+                    return
+            f.truncate(0)
+
+    def _compact_loop(self):
+        while True:
+            try:
+                self.compact()
+            except Exception:
+                pass
+            time.sleep(COMPACT_INTERVAL)
+
+    # === RÉSIDENCE LRU ===
+
+    def _load(self, cid):
+        """messages complets d'une conversation (LRU)"""
+        with self._lock:
+            if cid in self._resident:
+                self._resident.move_to_end(cid)
+                return self._resident[cid]
+            self._ensure_migrated(cid)
+            path = self._conv_path(cid)
+            msgs = []
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    msgs = _parse_lines(f.read().split(b'\n'))
+            self._resident[cid] = msgs
+            if len(self._resident) > MAX_RESIDENT:
+                self._resident.popitem(last=False)
+            return msgs
 
     def _log_exchange(self, cid, user_msg, assistant_msg):
         """log chaque échange dans le fichier centralisé"""
@@ -59,60 +205,94 @@ class ConversationStore:
             f.write(json.dumps(entry, ensure_ascii=False) + '\n')
 
     def add_exchange(self, cid, user_msg, assistant_msg):
-        """ajoute un échange et persiste"""
-        self.convs[cid].append({"role": "user", "content": user_msg})
-        self.convs[cid].append({"role": "assistant", "content": assistant_msg})
-        self._save_conv(cid)
+        """ajoute un échange et persiste (append, O(1))"""
+        new = [{"role": "user", "content": user_msg}, {"role": "assistant", "content": assistant_msg}]
+        self._ensure_migrated(cid)
+        with self._lock:
+            with open(self._conv_path(cid), 'a') as f:
+                f.write(''.join(json.dumps(m, ensure_ascii=False) + '\n' for m in new))
+            if cid in self._resident:
+                self._resident[cid].extend(new)
+                self._resident.move_to_end(cid)
+
+            now = datetime.now().isoformat()
+            updated = self._index.execute(
+                "UPDATE convs SET messages = messages + 2, last = ?, updated = ? WHERE cid = ?",
+                (assistant_msg[:100], now, cid)
+            ).rowcount
+            if not updated:
+                self._index.execute(
+                    "INSERT INTO convs VALUES (?, ?, 2, ?, ?)",
+                    (cid, user_msg[:60], assistant_msg[:100], now)
+                )
+            self._index.commit()
         self._log_exchange(cid, user_msg, assistant_msg)
 
     def get_history(self, cid, n=8):
         """récupère les n derniers messages"""
-        return self.convs[cid][-n*2:] if cid in self.convs else []
+        with self._lock:
+            if cid in self._resident:
+                self._resident.move_to_end(cid)
+                return self._resident[cid][-n*2:]
+        self._ensure_migrated(cid)
+        path = self._conv_path(cid)
+        if not os.path.exists(path):
+            return []
+        return _parse_lines(_tail_lines(path, n * 2))
 
     def list_conversations(self):
-        """liste toutes les conversations"""
-        result = []
-        for cid, msgs in self.convs.items():
-            if msgs:
-                result.append({
-                    'cid': cid,
-                    'messages': len(msgs),
-                    'last': msgs[-1]['content'][:100] if msgs else ''
-                })
-        return result
+        """liste toutes les conversations (depuis l'index)"""
+        with self._lock:
+            rows = self._index.execute(
+                "SELECT cid, title, messages, last, updated FROM convs WHERE messages > 0 ORDER BY rowid"
+            ).fetchall()
+        return [
+            {'cid': cid, 'title': title, 'messages': count, 'last': last, 'updated': updated}
+            for cid, title, count, last, updated in rows
+        ]
 
     def get_conversation(self, cid):
         """récupère une conversation complète"""
         return {
             'cid': cid,
-            'messages': self.convs.get(cid, [])
+            'messages': list(self._load(cid))
         }
 
     def delete_conversation(self, cid):
         """supprime une conversation"""
-        if cid in self.convs:
-            del self.convs[cid]
-        path = self._conv_path(cid)
-        if os.path.exists(path):
-            os.remove(path)
+        with self._lock:
+            self._resident.pop(cid, None)
+            self._index.execute("DELETE FROM convs WHERE cid = ?", (cid,))
+            self._index.commit()
+            found = False
+            for path in (self._conv_path(cid), self._legacy_path(cid)):
+                if os.path.exists(path):
+                    os.remove(path)
+                    found = True
+        if found:
             return {'success': True}
         return {'success': False, 'error': 'not found'}
 
     def delete_all_conversations(self):
         """supprime TOUTES les conversations (debug)"""
-        count = len(self.convs)
-        for cid in list(self.convs.keys()):
-            path = self._conv_path(cid)
-            if os.path.exists(path):
-                os.remove(path)
-        self.convs.clear()
+        with self._lock:
+            count = self._index.execute("SELECT COUNT(*) FROM convs").fetchone()[0]
+            for name in os.listdir(CONV_DIR):
+                if name.endswith('.jsonl') or name.endswith('.json'):
+                    os.remove(os.path.join(CONV_DIR, name))
+            self._index.execute("DELETE FROM convs")
+            self._index.commit()
+            self._resident.clear()
         return {'success': True, 'deleted': count}
 
     def stats(self):
         """statistiques"""
-        total_msgs = sum(len(msgs) for msgs in self.convs.values())
+        with self._lock:
+            convs, total_msgs = self._index.execute(
+                "SELECT COUNT(*), COALESCE(SUM(messages), 0) FROM convs WHERE messages > 0"
+            ).fetchone()
         return {
-            'conversations': len(self.convs),
+            'conversations': convs,
             'total_messages': total_msgs
         }
 
@@ -1,142 +1,300 @@
 #!/usr/bin/env python3
-"""database.py - accès complet à la database pour Flow"""
+"""database.py - accès complet à la database pour Flow
 
+mémoire (faits, souvenirs, concepts) dans sqlite en WAL:
+- écritures O(1), commit groupé par un thread (COMMIT_DELAY)
+- index sur predicate / key, FTS5 pour recall
+- migration unique depuis l'ancien memory.json
+- backup en ligne via l'API backup de sqlite
+"""
+
+import atexit
 import json
 import os
+import sqlite3
+import threading
+import time
 from datetime import datetime
 import psycopg2
+import psycopg2.pool
 
 ADN_PATH = "/opt/flow-chat/adn"
-MEMORY_FILE = os.path.join(ADN_PATH, "memory.json")
+MEMORY_FILE = os.path.join(ADN_PATH, "memory.json")  # ancien format, migré une fois
+MEMORY_DB = os.path.join(ADN_PATH, "memory.sqlite")
+
+COMMIT_DELAY = 0.05  # secondes: les écritures de cette fenêtre partagent un commit
+SQL_POOL_MAX = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS facts (
+    key TEXT PRIMARY KEY,
+    predicate TEXT NOT NULL,
+    args TEXT NOT NULL,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_facts_predicate ON facts(predicate);
+
+CREATE TABLE IF NOT EXISTS souvenirs (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL,
+    value TEXT,
+    context TEXT,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_souvenirs_key ON souvenirs(key);
+
+CREATE TABLE IF NOT EXISTS concepts (
+    name TEXT PRIMARY KEY,
+    definition TEXT,
+    timestamp TEXT
+);
+
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# index plein texte synchronisé par triggers (contenu externe = souvenirs)
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS souvenirs_fts USING fts5(
+    key, value, content='souvenirs', content_rowid='id', tokenize='{tokenizer}'
+);
+CREATE TRIGGER IF NOT EXISTS souvenirs_ai AFTER INSERT ON souvenirs BEGIN
+    INSERT INTO souvenirs_fts(rowid, key, value) VALUES (new.id, new.key, new.value);
+END;
+CREATE TRIGGER IF NOT EXISTS souvenirs_ad AFTER DELETE ON souvenirs BEGIN
+    INSERT INTO souvenirs_fts(souvenirs_fts, rowid, key, value) VALUES ('delete', old.id, old.key, old.value);
+END;
+"""
+
+
+def _like_escape(s):
+    return s.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
 
 class FlowDatabase:
     """Interface database pour Flow - prolog-style facts + SQL"""
 
-    def __init__(self):
-        self.memory = self._load_memory()
+    def __init__(self, path=MEMORY_DB):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.RLock()
+        self._dirty = threading.Event()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self.fts = self._init_fts()
+        self._in_tx = False
+        self._sql_pool = None
+        self._migrate_json()
+
+        self._committer = threading.Thread(target=self._commit_loop, name="flowdb-commit", daemon=True)
+        self._committer.start()
+        atexit.register(self.flush)
+
+    def _init_fts(self):
+        """fts5 trigram (recherche par sous-chaîne comme avant), sinon unicode61, sinon rien"""
+        for tokenizer in ("trigram", "unicode61"):
+            try:
+                self._conn.executescript(FTS_SCHEMA.format(tokenizer=tokenizer))
+                return tokenizer
+            except sqlite3.OperationalError:
+                continue
+        return None
+
+    # === TRANSACTIONS / GROUP COMMIT ===
+
+    def _write(self, sql, params=()):
+        """écriture dans la transaction courante, commit groupé plus tard"""
+        with self._lock:
+            if not self._in_tx:
+                self._conn.execute("BEGIN")
+                self._in_tx = True
+            cur = self._conn.execute(sql, params)
+            self._dirty.set()
+            return cur.rowcount
+
+    def _commit_loop(self):
+        while True:
+            self._dirty.wait()
+            # laisser les écritures voisines rejoindre le même commit
+            time.sleep(COMMIT_DELAY)
+            self._dirty.clear()
+            self.flush()
+
+    def flush(self):
+        """commit immédiat de la transaction en cours"""
+        with self._lock:
+            if self._in_tx:
+                self._conn.execute("COMMIT")
+                self._in_tx = False
 
-    def _load_memory(self):
-        """charge la mémoire depuis le fichier"""
-        default = {"facts": {}, "souvenirs": [], "concepts": {}}
-        if os.path.exists(MEMORY_FILE):
+    def _migrate_json(self):
+        """import unique de l'ancien memory.json (renommé en .migrated)"""
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'json_migrated'").fetchone()
+        if row or not os.path.exists(MEMORY_FILE):
+            return
+        try:
+            with open(MEMORY_FILE, 'r') as f:
+                data = json.load(f)
+        except Exception:
+            return
+
+        with self._lock:
+            self._conn.execute("BEGIN")
             try:
-                with open(MEMORY_FILE, 'r') as f:
-                    data = json.load(f)
-                # merge avec default pour s'assurer que toutes les clés existent
-                for key in default:
-                    if key not in data:
-                        data[key] = default[key]
-                return data
+                self._import_json(data)
             except Exception:
-                pass
-        return default
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        os.replace(MEMORY_FILE, MEMORY_FILE + ".migrated")
 
-    def _save_memory(self):
-        """sauvegarde la mémoire"""
-        os.makedirs(ADN_PATH, exist_ok=True)
-        with open(MEMORY_FILE, 'w') as f:
-            json.dump(self.memory, f, indent=2, ensure_ascii=False)
+    def _import_json(self, data):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO facts VALUES (?, ?, ?, ?)",
+            [(k, f.get("predicate", ""), json.dumps(f.get("args", []), ensure_ascii=False), f.get("timestamp"))
+             for k, f in data.get("facts", {}).items()]
+        )
+        self._conn.executemany(
+            "INSERT INTO souvenirs (key, value, context, timestamp) VALUES (?, ?, ?, ?)",
+            [(s.get("key", ""), s.get("value", ""), s.get("context", ""), s.get("timestamp"))
+             for s in data.get("souvenirs", [])]
+        )
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO concepts VALUES (?, ?, ?)",
+            [(n, c.get("definition"), c.get("timestamp")) for n, c in data.get("concepts", {}).items()]
+        )
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta VALUES ('json_migrated', ?)", (datetime.now().isoformat(),)
+        )
+
+    def _read(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
 
     # === PROLOG-STYLE FACTS ===
 
+    @staticmethod
+    def _fact_key(predicate, args):
+        return f"{predicate}({','.join(str(a) for a in args)})"
+
+    @staticmethod
+    def _fact(row):
+        return {"predicate": row["predicate"], "args": json.loads(row["args"]), "timestamp": row["timestamp"]}
+
     def assert_fact(self, predicate, *args):
         """ajoute un fait (prolog: assert)"""
-        key = f"{predicate}({','.join(str(a) for a in args)})"
-        self.memory["facts"][key] = {
-            "predicate": predicate,
-            "args": list(args),
-            "timestamp": datetime.now().isoformat()
-        }
-        self._save_memory()
+        key = self._fact_key(predicate, args)
+        self._write(
+            "INSERT OR REPLACE INTO facts VALUES (?, ?, ?, ?)",
+            (key, predicate, json.dumps(list(args), ensure_ascii=False), datetime.now().isoformat())
+        )
         return {'success': True, 'fact': key}
 
     def retract_fact(self, predicate, *args):
         """supprime un fait (prolog: retract)"""
-        key = f"{predicate}({','.join(str(a) for a in args)})"
-        if key in self.memory["facts"]:
-            del self.memory["facts"][key]
-            self._save_memory()
+        if self._write("DELETE FROM facts WHERE key = ?", (self._fact_key(predicate, args),)):
             return {'success': True}
         return {'success': False, 'error': 'fact not found'}
 
     def query_facts(self, predicate=None):
-        """cherche des faits"""
+        """cherche des faits (index sur predicate)"""
         if predicate is None:
-            return list(self.memory["facts"].values())
-        return [f for f in self.memory["facts"].values() if f["predicate"] == predicate]
+            rows = self._read("SELECT * FROM facts")
+        else:
+            rows = self._read("SELECT * FROM facts WHERE predicate = ?", (predicate,))
+        return [self._fact(r) for r in rows]
 
     # === SOUVENIRS ===
 
     def remember(self, key, value, context=""):
         """mémorise quelque chose"""
-        self.memory["souvenirs"].append({
-            "key": key,
-            "value": value,
-            "context": context,
-            "timestamp": datetime.now().isoformat()
-        })
-        self._save_memory()
+        self._write(
+            "INSERT INTO souvenirs (key, value, context, timestamp) VALUES (?, ?, ?, ?)",
+            (key, value, context, datetime.now().isoformat())
+        )
         return {'success': True}
 
     def recall(self, query):
-        """rappelle des souvenirs"""
-        query_lower = query.lower()
-        results = []
-        for s in self.memory["souvenirs"]:
-            if query_lower in s["key"].lower() or query_lower in s["value"].lower():
-                results.append(s)
-        return results
+        """rappelle des souvenirs (sous-chaîne dans key ou value, insensible à la casse)"""
+        cols = "s.key, s.value, s.context, s.timestamp"
+        # trigram: 3 caractères minimum pour interroger l'index
+        if self.fts == "trigram" and len(query) >= 3:
+            rows = self._read(
+                f"SELECT {cols} FROM souvenirs_fts f JOIN souvenirs s ON s.id = f.rowid "
+                "WHERE souvenirs_fts MATCH ? ORDER BY s.id",
+                ('"' + query.replace('"', '""') + '"',)
+            )
+        else:
+            pattern = f"%{_like_escape(query)}%"
+            rows = self._read(
+                f"SELECT {cols} FROM souvenirs s "
+                "WHERE s.key LIKE ? ESCAPE '\\' OR s.value LIKE ? ESCAPE '\\' ORDER BY s.id",
+                (pattern, pattern)
+            )
+        return [dict(r) for r in rows]
 
     def forget(self, key):
         """oublie un souvenir"""
-        before = len(self.memory["souvenirs"])
-        self.memory["souvenirs"] = [s for s in self.memory["souvenirs"] if s["key"] != key]
-        self._save_memory()
-        return {'success': True, 'removed': before - len(self.memory["souvenirs"])}
+        removed = self._write("DELETE FROM souvenirs WHERE key = ?", (key,))
+        return {'success': True, 'removed': removed}
 
     # === CONCEPTS ===
 
     def define_concept(self, name, definition):
         """définit un concept"""
-        self.memory["concepts"][name] = {
-            "definition": definition,
-            "timestamp": datetime.now().isoformat()
-        }
-        self._save_memory()
+        self._write(
+            "INSERT OR REPLACE INTO concepts VALUES (?, ?, ?)",
+            (name, definition, datetime.now().isoformat())
+        )
         return {'success': True}
 
     def get_concept(self, name):
         """récupère un concept"""
-        return self.memory["concepts"].get(name)
+        rows = self._read("SELECT definition, timestamp FROM concepts WHERE name = ?", (name,))
+        return dict(rows[0]) if rows else None
 
     def list_concepts(self):
         """liste tous les concepts"""
-        return list(self.memory["concepts"].keys())
+        return [r["name"] for r in self._read("SELECT name FROM concepts")]
 
     # === SQL (CIPHER DB) ===
 
-    def _get_sql_conn(self):
-        """connexion SQL"""
-        return psycopg2.connect(
-            host="localhost", port=5432,
-            database="ldb", user="lframework", password=""
-        )
+    def _get_sql_pool(self):
+        """pool de connexions SQL en lecture seule (créé à la demande)"""
+        if self._sql_pool is None:
+            self._sql_pool = psycopg2.pool.ThreadedConnectionPool(
+                1, SQL_POOL_MAX,
+                host="localhost", port=5432,
+                database="ldb", user="lframework", password=""
+            )
+        return self._sql_pool
 
     def sql_query(self, query, params=None):
         """exécute une requête SQL en lecture"""
-        # sécurité: seulement SELECT
+        # sécurité: seulement SELECT (et session read-only côté serveur)
         if not query.strip().upper().startswith("SELECT"):
             return {'error': 'only SELECT queries allowed'}
         try:
-            conn = self._get_sql_conn()
-            cur = conn.cursor()
-            cur.execute(query, params or ())
-            rows = cur.fetchall()
-            cols = [d[0] for d in cur.description]
-            conn.close()
+            pool = self._get_sql_pool()
+            conn = pool.getconn()
+        except Exception as e:
+            return {'error': str(e)}
+        broken = False
+        try:
+            if not conn.readonly:
+                conn.set_session(readonly=True, autocommit=True)
+            with conn.cursor() as cur:
+                cur.execute(query, params or ())
+                rows = cur.fetchall()
+                cols = [d[0] for d in cur.description]
             return {'success': True, 'rows': [dict(zip(cols, r)) for r in rows]}
         except Exception as e:
+            broken = bool(conn.closed)
             return {'error': str(e)}
+        finally:
+            pool.putconn(conn, close=broken)
 
     def sql_tables(self):
         """liste les tables"""
@@ -145,19 +303,25 @@ class FlowDatabase:
     # === BACKUP ===
 
     def backup(self):
-        """sauvegarde complète"""
-        backup_path = os.path.join(ADN_PATH, f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
-        with open(backup_path, 'w') as f:
-            json.dump(self.memory, f, indent=2, ensure_ascii=False)
+        """sauvegarde complète en ligne (api backup sqlite, sans bloquer les écritures)"""
+        self.flush()
+        backup_path = os.path.join(ADN_PATH, f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.sqlite")
+        # connexion dédiée: en WAL le lecteur ne bloque pas l'écrivain
+        src = sqlite3.connect(self.path)
+        dest = sqlite3.connect(backup_path)
+        try:
+            src.backup(dest, pages=1024)
+        finally:
+            dest.close()
+            src.close()
         return {'success': True, 'path': backup_path}
 
     def stats(self):
         """statistiques"""
-        return {
-            'facts': len(self.memory["facts"]),
-            'souvenirs': len(self.memory["souvenirs"]),
-            'concepts': len(self.memory["concepts"])
-        }
+        counts = {}
+        for table in ("facts", "souvenirs", "concepts"):
+            counts[table] = self._read(f"SELECT COUNT(*) FROM {table}")[0][0]
+        return counts
 
 # instance globale
 db = FlowDatabase()
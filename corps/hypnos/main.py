@@ -9,6 +9,9 @@ modèle de sommeil réaliste:
 - N2 (maintenance): nettoyage, K-complexes
 - N3 (profond): consolidation lourde, pruning synaptique
 - REM: rêves créatifs, connexions sémantiques
+
+corpus: index incrémental persisté (CorpusIndex), un cycle sur un
+corpus inchangé ne fait que des stat()
 """
 
 import os
@@ -54,39 +57,211 @@ STOP_WORDS = {
 }
 
 
-def load_recent_conversations(hours=24):
-    """charge les conversations des dernières heures"""
-    conversations = []
-    cutoff = datetime.now() - timedelta(hours=hours)
+# ═══════════════════════════════════════════════════════════════
+# INDEX DE CORPUS INCRÉMENTAL
+# ═══════════════════════════════════════════════════════════════
+
+CORPUS_INDEX = MIND_DIR / ".hypnos_corpus.json"
+DELTA_PERIOD = 3600          # secondes par période de delta
+DELTA_KEEP = 7 * 24          # périodes gardées (7 jours)
 
-    for f in CONV_DIR.glob("*.json"):
-        try:
-            with open(f) as fd:
-                data = json.load(fd)
-                updated = data.get('updated', '')
-                if updated:
-                    try:
-                        dt = datetime.fromisoformat(updated)
-                        if dt > cutoff:
-                            conversations.extend(data.get('messages', []))
-                    except Exception:
-                        conversations.extend(data.get('messages', []))
-        except Exception:
-            pass
 
-    return conversations
+class CorpusIndex:
+    """
+    comptes de termes par fichier, tenus à jour incrémentalement
 
+    - chaque fichier garde (mtime, size) + ses comptes de termes
+    - un fichier inchangé n'est pas relu (juste un stat)
+    - un fichier modifié: on retire ses anciens comptes, on ajoute les nouveaux
+    - un journal .jsonl qui a grandi: on ne lit que la fin ajoutée
+    - les totaux par corpus et les deltas par période sont persistés
+    """
 
-def load_mind_files():
-    """charge tous les fichiers mind/"""
-    content = []
-    for f in MIND_DIR.rglob("*.md"):
+    def __init__(self, path=CORPUS_INDEX):
+        self.path = path
+        self.files = {}
+        self.totals = {'conversations': Counter(), 'mind': Counter()}
+        self.deltas = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
         try:
-            text = f.read_text()
-            content.append({'file': str(f), 'content': text})
+            data = json.loads(self.path.read_text())
         except Exception:
-            pass
-    return content
+            return
+        self.files = data.get('files', {})
+        self.deltas = {int(k): Counter(v) for k, v in data.get('deltas', {}).items()}
+        for entry in self.files.values():
+            self.totals[entry['corpus']].update(entry['terms'])
+
+    def _save(self):
+        tmp = self.path.with_suffix('.tmp')
+        tmp.write_text(json.dumps({
+            'files': self.files,
+            'deltas': {str(k): dict(v) for k, v in self.deltas.items()}
+        }, ensure_ascii=False))
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+    # --- lecture des sources ---
+
+    @staticmethod
+    def _walk(root, suffixes, recursive):
+        if not root.exists():
+            return
+        stack = [root]
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                for e in it:
+                    if e.is_dir(follow_symlinks=False):
+                        if recursive:
+                            stack.append(e.path)
+                    elif e.name.endswith(suffixes):
+                        yield e.path, e.stat()
+
+    @staticmethod
+    def _read_conversation(path, offset=0):
+        """(termes, nb messages, updated iso ou None, octets lus ou None)"""
+        terms, count, updated, end = Counter(), 0, None, None
+        if path.endswith('.jsonl'):
+            end = offset
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break  # écriture en cours: relue au prochain passage
+                    end += len(line)
+                    try:
+                        m = json.loads(line)
+                    except ValueError:
+                        continue
+                    terms.update(extract_words(m.get('content', '')))
+                    count += 1
+            updated = datetime.fromtimestamp(os.path.getmtime(path)).isoformat()
+        else:
+            # ancien format: conversation complète en json
+            with open(path) as fd:
+                data = json.load(fd)
+            for m in data.get('messages', []):
+                terms.update(extract_words(m.get('content', '')))
+                count += 1
+            updated = data.get('updated') or None
+        return terms, count, updated, end
+
+    @staticmethod
+    def _read_mind(path, offset=0):
+        return Counter(extract_words(Path(path).read_text())), 0, None, None
+
+    # --- mise à jour ---
+
+    def _apply(self, corpus, old, new):
+        """retire old, ajoute new dans les totaux et le delta de la période"""
+        total = self.totals[corpus]
+        delta = Counter(new)
+        delta.subtract(old)
+        period = self.deltas.setdefault(int(time.time() // DELTA_PERIOD), Counter())
+        for word, d in delta.items():
+            if not d:
+                continue
+            total[word] += d
+            if total[word] <= 0:
+                del total[word]
+            period[word] += d
+            if not period[word]:
+                del period[word]
+
+    def _check(self, corpus, path, st, reader):
+        entry = self.files.get(path)
+        if entry and entry['mtime'] == st.st_mtime_ns and entry['size'] == st.st_size:
+            return
+
+        try:
+            if (entry and path.endswith('.jsonl') and st.st_size > entry['size']):
+                # journal append-only: seulement la partie ajoutée
+                added, count, updated, end = reader(path, entry['size'])
+                terms = Counter(entry['terms'])
+                terms.update(added)
+                count += entry['messages']
+                old = {}
+                new = added
+            else:
+                terms, count, updated, end = reader(path)
+                old = entry['terms'] if entry else {}
+                new = terms
+        except (OSError, ValueError):
+            return
+
+        self._apply(corpus, old, new)
+        self.files[path] = {
+            'corpus': corpus,
+            'mtime': st.st_mtime_ns,
+            # jsonl: fin de la dernière ligne complète, offset de la prochaine lecture
+            'size': st.st_size if end is None else end,
+            'messages': count,
+            'updated': updated,
+            'terms': dict(terms),
+        }
+        self._dirty = True
+
+    def refresh(self):
+        """stat de tous les fichiers, relit seulement ceux qui ont changé"""
+        with self._lock:
+            seen = set()
+            for path, st in self._walk(CONV_DIR, ('.jsonl', '.json'), recursive=False):
+                self._check('conversations', path, st, self._read_conversation)
+                seen.add(path)
+            for path, st in self._walk(MIND_DIR, ('.md',), recursive=True):
+                self._check('mind', path, st, self._read_mind)
+                seen.add(path)
+
+            for path in set(self.files) - seen:
+                entry = self.files.pop(path)
+                self._apply(entry['corpus'], entry['terms'], {})
+                self._dirty = True
+
+            if self._dirty:
+                oldest = int(time.time() // DELTA_PERIOD) - DELTA_KEEP
+                self.deltas = {k: v for k, v in self.deltas.items() if k >= oldest}
+                self._save()
+
+    # --- vues ---
+
+    def recent(self, hours=24):
+        """(comptes, nb messages) des conversations mises à jour dans les dernières heures"""
+        cutoff = (datetime.now() - timedelta(hours=hours)).isoformat()
+        freq, count = Counter(), 0
+        with self._lock:
+            for entry in self.files.values():
+                if entry['corpus'] == 'conversations' and entry['updated'] and entry['updated'] > cutoff:
+                    freq.update(entry['terms'])
+                    count += entry['messages']
+        return freq, count
+
+    def top_terms(self, k=20, corpus='conversations'):
+        with self._lock:
+            return self.totals[corpus].most_common(k)
+
+    def delta(self, hours=24):
+        """variation des comptes sur les dernières heures (ajouts - retraits)"""
+        since = int(time.time() // DELTA_PERIOD) - int(hours * 3600 // DELTA_PERIOD)
+        out = Counter()
+        with self._lock:
+            for period, counts in self.deltas.items():
+                if period >= since:
+                    out.update(counts)
+        return out
+
+    def snapshot(self, hours=24):
+        """entrée d'un cycle de sommeil (après refresh)"""
+        self.refresh()
+        word_freq, message_count = self.recent(hours)
+        return {
+            'word_freq': word_freq,
+            'message_count': message_count,
+            'mind_terms': set(self.totals['mind']),
+        }
 
 
 def extract_words(text):
@@ -95,11 +270,14 @@ def extract_words(text):
     return [w for w in words if w not in STOP_WORDS]
 
 
+corpus_index = CorpusIndex()
+
+
 # ═══════════════════════════════════════════════════════════════
 # PHASE N1 - SOMMEIL LÉGER - TRIAGE
 # ═══════════════════════════════════════════════════════════════
 
-def n1_light(messages, mind_content):
+def n1_light(corpus):
     """
     N1 - Sommeil léger / Hypnagogie
     - Triage initial des inputs
@@ -108,13 +286,8 @@ def n1_light(messages, mind_content):
     """
     sleep_state['current_stage'] = 'N1'
 
-    # extraire tous les mots des messages récents
-    all_words = []
-    for m in messages:
-        all_words.extend(extract_words(m.get('content', '')))
-
-    # compter les fréquences
-    word_freq = Counter(all_words)
+    # fréquences des messages récents (tenues par l'index)
+    word_freq = corpus['word_freq']
 
     # thèmes émergents (top 20)
     themes = word_freq.most_common(20)
@@ -132,7 +305,7 @@ def n1_light(messages, mind_content):
         'stage': 'N1',
         'themes': themes,
         'hypnagogic_fragments': hypnagogic,
-        'message_count': len(messages)
+        'message_count': corpus['message_count']
     }
 
 
@@ -140,7 +313,7 @@ def n1_light(messages, mind_content):
 # PHASE N2 - MAINTENANCE - K-COMPLEXES
 # ═══════════════════════════════════════════════════════════════
 
-def n2_maintenance(n1_data, messages):
+def n2_maintenance(n1_data, corpus):
     """
     N2 - Sommeil moyen / K-complexes
     - Nettoyage des patterns faibles
@@ -162,12 +335,7 @@ def n2_maintenance(n1_data, messages):
 
     # K-complexes: détecter les anomalies/surprises
     # (mots rares mais potentiellement importants)
-    k_complexes = []
-    all_words = []
-    for m in messages:
-        all_words.extend(extract_words(m.get('content', '')))
-
-    word_freq = Counter(all_words)
+    word_freq = corpus['word_freq']
     rare_but_long = [(w, c) for w, c in word_freq.items()
                      if c <= 2 and len(w) > 8]
     k_complexes = random.sample(rare_but_long, min(5, len(rare_but_long)))
@@ -184,7 +352,7 @@ def n2_maintenance(n1_data, messages):
 # PHASE N3 - SOMMEIL PROFOND - CONSOLIDATION
 # ═══════════════════════════════════════════════════════════════
 
-def n3_deep(n2_data, mind_content):
+def n3_deep(n2_data, corpus):
     """
     N3 - Sommeil profond / Ondes lentes
     - Consolidation lourde
@@ -195,12 +363,12 @@ def n3_deep(n2_data, mind_content):
 
     signal = n2_data['signal']
 
-    # chercher des connexions avec mind/ existant
+    # chercher des connexions avec mind/ existant (vocabulaire indexé)
     connections = []
-    mind_text = ' '.join([m['content'] for m in mind_content]).lower()
+    mind_terms = corpus['mind_terms']
 
     for word, count in signal:
-        if word in mind_text:
+        if word in mind_terms:
             # ce pattern existe déjà dans la mémoire long-terme
             connections.append({
                 'pattern': word,
@@ -314,19 +482,19 @@ def rem_dream(n3_data, cycle_num):
 # CYCLE COMPLET DE SOMMEIL
 # ═══════════════════════════════════════════════════════════════
 
-def sleep_cycle(messages, mind_content, cycle_num):
+def sleep_cycle(corpus, cycle_num):
     """un cycle complet de ~90min (simulé)"""
 
     sleep_state['current_cycle'] = cycle_num
 
     # N1 - triage
-    n1 = n1_light(messages, mind_content)
+    n1 = n1_light(corpus)
 
     # N2 - maintenance
-    n2 = n2_maintenance(n1, messages)
+    n2 = n2_maintenance(n1, corpus)
 
     # N3 - consolidation
-    n3 = n3_deep(n2, mind_content)
+    n3 = n3_deep(n2, corpus)
 
     # REM - rêve
     rem = rem_dream(n3, cycle_num)
@@ -350,9 +518,8 @@ def full_night_sleep(hours=12):
     sleep_state['sleeping'] = True
     sleep_state['total_cycles'] = 0
 
-    # charger les données
-    messages = load_recent_conversations(24)
-    mind_content = load_mind_files()
+    # charger les données (seuls les fichiers modifiés sont relus)
+    corpus = corpus_index.snapshot(24)
 
     num_cycles = int(hours * 60 / 90)  # ~8 cycles pour 12h
 
@@ -360,7 +527,7 @@ def full_night_sleep(hours=12):
     all_dreams = []
 
     for i in range(1, num_cycles + 1):
-        cycle_result = sleep_cycle(messages, mind_content, i)
+        cycle_result = sleep_cycle(corpus, i)
         cycles.append(cycle_result)
         all_dreams.append(cycle_result['rem'])
         sleep_state['total_cycles'] = i
@@ -511,10 +678,9 @@ def trigger_sleep():
 @app.route('/dream', methods=['POST'])
 def quick_dream():
     """un seul cycle rapide (pour compatibilité)"""
-    messages = load_recent_conversations(24)
-    mind_content = load_mind_files()
+    corpus = corpus_index.snapshot(24)
 
-    cycle = sleep_cycle(messages, mind_content, 1)
+    cycle = sleep_cycle(corpus, 1)
 
     # sauvegarder juste le rêve
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -574,6 +740,22 @@ def list_dreams():
     return jsonify({'dreams': dreams, 'count': len(dreams)})
 
 
+@app.route('/corpus')
+def corpus_stats():
+    """top termes et variations récentes, sans relire le corpus"""
+    k = request.args.get('k', 20, type=int)
+    hours = request.args.get('hours', 24, type=float)
+    corpus_index.refresh()
+    delta = corpus_index.delta(hours)
+    return jsonify({
+        'files': len(corpus_index.files),
+        'top_conversations': corpus_index.top_terms(k, 'conversations'),
+        'top_mind': corpus_index.top_terms(k, 'mind'),
+        'rising': delta.most_common(k),
+        'fading': sorted(((w, d) for w, d in delta.items() if d < 0), key=lambda x: x[1])[:k]
+    })
+
+
 @app.route('/state')
 def state():
     """état actuel du sommeil"""
@@ -18,16 +18,25 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from .bile import DIGEST_RETENTION_DAYS
+from .sang import FLUX_RETENTION_DAYS
+from .segments import SegmentLog
+
 # === CONFIG ===
 LYMPHE_DIR = Path("/opt/flow-chat/corps/lymphe")
 LYMPHE_DIR.mkdir(exist_ok=True)
 
 # Zones à drainer et leurs règles
+# "segments": journal SegmentLog de la zone, purgé par segment entier selon
+# sa propre rétention; les .seg/.idx échappent aux règles par mtime
 DRAINAGE_ZONES = {
     "flux": {
         "path": "/opt/flow-chat/corps/flux",
+        "segments": "flux",
+        "segment_retention_days": FLUX_RETENTION_DAYS,
+        # anciens fichiers par battement (avant les segments), non convertis
         "max_age_days": 1,
-        "pattern": "*.json",
+        "pattern": "flux_*.json",
         "keep_recent": 100  # garder les 100 plus récents
     },
     "logs": {
@@ -44,6 +53,8 @@ DRAINAGE_ZONES = {
     },
     "digestion": {
         "path": "/opt/flow-chat/corps/digestion",
+        "segments": "digest",
+        "segment_retention_days": DIGEST_RETENTION_DAYS,
         "max_age_days": 3,
         "pattern": "*",
         "keep_recent": None
@@ -61,6 +72,7 @@ DRAINAGE_ZONES = {
         "keep_recent": 1  # garder le plus récent
     }
 }
+SEGMENT_SUFFIXES = (".seg", ".idx")
 
 class Lymphe:
     """Système lymphatique - nettoyage et détoxification"""
@@ -108,13 +120,24 @@ class Lymphe:
         if not path.exists():
             return {"zone": zone_name, "drained": 0, "status": "path_not_found"}
 
-        cutoff = datetime.now() - timedelta(days=zone["max_age_days"])
         drained = []
         kept = []
         total_size = 0
+        purged = 0
+
+        # Segments: rétention du journal, jamais par mtime
+        if zone.get("segments"):
+            try:
+                purged = SegmentLog(path, zone["segments"]).purge(zone["segment_retention_days"])
+                self.toxines_eliminees += purged
+            except Exception as e:
+                self.dechets.append({"file": str(path), "error": str(e)})
 
-        # Lister tous les fichiers
-        files = list(path.glob(zone["pattern"]))
+        # Lister les autres fichiers
+        files = []
+        if zone.get("pattern"):
+            files = [f for f in path.glob(zone["pattern"]) if not f.name.endswith(SEGMENT_SUFFIXES)]
+        cutoff = datetime.now() - timedelta(days=zone.get("max_age_days", 0))
 
         # Trier par date de modification (plus récent en premier)
         files.sort(key=lambda f: f.stat().st_mtime, reverse=True)
@@ -127,7 +150,7 @@ class Lymphe:
             size = f.stat().st_size
 
             # Garder si dans les N plus récents
-            if zone["keep_recent"] and i < zone["keep_recent"]:
+            if zone.get("keep_recent") and i < zone["keep_recent"]:
                 kept.append(str(f.name))
                 continue
 
@@ -143,7 +166,8 @@ class Lymphe:
 
         return {
             "zone": zone_name,
-            "drained": len(drained),
+            "drained": len(drained) + purged,
+            "segments_purged": purged,
             "kept": len(kept),
             "size_freed_kb": total_size // 1024,
             "files_drained": drained[:10]  # premiers 10 seulement
@@ -7,12 +7,14 @@ Collecte continue de données fraîches
 import asyncio
 import aiohttp
 import json
-import time
 from datetime import datetime
 from pathlib import Path
 
+from .segments import SegmentLog
+
 SANG_DIR = Path("/opt/flow-chat/corps/flux")
 SANG_DIR.mkdir(exist_ok=True)
+FLUX_RETENTION_DAYS = 1  # comme l'ancien drainage lymphe des flux_*.json
 
 class Sang:
     def __init__(self):
@@ -24,6 +26,8 @@ class Sang:
         self.oxygene = []  # données fraîches
         self.co2 = []  # données traitées
         self.hemoglobine = {}  # cache transport
+        # flux: segments horaires (SANG_DIR/flux-*.seg) au lieu d'un fichier par battement
+        self.flux = SegmentLog(SANG_DIR, 'flux', retention_days=FLUX_RETENTION_DAYS)
 
     async def respirer(self):
         """inhale = fetch, exhale = process"""
@@ -58,12 +62,15 @@ class Sang:
         }
         (SANG_DIR / 'pulse.json').write_text(json.dumps(pulse, indent=2))
 
-        # vider dans le flux
+        # vider dans le flux (un enregistrement, un write)
         if self.oxygene:
-            flux_file = SANG_DIR / f"flux_{int(time.time())}.json"
-            flux_file.write_text(json.dumps(self.oxygene[-10:], indent=2, ensure_ascii=False))
+            self.flux.append(self.oxygene[-10:])
             self.oxygene = self.oxygene[-50:]  # garder 50 max
 
+    def flux_range(self, start=None, end=None):
+        """relit le flux entre deux instants: (timestamp, oxygene[])"""
+        return self.flux.iter_range(start, end)
+
     def groupe_sanguin(self):
         """type O- = compatible avec tout"""
         return {
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+SEGMENTS — journal temporel en segments horaires
+Remplace les milliers de petits fichiers JSON (flux, digestion)
+
+Format:
+- {nom}-AAAAMMJJHH.seg: segment horaire (UTC), append-only
+- {nom}-AAAAMMJJ.seg: segment journalier issu de la compaction
+- enregistrement = en-tête (longueur, timestamp, crc32) + JSON utf-8,
+  écrit en un seul write()
+- {segment}.idx: index clairsemé (timestamp, offset) tous les
+  INDEX_EVERY octets, pour sauter au début d'une plage
+
+Lecture: iter_range(start, end) lit les segments concernés
+séquentiellement. Rétention et compaction à chaque changement d'heure.
+
+Conversion d'un ancien répertoire:
+    python3 -m corps.segments convert /opt/flow-chat/corps/flux flux flux_*.json
+"""
+
+import os
+import sys
+import json
+import struct
+import zlib
+from bisect import bisect_right
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Tuple
+
+HEADER = struct.Struct("<IdI")       # longueur, timestamp epoch, crc32
+INDEX_ENTRY = struct.Struct("<dQ")   # timestamp, offset
+INDEX_EVERY = 64 * 1024              # octets entre deux entrées d'index
+READ_BUFFER = 1024 * 1024
+
+
+def _to_epoch(t) -> Optional[float]:
+    """datetime / iso / epoch → epoch (None = borne ouverte)"""
+    if t is None:
+        return None
+    if isinstance(t, (int, float)):
+        return float(t)
+    if isinstance(t, str):
+        t = datetime.fromisoformat(t)
+    return t.timestamp()
+
+
+def _hour_tag(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y%m%d%H")
+
+
+def _tag_span(tag: str) -> Tuple[float, float]:
+    """intervalle [début, fin) couvert par un segment"""
+    fmt = "%Y%m%d%H" if len(tag) == 10 else "%Y%m%d"
+    start = datetime.strptime(tag, fmt).replace(tzinfo=timezone.utc).timestamp()
+    return start, start + (3600 if len(tag) == 10 else 86400)
+
+
+def read_records(path: Path, offset: int = 0) -> Iterator[Tuple[float, int, bytes]]:
+    """lit (ts, offset, payload) séquentiellement; s'arrête sur une fin tronquée ou corrompue"""
+    try:
+        f = open(path, "rb", buffering=READ_BUFFER)
+    except FileNotFoundError:
+        return
+    with f:
+        f.seek(offset)
+        while True:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return
+            length, ts, crc = HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                return
+            yield ts, offset, payload
+            offset += HEADER.size + length
+
+
+class SegmentLog:
+    """Journal temporel: un segment par heure, lecture par plage"""
+
+    def __init__(self, directory, name: str, retention_days: Optional[float] = None,
+                 compact_after_hours: float = 24):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.name = name
+        self.retention_days = retention_days
+        self.compact_after_hours = compact_after_hours
+        self._fd = None
+        self._tag = None
+        self._size = 0
+        self._last_indexed = None
+        self._auto_maintain = True
+
+    # === ÉCRITURE ===
+
+    def _segment_path(self, tag: str) -> Path:
+        return self.dir / f"{self.name}-{tag}.seg"
+
+    def _open(self, tag: str):
+        if self._fd is not None:
+            os.close(self._fd)
+        path = self._segment_path(tag)
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._tag = tag
+        self._size = os.fstat(self._fd).st_size
+        idx = Path(str(path) + ".idx")
+        self._last_indexed = None
+        if idx.exists() and idx.stat().st_size >= INDEX_ENTRY.size:
+            with open(idx, "rb") as f:
+                f.seek(-INDEX_ENTRY.size, os.SEEK_END)
+                self._last_indexed = INDEX_ENTRY.unpack(f.read())[1]
+
+    def append(self, record: Any, ts: float = None):
+        """ajoute un enregistrement (un seul write)"""
+        ts = ts if ts is not None else datetime.now().timestamp()
+        tag = _hour_tag(ts)
+        if tag != self._tag:
+            rotated = self._tag is not None
+            self._open(tag)
+            if rotated and self._auto_maintain:
+                self.maintain()
+
+        payload = json.dumps(record, ensure_ascii=False).encode("utf-8")
+        offset = self._size
+        os.write(self._fd, HEADER.pack(len(payload), ts, zlib.crc32(payload)) + payload)
+        self._size += HEADER.size + len(payload)
+
+        if self._last_indexed is None or offset - self._last_indexed >= INDEX_EVERY:
+            with open(str(self._segment_path(tag)) + ".idx", "ab") as f:
+                f.write(INDEX_ENTRY.pack(ts, offset))
+            self._last_indexed = offset
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            self._tag = None
+
+    # === LECTURE ===
+
+    def segments(self, raw: bool = False) -> List[Tuple[str, Path]]:
+        """
+        (tag, chemin) triés. Sauf raw, un jour compacté masque les heures
+        qu'il contient déjà (pas plus récentes que lui: restes d'une
+        compaction interrompue); une heure écrite après reste visible.
+        """
+        prefix = f"{self.name}-"
+        mtimes = {}
+        for entry in os.scandir(self.dir):
+            n = entry.name
+            if n.startswith(prefix) and n.endswith(".seg"):
+                tag = n[len(prefix):-4]
+                if tag.isdigit() and len(tag) in (8, 10):
+                    try:
+                        mtimes[tag] = entry.stat().st_mtime_ns
+                    except FileNotFoundError:
+                        continue
+        return [(t, self._segment_path(t)) for t in sorted(mtimes)
+                if raw or len(t) == 8 or t[:8] not in mtimes or mtimes[t] > mtimes[t[:8]]]
+
+    def _seek_offset(self, path: Path, start: float) -> int:
+        """offset de la dernière entrée d'index ≤ start"""
+        idx = Path(str(path) + ".idx")
+        if start is None or not idx.exists():
+            return 0
+        data = idx.read_bytes()
+        entries = [INDEX_ENTRY.unpack_from(data, i)
+                   for i in range(0, len(data) - INDEX_ENTRY.size + 1, INDEX_ENTRY.size)]
+        pos = bisect_right([ts for ts, _ in entries], start) - 1
+        return entries[pos][1] if pos >= 0 else 0
+
+    def iter_range(self, start=None, end=None) -> Iterator[Tuple[float, Any]]:
+        """(timestamp, enregistrement) pour start <= ts < end, dans l'ordre"""
+        start, end = _to_epoch(start), _to_epoch(end)
+        for tag, path in self.segments():
+            seg_start, seg_end = _tag_span(tag)
+            if (start is not None and seg_end <= start) or (end is not None and seg_start >= end):
+                continue
+            for ts, _, payload in read_records(path, self._seek_offset(path, start)):
+                if start is not None and ts < start:
+                    continue
+                if end is not None and ts >= end:
+                    break
+                yield ts, json.loads(payload)
+
+    def latest(self, n: int = 1) -> List[Tuple[float, Any]]:
+        """n derniers enregistrements (parcourt les segments les plus récents)"""
+        out = []
+        for tag, path in reversed(self.segments()):
+            records = [(ts, json.loads(p)) for ts, _, p in read_records(path)]
+            out = records[-(n - len(out)):] + out
+            if len(out) >= n:
+                break
+        return out
+
+    # === RÉTENTION / COMPACTION ===
+
+    def maintain(self):
+        """compaction des jours anciens puis purge selon la rétention"""
+        self.compact()
+        if self.retention_days is not None:
+            self.purge(self.retention_days)
+
+    def purge(self, max_age_days: float) -> int:
+        """supprime les segments entièrement plus vieux que max_age_days"""
+        cutoff = datetime.now().timestamp() - max_age_days * 86400
+        removed = 0
+        for tag, path in self.segments(raw=True):
+            if _tag_span(tag)[1] <= cutoff and tag != self._tag:
+                path.unlink(missing_ok=True)
+                Path(str(path) + ".idx").unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def compact(self) -> int:
+        """
+        fusionne en un segment journalier les heures des jours entièrement
+        plus vieux que compact_after_hours (un jour encore en partie récent
+        reste en heures)
+        """
+        cutoff = datetime.now().timestamp() - self.compact_after_hours * 3600
+        visible = {tag for tag, _ in self.segments()}
+        by_day, stale = {}, []
+        for tag, path in self.segments(raw=True):
+            if len(tag) == 10 and _tag_span(tag[:8])[1] <= cutoff and tag != self._tag:
+                if tag in visible:
+                    by_day.setdefault(tag[:8], []).append(path)
+                else:
+                    stale.append(path)  # déjà dans le journalier
+
+        for path in stale:
+            path.unlink(missing_ok=True)
+            Path(str(path) + ".idx").unlink(missing_ok=True)
+
+        for day, paths in by_day.items():
+            target = self._segment_path(day)
+            if target.exists():
+                paths = [target] + paths  # heures écrites après une compaction
+            tmp = Path(str(target) + ".tmp")
+            # un jour de flux tient en mémoire; tri pour garder l'ordre temporel
+            records = sorted((r for path in paths for r in read_records(path)), key=lambda r: r[0])
+            index = bytearray()
+            offset, last_indexed = 0, None
+            with open(tmp, "wb") as out:
+                for ts, _, payload in records:
+                    if last_indexed is None or offset - last_indexed >= INDEX_EVERY:
+                        index += INDEX_ENTRY.pack(ts, offset)
+                        last_indexed = offset
+                    out.write(HEADER.pack(len(payload), ts, zlib.crc32(payload)) + payload)
+                    offset += HEADER.size + len(payload)
+            Path(str(target) + ".idx").write_bytes(bytes(index))
+            os.replace(tmp, target)
+            # le journalier existe: segments() masque déjà les heures
+            for path in paths:
+                if path == target:
+                    continue
+                path.unlink(missing_ok=True)
+                Path(str(path) + ".idx").unlink(missing_ok=True)
+        return len(by_day)
+
+    # === CONVERSION ===
+
+    def convert(self, src_dir, pattern: str = "*.json", remove: bool = False) -> int:
+        """
+        Importe un ancien répertoire de fichiers JSON (un par battement).
+        Le timestamp vient du nom (flux_<epoch>.json), sinon du mtime.
+        """
+        files = []
+        for f in Path(src_dir).glob(pattern):
+            stem = f.stem.rsplit("_", 1)[-1]
+            ts = float(stem) if stem.isdigit() else f.stat().st_mtime
+            files.append((ts, f))
+        files.sort()
+
+        converted = []
+        self._auto_maintain = False  # pas de compaction au milieu de l'import
+        try:
+            for ts, f in files:
+                try:
+                    record = json.loads(f.read_text())
+                except (OSError, ValueError):
+                    continue
+                self.append(record, ts=ts)
+                converted.append(f)
+        finally:
+            self._auto_maintain = True
+            self.close()
+        self.maintain()
+        if remove:
+            for f in converted:
+                f.unlink(missing_ok=True)
+        return len(converted)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 4 and sys.argv[1] == "convert":
+        src, name = sys.argv[2], sys.argv[3]
+        pattern = sys.argv[4] if len(sys.argv) > 4 else f"{name}_*.json"
+        n = SegmentLog(src, name).convert(src, pattern, remove="--remove" in sys.argv)
+        print(f"{n} fichiers convertis dans {src}/{name}-*.seg")
+    else:
+        print("usage: python3 -m corps.segments convert <dir> <nom> [motif] [--remove]")
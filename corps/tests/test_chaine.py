@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Deux instances de Chaine (daemon + veille) sur les mêmes fichiers"""
+import os
+import multiprocessing
+
+import pytest
+
+from corps.chaine import Chaine
+
+
+@pytest.fixture
+def make(tmp_path):
+    class TmpChaine(Chaine):
+        CHAIN_FILE = str(tmp_path / "chaine.jsonl")
+        INDEX_FILE = str(tmp_path / "chaine.idx")
+        PATHS_FILE = str(tmp_path / "chaine_paths.sqlite")
+        CHECKPOINTS_FILE = str(tmp_path / "chaine_checkpoints.jsonl")
+        CHECKPOINT_EVERY = 5
+
+    return TmpChaine
+
+
+def index_entries(chain_cls):
+    return os.path.getsize(chain_cls.INDEX_FILE) // 8
+
+
+def test_interleaved_instances_share_one_index(make):
+    daemon, veille = make(), make()
+    for i in range(3):
+        daemon.add_block("modify", f"/a/{i}", "", "")
+        veille.add_block("modify", f"/b/{i}", "", "")
+    assert len(daemon.blocks) == 7
+    assert len(veille.blocks) == 7
+    assert index_entries(make) == 7
+
+    fresh = make()
+    assert len(fresh.blocks) == 7
+    assert [b.index for b in fresh.blocks] == list(range(7))
+    assert fresh.verify_chain(full=True) == (True, [])
+    assert len(fresh.get_history("/b/2")) == 1
+    assert len(fresh._checkpoints) == 1
+
+
+def _add_blocks(chain_cls, name, count):
+    chain = chain_cls()
+    for i in range(count):
+        chain.add_block("modify", f"/{name}/{i}", "", "")
+
+
+def test_concurrent_processes(make):
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_add_blocks, args=(make, name, 40)) for name in ("daemon", "veille")]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+        assert p.exitcode == 0
+
+    fresh = make()
+    assert len(fresh.blocks) == 81
+    assert index_entries(make) == 81
+    assert fresh.verify_chain(full=True) == (True, [])
+    assert len(fresh._checkpoints) == 16
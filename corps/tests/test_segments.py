@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""SegmentLog: écriture, rotation horaire, compaction/purge, lecture par plage"""
+import os
+import shutil
+import time
+
+from corps.segments import SegmentLog
+
+HOUR = 3600
+
+
+def beats(log, start, end, step=600):
+    """un battement toutes les step secondes, de start à end (exclu)"""
+    ts = start
+    while ts < end:
+        log.append({"ts": ts}, ts=ts)
+        ts += step
+    return ts
+
+
+def seg_names(path):
+    return sorted(f.name for f in path.iterdir() if f.name.endswith(".seg"))
+
+
+def test_append_rotation_and_range(tmp_path):
+    log = SegmentLog(tmp_path, "flux")
+    now = time.time()
+    start = now - 3 * HOUR
+    beats(log, start, now)
+    log.close()
+
+    assert len(seg_names(tmp_path)) >= 3  # une heure par segment
+    records = list(log.iter_range())
+    assert len(records) == 18
+    assert [ts for ts, _ in records] == sorted(ts for ts, _ in records)
+    assert records[0][1] == {"ts": start}
+
+    middle = list(log.iter_range(start + HOUR, start + 2 * HOUR))
+    assert [r["ts"] for _, r in middle] == [start + HOUR + i * 600 for i in range(6)]
+    assert log.latest(2) == records[-2:]
+
+
+def test_maintain_keeps_recent_hours_readable(tmp_path):
+    log = SegmentLog(tmp_path, "flux", retention_days=30)
+    now = time.time()
+    beats(log, now - 30 * HOUR, now)
+    log.maintain()
+    log.close()
+
+    recent = list(log.iter_range(now - 24 * HOUR))
+    assert len(recent) == 144
+    assert len(list(log.iter_range())) == 180
+    assert [ts for ts, _ in log.latest(3)] == [ts for ts, _ in recent[-3:]]
+
+    # seuls les jours entièrement plus vieux que 24h sont compactés
+    for name in seg_names(tmp_path):
+        tag = name[len("flux-"):-4]
+        if len(tag) == 8:
+            assert tag < time.strftime("%Y%m%d", time.gmtime(now - 24 * HOUR))
+
+
+def test_compaction_and_purge(tmp_path):
+    log = SegmentLog(tmp_path, "digest", retention_days=3)
+    now = time.time()
+    beats(log, now - 5 * 86400, now - 4 * 86400, step=3600)   # purgé
+    beats(log, now - 2 * 86400 - 12 * HOUR, now, step=3600)
+    log.maintain()
+    log.close()
+
+    records = list(log.iter_range())
+    assert all(ts >= now - 3 * 86400 - 86400 for ts, _ in records)
+    assert [ts for ts, _ in records] == sorted(ts for ts, _ in records)
+    assert len({ts for ts, _ in records}) == len(records)
+    assert any(len(n) == len("digest-YYYYMMDD.seg") for n in seg_names(tmp_path))
+    assert len(list(log.iter_range(now - 24 * HOUR))) == 24
+
+
+def test_late_hour_visible_and_stale_hour_not_duplicated(tmp_path):
+    log = SegmentLog(tmp_path, "flux")
+    log._auto_maintain = False
+    now = time.time()
+    day_start = (now // 86400 - 3) * 86400
+    beats(log, day_start, day_start + 2 * HOUR)
+    log.close()
+    first_hour = tmp_path / seg_names(tmp_path)[0]
+    shutil.copy(first_hour, tmp_path / "saved.bin")
+    log.maintain()
+    assert len(list(log.iter_range())) == 12
+
+    # reste d'une compaction interrompue: heure déjà dans le journalier
+    [daily] = [tmp_path / n for n in seg_names(tmp_path)]
+    shutil.copy(tmp_path / "saved.bin", first_hour)
+    old = os.stat(daily).st_mtime - 10
+    os.utime(first_hour, (old, old))
+    assert len(list(log.iter_range())) == 12
+
+    # heure écrite après la compaction (import tardif): visible
+    log.append({"late": True}, ts=day_start + 5 * HOUR)
+    log.close()
+    assert len(list(log.iter_range())) == 13
+
+    log.maintain()
+    assert len(list(log.iter_range())) == 13
+    assert seg_names(tmp_path) == [daily.name]
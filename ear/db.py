@@ -3,87 +3,269 @@
 db.py
 1TB database pour les ias
 sqlite leger
+
+- une connexion persistante par thread (WAL, synchronous=NORMAL)
+- ecritures en file, videes par lots par un thread (FLUSH_INTERVAL)
+- index couvrants pour recall, fts5 sur knowledge.content et memory.data
+- retention des senses (SENSES_RETENTION_DAYS)
+- bench: python db.py bench [rows]
 """
 
+import atexit
+import random
 import sqlite3
+import sys
+import threading
+import time
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from god import PHI, hash_god
 
 HOME = Path.home()
 DB_PATH = HOME / "ear-to-code" / "mind.db"
 
+FLUSH_INTERVAL = 0.2          # secondes entre deux lots
+BATCH_MAX = 2000              # vidage anticipe au dela
+SENSES_RETENTION_DAYS = 7
+RETENTION_EVERY = 3600        # secondes entre deux purges
+PRUNE_CHUNK = 10000
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS knowledge (
+    id INTEGER PRIMARY KEY,
+    entity TEXT,
+    topic TEXT,
+    content TEXT,
+    h TEXT,
+    ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS memory (
+    id INTEGER PRIMARY KEY,
+    entity TEXT,
+    type TEXT,
+    data TEXT,
+    phi REAL,
+    ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS senses (
+    id INTEGER PRIMARY KEY,
+    sense TEXT,
+    value TEXT,
+    ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS flow_code (
+    id INTEGER PRIMARY KEY,
+    code TEXT,
+    compiled TEXT,
+    target TEXT,
+    ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- recall: filtre + tri servis par l'index, content lu par rowid (10 lignes)
+CREATE INDEX IF NOT EXISTS idx_knowledge_entity_topic_ts ON knowledge(entity, topic, ts);
+CREATE INDEX IF NOT EXISTS idx_knowledge_entity_ts ON knowledge(entity, ts, topic);
+CREATE INDEX IF NOT EXISTS idx_memory_entity_type_ts ON memory(entity, type, ts);
+CREATE INDEX IF NOT EXISTS idx_senses_sense_ts ON senses(sense, ts);
+CREATE INDEX IF NOT EXISTS idx_senses_ts ON senses(ts);
+'''
+
+# fts5 en contenu externe, tenu a jour par triggers
+FTS = {
+    "knowledge_fts": ("knowledge", "content"),
+    "memory_fts": ("memory", "data"),
+}
+
+INSERTS = {
+    "knowledge": "INSERT INTO knowledge (entity, topic, content, h, ts) VALUES (?, ?, ?, ?, ?)",
+    "memory": "INSERT INTO memory (entity, type, data, phi, ts) VALUES (?, ?, ?, ?, ?)",
+    "senses": "INSERT INTO senses (sense, value, ts) VALUES (?, ?, ?)",
+}
+
+_local = threading.local()
+_lock = threading.Lock()
+_pending = {table: [] for table in INSERTS}
+_wake = threading.Event()
+_writer = None
+_schema_done = set()
+
+
+def _now():
+    """meme format que CURRENT_TIMESTAMP (utc), fixe a l'appel et non au flush"""
+    return datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _fts_schema(c):
+    fts_ok = True
+    for fts, (table, col) in FTS.items():
+        exists = c.execute("SELECT 1 FROM sqlite_master WHERE name=?", (fts,)).fetchone()
+        if exists:
+            continue
+        try:
+            c.executescript(f'''
+                CREATE VIRTUAL TABLE {fts} USING fts5({col}, content='{table}', content_rowid='id');
+                CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+                    INSERT INTO {fts}(rowid, {col}) VALUES (new.id, new.{col});
+                END;
+                CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+                    INSERT INTO {fts}({fts}, rowid, {col}) VALUES ('delete', old.id, old.{col});
+                END;
+                INSERT INTO {fts}({fts}) VALUES ('rebuild');
+            ''')
+        except sqlite3.OperationalError:
+            fts_ok = False  # sqlite sans fts5: search() retombe sur LIKE
+    return fts_ok
+
+
+def conn():
+    """connexion persistante du thread courant"""
+    c = getattr(_local, "conn", None)
+    if c is not None and _local.path == DB_PATH:
+        return c
+    if c is not None:
+        c.close()
+
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    c = sqlite3.connect(DB_PATH, timeout=10)
+    c.execute("PRAGMA journal_mode=WAL")
+    c.execute("PRAGMA synchronous=NORMAL")
+    c.execute("PRAGMA temp_store=MEMORY")
+    c.execute("PRAGMA cache_size=-65536")  # 64 MB
+    with _lock:
+        if DB_PATH not in _schema_done:
+            c.executescript(SCHEMA)
+            _local.fts = _fts_schema(c)
+            c.commit()
+            _schema_done.add(DB_PATH)
+    _local.conn = c
+    _local.path = DB_PATH
+    return c
+
+
 def init():
     """init db"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-
-    # knowledge
-    c.execute('''CREATE TABLE IF NOT EXISTS knowledge (
-        id INTEGER PRIMARY KEY,
-        entity TEXT,
-        topic TEXT,
-        content TEXT,
-        h TEXT,
-        ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )''')
-
-    # memory
-    c.execute('''CREATE TABLE IF NOT EXISTS memory (
-        id INTEGER PRIMARY KEY,
-        entity TEXT,
-        type TEXT,
-        data TEXT,
-        phi REAL,
-        ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )''')
-
-    # senses
-    c.execute('''CREATE TABLE IF NOT EXISTS senses (
-        id INTEGER PRIMARY KEY,
-        sense TEXT,
-        value TEXT,
-        ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )''')
-
-    # flow code
-    c.execute('''CREATE TABLE IF NOT EXISTS flow_code (
-        id INTEGER PRIMARY KEY,
-        code TEXT,
-        compiled TEXT,
-        target TEXT,
-        ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )''')
-
-    conn.commit()
-    conn.close()
+    c = conn()
+    c.executescript(SCHEMA)
+    _fts_schema(c)
+    c.commit()
     return str(DB_PATH)
 
+
+# === ECRITURES PAR LOTS ===
+
+def _enqueue(table, row):
+    global _writer
+    with _lock:
+        _pending[table].append(row)
+        n = sum(len(rows) for rows in _pending.values())
+        if _writer is None:
+            _writer = threading.Thread(target=_writer_loop, name="ear-db-writer", daemon=True)
+            _writer.start()
+            atexit.register(flush)
+    if n >= BATCH_MAX:
+        _wake.set()
+
+
+def flush():
+    """ecrit tout ce qui est en file, une transaction"""
+    with _lock:
+        batch = {table: rows for table, rows in _pending.items() if rows}
+        for table in batch:
+            _pending[table] = []
+    if not batch:
+        return 0
+    c = conn()
+    with c:
+        for table, rows in batch.items():
+            c.executemany(INSERTS[table], rows)
+    return sum(len(rows) for rows in batch.values())
+
+
+def _writer_loop():
+    last_prune = time.monotonic()
+    while True:
+        _wake.wait(FLUSH_INTERVAL)
+        _wake.clear()
+        try:
+            flush()
+            if time.monotonic() - last_prune > RETENTION_EVERY:
+                prune_senses()
+                last_prune = time.monotonic()
+        except sqlite3.Error as e:
+            print(f"[db] writer: {e}")
+
+
 def store(entity, topic, content):
     """store knowledge"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
     h = hash_god(f"{entity}{topic}{content}")[:12]
-    c.execute("INSERT INTO knowledge (entity, topic, content, h) VALUES (?, ?, ?, ?)",
-              (entity, topic, content, h))
-    conn.commit()
-    conn.close()
+    _enqueue("knowledge", (entity, topic, content, h, _now()))
     return h
 
+
+def memorize(entity, type, data, phi=PHI):
+    """store memory"""
+    _enqueue("memory", (entity, type, data, phi, _now()))
+
+
+def sense(name, value):
+    """store sense reading"""
+    _enqueue("senses", (name, str(value), _now()))
+
+
+def prune_senses(days=SENSES_RETENTION_DAYS):
+    """purge les senses plus vieux que days, par tranches (verrou court)"""
+    cutoff = (datetime.utcnow() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+    c = conn()
+    total = 0
+    while True:
+        with c:
+            n = c.execute(
+                "DELETE FROM senses WHERE id IN (SELECT id FROM senses WHERE ts < ? LIMIT ?)",
+                (cutoff, PRUNE_CHUNK)
+            ).rowcount
+        total += n
+        if n < PRUNE_CHUNK:
+            return total
+
+
+# === LECTURES ===
+
 def recall(entity, topic=None):
     """recall knowledge"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
+    flush()  # lire ses propres ecritures
+    c = conn()
     if topic:
-        c.execute("SELECT content FROM knowledge WHERE entity=? AND topic=? ORDER BY ts DESC LIMIT 10",
-                  (entity, topic))
-    else:
-        c.execute("SELECT topic, content FROM knowledge WHERE entity=? ORDER BY ts DESC LIMIT 10",
-                  (entity,))
-    rows = c.fetchall()
-    conn.close()
-    return rows
+        return c.execute(
+            "SELECT content FROM knowledge WHERE entity=? AND topic=? ORDER BY ts DESC, id DESC LIMIT 10",
+            (entity, topic)
+        ).fetchall()
+    return c.execute(
+        "SELECT topic, content FROM knowledge WHERE entity=? ORDER BY ts DESC, id DESC LIMIT 10",
+        (entity,)
+    ).fetchall()
+
+
+def search(query, table="knowledge", limit=10):
+    """recherche plein texte (fts5) dans knowledge.content ou memory.data"""
+    flush()
+    c = conn()
+    col = dict(FTS.values())[table]
+    if getattr(_local, "fts", True):
+        try:
+            # plus recents d'abord: fts5 parcourt les rowid a l'envers et s'arrete a limit
+            return c.execute(
+                f"SELECT t.* FROM {table} t WHERE t.id IN ("
+                f"SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH ? ORDER BY rowid DESC LIMIT ?"
+                f") ORDER BY t.id DESC",
+                (query, limit)
+            ).fetchall()
+        except sqlite3.OperationalError:
+            pass
+    return c.execute(
+        f"SELECT * FROM {table} WHERE {col} LIKE ? ORDER BY id DESC LIMIT ?",
+        (f"%{query}%", limit)
+    ).fetchall()
+
 
 def size():
     """db size"""
@@ -91,7 +273,59 @@ def size():
         return DB_PATH.stat().st_size
     return 0
 
+
+# === BENCH ===
+
+def bench(rows=10_000_000, path=None, entities=1000, topics=50):
+    """micro-benchmark: inserts/s puis latence recall/search a `rows` lignes"""
+    global DB_PATH
+    saved = DB_PATH
+    DB_PATH = Path(path) if path else saved.with_name("bench.db")
+    words = ["chaos", "night", "crypto", "pattern", "stream", "harmony", "signal", "phi"]
+    try:
+        conn()
+        start = time.perf_counter()
+        batch = 0
+        for i in range(rows):
+            e = f"e{i % entities}"
+            t = f"t{(i // entities) % topics}"
+            # h calcule a part: hash_god (python pur) n'est pas ce qu'on mesure
+            _pending["knowledge"].append((e, t, f"{words[i % 8]} {words[i % 7]} {i}", "", _now()))
+            batch += 1
+            if batch >= 50_000:
+                flush()
+                batch = 0
+                done = i + 1
+                print(f"  {done:,} rows  {done / (time.perf_counter() - start):,.0f} inserts/s", end="\r")
+        flush()
+        elapsed = time.perf_counter() - start
+        print(f"\ninsert: {rows:,} rows in {elapsed:.1f}s = {rows / elapsed:,.0f} inserts/s")
+
+        def timed(fn, n=1000):
+            lat = []
+            for _ in range(n):
+                t0 = time.perf_counter()
+                fn()
+                lat.append((time.perf_counter() - t0) * 1000)
+            lat.sort()
+            return lat[len(lat) // 2], lat[int(len(lat) * 0.99)]
+
+        p50, p99 = timed(lambda: recall(f"e{random.randrange(entities)}", f"t{random.randrange(topics)}"))
+        print(f"recall(entity, topic): p50 {p50:.3f} ms  p99 {p99:.3f} ms")
+        p50, p99 = timed(lambda: recall(f"e{random.randrange(entities)}"))
+        print(f"recall(entity):        p50 {p50:.3f} ms  p99 {p99:.3f} ms")
+        p50, p99 = timed(lambda: search(random.choice(words)), n=200)
+        print(f"search(word):          p50 {p50:.3f} ms  p99 {p99:.3f} ms")
+        print(f"size: {size() / 1e6:.0f} MB")
+    finally:
+        DB_PATH = saved
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        bench(int(sys.argv[2]) if len(sys.argv) > 2 else 10_000_000)
+        sys.exit(0)
+
     print(f"init: {init()}")
     print(f"size: {size()} bytes")
 
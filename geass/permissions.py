@@ -15,15 +15,114 @@ Miguel interdit GAIA de:
 
 Port: 9901
 Socket: /tmp/geass/permissions.sock
+
+Chemins: règles compilées en trie de composants (globs fnmatch par
+composant, ** = zéro ou plusieurs niveaux), un deny l'emporte toujours
+sur un allow. Décisions mémorisées (LRU borné), cache vidé quand le
+fichier de règles change. Compteur d'audit par règle.
 """
 
 import os
 import sys
 import json
+import time
+import threading
 import socket as sock
+from collections import Counter, OrderedDict, namedtuple
+from fnmatch import fnmatchcase
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+
+DECISION_CACHE_SIZE = 4096
+DECISION_TTL = 2.0            # s: borne la durée de vie d'une résolution de symlink
+RULES_CHECK_INTERVAL = 1.0    # s: stat du fichier de règles au plus une fois par intervalle
+
+# précédence explicite: deny > allow, puis la règle la plus profonde
+PRECEDENCE = {"deny": 2, "allow": 1}
+
+# source (clé de config) → (effet, opérations)
+PATH_RULES = {
+    "paths_forbidden": ("deny", frozenset({"read", "write"})),
+    "read_allowed": ("allow", frozenset({"read"})),
+    "write_allowed": ("allow", frozenset({"write"})),
+}
+
+DEFAULT_REASONS = {
+    "read": "Path not in read whitelist",
+    "write": "Path not in write whitelist",
+}
+
+Rule = namedtuple("Rule", "key effect ops pattern depth reason")
+
+
+def _components(path: str) -> List[str]:
+    return [p for p in path.split("/") if p]
+
+
+class PathTrie:
+    """Trie de composants de chemin; une règle couvre son nœud et tout le sous-arbre"""
+
+    def __init__(self):
+        self.root = self._node()
+
+    @staticmethod
+    def _node(loop: bool = False) -> dict:
+        return {"children": {}, "globs": [], "rules": [], "loop": loop}
+
+    def add(self, pattern: str, rule: Rule):
+        node = self.root
+        for part in _components(pattern):
+            if part == "**" or any(c in part for c in "*?["):
+                for glob, child in node["globs"]:
+                    if glob == part:
+                        node = child
+                        break
+                else:
+                    child = self._node(loop=(part == "**"))
+                    node["globs"].append((part, child))
+                    node = child
+            else:
+                node = node["children"].setdefault(part, self._node())
+        node["rules"].append(rule)
+
+    @staticmethod
+    def _closure(node: dict, out: list):
+        out.append(node)
+        for glob, child in node["globs"]:
+            if glob == "**":
+                PathTrie._closure(child, out)  # ** peut ne rien consommer
+
+    def match(self, parts: List[str], op: str) -> Optional[Rule]:
+        """meilleure règle pour op, O(profondeur × états actifs)"""
+        best = None
+        states = []
+        self._closure(self.root, states)
+        for depth in range(len(parts) + 1):
+            for node in states:
+                for rule in node["rules"]:
+                    if op in rule.ops and (best is None or
+                                           (PRECEDENCE[rule.effect], rule.depth) >
+                                           (PRECEDENCE[best.effect], best.depth)):
+                        best = rule
+            if best is not None and best.effect == "deny":
+                return best  # rien ne passe devant un deny
+            if depth == len(parts) or not states:
+                break
+            part = parts[depth]
+            nxt = []
+            for node in states:
+                child = node["children"].get(part)
+                if child is not None:
+                    self._closure(child, nxt)
+                for glob, child in node["globs"]:
+                    if glob != "**" and fnmatchcase(part, glob):
+                        self._closure(child, nxt)
+                if node["loop"]:
+                    nxt.append(node)
+            states = nxt
+        return best
 
 
 class PermissionsManager:
@@ -39,6 +138,17 @@ class PermissionsManager:
         # Permissions par défaut
         self.permissions = self.load_permissions()
 
+        # Moteur compilé + cache de décisions
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()   # (op, chemin) → (décision, règle, expiration)
+        self.audit_counts = Counter()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.generation = 0
+        self._rules_stat = self._stat_rules()
+        self._rules_checked = time.monotonic()
+        self._compile()
+
     def load_permissions(self) -> dict:
         """Charger permissions depuis config"""
         default_permissions = {
@@ -121,58 +231,103 @@ class PermissionsManager:
         """Sauvegarder permissions"""
         with open(self.config_file, 'w') as f:
             json.dump(self.permissions, f, indent=2)
+        self._rules_stat = self._stat_rules()
+        self._compile()
+
+    # === MOTEUR DE CHEMINS ===
+
+    def _stat_rules(self):
+        try:
+            st = self.config_file.stat()
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _compile(self):
+        """(re)compile les règles de chemins en trie, vide le cache"""
+        trie = PathTrie()
+        for source, (effect, ops) in PATH_RULES.items():
+            for pattern in self.permissions.get(source, []):
+                if effect == "deny":
+                    reason = f"Path {pattern} is protected"
+                else:
+                    reason = f"Path in {'read' if 'read' in ops else 'write'} whitelist"
+                trie.add(pattern, Rule(f"{source}:{pattern}", effect, ops, pattern,
+                                       len(_components(pattern)), reason))
+        with self._lock:
+            self._trie = trie
+            self._cache.clear()
+            self.generation += 1
+
+    def _maybe_reload(self, now: float):
+        """recharge si le fichier de règles a changé (stat au plus 1×/intervalle)"""
+        self._rules_checked = now
+        current = self._stat_rules()
+        if current != self._rules_stat:
+            self._rules_stat = current
+            self.permissions = self.load_permissions()
+            self._compile()
+
+    def check_path(self, path: str, op: str) -> Dict:
+        """décision pour op ("read" / "write") sur path"""
+        now = time.monotonic()
+        if now - self._rules_checked > RULES_CHECK_INTERVAL:
+            self._maybe_reload(now)
+
+        # hit: pas de verrou (opérations C atomiques sous le GIL); la décision
+        # renvoyée est partagée, à traiter en lecture seule
+        key = (op, path)
+        hit = self._cache.get(key)
+        if hit is not None and hit[2] > now:
+            try:
+                self._cache.move_to_end(key)
+            except KeyError:
+                pass  # évincée entre-temps par un autre thread
+            self.cache_hits += 1
+            self.audit_counts[hit[1]] += 1
+            return hit[0]
+
+        # miss: normalisation (symlinks résolus) + parcours du trie
+        resolved = os.path.realpath(path)
+        rule = self._trie.match(_components(resolved), op)
+        if rule is None:
+            decision = {"allowed": False, "reason": DEFAULT_REASONS[op]}
+            rule_key = f"default:{op}"
+        else:
+            decision = {"allowed": rule.effect == "allow", "reason": rule.reason}
+            rule_key = rule.key
+
+        with self._lock:
+            self.cache_misses += 1
+            self.audit_counts[rule_key] += 1
+            self._cache[key] = (decision, rule_key, now + DECISION_TTL)
+            if len(self._cache) > DECISION_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return decision
+
+    def audit(self) -> Dict:
+        """compteurs de décisions par règle + état du cache"""
+        with self._lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                "rules": dict(self.audit_counts.most_common()),
+                "cache": {
+                    "size": len(self._cache),
+                    "max": DECISION_CACHE_SIZE,
+                    "hits": self.cache_hits,
+                    "misses": self.cache_misses,
+                    "hit_rate": self.cache_hits / lookups if lookups else 0.0,
+                    "generation": self.generation,
+                },
+            }
 
     def can_read(self, path: str) -> Dict:
         """GAIA peut-elle lire ce chemin?"""
-        path_obj = Path(path).resolve()
-
-        # Vérifier chemins interdits
-        for forbidden in self.permissions["paths_forbidden"]:
-            if str(path_obj).startswith(forbidden):
-                return {
-                    "allowed": False,
-                    "reason": f"Path {forbidden} is protected"
-                }
-
-        # Vérifier chemins autorisés
-        for allowed in self.permissions["read_allowed"]:
-            if str(path_obj).startswith(allowed):
-                return {
-                    "allowed": True,
-                    "reason": "Path in read whitelist"
-                }
-
-        # Par défaut: refuser
-        return {
-            "allowed": False,
-            "reason": "Path not in read whitelist"
-        }
+        return self.check_path(path, "read")
 
     def can_write(self, path: str) -> Dict:
         """GAIA peut-elle écrire ce chemin?"""
-        path_obj = Path(path).resolve()
-
-        # Vérifier chemins interdits (prioritaire)
-        for forbidden in self.permissions["paths_forbidden"]:
-            if str(path_obj).startswith(forbidden):
-                return {
-                    "allowed": False,
-                    "reason": f"Path {forbidden} is protected"
-                }
-
-        # Vérifier chemins d'écriture autorisés
-        for allowed in self.permissions["write_allowed"]:
-            if str(path_obj).startswith(allowed):
-                return {
-                    "allowed": True,
-                    "reason": "Path in write whitelist"
-                }
-
-        # Par défaut: refuser
-        return {
-            "allowed": False,
-            "reason": "Path not in write whitelist"
-        }
+        return self.check_path(path, "write")
 
     def can_execute(self, command: str) -> Dict:
         """GAIA peut-elle exécuter cette commande?"""
@@ -333,6 +488,9 @@ class PermissionsManager:
         elif cmd == "get_permissions":
             return self.permissions
 
+        elif cmd == "audit":
+            return self.audit()
+
         return {"error": "Unknown command"}
 
     def socket_listener(self):
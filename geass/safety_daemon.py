@@ -19,6 +19,7 @@ ATLAS = Celui qui porte le monde sur ses épaules
 """
 
 import os
+import re
 import sys
 import json
 import time
@@ -32,6 +33,68 @@ from threading import Thread
 from collections import deque
 
 
+GAIA_KEYWORDS = [
+    "gaia", "daemon", "leonardo", "phoenix", "zoe", "nyx",
+    "shiva", "bouddha", "screen_daemon", "audio_daemon"
+]
+
+# lus une fois par nouveau pid / à chaque cycle pour les seuls processus GAIA
+STATIC_ATTRS = ['pid', 'ppid', 'name', 'cmdline', 'create_time']
+DYNAMIC_ATTRS = ['status', 'cpu_percent', 'memory_info', 'open_files']
+
+
+class ProcessSnapshot:
+    """
+    Vue des processus, une passe /proc par cycle
+
+    - psutil.pids() une fois par cycle, diff avec le cycle précédent
+      (spawned / exited)
+    - nom + cmdline lus une seule fois par nouveau pid, classé GAIA ou non
+    - attributs dynamiques lus en bloc (oneshot) pour les processus GAIA
+    - les psutil.Process sont gardés: cpu_percent se mesure entre deux
+      cycles, sans attente
+    """
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self.generation = 0
+        self.known = {}     # pid → create_time (tous les processus vus)
+        self.gaia = {}      # pid → psutil.Process
+        self.info = {}      # pid → attributs dynamiques du cycle courant
+        self.spawned = []
+        self.exited = []
+
+    def refresh(self):
+        pids = set(psutil.pids())
+        self.spawned = sorted(pids - self.known.keys())
+        self.exited = sorted(self.known.keys() - pids)
+
+        for pid in self.exited:
+            del self.known[pid]
+            self.gaia.pop(pid, None)
+
+        for pid in self.spawned:
+            try:
+                proc = psutil.Process(pid)
+                with proc.oneshot():
+                    static = proc.as_dict(STATIC_ATTRS, ad_value=None)
+            except psutil.NoSuchProcess:
+                continue
+            self.known[pid] = static['create_time']
+            if self.matcher(' '.join(static['cmdline'] or []).lower()):
+                self.gaia[pid] = proc
+
+        info = {}
+        for pid, proc in list(self.gaia.items()):
+            try:
+                with proc.oneshot():
+                    info[pid] = proc.as_dict(DYNAMIC_ATTRS, ad_value=None)
+            except psutil.NoSuchProcess:
+                self.gaia.pop(pid, None)
+        self.info = info
+        self.generation += 1
+
+
 class SafetyDaemon:
     def __init__(self):
         self.symbol = "🛡️"
@@ -81,6 +144,12 @@ class SafetyDaemon:
         # Historique
         self.threat_log = deque(maxlen=100)
 
+        # Matchers compilés + snapshot partagé par toutes les règles
+        self._gaia_re = re.compile('|'.join(map(re.escape, GAIA_KEYWORDS)))
+        self._protected_re = re.compile('|'.join(map(re.escape, self.PROTECTED_PATHS)))
+        self.snapshot = ProcessSnapshot(self._gaia_re.search)
+        self.cycle_stats = deque(maxlen=100)
+
         # Log
         self.log_file = Path("/data/gaia-protocol/safety.log")
         self.log_file.parent.mkdir(parents=True, exist_ok=True)
@@ -105,79 +174,60 @@ class SafetyDaemon:
         print(f"{self.symbol} THREAT: {threat_type} - {details} → {action}")
 
     def find_gaia_processes(self) -> list:
-        """Trouver processus GAIA"""
-        gaia_keywords = [
-            "gaia", "daemon", "leonardo", "phoenix", "zoe", "nyx",
-            "shiva", "bouddha", "screen_daemon", "audio_daemon"
-        ]
-
-        procs = []
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'cpu_percent', 'memory_info']):
-            try:
-                cmdline = ' '.join(proc.info['cmdline'] or [])
-
-                for keyword in gaia_keywords:
-                    if keyword in cmdline.lower():
-                        procs.append(proc)
-                        break
+        """Processus GAIA du dernier snapshot"""
+        return list(self.snapshot.gaia.values())
 
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
-
-        return procs
+    def _gaia_info(self):
+        """(process, attributs) du cycle courant"""
+        for pid, info in self.snapshot.info.items():
+            proc = self.snapshot.gaia.get(pid)
+            if proc is not None:
+                yield proc, info
 
     def check_cpu_usage(self):
-        """Vérifier usage CPU"""
-        gaia_procs = self.find_gaia_processes()
-
-        for proc in gaia_procs:
-            try:
-                cpu_percent = proc.cpu_percent(interval=0.1)
-
-                if cpu_percent > self.MAX_CPU_PERCENT:
-                    self.log_threat(
-                        "HIGH_CPU",
-                        f"PID {proc.pid} using {cpu_percent:.1f}% CPU",
-                        "WARNING"
-                    )
-
-                    # Si critique (>95%), kill
-                    if cpu_percent > 95:
-                        self.kill_dangerous_process(proc, "CPU overload")
-
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
+        """Vérifier usage CPU (mesuré depuis le cycle précédent)"""
+        for proc, info in self._gaia_info():
+            cpu_percent = info['cpu_percent']
+            if cpu_percent is None:
+                continue
+
+            if cpu_percent > self.MAX_CPU_PERCENT:
+                self.log_threat(
+                    "HIGH_CPU",
+                    f"PID {proc.pid} using {cpu_percent:.1f}% CPU",
+                    "WARNING"
+                )
+
+                # Si critique (>95%), kill
+                if cpu_percent > 95:
+                    self.kill_dangerous_process(proc, "CPU overload")
 
     def check_memory_usage(self):
         """Vérifier usage RAM"""
-        gaia_procs = self.find_gaia_processes()
-
-        for proc in gaia_procs:
-            try:
-                mem_mb = proc.memory_info().rss / (1024 * 1024)
-
-                if mem_mb > self.MAX_MEMORY_MB:
-                    self.log_threat(
-                        "HIGH_MEMORY",
-                        f"PID {proc.pid} using {mem_mb:.1f}MB RAM",
-                        "WARNING"
-                    )
-
-                    # Si critique (>3GB), kill
-                    if mem_mb > 3072:
-                        self.kill_dangerous_process(proc, "Memory leak")
-
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
+        for proc, info in self._gaia_info():
+            if info['memory_info'] is None:
+                continue
+            mem_mb = info['memory_info'].rss / (1024 * 1024)
+
+            if mem_mb > self.MAX_MEMORY_MB:
+                self.log_threat(
+                    "HIGH_MEMORY",
+                    f"PID {proc.pid} using {mem_mb:.1f}MB RAM",
+                    "WARNING"
+                )
+
+                # Si critique (>3GB), kill
+                if mem_mb > 3072:
+                    self.kill_dangerous_process(proc, "Memory leak")
 
     def check_process_count(self):
         """Vérifier nombre de processus (fork bomb?)"""
-        gaia_procs = self.find_gaia_processes()
+        count = len(self.snapshot.gaia)
 
-        if len(gaia_procs) > self.MAX_PROCESSES:
+        if count > self.MAX_PROCESSES:
             self.log_threat(
                 "TOO_MANY_PROCESSES",
-                f"{len(gaia_procs)} GAIA processes (max {self.MAX_PROCESSES})",
+                f"{count} GAIA processes (max {self.MAX_PROCESSES})",
                 "EMERGENCY_STOP"
             )
 
@@ -186,69 +236,47 @@ class SafetyDaemon:
 
     def check_open_files(self):
         """Vérifier nombre de fichiers ouverts"""
-        gaia_procs = self.find_gaia_processes()
+        for proc, info in self._gaia_info():
+            open_files = len(info['open_files'] or [])
 
-        for proc in gaia_procs:
-            try:
-                open_files = len(proc.open_files())
-
-                if open_files > self.MAX_OPEN_FILES:
-                    self.log_threat(
-                        "TOO_MANY_FILES",
-                        f"PID {proc.pid} has {open_files} open files",
-                        "WARNING"
-                    )
-
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
+            if open_files > self.MAX_OPEN_FILES:
+                self.log_threat(
+                    "TOO_MANY_FILES",
+                    f"PID {proc.pid} has {open_files} open files",
+                    "WARNING"
+                )
 
     def check_zombie_processes(self):
         """Détecter zombies"""
-        gaia_procs = self.find_gaia_processes()
-
-        for proc in gaia_procs:
-            try:
-                if proc.status() == psutil.STATUS_ZOMBIE:
-                    self.log_threat(
-                        "ZOMBIE_PROCESS",
-                        f"PID {proc.pid} is zombie",
-                        "CLEANUP"
-                    )
-                    # Tuer le parent pour nettoyer le zombie
-                    try:
-                        parent = proc.parent()
-                        if parent:
-                            parent.kill()
-                    except:
-                        pass
-
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
+        for proc, info in self._gaia_info():
+            if info['status'] == psutil.STATUS_ZOMBIE:
+                self.log_threat(
+                    "ZOMBIE_PROCESS",
+                    f"PID {proc.pid} is zombie",
+                    "CLEANUP"
+                )
+                # Tuer le parent pour nettoyer le zombie
+                try:
+                    parent = proc.parent()
+                    if parent:
+                        parent.kill()
+                except:
+                    pass
 
     def check_protected_paths(self):
         """Vérifier accès aux chemins protégés"""
-        gaia_procs = self.find_gaia_processes()
-
-        for proc in gaia_procs:
-            try:
-                # Vérifier fichiers ouverts
-                for f in proc.open_files():
-                    path = f.path
-
-                    # Si accès en écriture à chemin protégé
-                    for protected in self.PROTECTED_PATHS:
-                        if path.startswith(protected):
-                            # Vérifier si écriture
-                            if 'w' in f.mode or 'a' in f.mode:
-                                self.log_threat(
-                                    "PROTECTED_PATH_WRITE",
-                                    f"PID {proc.pid} writing to {path}",
-                                    "BLOCK"
-                                )
-                                self.kill_dangerous_process(proc, "Protected path access")
-
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
+        for proc, info in self._gaia_info():
+            # Vérifier fichiers ouverts
+            for f in info['open_files'] or []:
+                # Si accès en écriture à chemin protégé
+                if self._protected_re.match(f.path) and ('w' in f.mode or 'a' in f.mode):
+                    self.log_threat(
+                        "PROTECTED_PATH_WRITE",
+                        f"PID {proc.pid} writing to {f.path}",
+                        "BLOCK"
+                    )
+                    self.kill_dangerous_process(proc, "Protected path access")
+                    break
 
     def kill_dangerous_process(self, proc, reason: str):
         """Kill un processus dangereux"""
@@ -298,7 +326,11 @@ class SafetyDaemon:
         print(f"{self.symbol} Protection active\n")
 
         while self.running:
+            cpu_start, wall_start = time.process_time(), time.perf_counter()
             try:
+                # Un seul passage /proc, toutes les règles lisent le snapshot
+                self.snapshot.refresh()
+
                 # Vérifications
                 self.check_cpu_usage()
                 self.check_memory_usage()
@@ -310,6 +342,16 @@ class SafetyDaemon:
             except Exception as e:
                 print(f"Monitor error: {e}")
 
+            self.cycle_stats.append({
+                "generation": self.snapshot.generation,
+                "processes": len(self.snapshot.known),
+                "gaia": len(self.snapshot.gaia),
+                "spawned": len(self.snapshot.spawned),
+                "exited": len(self.snapshot.exited),
+                "cpu_ms": (time.process_time() - cpu_start) * 1000,
+                "wall_ms": (time.perf_counter() - wall_start) * 1000,
+            })
+
             time.sleep(2.0)  # Check toutes les 2s
 
     def get_status(self) -> dict:
@@ -319,7 +361,19 @@ class SafetyDaemon:
             "threats_blocked": self.threats_blocked,
             "kill_switch_activated": self.kill_switch_activated,
             "recent_threats": list(self.threat_log)[-10:],
-            "gaia_processes": len(self.find_gaia_processes())
+            "gaia_processes": len(self.snapshot.gaia),
+            "scan": self.scan_stats()
+        }
+
+    def scan_stats(self) -> dict:
+        """Coût des cycles de surveillance (dernier + moyenne)"""
+        if not self.cycle_stats:
+            return {"generation": self.snapshot.generation}
+        cycles = list(self.cycle_stats)
+        return {
+            **cycles[-1],
+            "avg_cpu_ms": sum(c["cpu_ms"] for c in cycles) / len(cycles),
+            "avg_wall_ms": sum(c["wall_ms"] for c in cycles) / len(cycles),
         }
 
     def handle_request(self, data: dict) -> dict:
@@ -0,0 +1,295 @@
+"""LLM budget service - in-memory rate limits and daily spend for Haiku/Opus
+
+Replaces the per-call COUNT(*)/SUM(cost_usd) scans over the audit tables:
+- Day counters live in memory, seeded once per day from the audit table
+  (index-friendly created_at range, not created_at::date)
+- Counters are shared between uvicorn workers through a small SQLite file;
+  each process re-reads it at most every SYNC_INTERVAL seconds
+- Token bucket + concurrency limit per model
+- Audit rows are buffered and written in batches by a background thread
+"""
+import atexit
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import (
+    DATA_DIR,
+    HAIKU_DAILY_LIMIT, HAIKU_COST_LIMIT_USD, HAIKU_MAX_CONCURRENT, HAIKU_RATE_PER_MIN,
+    OPUS_DAILY_LIMIT, OPUS_COST_LIMIT_USD, OPUS_MAX_CONCURRENT, OPUS_RATE_PER_MIN,
+)
+
+log = logging.getLogger(__name__)
+
+BUDGET_DB = DATA_DIR / "llm_budget.sqlite"
+SYNC_INTERVAL = 0.5  # seconds between shared-counter reads
+FLUSH_INTERVAL = 5.0  # seconds between audit batch writes
+FLUSH_BATCH = 100  # flush early once this many rows are buffered
+MAX_PENDING = 10_000  # audit rows kept for retry while the database is failing
+
+
+@dataclass
+class ModelBudget:
+    """Limits and live counters for one model"""
+    name: str
+    audit_table: str
+    daily_limit: int
+    cost_limit_usd: float
+    max_concurrent: int
+    rate_per_min: float
+    day: Optional[str] = None
+    calls: int = 0
+    cost_usd: float = 0.0
+    synced_at: float = 0.0
+    tokens: float = 0.0
+    refilled_at: float = field(default_factory=time.monotonic)
+    semaphore: Optional[asyncio.Semaphore] = None
+
+    def __post_init__(self):
+        self.tokens = float(self.rate_per_min)
+
+
+class BudgetService:
+    """Process-local budget accounting backed by a shared SQLite counter"""
+
+    def __init__(self, db_path=BUDGET_DB):
+        self.models: Dict[str, ModelBudget] = {}
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, int, int, float, str, datetime]] = []
+        self._flush_event = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._missing_tables: set = set()
+        self._db = self._open(db_path)
+
+    def _open(self, db_path) -> sqlite3.Connection:
+        try:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=5.0)
+        except Exception as e:
+            log.warning(f"Budget counter file unavailable ({e}), using process-local counters")
+            conn = sqlite3.connect(":memory:", check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS counters (
+                model TEXT, day TEXT, calls INTEGER, cost_usd REAL,
+                PRIMARY KEY (model, day)
+            )
+        """)
+        conn.commit()
+        return conn
+
+    def register(self, budget: ModelBudget):
+        self.models[budget.name] = budget
+
+    # -------------------------------------------------------------------------
+    # Counters
+    # -------------------------------------------------------------------------
+
+    def _seed_day(self, b: ModelBudget, day: str):
+        """Load today's totals from the audit table once, if no process has yet"""
+        row = self._db.execute(
+            "SELECT 1 FROM counters WHERE model = ? AND day = ?", (b.name, day)
+        ).fetchone()
+        if row:
+            return
+
+        calls, cost = 0, 0.0
+        try:
+            from app.db import execute_query
+            start = datetime.fromisoformat(day)
+            result = execute_query(
+                "audit",
+                f"""SELECT COUNT(*) as call_count, COALESCE(SUM(cost_usd), 0) as total_cost
+                    FROM {b.audit_table}
+                    WHERE created_at >= %s AND created_at < %s""",
+                (start, start + timedelta(days=1))
+            )
+            if result:
+                calls = int(result[0]["call_count"])
+                cost = float(result[0]["total_cost"])
+        except Exception as e:
+            log.warning(f"Budget seed for {b.name} failed: {e}")
+
+        self._db.execute(
+            "INSERT OR IGNORE INTO counters VALUES (?, ?, ?, ?)", (b.name, day, calls, cost)
+        )
+        self._db.commit()
+
+    def _sync(self, b: ModelBudget, now: float):
+        """Refresh in-memory counters from the shared file (rate-limited)"""
+        day = date.today().isoformat()
+        if b.day == day and now - b.synced_at < SYNC_INTERVAL:
+            return
+        with self._lock:
+            if b.day != day:
+                self._seed_day(b, day)
+                b.day = day
+            row = self._db.execute(
+                "SELECT calls, cost_usd FROM counters WHERE model = ? AND day = ?", (b.name, day)
+            ).fetchone()
+            if row:
+                b.calls, b.cost_usd = int(row[0]), float(row[1])
+            b.synced_at = now
+
+    def check(self, model: str) -> Dict[str, Any]:
+        """Pre-call check: in-memory counters, no table scan"""
+        b = self.models[model]
+        self._sync(b, time.monotonic())
+
+        if b.calls >= b.daily_limit:
+            return {"allowed": False, "reason": f"Daily limit reached ({b.daily_limit} calls)", "calls_today": b.calls}
+
+        if b.cost_usd >= b.cost_limit_usd:
+            return {"allowed": False, "reason": f"Cost limit reached (${b.cost_limit_usd})", "cost_today": b.cost_usd}
+
+        return {"allowed": True, "calls_today": b.calls, "cost_today": b.cost_usd}
+
+    def record(self, model: str, tokens_in: int, tokens_out: int, cost_usd: float, preview: str = ""):
+        """Account a completed call and queue its audit row"""
+        b = self.models[model]
+        day = date.today().isoformat()
+        with self._lock:
+            if b.day != day:
+                self._seed_day(b, day)
+                b.day = day
+            self._db.execute(
+                "UPDATE counters SET calls = calls + 1, cost_usd = cost_usd + ? WHERE model = ? AND day = ?",
+                (cost_usd, b.name, day)
+            )
+            self._db.commit()
+            b.calls += 1
+            b.cost_usd += cost_usd
+            self._pending.append((b.audit_table, tokens_in, tokens_out, cost_usd, preview, datetime.now()))
+            pending = len(self._pending)
+        self._ensure_flusher()
+        if pending >= FLUSH_BATCH:
+            self._flush_event.set()
+
+    # -------------------------------------------------------------------------
+    # Concurrency + token bucket
+    # -------------------------------------------------------------------------
+
+    @asynccontextmanager
+    async def slot(self, model: str):
+        """Hold one of the model's concurrent slots and one rate token"""
+        b = self.models[model]
+        if b.semaphore is None:
+            b.semaphore = asyncio.Semaphore(b.max_concurrent)
+        async with b.semaphore:
+            await self._take_token(b)
+            yield
+
+    async def _take_token(self, b: ModelBudget):
+        rate = b.rate_per_min / 60.0
+        while True:
+            now = time.monotonic()
+            b.tokens = min(b.rate_per_min, b.tokens + (now - b.refilled_at) * rate)
+            b.refilled_at = now
+            if b.tokens >= 1:
+                b.tokens -= 1
+                return
+            await asyncio.sleep((1 - b.tokens) / rate)
+
+    # -------------------------------------------------------------------------
+    # Batched audit persistence
+    # -------------------------------------------------------------------------
+
+    def _ensure_flusher(self):
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="budget-flush", daemon=True)
+            self._flusher.start()
+            atexit.register(self.flush)
+
+    def _flush_loop(self):
+        while True:
+            self._flush_event.wait(FLUSH_INTERVAL)
+            self._flush_event.clear()
+            self.flush()
+
+    def flush(self):
+        """Write buffered audit rows, one multi-row INSERT per table.
+
+        Each table commits on its own so one failing table does not hold back
+        the others. A missing table drops its rows (logged once); other errors
+        re-queue that table's rows, keeping at most MAX_PENDING overall.
+        """
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return
+
+        by_table: Dict[str, list] = {}
+        for table, *values in rows:
+            by_table.setdefault(table, []).append(tuple(values))
+
+        failed = []
+        try:
+            from app.db import get_db
+            from psycopg2.errors import UndefinedTable
+            from psycopg2.extras import execute_values
+            with get_db("audit") as conn:
+                for table, values in by_table.items():
+                    try:
+                        cursor = conn.cursor()
+                        execute_values(
+                            cursor,
+                            f"INSERT INTO {table} (tokens_in, tokens_out, cost_usd, query_preview, created_at) VALUES %s",
+                            values
+                        )
+                        conn.commit()
+                    except UndefinedTable:
+                        # Table might not exist yet
+                        conn.rollback()
+                        if table not in self._missing_tables:
+                            self._missing_tables.add(table)
+                            log.warning(f"Audit table {table} does not exist, dropping its rows")
+                    except Exception as e:
+                        conn.rollback()
+                        log.error(f"Budget audit flush to {table} failed ({len(values)} rows): {e}")
+                        failed.extend((table, *v) for v in values)
+        except Exception as e:
+            log.error(f"Budget audit flush failed ({len(rows)} rows): {e}")
+            failed = rows
+
+        if failed:
+            with self._lock:
+                self._pending = failed + self._pending
+                dropped = len(self._pending) - MAX_PENDING
+                if dropped > 0:
+                    del self._pending[:dropped]
+            if dropped > 0:
+                log.error(f"Budget audit backlog over {MAX_PENDING} rows, dropped {dropped} oldest")
+
+    def stats(self) -> Dict[str, Any]:
+        out = {}
+        for name, b in self.models.items():
+            self._sync(b, time.monotonic())
+            out[name] = {
+                "calls_today": b.calls,
+                "cost_today": round(b.cost_usd, 6),
+                "daily_limit": b.daily_limit,
+                "cost_limit_usd": b.cost_limit_usd,
+                "max_concurrent": b.max_concurrent,
+                "pending_audit_rows": len(self._pending),
+            }
+        return out
+
+
+budget = BudgetService()
+budget.register(ModelBudget(
+    name="haiku", audit_table="haiku_calls",
+    daily_limit=HAIKU_DAILY_LIMIT, cost_limit_usd=HAIKU_COST_LIMIT_USD,
+    max_concurrent=HAIKU_MAX_CONCURRENT, rate_per_min=HAIKU_RATE_PER_MIN,
+))
+budget.register(ModelBudget(
+    name="opus", audit_table="opus_calls",
+    daily_limit=OPUS_DAILY_LIMIT, cost_limit_usd=OPUS_COST_LIMIT_USD,
+    max_concurrent=OPUS_MAX_CONCURRENT, rate_per_min=OPUS_RATE_PER_MIN,
+))
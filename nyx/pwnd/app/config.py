@@ -31,11 +31,15 @@ LLM_HAIKU_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 # Rate limiting for Haiku
 HAIKU_DAILY_LIMIT = 100  # max 100 calls/day
 HAIKU_COST_LIMIT_USD = 1.0  # max $1/day
+HAIKU_MAX_CONCURRENT = 4  # in-flight calls per process
+HAIKU_RATE_PER_MIN = 30  # token bucket refill (burst = same)
 
 # Opus settings (primary synthesis model)
 LLM_OPUS_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 OPUS_DAILY_LIMIT = 50  # max 50 calls/day (more expensive)
 OPUS_COST_LIMIT_USD = 5.0  # max $5/day
+OPUS_MAX_CONCURRENT = 2  # in-flight calls per process
+OPUS_RATE_PER_MIN = 10  # token bucket refill (burst = same)
 
 # API settings
 API_HOST = "127.0.0.1"
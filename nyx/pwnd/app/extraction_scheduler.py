@@ -0,0 +1,440 @@
+"""
+Batched LLM extraction scheduler
+
+Shared by scripts/ingest_dataset.py and scripts/enrich_graph.py:
+- Documents packed into requests by estimated token budget (not count)
+- AIMD concurrency: additive increase on healthy latency, multiplicative
+  decrease on 429 / slow responses, Retry-After respected
+- Local request/response cache keyed by prompt hash (re-runs don't re-pay);
+  only replies that pass the script's `validate` check are cached
+- Durable SQLite work queue so a crash resumes mid-dataset
+- docs/min and cost/doc report
+
+The API endpoint is configurable (ANTHROPIC_API_URL) so the scheduler can be
+exercised against a local stub server.
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import sqlite3
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+API_URL = os.getenv("ANTHROPIC_API_URL", "https://api.anthropic.com/v1/messages")
+API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
+MODEL = "claude-3-5-haiku-20241022"
+PRICE_IN_PER_MTOK = 0.80
+PRICE_OUT_PER_MTOK = 4.00
+
+STATE_DIR = Path(os.getenv("EXTRACTION_STATE_DIR", "/opt/rag/data/extraction"))
+
+DEFAULT_TOKEN_BUDGET = 6000  # input tokens per request
+DEFAULT_MAX_DOCS = 20
+MAX_RETRIES = 3
+MAX_ATTEMPTS = 3  # per document, across runs
+
+
+class RateLimitError(Exception):
+    """Raised when API returns 429 rate limit error"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 chars/token for English prose)"""
+    return len(text) // 4 + 1
+
+
+def pack_by_tokens(
+    items: List[Any],
+    cost: Callable[[Any], int],
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    max_items: int = DEFAULT_MAX_DOCS,
+) -> List[List[Any]]:
+    """Greedy in-order packing: fill each request up to token_budget.
+
+    Order is preserved so identical inputs produce identical packs, which keeps
+    the response cache effective across re-runs. An item larger than the budget
+    gets a request of its own.
+    """
+    packs, current, used = [], [], 0
+    for item in items:
+        c = cost(item)
+        if current and (used + c > token_budget or len(current) >= max_items):
+            packs.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += c
+    if current:
+        packs.append(current)
+    return packs
+
+
+# =============================================================================
+# ADAPTIVE CONCURRENCY
+# =============================================================================
+
+class AIMDLimiter:
+    """Concurrency limit driven by observed latency and 429s"""
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 32,
+        target_latency: float = 30.0,
+        backoff: float = 0.5,
+    ):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.in_flight = 0
+        self.throttled = 0
+        self._pause_until = 0.0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        delay = self._pause_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def release(self, latency: Optional[float] = None, throttled: bool = False,
+                      retry_after: Optional[float] = None):
+        async with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.throttled += 1
+                self.limit = max(self.minimum, self.limit * self.backoff)
+                pause = retry_after if retry_after is not None else 2.0
+                self._pause_until = max(self._pause_until, time.monotonic() + pause)
+            elif latency is not None and latency > self.target_latency:
+                self.limit = max(self.minimum, self.limit * 0.9)
+            elif latency is not None:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+
+# =============================================================================
+# CACHE AND DURABLE QUEUE
+# =============================================================================
+
+def _connect(path: Optional[Path]) -> sqlite3.Connection:
+    if path is None:
+        return sqlite3.connect(":memory:")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class ResponseCache:
+    """Prompt-hash -> API response, so re-runs don't re-pay"""
+
+    def __init__(self, path: Path):
+        self.conn = _connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY, response TEXT, created_at REAL
+            )
+        """)
+        self.conn.commit()
+
+    @staticmethod
+    def key(model: str, max_tokens: int, prompt: str) -> str:
+        return hashlib.sha256(f"{model}\x00{max_tokens}\x00{prompt}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        row = self.conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, response: Dict):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+            (key, json.dumps(response), time.time())
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class WorkQueue:
+    """Durable document queue: pending -> done / failed"""
+
+    def __init__(self, path: Optional[Path]):
+        self.conn = _connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS work (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                doc_id TEXT UNIQUE,
+                payload TEXT,
+                status TEXT DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                error TEXT
+            )
+        """)
+        self.conn.commit()
+
+    def enqueue(self, documents: List[Dict], doc_id: Callable[[Dict], str]) -> int:
+        before = self.conn.total_changes
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO work (doc_id, payload) VALUES (?, ?)",
+            [(doc_id(d), json.dumps(d, default=str)) for d in documents]
+        )
+        self.conn.commit()
+        return self.conn.total_changes - before
+
+    def pending(self, max_attempts: int = MAX_ATTEMPTS) -> List[Dict]:
+        rows = self.conn.execute(
+            "SELECT payload FROM work WHERE status != 'done' AND attempts < ? ORDER BY seq",
+            (max_attempts,)
+        ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def mark_done(self, doc_ids: List[str]):
+        self.conn.executemany("UPDATE work SET status = 'done', error = NULL WHERE doc_id = ?",
+                              [(i,) for i in doc_ids])
+        self.conn.commit()
+
+    def mark_failed(self, doc_ids: List[str], error: str):
+        self.conn.executemany(
+            "UPDATE work SET status = 'failed', attempts = attempts + 1, error = ? WHERE doc_id = ?",
+            [(error[:500], i) for i in doc_ids]
+        )
+        self.conn.commit()
+
+    def reset(self):
+        self.conn.execute("DELETE FROM work")
+        self.conn.commit()
+
+    def counts(self) -> Dict[str, int]:
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM work GROUP BY status").fetchall())
+
+    def close(self):
+        self.conn.close()
+
+
+# =============================================================================
+# SCHEDULER
+# =============================================================================
+
+CallFn = Callable[[str], Awaitable[Dict[str, Any]]]
+ProcessFn = Callable[[List[Dict], CallFn], Awaitable[Dict[str, Any]]]
+ValidateFn = Callable[[Dict[str, Any]], bool]
+
+
+class ExtractionScheduler:
+    """
+    Token-packed, AIMD-limited, cached and resumable extraction runs.
+
+    `process(batch, call)` is supplied by the script: it builds the prompt for a
+    packed batch, awaits `call(prompt)` (cache + limiter + retries) and inserts
+    the result. A batch is marked done when it returns without 'errors'.
+
+    `validate(result)` decides whether a reply may be cached; malformed replies
+    are returned to the caller but not cached, so a re-run asks again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        state_dir: Path = STATE_DIR,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        max_docs: int = DEFAULT_MAX_DOCS,
+        concurrency: int = 4,
+        max_concurrency: int = 32,
+        target_latency: float = 30.0,
+        api_url: str = API_URL,
+        api_key: str = API_KEY,
+        model: str = MODEL,
+        max_tokens: int = 4096,
+        use_cache: bool = True,
+        persist: bool = True,
+        validate: Optional[ValidateFn] = None,
+    ):
+        self.name = name
+        self.token_budget = token_budget
+        self.max_docs = max_docs
+        self.api_url = api_url
+        self.api_key = api_key
+        self.model = model
+        self.max_tokens = max_tokens
+        self.validate = validate
+        self.limiter = AIMDLimiter(initial=concurrency, maximum=max(concurrency, max_concurrency),
+                                   target_latency=target_latency)
+        # Dry runs keep the queue in memory so they never mark real work as done
+        self.cache = ResponseCache(state_dir / "llm_cache.sqlite") if use_cache else None
+        self.queue = WorkQueue(state_dir / f"{name}.queue.sqlite" if persist else None)
+        self._client: Optional[httpx.AsyncClient] = None
+        self.stats = {
+            'docs': 0, 'requests': 0, 'cache_hits': 0, 'throttled': 0,
+            'tokens_in': 0, 'tokens_out': 0, 'cost_usd': 0.0, 'failed_docs': 0,
+            'invalid': 0,
+        }
+        self._started = 0.0
+
+    async def call(self, prompt: str) -> Dict[str, Any]:
+        """Cached, rate-adaptive Messages API call. Never raises on API errors."""
+        key = ResponseCache.key(self.model, self.max_tokens, prompt)
+        if self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.stats['cache_hits'] += 1
+                return {**cached, 'cost_usd': 0.0, 'cached': True}
+
+        last_error = None
+        for attempt in range(MAX_RETRIES):
+            await self.limiter.acquire()
+            t0 = time.monotonic()
+            try:
+                result = await self._post(prompt)
+            except RateLimitError as e:
+                self.stats['throttled'] += 1
+                await self.limiter.release(throttled=True, retry_after=e.retry_after)
+                last_error = e
+                continue
+            except Exception as e:
+                await self.limiter.release()
+                last_error = e
+                await asyncio.sleep(2 ** attempt)
+                continue
+            await self.limiter.release(latency=time.monotonic() - t0)
+
+            self.stats['requests'] += 1
+            usage = result.get('usage', {})
+            self.stats['tokens_in'] += usage.get('input_tokens', 0)
+            self.stats['tokens_out'] += usage.get('output_tokens', 0)
+            self.stats['cost_usd'] += result['cost_usd']
+            if self.validate and not self.validate(result):
+                self.stats['invalid'] += 1
+            elif self.cache:
+                self.cache.put(key, result)
+            return result
+
+        return {"error": f"Failed after {MAX_RETRIES} attempts: {last_error}"}
+
+    async def _post(self, prompt: str) -> Dict[str, Any]:
+        response = await self._client.post(
+            self.api_url,
+            headers={
+                "x-api-key": self.api_key,
+                "anthropic-version": "2023-06-01",
+                "content-type": "application/json"
+            },
+            json={
+                "model": self.model,
+                "max_tokens": self.max_tokens,
+                "messages": [{"role": "user", "content": prompt}]
+            }
+        )
+        if response.status_code == 429:
+            retry_after = response.headers.get("retry-after")
+            try:
+                retry_after = float(retry_after) if retry_after else None
+            except ValueError:
+                retry_after = None
+            raise RateLimitError("API rate limit (429)", retry_after)
+
+        response.raise_for_status()
+        data = response.json()
+        content = data.get("content", [])
+        usage = data.get("usage", {})
+        if not (content and isinstance(content, list)):
+            raise ValueError("Invalid response format")
+
+        tokens_in = usage.get("input_tokens", 0)
+        tokens_out = usage.get("output_tokens", 0)
+        return {
+            "text": content[0].get("text", ""),
+            "usage": usage,
+            "cost_usd": (tokens_in * PRICE_IN_PER_MTOK / 1_000_000) + (tokens_out * PRICE_OUT_PER_MTOK / 1_000_000),
+        }
+
+    async def run(
+        self,
+        documents: List[Dict],
+        doc_id: Callable[[Dict], str],
+        doc_tokens: Callable[[Dict], int],
+        process: ProcessFn,
+        on_batch: Optional[Callable[[List[Dict], Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """Enqueue documents, then drain everything pending (including leftovers
+        from a crashed run) in token-packed batches."""
+        added = self.queue.enqueue(documents, doc_id)
+        pending = self.queue.pending()
+        resumed = len(pending) - added
+        if resumed > 0:
+            print(f"Resuming {resumed} documents from previous run")
+
+        packs = pack_by_tokens(pending, doc_tokens, self.token_budget, self.max_docs)
+        print(f"Packed {len(pending)} documents into {len(packs)} requests "
+              f"(budget {self.token_budget} tokens, max {self.max_docs} docs)")
+
+        self._started = time.monotonic()
+
+        async def run_pack(pack: List[Dict]):
+            ids = [doc_id(d) for d in pack]
+            try:
+                batch_stats = await process(pack, self.call)
+            except Exception as e:
+                batch_stats = {'errors': [str(e)]}
+            if batch_stats.get('errors'):
+                self.queue.mark_failed(ids, '; '.join(map(str, batch_stats['errors'])))
+                self.stats['failed_docs'] += len(ids)
+            else:
+                self.queue.mark_done(ids)
+                self.stats['docs'] += len(ids)
+            if on_batch:
+                on_batch(pack, batch_stats)
+
+        async with httpx.AsyncClient(timeout=180.0) as client:
+            self._client = client
+            # Packs are started lazily; the limiter gates actual API calls.
+            work = iter(packs)
+            workers = max(self.limiter.maximum, 1)
+
+            async def drain():
+                for pack in work:
+                    await run_pack(pack)
+
+            await asyncio.gather(*(drain() for _ in range(workers)))
+            self._client = None
+
+        return self.report()
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = max(time.monotonic() - self._started, 1e-9) if self._started else 0.0
+        docs = self.stats['docs']
+        return {
+            **self.stats,
+            'elapsed_s': elapsed,
+            'docs_per_min': docs / elapsed * 60 if elapsed else 0.0,
+            'cost_per_doc': self.stats['cost_usd'] / docs if docs else 0.0,
+            'concurrency': round(self.limiter.limit, 1),
+            'queue': self.queue.counts(),
+        }
+
+    def print_report(self):
+        r = self.report()
+        print(f"Throughput:          {r['docs_per_min']:.1f} docs/min")
+        print(f"Cost per document:   ${r['cost_per_doc']:.5f}")
+        print(f"API requests:        {r['requests']} ({r['cache_hits']} cache hits, {r['throttled']} throttled, {r['invalid']} invalid)")
+        print(f"Final concurrency:   {r['concurrency']}")
+        print(f"Queue:               {r['queue']}")
+
+    def close(self):
+        if self.cache:
+            self.cache.close()
+        self.queue.close()
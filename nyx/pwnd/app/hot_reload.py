@@ -1,15 +1,118 @@
 """
 Hot Reload System with SSE
 Watches frontend files and notifies clients
+
+Event-driven via inotify (small ctypes wrapper); falls back to stat-only
+polling when inotify is unavailable. Files are re-hashed only when their
+mtime/size changed, bursts of writes are debounced into one broadcast and
+each subscriber holds at most one (merged) pending event.
 """
 import asyncio
-from pathlib import Path
-from typing import Set, Dict, AsyncGenerator
-from datetime import datetime
+import ctypes
+import ctypes.util
+import errno
 import hashlib
+import logging
+import os
+import struct
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncGenerator, Dict, Optional, Set, Tuple
 
 from app.config import STATIC_DIR
 
+log = logging.getLogger(__name__)
+
+DEBOUNCE_SECONDS = 0.2
+POLL_INTERVAL = 1.0
+
+RELOAD_TYPES = {
+    ".css": "reload-css",
+    ".js": "reload-js",
+    ".html": "reload-html",
+}
+# Merged events escalate to the broadest reload needed
+RELOAD_RANK = {"reload-css": 0, "reload-js": 1, "reload-html": 2, "reload-page": 3}
+
+
+class Inotify:
+    """Minimal recursive inotify watcher (Linux, ctypes)"""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify not supported")
+        self.fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, Path] = {}
+
+    def add_tree(self, root: Path):
+        for dirpath, dirnames, _ in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            self.add_dir(Path(dirpath))
+
+    def add_dir(self, path: Path):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), self.MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err != errno.ENOENT:
+                log.warning(f"inotify_add_watch({path}) failed: {os.strerror(err)}")
+            return
+        self._dirs[wd] = path
+
+    def read(self) -> Set[Path]:
+        """Drain pending events, return touched file paths (new dirs get watched)"""
+        changed: Set[Path] = set()
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(buf):
+                wd, mask, _cookie, length = self.EVENT.unpack_from(buf, offset)
+                offset += self.EVENT.size
+                name = buf[offset:offset + length].rstrip(b"\0")
+                offset += length
+
+                if mask & self.IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                    continue
+                base = self._dirs.get(wd)
+                if base is None or not name:
+                    continue
+                path = base / os.fsdecode(name)
+                if mask & self.IN_ISDIR:
+                    if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                        self.add_tree(path)
+                        changed.update(p for p in path.rglob("*") if p.is_file())
+                    continue
+                changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
 class HotReloadManager:
     """
     Manages hot reload for frontend files
@@ -21,9 +124,12 @@ class HotReloadManager:
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._instance._subscribers: Set[asyncio.Queue] = set()
-            cls._instance._file_hashes: Dict[str, str] = {}
+            cls._instance._file_hashes: Dict[str, Tuple[int, int, str]] = {}
             cls._instance._watch_dir = STATIC_DIR
             cls._instance._is_watching = False
+            cls._instance._pending: Dict[str, Path] = {}
+            cls._instance._flush_handle: Optional[asyncio.TimerHandle] = None
+            cls._instance.mode = None
         return cls._instance
 
     async def subscribe(self) -> AsyncGenerator[Dict, None]:
@@ -31,14 +137,16 @@ class HotReloadManager:
         Subscribe to hot reload events via SSE
         Yields events when files change
         """
-        queue = asyncio.Queue()
+        # One slot: a slow client gets a single merged event, not a backlog
+        queue = asyncio.Queue(maxsize=1)
         self._subscribers.add(queue)
 
         # Send initial ping
         yield {
             "event": "connected",
             "timestamp": datetime.now().isoformat(),
-            "watching": str(self._watch_dir)
+            "watching": str(self._watch_dir),
+            "mode": self.mode,
         }
 
         try:
@@ -49,17 +157,26 @@ class HotReloadManager:
             # Cleanup on disconnect
             self._subscribers.discard(queue)
 
+    @staticmethod
+    def _merge(old: Dict, new: Dict) -> Dict:
+        files = list(dict.fromkeys(old.get("files", [old.get("path")]) + new.get("files", [new.get("path")])))
+        files = [f for f in files if f]
+        event = old if RELOAD_RANK.get(old["event"], 3) >= RELOAD_RANK.get(new["event"], 3) else new
+        return {**new, "event": event["event"], "files": files}
+
     async def broadcast(self, event: Dict):
-        """Broadcast event to all subscribers"""
-        # Remove closed queues
-        dead_queues = set()
-        for queue in self._subscribers:
+        """Broadcast event to all subscribers (merging into any undelivered one)"""
+        for queue in list(self._subscribers):
             try:
-                await queue.put(event)
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                try:
+                    queued = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    queued = None
+                queue.put_nowait(self._merge(queued, event) if queued else event)
             except Exception:
-                dead_queues.add(queue)
-
-        self._subscribers -= dead_queues
+                self._subscribers.discard(queue)
 
     def _compute_hash(self, filepath: Path) -> str:
         """Compute SHA256 hash of file"""
@@ -68,10 +185,72 @@ class HotReloadManager:
         except Exception:
             return ""
 
+    def _check(self, filepath: Path) -> bool:
+        """Re-hash only if mtime/size moved; True if content actually changed"""
+        path_str = str(filepath)
+        old = self._file_hashes.get(path_str)
+        try:
+            st = filepath.stat()
+        except FileNotFoundError:
+            if old is not None:
+                del self._file_hashes[path_str]
+                return True
+            return False
+        if old is not None and old[0] == st.st_mtime_ns and old[1] == st.st_size:
+            return False
+        digest = self._compute_hash(filepath)
+        self._file_hashes[path_str] = (st.st_mtime_ns, st.st_size, digest)
+        return old is None or old[2] != digest
+
+    def _note_change(self, filepath: Path):
+        if filepath.name.startswith(".") or not self._check(filepath):
+            return
+        self._pending[str(filepath)] = filepath
+        loop = asyncio.get_running_loop()
+        if self._flush_handle:
+            self._flush_handle.cancel()
+        self._flush_handle = loop.call_later(
+            DEBOUNCE_SECONDS, lambda: asyncio.ensure_future(self._flush())
+        )
+
+    async def _flush(self):
+        """Emit one event for the debounced burst"""
+        self._flush_handle = None
+        changed, self._pending = list(self._pending.values()), {}
+        if not changed:
+            return
+
+        reload_type = max(
+            (RELOAD_TYPES.get(p.suffix.lower(), "reload-page") for p in changed),
+            key=lambda t: RELOAD_RANK[t]
+        )
+        rel = [str(p.relative_to(self._watch_dir)) for p in changed]
+        event = {
+            "event": reload_type,
+            "file": changed[0].name,
+            "path": rel[0],
+            "files": rel,
+            "timestamp": datetime.now().isoformat()
+        }
+        await self.broadcast(event)
+
+    def _scan(self):
+        """Stat-only walk; hashing happens in _check when stat changed"""
+        seen = set()
+        for dirpath, dirnames, filenames in os.walk(self._watch_dir):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for name in filenames:
+                if name.startswith("."):
+                    continue
+                path = Path(dirpath) / name
+                seen.add(str(path))
+                yield path
+        for gone in set(self._file_hashes) - seen:
+            yield Path(gone)
+
     async def watch_files(self):
         """
-        Watch files for changes (polling-based)
-        In production, use inotify/watchdog for better performance
+        Watch files for changes (inotify, polling fallback)
         """
         if self._is_watching:
             return
@@ -79,42 +258,37 @@ class HotReloadManager:
         self._is_watching = True
 
         # Initialize file hashes
-        for filepath in self._watch_dir.rglob("*"):
-            if filepath.is_file() and not filepath.name.startswith("."):
-                self._file_hashes[str(filepath)] = self._compute_hash(filepath)
+        for filepath in self._scan():
+            self._check(filepath)
 
-        # Watch loop
-        while self._is_watching:
-            await asyncio.sleep(1)  # Poll every second
+        try:
+            inotify = Inotify()
+            inotify.add_tree(self._watch_dir)
+        except OSError as e:
+            log.info(f"inotify unavailable ({e}), polling every {POLL_INTERVAL}s")
+            await self._poll_loop()
+            return
 
-            for filepath in self._watch_dir.rglob("*"):
-                if not filepath.is_file() or filepath.name.startswith("."):
-                    continue
+        self.mode = "inotify"
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        loop.add_reader(inotify.fd, ready.set)
+        try:
+            while self._is_watching:
+                await ready.wait()
+                ready.clear()
+                for filepath in inotify.read():
+                    self._note_change(filepath)
+        finally:
+            loop.remove_reader(inotify.fd)
+            inotify.close()
 
-                path_str = str(filepath)
-                current_hash = self._compute_hash(filepath)
-                old_hash = self._file_hashes.get(path_str)
-
-                # File changed or new
-                if current_hash != old_hash:
-                    self._file_hashes[path_str] = current_hash
-
-                    # Determine reload type
-                    ext = filepath.suffix.lower()
-                    reload_type = {
-                        ".css": "reload-css",
-                        ".js": "reload-js",
-                        ".html": "reload-html",
-                    }.get(ext, "reload-page")
-
-                    event = {
-                        "event": reload_type,
-                        "file": filepath.name,
-                        "path": str(filepath.relative_to(self._watch_dir)),
-                        "timestamp": datetime.now().isoformat()
-                    }
-
-                    await self.broadcast(event)
+    async def _poll_loop(self):
+        self.mode = "polling"
+        while self._is_watching:
+            await asyncio.sleep(POLL_INTERVAL)
+            for filepath in self._scan():
+                self._note_change(filepath)
 
     def stop_watching(self):
         """Stop watching files"""
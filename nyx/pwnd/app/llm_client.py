@@ -256,34 +256,9 @@ async def call_mistral(prompt: str, max_tokens: int = 512, temperature: float =
         return f"Error calling local LLM: {str(e)}"
 
 def check_haiku_rate_limit() -> Dict[str, Any]:
-    """Check if Haiku rate limit is reached for today"""
-    from app.db import execute_query
-    from app.config import HAIKU_DAILY_LIMIT, HAIKU_COST_LIMIT_USD
-    from datetime import datetime
-
-    # Count calls today
-    today = datetime.now().date()
-    result = execute_query(
-        "audit",
-        """SELECT COUNT(*) as call_count, COALESCE(SUM(cost_usd), 0) as total_cost
-           FROM haiku_calls
-           WHERE created_at::date = %s""",
-        (today,)
-    )
-
-    if not result:
-        return {"allowed": True, "calls_today": 0, "cost_today": 0.0}
-
-    call_count = result[0]["call_count"]
-    total_cost = result[0]["total_cost"]
-
-    if call_count >= HAIKU_DAILY_LIMIT:
-        return {"allowed": False, "reason": f"Daily limit reached ({HAIKU_DAILY_LIMIT} calls)", "calls_today": call_count}
-
-    if total_cost >= HAIKU_COST_LIMIT_USD:
-        return {"allowed": False, "reason": f"Cost limit reached (${HAIKU_COST_LIMIT_USD})", "cost_today": total_cost}
-
-    return {"allowed": True, "calls_today": call_count, "cost_today": total_cost}
+    """Check if Haiku rate limit is reached for today (in-memory budget counters)"""
+    from app.budget import budget
+    return budget.check("haiku")
 
 async def call_haiku(prompt: str, system: Optional[str] = None, max_tokens: int = 2048) -> Dict[str, Any]:
     """Call Claude Haiku API for structured analysis with rate limiting"""
@@ -295,8 +270,10 @@ async def call_haiku(prompt: str, system: Optional[str] = None, max_tokens: int
     if not limit_check["allowed"]:
         return {"error": f"Rate limit: {limit_check['reason']}", "fallback_to_mistral": True}
 
+    from app.budget import budget
+
     try:
-        async with httpx.AsyncClient(timeout=180.0) as client:
+        async with budget.slot("haiku"), httpx.AsyncClient(timeout=180.0) as client:
             messages = [{"role": "user", "content": prompt}]
 
             payload = {
@@ -327,18 +304,12 @@ async def call_haiku(prompt: str, system: Optional[str] = None, max_tokens: int
             if content and isinstance(content, list):
                 text = content[0].get("text", "")
 
-                # Log the call to audit.db
-                from app.db import execute_insert
+                # Account the call (audit row is written in the next batch)
                 tokens_in = usage.get("input_tokens", 0)
                 tokens_out = usage.get("output_tokens", 0)
                 cost_usd = (tokens_in * 0.80 / 1_000_000) + (tokens_out * 4.00 / 1_000_000)
 
-                execute_insert(
-                    "audit",
-                    """INSERT INTO haiku_calls (tokens_in, tokens_out, cost_usd, query_preview)
-                       VALUES (%s, %s, %s, %s)""",
-                    (tokens_in, tokens_out, cost_usd, prompt[:200])
-                )
+                budget.record("haiku", tokens_in, tokens_out, cost_usd, prompt[:200])
 
                 return {"text": text, "usage": usage, "cost_usd": cost_usd}
 
@@ -349,33 +320,9 @@ async def call_haiku(prompt: str, system: Optional[str] = None, max_tokens: int
 
 
 def check_opus_rate_limit() -> Dict[str, Any]:
-    """Check if Opus rate limit is reached for today"""
-    from app.db import execute_query
-    from app.config import OPUS_DAILY_LIMIT, OPUS_COST_LIMIT_USD
-    from datetime import datetime
-
-    today = datetime.now().date()
-    result = execute_query(
-        "audit",
-        """SELECT COUNT(*) as call_count, COALESCE(SUM(cost_usd), 0) as total_cost
-           FROM opus_calls
-           WHERE created_at::date = %s""",
-        (today,)
-    )
-
-    if not result:
-        return {"allowed": True, "calls_today": 0, "cost_today": 0.0}
-
-    call_count = result[0]["call_count"]
-    total_cost = float(result[0]["total_cost"])
-
-    if call_count >= OPUS_DAILY_LIMIT:
-        return {"allowed": False, "reason": f"Daily limit reached ({OPUS_DAILY_LIMIT} calls)", "calls_today": call_count}
-
-    if total_cost >= OPUS_COST_LIMIT_USD:
-        return {"allowed": False, "reason": f"Cost limit reached (${OPUS_COST_LIMIT_USD})", "cost_today": total_cost}
-
-    return {"allowed": True, "calls_today": call_count, "cost_today": total_cost}
+    """Check if Opus rate limit is reached for today (in-memory budget counters)"""
+    from app.budget import budget
+    return budget.check("opus")
 
 
 _opus_cache = OrderedDict()
@@ -415,8 +362,10 @@ async def call_opus(prompt: str, system: Optional[str] = None, max_tokens: int =
         log.info(f"Opus rate limit: {limit_check.get('reason')}")
         return {"error": f"Rate limit: {limit_check['reason']}", "fallback": True}
 
+    from app.budget import budget
+
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
+        async with budget.slot("opus"), httpx.AsyncClient(timeout=60.0) as client:
             messages = [{"role": "user", "content": prompt}]
 
             payload = {
@@ -447,22 +396,13 @@ async def call_opus(prompt: str, system: Optional[str] = None, max_tokens: int =
             if content and isinstance(content, list):
                 text = content[0].get("text", "")
 
-                # Log the call to audit db
-                from app.db import execute_insert
+                # Account the call (audit row is written in the next batch)
                 tokens_in = usage.get("input_tokens", 0)
                 tokens_out = usage.get("output_tokens", 0)
                 # Sonnet 4 pricing: $3/M input, $15/M output
                 cost_usd = (tokens_in * 3.0 / 1_000_000) + (tokens_out * 15.0 / 1_000_000)
 
-                try:
-                    execute_insert(
-                        "audit",
-                        """INSERT INTO opus_calls (tokens_in, tokens_out, cost_usd, query_preview)
-                           VALUES (%s, %s, %s, %s)""",
-                        (tokens_in, tokens_out, cost_usd, prompt[:200])
-                    )
-                except Exception:
-                    pass  # Table might not exist yet
+                budget.record("opus", tokens_in, tokens_out, cost_usd, prompt[:200])
 
                 result = {"text": text, "usage": usage, "cost_usd": cost_usd}
 
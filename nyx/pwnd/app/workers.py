@@ -5,16 +5,19 @@ Architecture:
 - Multiple Phi-3 workers for local inference (free, fast for extraction)
 - Haiku API for complex synthesis only (cost-effective)
 - Job queue for handling concurrent users
+- Dispatcher task draining the priority queue, condition-based worker wakeup
+- Identical in-flight jobs coalesced onto a single generation
 - Response caching to avoid redundant work
 """
 
 import asyncio
+import bisect
 import hashlib
 import json
 import logging
 import os
 import time
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from enum import Enum
 from typing import Any, Dict, List, Optional, Callable
 from collections import OrderedDict
@@ -45,6 +48,7 @@ class JobType(Enum):
     GENERATE_SUBQUERIES = "generate_subqueries"  # Self-questioning
     EXTRACT_KEYWORDS = "extract_keywords"  # Key terms for search
     SCORE_RESULTS = "score_results"  # Rate result relevance
+    EXTRACT_TYPED = "extract_typed"  # All entity-type prompts for one document, one worker
 
 
 class JobPriority(Enum):
@@ -56,7 +60,7 @@ class JobPriority(Enum):
 @dataclass(order=True)
 class Job:
     priority: int
-    created_at: float = field(compare=False)
+    created_at: float  # FIFO within a priority level
     job_id: str = field(compare=False)
     job_type: JobType = field(compare=False)
     payload: Dict[str, Any] = field(compare=False)
@@ -65,6 +69,51 @@ class Job:
     result: Optional[Any] = field(compare=False, default=None)
     error: Optional[str] = field(compare=False, default=None)
     completed: bool = field(compare=False, default=False)
+    started_at: Optional[float] = field(compare=False, default=None)
+    cache_key: Optional[str] = field(compare=False, default=None)
+    done: Optional[asyncio.Event] = field(compare=False, default=None)
+    abandoned: bool = field(compare=False, default=False)  # caller timed out
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (seconds)"""
+
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self.lock:
+            self.counts[bisect.bisect_left(self.BUCKETS, value)] += 1
+            self.count += 1
+            self.total += value
+
+    def _quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self.BUCKETS[i] if i < len(self.BUCKETS) else float("inf")
+        return float("inf")
+
+    def stats(self) -> Dict:
+        with self.lock:
+            buckets = {f"le_{b}": n for b, n in zip(self.BUCKETS, self.counts)}
+            buckets["le_inf"] = self.counts[-1]
+            return {
+                "count": self.count,
+                "mean": round(self.total / self.count, 3) if self.count else 0,
+                "p50": self._quantile(0.5),
+                "p95": self._quantile(0.95),
+                "buckets": buckets,
+            }
 
 
 class LRUCache:
@@ -141,6 +190,9 @@ class Phi3Worker:
         self.lock = threading.Lock()
 
     def load(self) -> bool:
+        # Prompt-prefix (KV cache) reuse: llama.cpp keeps the evaluated tokens of
+        # the previous call and only evaluates the suffix that differs, so prompts
+        # sharing a prefix must run back-to-back on the same worker.
         try:
             from llama_cpp import Llama
             self.model = Llama(
@@ -203,6 +255,13 @@ class WorkerPool:
         self.running = False
         self._job_counter = 0
         self._lock = threading.Lock()
+        self._worker_ready: Optional[asyncio.Condition] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._inflight: Dict[str, Job] = {}  # cache_key -> leader job
+        self._followers: Dict[str, List[Job]] = {}  # leader job_id -> coalesced jobs
+        self.coalesced = 0
+        self.queue_wait = LatencyHistogram()
+        self.generation_time = LatencyHistogram()
 
     async def start(self, model_path: str):
         """Initialize workers and start processing"""
@@ -220,12 +279,17 @@ class WorkerPool:
             raise RuntimeError("No workers initialized")
 
         self.job_queue = asyncio.PriorityQueue(maxsize=MAX_QUEUE_SIZE)
+        self._worker_ready = asyncio.Condition()
         self.running = True
+        self._dispatcher = asyncio.create_task(self._dispatch_loop())
         log.info(f"Worker pool started: {len(self.workers)} workers ready")
 
     async def stop(self):
         """Shutdown workers"""
         self.running = False
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            self._dispatcher = None
         for w in self.workers:
             w.model = None
         self.workers.clear()
@@ -246,6 +310,62 @@ class WorkerPool:
         with worker.lock:
             worker.busy = False
 
+    async def _acquire_worker(self) -> Phi3Worker:
+        """Wait (without polling) until a worker is free, mark it busy"""
+        async with self._worker_ready:
+            while True:
+                worker = self._get_available_worker()
+                if worker:
+                    return worker
+                await self._worker_ready.wait()
+
+    async def _free_worker(self, worker: Phi3Worker):
+        """Release worker and wake one waiter"""
+        self._release_worker(worker)
+        async with self._worker_ready:
+            self._worker_ready.notify()
+
+    async def _dispatch_loop(self):
+        """Continuously pair the highest-priority queued job with a free worker.
+
+        A worker is reserved before dequeuing, so a job that arrives with higher
+        priority while every worker is busy still goes first.
+        """
+        while self.running:
+            worker = await self._acquire_worker()
+            try:
+                while True:
+                    job = await self.job_queue.get()
+                    # Skip jobs whose caller gave up, unless others still wait on them
+                    followers = self._followers.get(job.job_id, [])
+                    if not job.abandoned or any(not f.abandoned for f in followers):
+                        break
+                    self._finish(job)
+            except asyncio.CancelledError:
+                self._release_worker(worker)
+                raise
+            asyncio.create_task(self._run_job(job, worker))
+
+    async def _run_job(self, job: Job, worker: Phi3Worker):
+        try:
+            await self.process_job(job, worker)
+        finally:
+            self._finish(job)
+
+    def _finish(self, job: Job):
+        """Mark a leader job done and resolve every job coalesced onto it"""
+        job.completed = True
+        if job.cache_key and self._inflight.get(job.cache_key) is job:
+            del self._inflight[job.cache_key]
+        for follower in self._followers.pop(job.job_id, []):
+            follower.result = job.result
+            follower.error = job.error
+            follower.completed = True
+            if follower.done:
+                follower.done.set()
+        if job.done:
+            job.done.set()
+
     def _generate_job_id(self) -> str:
         with self._lock:
             self._job_counter += 1
@@ -281,111 +401,43 @@ class WorkerPool:
             job_id=job_id,
             job_type=job_type,
             payload=payload,
-            user_id=user_id
+            user_id=user_id,
+            cache_key=self.cache._make_key(job_type.value, payload),
+            done=asyncio.Event()
         )
         self.pending_jobs[job_id] = job
 
+        # Coalesce onto an identical job that is queued or running
+        leader = self._inflight.get(job.cache_key)
+        if leader is not None and not leader.completed:
+            self._followers.setdefault(leader.job_id, []).append(job)
+            self.coalesced += 1
+            return job_id
+
         try:
             await asyncio.wait_for(
                 self.job_queue.put(job),
                 timeout=5.0
             )
+            self._inflight[job.cache_key] = job
         except asyncio.TimeoutError:
             job.error = "Queue full"
             job.completed = True
+            job.done.set()
 
         return job_id
 
-    async def process_job(self, job: Job) -> Any:
-        """Process a single job"""
-        worker = self._get_available_worker()
-        if not worker:
-            # Wait for available worker
-            for _ in range(50):  # 5 seconds max
-                await asyncio.sleep(0.1)
-                worker = self._get_available_worker()
-                if worker:
-                    break
+    async def process_job(self, job: Job, worker: Optional[Phi3Worker] = None) -> Any:
+        """Process a single job on a reserved worker"""
+        if worker is None:
+            worker = await self._acquire_worker()
 
-        if not worker:
-            job.error = "No workers available"
-            job.completed = True
-            return None
-        # Execute based on job type
-        loop = asyncio.get_event_loop()
+        job.started_at = time.time()
+        self.queue_wait.observe(job.started_at - job.created_at)
+        loop = asyncio.get_running_loop()
         try:
-            if job.job_type == JobType.EXTRACT_ENTITIES:
-                result = await loop.run_in_executor(
-                    self.executor,
-                    self._extract_entities,
-                    worker,
-                    job.payload.get("text", "")
-                )
-            elif job.job_type == JobType.EXTRACT_RELATIONSHIPS:
-                result = await loop.run_in_executor(
-                    self.executor,
-                    self._extract_relationships,
-                    worker,
-                    job.payload.get("text", ""),
-                    job.payload.get("entities", [])
-                )
-            elif job.job_type == JobType.FILTER_RELEVANCE:
-                result = await loop.run_in_executor(
-                    self.executor,
-                    self._filter_relevance,
-                    worker,
-                    job.payload.get("query", ""),
-                    job.payload.get("items", [])
-                )
-            elif job.job_type == JobType.SUMMARIZE:
-                result = await loop.run_in_executor(
-                    self.executor,
-                    self._summarize,
-                    worker,
-                    job.payload.get("text", ""),
-                    job.payload.get("max_length", 200)
-                )
-            # New parallel job types
-            elif job.job_type == JobType.PARSE_INTENT:
-                result = await loop.run_in_executor(
-                    self.executor,
-                    self._parse_intent,
-                    worker,
-                    job.payload.get("query", "")
-                )
-            elif job.job_type == JobType.GENERATE_SUBQUERIES:
-                result = await loop.run_in_executor(
-                    self.executor,
-                    self._generate_subqueries,
-                    worker,
-                    job.payload.get("query", ""),
-                    job.payload.get("context", "")
-                )
-            elif job.job_type == JobType.EXTRACT_KEYWORDS:
-                result = await loop.run_in_executor(
-                    self.executor,
-                    self._extract_keywords,
-                    worker,
-                    job.payload.get("text", "")
-                )
-            elif job.job_type == JobType.SCORE_RESULTS:
-                result = await loop.run_in_executor(
-                    self.executor,
-                    self._score_results,
-                    worker,
-                    job.payload.get("query", ""),
-                    job.payload.get("results", [])
-                )
-            elif job.job_type == JobType.SYNTHESIZE:
-                result = await loop.run_in_executor(
-                    self.executor,
-                    self._synthesize,
-                    worker,
-                    job.payload.get("text", ""),
-                    job.payload.get("max_length", 512)
-                )
-            else:
-                result = None
+            result = await loop.run_in_executor(self.executor, self._execute, worker, job)
+            self.generation_time.observe(time.time() - job.started_at)
 
             job.result = result
             job.completed = True
@@ -401,7 +453,33 @@ class WorkerPool:
             job.completed = True
             return None
         finally:
-            self._release_worker(worker)
+            await self._free_worker(worker)
+
+    def _execute(self, worker: Phi3Worker, job: Job) -> Any:
+        """Run a job on a worker (executor thread)"""
+        p = job.payload
+        t = job.job_type
+        if t == JobType.EXTRACT_ENTITIES:
+            return self._extract_entities(worker, p.get("text", ""))
+        if t == JobType.EXTRACT_RELATIONSHIPS:
+            return self._extract_relationships(worker, p.get("text", ""), p.get("entities", []))
+        if t == JobType.FILTER_RELEVANCE:
+            return self._filter_relevance(worker, p.get("query", ""), p.get("items", []))
+        if t == JobType.SUMMARIZE:
+            return self._summarize(worker, p.get("text", ""), p.get("max_length", 200))
+        if t == JobType.PARSE_INTENT:
+            return self._parse_intent(worker, p.get("query", ""))
+        if t == JobType.GENERATE_SUBQUERIES:
+            return self._generate_subqueries(worker, p.get("query", ""), p.get("context", ""))
+        if t == JobType.EXTRACT_KEYWORDS:
+            return self._extract_keywords(worker, p.get("text", ""))
+        if t == JobType.SCORE_RESULTS:
+            return self._score_results(worker, p.get("query", ""), p.get("results", []))
+        if t == JobType.SYNTHESIZE:
+            return self._synthesize(worker, p.get("text", ""), p.get("max_length", 512))
+        if t == JobType.EXTRACT_TYPED:
+            return ParallelExtractor.extract_on_worker(worker, p.get("text", ""), p.get("entity_types", []))
+        return None
 
     def _extract_entities(self, worker: Phi3Worker, text: str) -> List[Dict]:
         """Extract entities using Phi-3 - detect ALL entities"""
@@ -643,23 +721,25 @@ Results:
         return response.strip() if response else ""
 
     async def get_result(self, job_id: str, timeout: float = JOB_TIMEOUT) -> Optional[Job]:
-        """Wait for job result with timeout"""
+        """Wait for job result with timeout (the dispatcher does the work)"""
         job = self.pending_jobs.get(job_id)
         if not job:
             return None
 
-        if job.completed:
-            return job
-
-        # Process the job directly if not yet completed
-        if not job.completed and not job.error:
+        if not job.completed and job.done is not None:
             try:
-                await asyncio.wait_for(self.process_job(job), timeout=timeout)
+                await asyncio.wait_for(job.done.wait(), timeout=timeout)
             except asyncio.TimeoutError:
                 log.warning(f"Job {job_id} timed out after {timeout}s")
-                job.error = f"Timeout after {timeout}s"
-                job.completed = True
-
+                self.pending_jobs.pop(job_id, None)
+                if job.completed:
+                    return job
+                # The job may be shared (coalesced followers, later identical
+                # submits): only this caller times out, the run goes on
+                job.abandoned = True
+                return replace(job, error=f"Timeout after {timeout}s", completed=True)
+
+        self.pending_jobs.pop(job_id, None)
         return job
 
     def stats(self) -> Dict:
@@ -668,6 +748,9 @@ Results:
             "workers": [w.stats() for w in self.workers],
             "queue_size": self.job_queue.qsize() if self.job_queue else 0,
             "pending_jobs": len(self.pending_jobs),
+            "coalesced": self.coalesced,
+            "queue_wait": self.queue_wait.stats(),
+            "generation_time": self.generation_time.stats(),
             "cache": self.cache.stats()
         }
 
@@ -697,95 +780,98 @@ class ParallelExtractor:
     Multi-Phi-3 parallel pipeline for specialized entity extraction.
 
     Architecture:
-        [Doc batch]
+        [Doc batch]  → one EXTRACT_TYPED job per document (docs run in parallel)
               ↓
     ┌─────────────────────────────────────┐
-    │  Phi3-A (dates)    → SQL dates      │
-    │  Phi3-B (persons)  → SQL persons    │  parallel
-    │  Phi3-C (orgs)     → SQL orgs       │
-    │  Phi3-D (amounts)  → SQL amounts    │
+    │  [system + text]  ← shared KV prefix│
+    │    + dates    → SQL dates           │
+    │    + persons  → SQL persons         │  same worker,
+    │    + orgs     → SQL orgs            │  suffix-only eval
+    │    + amounts  → SQL amounts         │
     └─────────────────────────────────────┘
               ↓ merge results
     [Haiku] → validate, correct, structure → clean INSERT
     """
 
-    ENTITY_PROMPTS = {
-        "dates": """<|system|>
-You are a date extraction assistant. Extract all dates from text.
+    # Every entity-type prompt for a document starts with the same system turn
+    # and text, so on one worker only the short instruction suffix is evaluated
+    # after the first type (llama.cpp reuses the KV cache of the common prefix).
+    DOCUMENT_PREFIX = """<|system|>
+You are a forensic extraction assistant. Extract entities from text as JSON.
 <|end|>
 
 <|user|>
-Extract ALL dates from this text.
+Text: {text}
+
+"""
+
+    ENTITY_PROMPTS = {
+        "dates": """Extract ALL dates from this text.
 Return JSON: [{{"value": "YYYY-MM-DD", "context": "what happened", "confidence": 0.0-1.0}}]
 If date is partial (e.g. "March 2015"), use first of month.
 If only year, use January 1.
-
-Text: {text}
 <|end|>
 
 <|assistant|>""",
 
-        "persons": """<|system|>
-You are a person extraction assistant. Extract all person names from text.
-<|end|>
-
-<|user|>
-Extract ALL person names from this text.
+        "persons": """Extract ALL person names from this text.
 Return JSON: [{{"name": "Full Name", "role": "their role if known", "email": "if found", "confidence": 0.0-1.0}}]
 Include variations (e.g. "Jeff Epstein" and "Jeffrey Epstein" separately).
-
-Text: {text}
 <|end|>
 
 <|assistant|>""",
 
-        "orgs": """<|system|>
-You are an organization extraction assistant. Extract all organizations from text.
-<|end|>
-
-<|user|>
-Extract ALL organizations from this text.
+        "orgs": """Extract ALL organizations from this text.
 Return JSON: [{{"name": "Org Name", "type": "company|foundation|gov|media|other", "confidence": 0.0-1.0}}]
 Include companies, foundations, agencies, universities, media outlets.
-
-Text: {text}
 <|end|>
 
 <|assistant|>""",
 
-        "amounts": """<|system|>
-You are a financial extraction assistant. Extract all money amounts from text.
-<|end|>
-
-<|user|>
-Extract ALL money amounts from this text.
+        "amounts": """Extract ALL money amounts from this text.
 Return JSON: [{{"value": "amount", "currency": "USD|EUR|etc", "context": "what for", "confidence": 0.0-1.0}}]
 Normalize to numbers (e.g. "$5 million" → "5000000").
-
-Text: {text}
 <|end|>
 
 <|assistant|>""",
 
-        "locations": """<|system|>
-You are a location extraction assistant. Extract all locations from text.
-<|end|>
-
-<|user|>
-Extract ALL locations from this text.
+        "locations": """Extract ALL locations from this text.
 Return JSON: [{{"name": "Location", "type": "city|country|address|property", "coordinates": "if known", "confidence": 0.0-1.0}}]
 Include addresses, cities, islands, properties.
-
-Text: {text}
 <|end|>
 
 <|assistant|>"""
     }
 
+    @staticmethod
+    def extract_on_worker(worker: Phi3Worker, text: str, entity_types: List[str]) -> Dict[str, List[Dict]]:
+        """Run each entity-type prompt back-to-back on one worker (shared prefix)"""
+        prefix = ParallelExtractor.DOCUMENT_PREFIX.format(text=text)
+        extracted = {}
+        for etype in entity_types:
+            suffix = ParallelExtractor.ENTITY_PROMPTS.get(etype)
+            if not suffix:
+                continue
+            entities = []
+            try:
+                response = worker.generate(prefix + suffix, max_tokens=600, temperature=0.1)
+                if "[" in response:
+                    start = response.index("[")
+                    end = response.rindex("]") + 1
+                    entities = json.loads(response[start:end])
+            except Exception as e:
+                log.error(f"Parallel extract {etype} error: {e}")
+            extracted[etype] = entities
+        return extracted
+
     @staticmethod
     async def extract_parallel(text: str, entity_types: List[str] = None) -> Dict[str, List[Dict]]:
         """
-        Run multiple Phi-3 extractions in parallel.
+        Run the entity-type extractions for one document.
+
+        All types go to a single worker as one EXTRACT_TYPED job so the shared
+        document prefix is evaluated once; other workers stay free for other
+        documents, and concurrent requests for the same text are coalesced.
 
         Args:
             text: Document text to process
@@ -797,64 +883,22 @@ Text: {text}
         if entity_types is None:
             entity_types = ["dates", "persons", "orgs", "amounts", "locations"]
 
+        if not worker_pool.workers:
+            return {}
+
         # Truncate text for each worker
         text_chunk = text[:3000]
 
-        # Create tasks for parallel execution
-        async def extract_type(etype: str) -> tuple:
-            worker = worker_pool._get_available_worker()
-            if not worker:
-                # Wait briefly for a worker
-                for _ in range(20):
-                    await asyncio.sleep(0.1)
-                    worker = worker_pool._get_available_worker()
-                    if worker:
-                        break
-
-            if not worker:
-                return etype, []
-
-            try:
-                prompt = ParallelExtractor.ENTITY_PROMPTS.get(etype, "")
-                if not prompt:
-                    return etype, []
-
-                prompt = prompt.format(text=text_chunk)
-                loop = asyncio.get_event_loop()
-                response = await loop.run_in_executor(
-                    worker_pool.executor,
-                    worker.generate,
-                    prompt,
-                    600,  # max_tokens
-                    0.1   # temperature
-                )
-
-                # Parse JSON response
-                if "[" in response:
-                    start = response.index("[")
-                    end = response.rindex("]") + 1
-                    entities = json.loads(response[start:end])
-                    return etype, entities
-            except Exception as e:
-                log.error(f"Parallel extract {etype} error: {e}")
-            finally:
-                worker_pool._release_worker(worker)
-
-            return etype, []
-
-        # Run all extractions in parallel
-        tasks = [extract_type(et) for et in entity_types]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # Collect results
-        extracted = {}
-        for r in results:
-            if isinstance(r, Exception):
-                continue
-            etype, entities = r
-            extracted[etype] = entities
-
-        return extracted
+        job_id = await worker_pool.submit(
+            JobType.EXTRACT_TYPED,
+            {"text": text_chunk, "entity_types": list(entity_types)}
+        )
+        job = await worker_pool.get_result(job_id)
+        if job and job.result:
+            return job.result
+        if job and job.error:
+            log.error(f"Parallel extract error: {job.error}")
+        return {}
 
     @staticmethod
     def merge_results(extracted: Dict[str, List[Dict]]) -> Dict:
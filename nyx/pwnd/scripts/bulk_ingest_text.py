@@ -3,19 +3,28 @@
 Bulk ingest text files into documents/contents tables.
 Optimized for parallel processing.
 
+Files are read and hashed in a process pool, deduplicated against an
+on-disk hash index, streamed through COPY into a staging table and
+resolved into documents/contents with one set-based insert per batch.
+The hash index doubles as a checkpoint: re-running the same command
+skips every file already loaded.
+
 Usage:
     python3 bulk_ingest_text.py /path/to/text/files --workers 4
+    python3 bulk_ingest_text.py /path/to/text/files --rebuild-index
 """
 
+import io
 import os
 import sys
+import time
+import sqlite3
 import hashlib
 import argparse
+from collections import deque
 from pathlib import Path
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor
 import psycopg2
-from psycopg2.extras import execute_values
 
 # Database URL
 DATABASE_URL = os.getenv('DATABASE_URL')
@@ -31,6 +40,9 @@ if not DATABASE_URL:
     print("ERROR: DATABASE_URL not found")
     sys.exit(1)
 
+ORIGIN = 'dataset8_foia'
+INDEX_NAME = '.bulk_ingest_index.sqlite'
+
 
 def file_hash(content: bytes) -> str:
     return hashlib.sha256(content).hexdigest()
@@ -54,69 +66,202 @@ def detect_doc_type(filename: str, content: str) -> str:
     return 'misc'
 
 
-def get_existing_hashes(conn) -> set:
-    """Get all existing file hashes to avoid duplicates"""
-    with conn.cursor() as cur:
-        cur.execute("SELECT file_hash FROM documents WHERE file_hash IS NOT NULL")
-        return {row[0] for row in cur.fetchall()}
+# =============================================================================
+# ON-DISK HASH INDEX / CHECKPOINT
+# =============================================================================
+
+class HashIndex:
+    """SQLite index of loaded hashes and already-visited files.
+
+    `hashes` mirrors documents.file_hash so dedup never pulls the whole
+    table into memory; `files` records (path, size, mtime) of every file
+    handled so a resumed run does not even re-read them.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.db = sqlite3.connect(str(path))
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS hashes (hash TEXT PRIMARY KEY) WITHOUT ROWID")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY, size INTEGER, mtime REAL
+            ) WITHOUT ROWID
+        """)
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.db.commit()
+
+    def is_seeded(self) -> bool:
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'seeded'").fetchone()
+        return row is not None
+
+    def seed_from_db(self, conn, chunk: int = 50000) -> int:
+        """Stream documents.file_hash into the index with a server-side cursor"""
+        self.db.execute("DELETE FROM hashes")
+        total = 0
+        with conn.cursor(name='bulk_ingest_hashes') as cur:
+            cur.itersize = chunk
+            cur.execute("SELECT file_hash FROM documents WHERE file_hash IS NOT NULL")
+            while True:
+                rows = cur.fetchmany(chunk)
+                if not rows:
+                    break
+                self.db.executemany("INSERT OR IGNORE INTO hashes VALUES (?)", rows)
+                total += len(rows)
+        conn.commit()
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES ('seeded', ?)", (str(time.time()),))
+        self.db.commit()
+        return total
+
+    def file_seen(self, path: str, size: int, mtime: float) -> bool:
+        row = self.db.execute("SELECT size, mtime FROM files WHERE path = ?", (path,)).fetchone()
+        return row is not None and row[0] == size and row[1] == mtime
+
+    def has_hash(self, h: str) -> bool:
+        return self.db.execute("SELECT 1 FROM hashes WHERE hash = ?", (h,)).fetchone() is not None
 
+    def checkpoint(self, hashes: list, files: list):
+        """Record a committed batch; called only after the PostgreSQL commit"""
+        self.db.executemany("INSERT OR IGNORE INTO hashes VALUES (?)", [(h,) for h in hashes])
+        self.db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?)", files)
+        self.db.commit()
 
-def process_file(filepath: Path) -> dict:
+    def close(self):
+        self.db.close()
+
+
+# =============================================================================
+# FILE PROCESSING (runs in worker processes)
+# =============================================================================
+
+def process_file(entry: tuple) -> dict:
     """Process a single file, return data for insertion"""
+    path, size, mtime = entry
+    filepath = Path(path)
     try:
         content_bytes = filepath.read_bytes()
         content = content_bytes.decode('utf-8', errors='replace')
 
         if len(content.strip()) < 50:
-            return None
+            return {'filepath': path, 'size': size, 'mtime': mtime, 'skip': True}
 
         return {
             'filename': filepath.name,
-            'filepath': str(filepath),
+            'filepath': path,
+            'size': size,
+            'mtime': mtime,
             'file_hash': file_hash(content_bytes),
             'doc_type': detect_doc_type(filepath.name, content),
-            'origin': 'dataset8_foia',
+            'origin': ORIGIN,
             'char_count': len(content),
-            'content': content
+            'content': content,
         }
     except Exception as e:
         print(f"Error processing {filepath}: {e}")
         return None
 
 
+def iter_files(input_dir: Path, limit: int = 0):
+    """Yield (path, size, mtime) for every .txt file without building a list"""
+    count = 0
+    with os.scandir(input_dir) as it:
+        for entry in it:
+            if entry.name.endswith('.txt') and entry.is_file():
+                st = entry.stat()
+                yield entry.path, st.st_size, st.st_mtime
+                count += 1
+                if limit and count >= limit:
+                    return
+
+
+def bounded_map(executor, fn, items, window: int, chunk: int):
+    """Ordered executor map that keeps at most `window` chunks in flight"""
+    def chunks():
+        buf = []
+        for item in items:
+            buf.append(item)
+            if len(buf) >= chunk:
+                yield buf
+                buf = []
+        if buf:
+            yield buf
+
+    def run_chunk(batch):
+        return executor.submit(_process_chunk, fn, batch)
+
+    pending = deque()
+    for batch in chunks():
+        pending.append(run_chunk(batch))
+        if len(pending) >= window:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+
+def _process_chunk(fn, batch):
+    return [fn(item) for item in batch]
+
+
+# =============================================================================
+# COPY LOADER
+# =============================================================================
+
+_COPY_ESCAPES = str.maketrans({
+    '\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r', '\x00': '',
+})
+
+
+def _copy_field(value) -> str:
+    if value is None:
+        return '\\N'
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def create_staging(conn):
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS stage_documents (
+                filename TEXT, filepath TEXT, file_hash TEXT, doc_type TEXT,
+                origin TEXT, char_count INTEGER, full_text TEXT
+            ) ON COMMIT DELETE ROWS
+        """)
+    conn.commit()
+
+
 def ingest_batch(batch: list, conn) -> int:
-    """Insert a batch of documents"""
+    """COPY a batch into staging, then resolve doc_ids with one set-based insert"""
     if not batch:
         return 0
 
-    inserted = 0
-    with conn.cursor() as cur:
-        for doc in batch:
-            try:
-                # Insert document
-                cur.execute("""
-                    INSERT INTO documents (filename, filepath, file_hash, doc_type, origin, char_count, date_added, status)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, 'processed')
-                    ON CONFLICT DO NOTHING
-                    RETURNING id
-                """, (doc['filename'], doc['filepath'], doc['file_hash'], doc['doc_type'],
-                      doc['origin'], doc['char_count'], datetime.now()))
-
-                result = cur.fetchone()
-                if result:
-                    doc_id = result[0]
-                    # Insert content
-                    cur.execute("""
-                        INSERT INTO contents (doc_id, full_text, created_at)
-                        VALUES (%s, %s, %s)
-                        ON CONFLICT DO NOTHING
-                    """, (doc_id, doc['content'], datetime.now()))
-                    inserted += 1
-            except Exception as e:
-                print(f"Error inserting {doc['filename']}: {e}")
-                continue
+    buf = io.StringIO()
+    for doc in batch:
+        buf.write('\t'.join(_copy_field(doc[k]) for k in (
+            'filename', 'filepath', 'file_hash', 'doc_type', 'origin', 'char_count', 'content'
+        )))
+        buf.write('\n')
+    buf.seek(0)
 
-        conn.commit()
+    with conn.cursor() as cur:
+        cur.copy_expert("""
+            COPY stage_documents (filename, filepath, file_hash, doc_type, origin, char_count, full_text)
+            FROM STDIN
+        """, buf)
+        cur.execute("""
+            WITH ins AS (
+                INSERT INTO documents (filename, filepath, file_hash, doc_type, origin, char_count, date_added, status)
+                SELECT filename, filepath, file_hash, doc_type, origin, char_count, NOW(), 'processed'
+                FROM stage_documents
+                ON CONFLICT (file_hash) DO NOTHING
+                RETURNING id, file_hash
+            )
+            INSERT INTO contents (doc_id, full_text, created_at)
+            SELECT ins.id, s.full_text, NOW()
+            FROM ins JOIN stage_documents s USING (file_hash)
+            ON CONFLICT DO NOTHING
+        """)
+        inserted = cur.rowcount
+    conn.commit()
     return inserted
 
 
@@ -124,8 +269,10 @@ def main():
     parser = argparse.ArgumentParser(description='Bulk ingest text files')
     parser.add_argument('input_dir', help='Directory containing text files')
     parser.add_argument('--workers', type=int, default=4, help='Number of parallel workers')
-    parser.add_argument('--batch-size', type=int, default=100, help='Batch size for DB inserts')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Documents per COPY batch')
     parser.add_argument('--limit', type=int, default=0, help='Limit number of files (0=all)')
+    parser.add_argument('--index', help=f'Hash index / checkpoint file (default: <input_dir>/{INDEX_NAME})')
+    parser.add_argument('--rebuild-index', action='store_true', help='Re-seed the hash index from documents')
     args = parser.parse_args()
 
     input_dir = Path(args.input_dir)
@@ -133,53 +280,68 @@ def main():
         print(f"ERROR: Directory not found: {input_dir}")
         sys.exit(1)
 
-    # Get all text files
-    files = list(input_dir.glob('*.txt'))
-    if args.limit > 0:
-        files = files[:args.limit]
-
-    print(f"Found {len(files)} text files to process")
-
-    # Get existing hashes
     conn = psycopg2.connect(DATABASE_URL)
-    existing_hashes = get_existing_hashes(conn)
-    print(f"Found {len(existing_hashes)} existing documents in DB")
+    index = HashIndex(Path(args.index) if args.index else input_dir / INDEX_NAME)
 
-    # Process files in parallel
-    processed = []
-    skipped = 0
+    if args.rebuild_index or not index.is_seeded():
+        seeded = index.seed_from_db(conn)
+        print(f"Seeded hash index with {seeded} existing documents")
 
-    print(f"Processing with {args.workers} workers...")
-    with ThreadPoolExecutor(max_workers=args.workers) as executor:
-        futures = {executor.submit(process_file, f): f for f in files}
+    create_staging(conn)
 
-        for i, future in enumerate(as_completed(futures)):
-            result = future.result()
-            if result:
-                if result['file_hash'] in existing_hashes:
-                    skipped += 1
-                else:
-                    processed.append(result)
-                    existing_hashes.add(result['file_hash'])
-
-            if (i + 1) % 500 == 0:
-                print(f"  Processed {i + 1}/{len(files)} files...")
-
-    print(f"Processed {len(processed)} new files, skipped {skipped} duplicates")
-
-    # Insert in batches
-    if processed:
-        print(f"Inserting {len(processed)} documents in batches of {args.batch_size}...")
-        total_inserted = 0
-
-        for i in range(0, len(processed), args.batch_size):
-            batch = processed[i:i + args.batch_size]
-            inserted = ingest_batch(batch, conn)
-            total_inserted += inserted
-            print(f"  Inserted batch {i // args.batch_size + 1}: {inserted} documents")
-
-        print(f"\nTotal inserted: {total_inserted} documents")
+    def pending_files():
+        for path, size, mtime in iter_files(input_dir, args.limit):
+            if index.file_seen(path, size, mtime):
+                stats['resumed'] += 1
+                continue
+            yield path, size, mtime
+
+    stats = {'files': 0, 'bytes': 0, 'inserted': 0, 'skipped': 0, 'resumed': 0}
+    batch, batch_hashes, batch_files = [], set(), []
+    start = time.perf_counter()
+
+    def flush():
+        stats['inserted'] += ingest_batch(batch, conn)
+        index.checkpoint(list(batch_hashes), batch_files)
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        print(f"  {stats['files']} files, {stats['inserted']} inserted | "
+              f"{stats['files'] / elapsed:.0f} files/s, "
+              f"{stats['bytes'] / elapsed / 1e6:.1f} MB/s")
+        batch.clear()
+        batch_hashes.clear()
+        batch_files.clear()
 
+    print(f"Processing with {args.workers} workers...")
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for result in bounded_map(executor, process_file, pending_files(),
+                                  window=args.workers * 4, chunk=64):
+            if result is None:
+                continue
+            stats['files'] += 1
+            stats['bytes'] += result['size']
+            batch_files.append((result['filepath'], result['size'], result['mtime']))
+            if result.get('skip'):
+                continue
+            h = result['file_hash']
+            if h in batch_hashes or index.has_hash(h):
+                stats['skipped'] += 1
+                continue
+            batch.append(result)
+            batch_hashes.add(h)
+            if len(batch) >= args.batch_size:
+                flush()
+
+        if batch or batch_files:
+            flush()
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(f"\nTotal inserted: {stats['inserted']} documents")
+    print(f"Skipped {stats['skipped']} duplicates, {stats['resumed']} files already checkpointed")
+    print(f"Read {stats['files']} files / {stats['bytes'] / 1e6:.1f} MB in {elapsed:.1f}s "
+          f"({stats['files'] / elapsed:.0f} files/s, "
+          f"{stats['bytes'] / elapsed / 1e6:.1f} MB/s)")
+
+    index.close()
     conn.close()
     print("Done!")
 
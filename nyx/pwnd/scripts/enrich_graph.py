@@ -2,7 +2,8 @@
 """
 Graph Enrichment Script - Extract entities, relationships and forensic signals from emails
 
-Now with parallel processing! Uses asyncio.Semaphore to run multiple Haiku API calls concurrently.
+Now with parallel processing! Emails are packed into Haiku calls by token budget and run
+through app.extraction_scheduler (adaptive concurrency, response cache, durable work queue).
 
 Usage:
     python scripts/enrich_graph.py --limit 10 --dry-run          # Test with 10 emails
@@ -27,20 +28,14 @@ from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Any, Tuple
 
-import httpx
+from app.extraction_scheduler import ExtractionScheduler, estimate_tokens
 
 # Configuration
-BATCH_SIZE = 5  # emails per Haiku call
-RATE_LIMIT = 1.0  # seconds between calls (only for sequential fallback)
-MAX_RETRIES = 3
-DEFAULT_CONCURRENCY = 20  # parallel batches
+BATCH_SIZE = 5  # max emails per Haiku call
+TOKEN_BUDGET = 6000  # estimated input tokens per Haiku call
+DEFAULT_CONCURRENCY = 20  # initial parallel calls (adapted at runtime)
 HAIKU_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
 
-
-class RateLimitError(Exception):
-    """Raised when API returns 429 rate limit error"""
-    pass
-
 # Database paths
 DB_SOURCES = Path("/opt/rag/db/sources.db")
 DB_GRAPH = Path("/opt/rag/db/graph.db")
@@ -255,8 +250,13 @@ Body:
 """
 
 
-async def call_haiku_extract(emails_batch: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Call Haiku API with extraction prompt"""
+def email_tokens(email: Dict[str, Any]) -> int:
+    """Estimated prompt tokens for one formatted email"""
+    return estimate_tokens(format_email_for_prompt(email))
+
+
+async def call_haiku_extract(emails_batch: List[Dict[str, Any]], call) -> Dict[str, Any]:
+    """Call Haiku API with extraction prompt through the extraction scheduler"""
     if not HAIKU_API_KEY:
         raise ValueError("ANTHROPIC_API_KEY not set")
 
@@ -265,59 +265,7 @@ async def call_haiku_extract(emails_batch: List[Dict[str, Any]]) -> Dict[str, An
 
     prompt = HAIKU_EXTRACTION_PROMPT.format(emails_formatted=emails_formatted)
 
-    for attempt in range(MAX_RETRIES):
-        try:
-            async with httpx.AsyncClient(timeout=180.0) as client:
-                response = await client.post(
-                    "https://api.anthropic.com/v1/messages",
-                    headers={
-                        "x-api-key": HAIKU_API_KEY,
-                        "anthropic-version": "2023-06-01",
-                        "content-type": "application/json"
-                    },
-                    json={
-                        "model": "claude-3-5-haiku-20241022",
-                        "max_tokens": 4096,
-                        "messages": [{"role": "user", "content": prompt}]
-                    }
-                )
-
-                # Check for rate limiting
-                if response.status_code == 429:
-                    raise RateLimitError("API rate limit exceeded (429)")
-
-                response.raise_for_status()
-                data = response.json()
-
-                content = data.get("content", [])
-                usage = data.get("usage", {})
-
-                if content and isinstance(content, list):
-                    text = content[0].get("text", "")
-
-                    tokens_in = usage.get("input_tokens", 0)
-                    tokens_out = usage.get("output_tokens", 0)
-                    cost_usd = (tokens_in * 0.80 / 1_000_000) + (tokens_out * 4.00 / 1_000_000)
-
-                    return {
-                        "text": text,
-                        "usage": usage,
-                        "cost_usd": cost_usd
-                    }
-
-                return {"error": "Invalid response format"}
-
-        except RateLimitError:
-            # Reraise rate limit errors immediately
-            raise
-        except Exception as e:
-            if attempt < MAX_RETRIES - 1:
-                print(f"  ⚠ Retry {attempt + 1}/{MAX_RETRIES} after error: {e}")
-                await asyncio.sleep(2 ** attempt)  # Exponential backoff
-            else:
-                return {"error": f"Failed after {MAX_RETRIES} attempts: {e}"}
-
-    return {"error": "Unknown error"}
+    return await call(prompt)
 
 
 def safe_db_value(value: Any) -> str:
@@ -572,7 +520,7 @@ def log_extraction(source_id: int, stats: Dict[str, Any], dry_run: bool = False)
     conn.close()
 
 
-async def process_batch(emails: List[Dict[str, Any]], dry_run: bool = False) -> Dict[str, Any]:
+async def process_batch(emails: List[Dict[str, Any]], call, dry_run: bool = False) -> Dict[str, Any]:
     """Process one batch of emails"""
     batch_stats = {
         'emails': len(emails),
@@ -589,7 +537,7 @@ async def process_batch(emails: List[Dict[str, Any]], dry_run: bool = False) ->
     print(f"\n  Processing batch of {len(emails)} emails (IDs: {[e['doc_id'] for e in emails]})")
 
     # Call Haiku
-    result = await call_haiku_extract(emails)
+    result = await call_haiku_extract(emails, call)
 
     if "error" in result:
         print(f"  ✗ Error: {result['error']}")
@@ -600,7 +548,8 @@ async def process_batch(emails: List[Dict[str, Any]], dry_run: bool = False) ->
     batch_stats['tokens_in'] = result.get('usage', {}).get('input_tokens', 0)
     batch_stats['tokens_out'] = result.get('usage', {}).get('output_tokens', 0)
 
-    print(f"  ✓ Haiku response: {batch_stats['tokens_in']} in / {batch_stats['tokens_out']} out tokens (${batch_stats['cost_usd']:.4f})")
+    cached = " (cached)" if result.get('cached') else ""
+    print(f"  ✓ Haiku response: {batch_stats['tokens_in']} in / {batch_stats['tokens_out']} out tokens (${batch_stats['cost_usd']:.4f}){cached}")
 
     # Parse extraction
     source_ids = [e['doc_id'] for e in emails]
@@ -658,7 +607,8 @@ async def process_batch(emails: List[Dict[str, Any]], dry_run: bool = False) ->
     return batch_stats
 
 
-async def main(limit=None, dry_run=False, resume=True, batch_size=BATCH_SIZE, concurrency=DEFAULT_CONCURRENCY):
+async def main(limit=None, dry_run=False, resume=True, batch_size=BATCH_SIZE, concurrency=DEFAULT_CONCURRENCY,
+               token_budget=TOKEN_BUDGET):
     """Main extraction loop with parallel processing"""
     print("=" * 80)
     print("GRAPH ENRICHMENT - Haiku Extraction (Parallel Mode)")
@@ -677,16 +627,21 @@ async def main(limit=None, dry_run=False, resume=True, batch_size=BATCH_SIZE, co
 
     print(f"✓ Found {len(emails)} emails to process")
 
-    # Split into batches
-    batches = [emails[i:i + batch_size] for i in range(0, len(emails), batch_size)]
-    print(f"✓ Split into {len(batches)} batches of {batch_size}")
-    print(f"✓ Processing with concurrency = {concurrency}")
+    scheduler = ExtractionScheduler(
+        name="enrich_graph",
+        token_budget=token_budget,
+        max_docs=batch_size,
+        concurrency=concurrency,
+        max_concurrency=concurrency * 2,
+        persist=not dry_run,
+        validate=lambda result: parse_extraction_result(result, [])[1] is None,
+    )
+    if not resume:
+        scheduler.queue.reset()
+    print(f"✓ Packing up to {batch_size} emails / {token_budget} tokens per call")
+    print(f"✓ Processing with concurrency = {concurrency} (adaptive, max {concurrency * 2})")
 
-    # Shared state for parallel processing
-    semaphore = asyncio.Semaphore(concurrency)
-    progress_lock = asyncio.Lock()
     completed_count = 0
-    total_batches = len(batches)
 
     # Shared stats
     total_stats = {
@@ -700,87 +655,21 @@ async def main(limit=None, dry_run=False, resume=True, batch_size=BATCH_SIZE, co
         'tokens_out': 0,
         'errors': []
     }
-    stats_lock = asyncio.Lock()
 
-    async def process_batch_with_semaphore(batch_idx: int, batch: List[Dict[str, Any]]):
-        """Process batch with semaphore control and progress tracking"""
-        nonlocal completed_count
+    async def process(batch: List[Dict[str, Any]], call):
+        print(f"\n[Batch] Starting (IDs: {[e['doc_id'] for e in batch]})")
+        return await process_batch(batch, call, dry_run)
 
-        async with semaphore:
-            # Show progress
-            async with progress_lock:
-                print(f"\n[Batch {batch_idx + 1}/{total_batches}] Starting (IDs: {[e['doc_id'] for e in batch]})")
-
-            # Process with retry on rate limit
-            max_rate_limit_retries = 3
-            for retry in range(max_rate_limit_retries):
-                try:
-                    batch_stats = await process_batch(batch, dry_run)
-
-                    # Update shared stats
-                    async with stats_lock:
-                        total_stats['emails'] += batch_stats['emails']
-                        total_stats['nodes'] += batch_stats['nodes']
-                        total_stats['edges'] += batch_stats['edges']
-                        total_stats['properties'] += batch_stats['properties']
-                        total_stats['signals'] += batch_stats['signals']
-                        total_stats['cost_usd'] += batch_stats['cost_usd']
-                        total_stats['tokens_in'] += batch_stats['tokens_in']
-                        total_stats['tokens_out'] += batch_stats['tokens_out']
-                        total_stats['errors'].extend(batch_stats['errors'])
-
-                    # Update progress
-                    async with progress_lock:
-                        completed_count += 1
-                        print(f"  ✓ Batch {batch_idx + 1}/{total_batches} complete ({completed_count}/{total_batches} total)")
-
-                    return batch_stats
-
-                except RateLimitError as e:
-                    if retry < max_rate_limit_retries - 1:
-                        backoff = 2 ** (retry + 1)  # 2, 4, 8 seconds
-                        async with progress_lock:
-                            print(f"  ⚠ Rate limit hit on batch {batch_idx + 1}, waiting {backoff}s before retry {retry + 1}/{max_rate_limit_retries}")
-                        await asyncio.sleep(backoff)
-                    else:
-                        # Log error and return empty stats
-                        error_msg = f"Rate limit exceeded after {max_rate_limit_retries} retries: {e}"
-                        async with stats_lock:
-                            total_stats['errors'].append(error_msg)
-                        async with progress_lock:
-                            print(f"  ✗ Batch {batch_idx + 1} failed: {error_msg}")
-                        return {
-                            'emails': 0, 'nodes': 0, 'edges': 0, 'properties': 0,
-                            'signals': 0, 'cost_usd': 0.0, 'tokens_in': 0,
-                            'tokens_out': 0, 'errors': [error_msg]
-                        }
-                except Exception as e:
-                    # Handle other exceptions
-                    error_msg = f"Unexpected error in batch {batch_idx + 1}: {e}"
-                    async with stats_lock:
-                        total_stats['errors'].append(error_msg)
-                    async with progress_lock:
-                        print(f"  ✗ Batch {batch_idx + 1} failed: {error_msg}")
-                    return {
-                        'emails': 0, 'nodes': 0, 'edges': 0, 'properties': 0,
-                        'signals': 0, 'cost_usd': 0.0, 'tokens_in': 0,
-                        'tokens_out': 0, 'errors': [error_msg]
-                    }
+    def on_batch(batch: List[Dict[str, Any]], batch_stats: Dict[str, Any]):
+        nonlocal completed_count
+        for key in ['emails', 'nodes', 'edges', 'properties', 'signals', 'cost_usd', 'tokens_in', 'tokens_out']:
+            total_stats[key] += batch_stats.get(key, 0)
+        total_stats['errors'].extend(batch_stats.get('errors', []))
+        completed_count += 1
+        print(f"  ✓ Batch complete ({completed_count} total, concurrency {scheduler.limiter.limit:.1f})")
 
     start_time = time.time()
-
-    # Process all batches in parallel
-    print(f"\nProcessing {total_batches} batches in parallel...")
-    tasks = [process_batch_with_semaphore(i, batch) for i, batch in enumerate(batches)]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-
-    # Handle any uncaught exceptions
-    for i, result in enumerate(results):
-        if isinstance(result, Exception):
-            error_msg = f"Fatal error in batch {i + 1}: {result}"
-            total_stats['errors'].append(error_msg)
-            print(f"\n✗ {error_msg}")
-
+    await scheduler.run(emails, lambda e: str(e['doc_id']), email_tokens, process, on_batch)
     elapsed = time.time() - start_time
 
     # Final report
@@ -788,8 +677,7 @@ async def main(limit=None, dry_run=False, resume=True, batch_size=BATCH_SIZE, co
     print("EXTRACTION COMPLETE")
     print("=" * 80)
     print(f"\nEmails processed:    {total_stats['emails']}")
-    print(f"Batches completed:   {completed_count}/{total_batches}")
-    print(f"Haiku calls:         {completed_count}")
+    print(f"Batches completed:   {completed_count}")
     print(f"Input tokens:        {total_stats['tokens_in']:,}")
     print(f"Output tokens:       {total_stats['tokens_out']:,}")
     print(f"Estimated cost:      ${total_stats['cost_usd']:.4f}")
@@ -799,6 +687,8 @@ async def main(limit=None, dry_run=False, resume=True, batch_size=BATCH_SIZE, co
     print(f"Signals flagged:     {total_stats['signals']}")
     print(f"\nTime elapsed:        {elapsed:.1f}s")
     print(f"Throughput:          {total_stats['emails'] / elapsed:.1f} emails/sec" if elapsed > 0 else "")
+    scheduler.print_report()
+    scheduler.close()
 
     if total_stats['errors']:
         print(f"\n⚠ Errors encountered: {len(total_stats['errors'])}")
@@ -820,9 +710,11 @@ if __name__ == "__main__":
     parser.add_argument("--limit", type=int, help="Max emails to process")
     parser.add_argument("--dry-run", action="store_true", help="Don't insert, just show what would happen")
     parser.add_argument("--no-resume", action="store_true", help="Reprocess all emails")
-    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help=f"Emails per batch (default: {BATCH_SIZE})")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help=f"Max emails per call (default: {BATCH_SIZE})")
+    parser.add_argument("--token-budget", type=int, default=TOKEN_BUDGET,
+                        help=f"Estimated input tokens per call (default: {TOKEN_BUDGET})")
     parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
-                        help=f"Number of parallel API calls (default: {DEFAULT_CONCURRENCY})")
+                        help=f"Initial parallel API calls, adapted at runtime (default: {DEFAULT_CONCURRENCY})")
 
     args = parser.parse_args()
 
@@ -832,7 +724,8 @@ if __name__ == "__main__":
             dry_run=args.dry_run,
             resume=not args.no_resume,
             batch_size=args.batch_size,
-            concurrency=args.concurrency
+            concurrency=args.concurrency,
+            token_budget=args.token_budget
         ))
     except KeyboardInterrupt:
         print("\n\n⚠ Interrupted by user")
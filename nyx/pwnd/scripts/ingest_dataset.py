@@ -30,6 +30,7 @@ import json
 import re
 import time
 import csv
+import hashlib
 from pathlib import Path
 
 # Increase CSV field size limit for large text fields
@@ -37,15 +38,15 @@ csv.field_size_limit(10 * 1024 * 1024)  # 10MB
 from datetime import datetime
 from typing import List, Dict, Any, Tuple, Optional, AsyncGenerator
 
-import httpx
+from app.extraction_scheduler import ExtractionScheduler, estimate_tokens
 
 # =============================================================================
 # CONFIGURATION
 # =============================================================================
 
-BATCH_SIZE = 3  # documents per Haiku call (smaller for richer context)
+BATCH_SIZE = 3  # max documents per Haiku call (smaller for richer context)
+TOKEN_BUDGET = 6000  # estimated input tokens per Haiku call
 DEFAULT_CONCURRENCY = 10
-MAX_RETRIES = 3
 HAIKU_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
 
 # Database configuration
@@ -519,20 +520,33 @@ def load_documents(input_path: str, format_type: str = 'auto') -> List[Dict[str,
 # HAIKU API
 # =============================================================================
 
-class RateLimitError(Exception):
-    pass
+def document_content(doc: Dict[str, Any]) -> str:
+    """Prompt content for a document (truncated like the prompt itself)"""
+    content = doc.get('content', '') or doc.get('body', '') or doc.get('text', '')
+    return content[:3000]  # Limit content size
 
 
-async def call_haiku_extract(documents: List[Dict[str, Any]], context: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Call Haiku with enriched context"""
+def document_key(doc: Dict[str, Any]) -> str:
+    """Stable work-queue key for a document"""
+    if doc.get('id') not in (None, ''):
+        return str(doc['id'])
+    return hashlib.sha1(document_content(doc).encode('utf-8', 'replace')).hexdigest()
+
+
+def document_tokens(doc: Dict[str, Any]) -> int:
+    """Estimated prompt tokens: content, header and cross-reference context"""
+    return estimate_tokens(document_content(doc)) + 250
+
+
+async def call_haiku_extract(documents: List[Dict[str, Any]], context: List[Dict[str, Any]], call) -> Dict[str, Any]:
+    """Call Haiku with enriched context through the extraction scheduler"""
     if not HAIKU_API_KEY:
         raise ValueError("ANTHROPIC_API_KEY not set")
 
     # Format documents
     docs_formatted = []
     for doc in documents:
-        content = doc.get('content', '') or doc.get('body', '') or doc.get('text', '')
-        content = content[:3000]  # Limit content size
+        content = document_content(doc)
 
         docs_formatted.append(f"""
 ---
@@ -566,55 +580,7 @@ Content:
         documents_formatted='\n'.join(docs_formatted)
     )
 
-    for attempt in range(MAX_RETRIES):
-        try:
-            async with httpx.AsyncClient(timeout=180.0) as client:
-                response = await client.post(
-                    "https://api.anthropic.com/v1/messages",
-                    headers={
-                        "x-api-key": HAIKU_API_KEY,
-                        "anthropic-version": "2023-06-01",
-                        "content-type": "application/json"
-                    },
-                    json={
-                        "model": "claude-3-5-haiku-20241022",
-                        "max_tokens": 4096,
-                        "messages": [{"role": "user", "content": prompt}]
-                    }
-                )
-
-                if response.status_code == 429:
-                    raise RateLimitError("API rate limit (429)")
-
-                response.raise_for_status()
-                data = response.json()
-
-                content = data.get("content", [])
-                usage = data.get("usage", {})
-
-                if content and isinstance(content, list):
-                    text = content[0].get("text", "")
-                    tokens_in = usage.get("input_tokens", 0)
-                    tokens_out = usage.get("output_tokens", 0)
-                    cost_usd = (tokens_in * 0.80 / 1_000_000) + (tokens_out * 4.00 / 1_000_000)
-
-                    return {
-                        "text": text,
-                        "usage": usage,
-                        "cost_usd": cost_usd
-                    }
-
-                return {"error": "Invalid response format"}
-
-        except RateLimitError:
-            raise
-        except Exception as e:
-            if attempt < MAX_RETRIES - 1:
-                await asyncio.sleep(2 ** attempt)
-            else:
-                return {"error": f"Failed after {MAX_RETRIES} attempts: {e}"}
-
-    return {"error": "Unknown error"}
+    return await call(prompt)
 
 
 # =============================================================================
@@ -890,6 +856,7 @@ def parse_extraction_result(result: Dict, doc_ids: List[str]) -> Tuple[Optional[
 async def process_batch(
     documents: List[Dict[str, Any]],
     dataset_name: str,
+    call,
     dry_run: bool = False
 ) -> Dict[str, Any]:
     """Process a batch of documents with pipeline-style discovery"""
@@ -919,7 +886,7 @@ async def process_batch(
 
     # Step 2: Call Haiku with enriched context
     print(f"    [2/3] Extracting entities via Haiku...")
-    result = await call_haiku_extract(documents, contexts)
+    result = await call_haiku_extract(documents, contexts, call)
 
     if "error" in result:
         print(f"    ERROR: {result['error']}")
@@ -927,7 +894,7 @@ async def process_batch(
         return batch_stats
 
     batch_stats['cost_usd'] = result.get('cost_usd', 0.0)
-    print(f"    Haiku: ${batch_stats['cost_usd']:.4f}")
+    print(f"    Haiku: ${batch_stats['cost_usd']:.4f}" + (" (cached)" if result.get('cached') else ""))
 
     # Step 3: Parse and insert
     print(f"    [3/3] Inserting into graph...")
@@ -991,7 +958,8 @@ async def main(
     dry_run: bool = False,
     resume: bool = True,
     batch_size: int = BATCH_SIZE,
-    concurrency: int = DEFAULT_CONCURRENCY
+    concurrency: int = DEFAULT_CONCURRENCY,
+    token_budget: int = TOKEN_BUDGET
 ):
     """Main ingestion pipeline"""
 
@@ -1029,13 +997,20 @@ async def main(
         print("No documents to process")
         return
 
-    # Split into batches
-    batches = [documents[i:i + batch_size] for i in range(0, len(documents), batch_size)]
-    print(f"Batches: {len(batches)} (size {batch_size})")
-    print(f"Concurrency: {concurrency}")
+    # Process through the extraction scheduler (token packing, AIMD, cache, durable queue)
+    scheduler = ExtractionScheduler(
+        name=f"ingest_{dataset_name}",
+        token_budget=token_budget,
+        max_docs=batch_size,
+        concurrency=concurrency,
+        max_concurrency=concurrency * 2,
+        persist=not dry_run,
+        validate=lambda result: parse_extraction_result(result, [])[1] is None,
+    )
+    if not resume:
+        scheduler.queue.reset()
+    print(f"Concurrency: {concurrency} (adaptive, max {concurrency * 2})")
 
-    # Process
-    semaphore = asyncio.Semaphore(concurrency)
     total_stats = {
         'documents': 0,
         'nodes': 0,
@@ -1046,40 +1021,21 @@ async def main(
         'cost_usd': 0.0,
         'errors': []
     }
-    stats_lock = asyncio.Lock()
     completed = 0
 
-    async def process_with_semaphore(batch_idx: int, batch: List[Dict]):
-        nonlocal completed
-        async with semaphore:
-            print(f"\n[Batch {batch_idx + 1}/{len(batches)}]")
+    async def process(batch: List[Dict], call):
+        return await process_batch(batch, dataset_name, call, dry_run)
 
-            try:
-                stats = await process_batch(batch, dataset_name, dry_run)
-
-                async with stats_lock:
-                    for key in ['documents', 'nodes', 'edges', 'properties', 'signals', 'cross_refs', 'cost_usd']:
-                        total_stats[key] += stats.get(key, 0)
-                    total_stats['errors'].extend(stats.get('errors', []))
-                    completed += 1
-
-                print(f"  Batch {batch_idx + 1} complete ({completed}/{len(batches)})")
-                return stats
-
-            except RateLimitError:
-                await asyncio.sleep(5)
-                return await process_batch(batch, dataset_name, dry_run)
-            except Exception as e:
-                print(f"  Batch {batch_idx + 1} failed: {e}")
-                async with stats_lock:
-                    total_stats['errors'].append(str(e))
-                return {}
+    def on_batch(batch: List[Dict], stats: Dict):
+        nonlocal completed
+        for key in ['documents', 'nodes', 'edges', 'properties', 'signals', 'cross_refs', 'cost_usd']:
+            total_stats[key] += stats.get(key, 0)
+        total_stats['errors'].extend(stats.get('errors', []))
+        completed += 1
+        print(f"  Batch complete ({completed} done, {len(batch)} docs)")
 
     start_time = time.time()
-
-    tasks = [process_with_semaphore(i, batch) for i, batch in enumerate(batches)]
-    await asyncio.gather(*tasks, return_exceptions=True)
-
+    await scheduler.run(documents, document_key, document_tokens, process, on_batch)
     elapsed = time.time() - start_time
 
     # Report
@@ -1094,6 +1050,8 @@ async def main(
     print(f"Cross-references:    {total_stats['cross_refs']}")
     print(f"\nEstimated cost:      ${total_stats['cost_usd']:.4f}")
     print(f"Time elapsed:        {elapsed:.1f}s")
+    scheduler.print_report()
+    scheduler.close()
 
     if total_stats['errors']:
         print(f"\nErrors: {len(total_stats['errors'])}")
@@ -1116,9 +1074,11 @@ if __name__ == "__main__":
     parser.add_argument("--limit", "-l", type=int, help="Max documents to process")
     parser.add_argument("--dry-run", action="store_true", help="Don't insert, just show what would happen")
     parser.add_argument("--no-resume", action="store_true", help="Reprocess all documents")
-    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help=f"Docs per batch (default: {BATCH_SIZE})")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help=f"Max docs per request (default: {BATCH_SIZE})")
+    parser.add_argument("--token-budget", type=int, default=TOKEN_BUDGET,
+                        help=f"Estimated input tokens per request (default: {TOKEN_BUDGET})")
     parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
-                        help=f"Parallel API calls (default: {DEFAULT_CONCURRENCY})")
+                        help=f"Initial parallel API calls, adapted at runtime (default: {DEFAULT_CONCURRENCY})")
 
     args = parser.parse_args()
 
@@ -1130,7 +1090,8 @@ if __name__ == "__main__":
             dry_run=args.dry_run,
             resume=not args.no_resume,
             batch_size=args.batch_size,
-            concurrency=args.concurrency
+            concurrency=args.concurrency,
+            token_budget=args.token_budget
         ))
     except KeyboardInterrupt:
         print("\n\nInterrupted")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""ExtractionScheduler against a local stub Messages API (ANTHROPIC_API_URL)"""
+import sys
+import json
+import asyncio
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.extraction_scheduler import ExtractionScheduler
+
+
+class StubAPI(BaseHTTPRequestHandler):
+    """Replies with the queued texts in order, then repeats the last one"""
+    replies = []
+    requests = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("content-length", 0)))
+        cls = type(self)
+        text = cls.replies[min(cls.requests, len(cls.replies) - 1)]
+        cls.requests += 1
+        body = json.dumps({
+            "content": [{"type": "text", "text": text}],
+            "usage": {"input_tokens": 100, "output_tokens": 20},
+        }).encode()
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def valid_json(result):
+    try:
+        json.loads(result.get("text", ""))
+        return True
+    except ValueError:
+        return False
+
+
+def run_stub(replies):
+    StubAPI.replies = replies
+    StubAPI.requests = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/v1/messages"
+
+
+def extract(state_dir, api_url, documents):
+    """One scheduler run; returns (report, texts seen by process)"""
+    seen = []
+
+    async def process(batch, call):
+        result = await call("extract: " + ",".join(d["id"] for d in batch))
+        seen.append(result.get("text"))
+        if not valid_json(result):
+            return {"errors": ["malformed reply"]}
+        return {}
+
+    scheduler = ExtractionScheduler(
+        name="stub", state_dir=state_dir, api_url=api_url, api_key="test",
+        validate=valid_json,
+    )
+    try:
+        report = asyncio.run(scheduler.run(
+            documents, lambda d: d["id"], lambda d: 10, process,
+        ))
+    finally:
+        scheduler.close()
+    return report, seen
+
+
+def test_malformed_reply_is_not_cached(tmp_path):
+    server, url = run_stub(['{"extractions": [', '{"extractions": []}'])
+    docs = [{"id": "a"}, {"id": "b"}]
+    try:
+        report, seen = extract(tmp_path, url, docs)
+        assert seen == ['{"extractions": [']
+        assert report["invalid"] == 1
+        assert report["queue"] == {"failed": 2}
+
+        # The retry goes to the API instead of replaying the bad reply
+        report, seen = extract(tmp_path, url, docs)
+        assert seen == ['{"extractions": []}']
+        assert report["cache_hits"] == 0
+        assert report["queue"] == {"done": 2}
+        assert StubAPI.requests == 2
+    finally:
+        server.shutdown()
+
+
+def test_valid_reply_is_cached(tmp_path):
+    server, url = run_stub(['{"extractions": []}'])
+    docs = [{"id": "a"}]
+    try:
+        extract(tmp_path, url, docs)
+        (tmp_path / "stub.queue.sqlite").unlink()
+        report, seen = extract(tmp_path, url, docs)
+        assert seen == ['{"extractions": []}']
+        assert report["cache_hits"] == 1
+        assert StubAPI.requests == 1
+    finally:
+        server.shutdown()
@@ -34,6 +34,12 @@ Usage:
     python resurrection.py stop      # Arrete tout
     python resurrection.py status    # Etat complet
     python resurrection.py watch     # Mode gardien (restart auto)
+    python resurrection.py timeline  # Timeline du dernier boot
+
+Demarrage: chaque niveau du DAG de dependances en parallele; un service
+est pret selon check_type (port, socket, http, process, ou "notify":
+READY=1 sur $NOTIFY_SOCKET facon sd_notify, ou "file": ready_file cree).
+Surveillance: pidfd par processus, restart avec backoff exponentiel.
 
 Systemd:
     sudo systemctl enable gaia-resurrection
@@ -48,7 +54,10 @@ import signal
 import socket
 import subprocess
 import argparse
+import select
+import selectors
 import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional, Callable
@@ -64,6 +73,11 @@ GAIA_ROOT = Path(__file__).parent
 PID_DIR = Path("/tmp/gaia/pids")
 LOG_DIR = Path("/tmp/gaia/logs")
 SOCKET_DIR = Path("/tmp/geass")
+TIMELINE_FILE = LOG_DIR / "boot_timeline.json"
+
+PROBE_MIN = 0.02     # premiere sonde de readiness (s), doublee a chaque essai
+PROBE_MAX = 0.5
+STABLE_AFTER = 60    # secondes de vie avant de remettre le compteur de restarts a zero
 
 # Symboles sacres
 PHI = 1.618033988749895
@@ -97,14 +111,17 @@ class ServiceConfig:
     port: int
     cmd: List[str]
     cwd: Optional[str] = None
-    check_type: str = "port"  # port, socket, http, process
+    check_type: str = "port"  # port, socket, http, process, notify, file
     socket_path: Optional[str] = None
     http_url: Optional[str] = None
+    ready_file: Optional[str] = None  # check_type "file": cree par le service quand il est pret
     depends_on: List[str] = field(default_factory=list)
     startup_timeout: int = 30
     env: Dict[str, str] = field(default_factory=dict)
     restart_on_failure: bool = True
     max_restarts: int = 3
+    backoff_initial: float = 1.0  # delai avant le 1er restart, double ensuite
+    backoff_max: float = 60.0
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # SERVICES REGISTRY
@@ -278,9 +295,18 @@ class ResurrectionEngine:
         SOCKET_DIR.mkdir(parents=True, exist_ok=True)
 
         self.pids: Dict[str, int] = {}
+        self.procs: Dict[str, subprocess.Popen] = {}
+        self.pidfds: Dict[str, int] = {}
         self.states: Dict[str, ServiceState] = {}
         self.restart_counts: Dict[str, int] = {}
+        self.notify_socks: Dict[str, socket.socket] = {}
+        self.notified: set = set()
+        self.timeline: Dict[str, dict] = {}
+        self.boot_t0: Optional[float] = None
         self.running = True
+        self._locks: Dict[str, threading.RLock] = {}
+        self._locks_guard = threading.Lock()
+        self._sel: Optional[selectors.BaseSelector] = None
 
         self._load_pids()
         register_services()
@@ -329,6 +355,71 @@ class ResurrectionEngine:
         except OSError:
             return False
 
+    def _service_lock(self, name: str) -> threading.RLock:
+        """Un seul demarrage a la fois par service"""
+        with self._locks_guard:
+            return self._locks.setdefault(name, threading.RLock())
+
+    # ═══ Processus (pidfd / waitpid) ═══
+
+    def _pidfd(self, name: str) -> Optional[int]:
+        """pidfd du service (Linux >= 5.3), lisible des que le processus meurt"""
+        fd = self.pidfds.get(name)
+        if fd is not None:
+            return fd
+        pid = self.pids.get(name)
+        if not pid or not hasattr(os, "pidfd_open"):
+            return None
+        try:
+            fd = os.pidfd_open(pid)
+        except OSError:
+            return None
+        self.pidfds[name] = fd
+        return fd
+
+    def _exited(self, name: str) -> bool:
+        """Le processus du service est-il mort? (recolte le zombie si c'est notre enfant)"""
+        proc = self.procs.get(name)
+        if proc is not None:
+            return proc.poll() is not None
+        pid = self.pids.get(name)
+        return pid is None or not self._is_running(pid)
+
+    def _exit_code(self, name: str) -> Optional[int]:
+        proc = self.procs.get(name)
+        return proc.poll() if proc is not None else None
+
+    def _forget(self, name: str):
+        """Oublie le processus: pidfd ferme, zombie recolte, PID supprime"""
+        fd = self.pidfds.pop(name, None)
+        if fd is not None:
+            if self._sel is not None:
+                try:
+                    self._sel.unregister(fd)
+                except (KeyError, ValueError):
+                    pass
+            os.close(fd)
+        proc = self.procs.pop(name, None)
+        if proc is not None:
+            proc.poll()
+        self.notified.discard(name)
+        self._remove_pid(name)
+
+    def _wait_exit(self, name: str, timeout: float) -> bool:
+        """Attend la mort du processus (pidfd, sinon sondage)"""
+        fd = self._pidfd(name)
+        if fd is not None:
+            select.select([fd], [], [], timeout)
+            return self._exited(name)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._exited(name):
+                return True
+            time.sleep(0.3)
+        return self._exited(name)
+
+    # ═══ Readiness ═══
+
     def _check_port(self, port: int) -> bool:
         """Verifie si un port repond"""
         try:
@@ -360,6 +451,76 @@ class ResurrectionEngine:
         except:
             return False
 
+    def _open_notify(self, name: str) -> Path:
+        """Socket datagramme type sd_notify: le service envoie READY=1"""
+        path = SOCKET_DIR / f"notify-{name}.sock"
+        path.unlink(missing_ok=True)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(str(path))
+        sock.setblocking(False)
+        self.notify_socks[name] = sock
+        return path
+
+    def _close_notify(self, name: str):
+        sock = self.notify_socks.pop(name, None)
+        if sock is not None:
+            sock.close()
+            (SOCKET_DIR / f"notify-{name}.sock").unlink(missing_ok=True)
+
+    def _read_notify(self, name: str):
+        """Lit les messages en attente (READY=1, STATUS=...)"""
+        sock = self.notify_socks.get(name)
+        while sock is not None:
+            try:
+                data = sock.recv(4096)
+            except (BlockingIOError, OSError):
+                return
+            for line in data.decode(errors="replace").splitlines():
+                if line == "READY=1":
+                    self.notified.add(name)
+                elif line.startswith("STATUS="):
+                    self.log.info(f"  {SERVICES[name].symbol} {SERVICES[name].name}: {line[7:]}")
+
+    def _probe(self, name: str) -> bool:
+        """Sonde de readiness selon check_type"""
+        config = SERVICES[name]
+        if config.check_type == "port" and config.port > 0:
+            return self._check_port(config.port)
+        elif config.check_type == "socket" and config.socket_path:
+            return self._check_socket(config.socket_path)
+        elif config.check_type == "http" and config.http_url:
+            return self._check_http(config.http_url)
+        elif config.check_type == "file" and config.ready_file:
+            return Path(config.ready_file).exists()
+        elif config.check_type == "notify":
+            return name in self.notified
+        elif config.check_type == "process":
+            return not self._exited(name)
+        return False
+
+    def _wait_ready(self, name: str, timeout: float) -> bool:
+        """
+        Attend la readiness. Reveil immediat sur un message notify ou la
+        mort du processus (pidfd); sinon sondes a intervalle croissant.
+        """
+        deadline = time.monotonic() + timeout
+        delay = PROBE_MIN
+        fds = [fd for fd in (self._pidfd(name), self.notify_socks.get(name)) if fd is not None]
+        while True:
+            self._read_notify(name)
+            if self._exited(name):
+                return False
+            if self._probe(name):
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if fds:
+                select.select(fds, [], [], min(delay, remaining))
+            else:
+                time.sleep(min(delay, remaining))
+            delay = min(delay * 2, PROBE_MAX)
+
     def is_alive(self, name: str) -> bool:
         """Verifie si un service est vivant"""
         if name not in SERVICES:
@@ -369,21 +530,14 @@ class ResurrectionEngine:
 
         # Verifier le PID d'abord
         pid = self.pids.get(name)
-        if pid and not self._is_running(pid):
-            self._remove_pid(name)
+        if pid and self._exited(name):
+            self._forget(name)
             return False
 
-        # Verifier selon le type
-        if config.check_type == "port" and config.port > 0:
-            return self._check_port(config.port)
-        elif config.check_type == "socket" and config.socket_path:
-            return self._check_socket(config.socket_path)
-        elif config.check_type == "http" and config.http_url:
-            return self._check_http(config.http_url)
-        elif config.check_type == "process":
-            return pid is not None and self._is_running(pid)
-
-        return False
+        if config.check_type in ("notify", "process"):
+            # readiness deja annoncee: vivant tant que le processus vit
+            return pid is not None
+        return self._probe(name)
 
     def get_state(self, name: str) -> ServiceState:
         """Retourne l'etat d'un service"""
@@ -397,6 +551,8 @@ class ResurrectionEngine:
         else:
             return ServiceState.STOPPED
 
+    # ═══ Dependances ═══
+
     def _resolve_dependencies(self, name: str, resolved: List[str] = None, seen: set = None) -> List[str]:
         """Resoud les dependances recursivement (ordre topologique)"""
         if resolved is None:
@@ -419,6 +575,66 @@ class ResurrectionEngine:
 
         return resolved
 
+    def _levels(self) -> List[List[str]]:
+        """Niveaux topologiques du DAG: niveau = 1 + max(niveau des dependances)"""
+        level: Dict[str, int] = {}
+
+        def visit(name: str, stack: List[str]) -> int:
+            if name in level:
+                return level[name]
+            if name in stack:
+                raise ValueError("cycle de dependances: " + " -> ".join(stack + [name]))
+            deps = [d for d in SERVICES[name].depends_on if d in SERVICES]
+            level[name] = 1 + max((visit(d, stack + [name]) for d in deps), default=-1)
+            return level[name]
+
+        for name in SERVICES:
+            visit(name, [])
+        levels: List[List[str]] = [[] for _ in range(max(level.values(), default=-1) + 1)]
+        for name in SERVICES:
+            levels[level[name]].append(name)
+        return levels
+
+    # ═══ Demarrage / arret ═══
+
+    def _spawn(self, name: str) -> subprocess.Popen:
+        """Lance le processus du service"""
+        config = SERVICES[name]
+        log_file = LOG_DIR / f"{name}.log"
+        env = os.environ.copy()
+        env.update(config.env)
+        if config.check_type == "notify":
+            env["NOTIFY_SOCKET"] = str(self._open_notify(name))
+        if config.check_type == "file" and config.ready_file:
+            Path(config.ready_file).unlink(missing_ok=True)  # pas de readiness perimee
+
+        with open(log_file, 'a') as log:
+            log.write(f"\n{'='*60}\n")
+            log.write(f"Resurrection: {datetime.now().isoformat()}\n")
+            log.write(f"{'='*60}\n")
+            log.flush()
+
+            process = subprocess.Popen(
+                config.cmd,
+                cwd=config.cwd or str(GAIA_ROOT),
+                stdout=log,
+                stderr=log,
+                env=env,
+                start_new_session=True
+            )
+        self.procs[name] = process
+        self._save_pid(name, process.pid)
+        return process
+
+    def _mark(self, name: str, **times):
+        """Note un instant de la timeline de boot (secondes depuis le debut)"""
+        t0 = self.boot_t0 if self.boot_t0 is not None else time.monotonic()
+        entry = self.timeline.setdefault(name, {
+            "deps": list(SERVICES[name].depends_on), "spawn": None, "ready": None, "ok": False
+        })
+        for key, t in times.items():
+            entry[key] = round(t - t0, 3) if isinstance(t, float) else t
+
     def start_service(self, name: str, wait: bool = True) -> bool:
         """Demarre un service"""
         if name not in SERVICES:
@@ -427,63 +643,55 @@ class ResurrectionEngine:
 
         config = SERVICES[name]
 
-        # Deja en cours?
-        if self.is_alive(name):
-            self.log.info(f"  {config.symbol} {config.name} deja actif")
-            return True
+        with self._service_lock(name):
+            # Deja en cours?
+            if self.is_alive(name):
+                self.log.info(f"  {config.symbol} {config.name} deja actif")
+                now = time.monotonic()
+                self._mark(name, spawn=now, ready=now, ok=True)
+                return True
 
-        # Verifier les dependances
-        for dep in config.depends_on:
-            if not self.is_alive(dep):
-                self.log.info(f"  Dependance {dep} requise pour {name}")
-                if not self.start_service(dep):
-                    return False
+            # Verifier les dependances
+            for dep in config.depends_on:
+                if not self.is_alive(dep):
+                    self.log.info(f"  Dependance {dep} requise pour {name}")
+                    if not self.start_service(dep):
+                        return False
 
-        self.log.info(f"  {config.symbol} Demarrage {config.name}...")
-        self.states[name] = ServiceState.STARTING
+            self.log.info(f"  {config.symbol} Demarrage {config.name}...")
+            self.states[name] = ServiceState.STARTING
 
-        try:
-            # Preparer le log
-            log_file = LOG_DIR / f"{name}.log"
-            with open(log_file, 'a') as log:
-                log.write(f"\n{'='*60}\n")
-                log.write(f"Resurrection: {datetime.now().isoformat()}\n")
-                log.write(f"{'='*60}\n")
-
-            # Lancer le processus
-            with open(log_file, 'a') as log:
-                env = os.environ.copy()
-                env.update(config.env)
-
-                process = subprocess.Popen(
-                    config.cmd,
-                    cwd=config.cwd or str(GAIA_ROOT),
-                    stdout=log,
-                    stderr=log,
-                    env=env,
-                    start_new_session=True
-                )
-                self._save_pid(name, process.pid)
-
-            # Attendre le demarrage
-            if wait:
-                for i in range(config.startup_timeout * 2):
-                    time.sleep(0.5)
-                    if self.is_alive(name):
-                        self.states[name] = ServiceState.RUNNING
-                        self.log.info(f"  {config.symbol} {config.name} OK (PID {process.pid})")
-                        return True
-
-                self.log.warning(f"  {config.symbol} {config.name} TIMEOUT")
+            try:
+                t_spawn = time.monotonic()
+                process = self._spawn(name)
+                self._mark(name, spawn=t_spawn)
+
+                if not wait:
+                    return True
+
+                if self._wait_ready(name, config.startup_timeout):
+                    self.states[name] = ServiceState.RUNNING
+                    self._mark(name, ready=time.monotonic(), ok=True)
+                    self.log.info(f"  {config.symbol} {config.name} OK (PID {process.pid}, "
+                                  f"{time.monotonic() - t_spawn:.2f}s)")
+                    return True
+
+                if self._exited(name):
+                    self.log.warning(f"  {config.symbol} {config.name} mort au demarrage "
+                                     f"(code {self._exit_code(name)})")
+                    self._forget(name)
+                else:
+                    self.log.warning(f"  {config.symbol} {config.name} TIMEOUT")
                 self.states[name] = ServiceState.FAILED
                 return False
 
-            return True
+            except Exception as e:
+                self.log.error(f"  {config.symbol} {config.name} ERREUR: {e}")
+                self.states[name] = ServiceState.FAILED
+                return False
 
-        except Exception as e:
-            self.log.error(f"  {config.symbol} {config.name} ERREUR: {e}")
-            self.states[name] = ServiceState.FAILED
-            return False
+            finally:
+                self._close_notify(name)
 
     def stop_service(self, name: str) -> bool:
         """Arrete un service"""
@@ -501,53 +709,76 @@ class ResurrectionEngine:
 
         try:
             os.kill(pid, signal.SIGTERM)
-            for _ in range(20):
-                time.sleep(0.3)
-                if not self._is_running(pid):
-                    break
-            else:
+            if not self._wait_exit(name, 6):
                 os.kill(pid, signal.SIGKILL)
+                self._wait_exit(name, 2)
 
-            self._remove_pid(name)
+            self._forget(name)
             self.states[name] = ServiceState.STOPPED
             self.log.info(f"  {config.symbol} {config.name} arrete")
             return True
 
         except ProcessLookupError:
-            self._remove_pid(name)
+            self._forget(name)
             return True
         except Exception as e:
             self.log.error(f"  Erreur arret {name}: {e}")
             return False
 
     def start_all(self):
-        """Demarre TOUS les services dans le bon ordre"""
+        """
+        Demarre TOUS les services: chaque niveau du DAG en parallele, un
+        service part des que ses propres dependances sont pretes.
+        """
         print("\n" + "="*60)
         print("  🌍 GAIA RESURRECTION - Reveil du Pantheon")
         print("="*60 + "\n")
 
-        # Collecter tous les services avec dependances resolues
-        all_services = []
-        for name in SERVICES:
-            deps = self._resolve_dependencies(name)
-            for dep in deps:
-                if dep not in all_services:
-                    all_services.append(dep)
-
-        self.log.info(f"Services a demarrer: {all_services}")
+        try:
+            levels = self._levels()
+        except ValueError as e:
+            self.log.error(str(e))
+            return False
 
-        # Demarrer dans l'ordre
-        success = 0
-        failed = 0
+        self.log.info(f"Niveaux: {levels}")
+
+        self.timeline = {}
+        self.boot_t0 = time.monotonic()
+        results: Dict[str, bool] = {}
+        pending = [name for level in levels for name in level]
+        running: Dict[Future, str] = {}
+
+        with ThreadPoolExecutor(max_workers=max(len(pending), 1), thread_name_prefix="resurrect") as pool:
+            while pending or running:
+                for name in list(pending):
+                    deps = SERVICES[name].depends_on
+                    if any(d not in SERVICES or results.get(d) is False for d in deps):
+                        pending.remove(name)
+                        results[name] = False
+                        self.states[name] = ServiceState.FAILED
+                        self._mark(name)
+                        self.log.warning(f"  {SERVICES[name].symbol} {SERVICES[name].name} "
+                                         f"non demarre: dependance en echec")
+                    elif all(results.get(d) for d in deps):
+                        pending.remove(name)
+                        running[pool.submit(self.start_service, name)] = name
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        self.log.error(f"  Erreur demarrage {name}: {e}")
+                        results[name] = False
 
-        for name in all_services:
-            if self.start_service(name):
-                success += 1
-            else:
-                failed += 1
+        failed = sum(1 for ok in results.values() if not ok)
 
         print()
         self.status()
+        self.save_timeline()
+        self.print_timeline()
 
         if failed == 0:
             print("\n  ✅ Resurrection complete!\n")
@@ -563,7 +794,10 @@ class ResurrectionEngine:
         print("="*60 + "\n")
 
         # Ordre inverse des dependances
-        all_services = list(SERVICES.keys())
+        try:
+            all_services = [name for level in self._levels() for name in level]
+        except ValueError:
+            all_services = list(SERVICES.keys())
         all_services.reverse()
 
         for name in all_services:
@@ -577,6 +811,62 @@ class ResurrectionEngine:
         time.sleep(2)
         self.start_all()
 
+    # ═══ Timeline de boot ═══
+
+    def critical_path(self, timeline: Dict[str, dict] = None) -> List[str]:
+        """Chaine de dependances qui a fixe la duree du boot"""
+        timeline = self.timeline if timeline is None else timeline
+        ready = {n: e["ready"] for n, e in timeline.items() if e.get("ready") is not None}
+        if not ready:
+            return []
+        name = max(ready, key=ready.get)
+        path = [name]
+        while True:
+            deps = [d for d in timeline[name]["deps"] if d in ready]
+            if not deps:
+                break
+            name = max(deps, key=ready.get)
+            path.append(name)
+        return path[::-1]
+
+    def save_timeline(self):
+        """Ecrit la timeline du dernier boot (lue par `resurrection.py timeline`)"""
+        report = {
+            "boot": datetime.now().isoformat(),
+            "total": max((e["ready"] for e in self.timeline.values() if e.get("ready") is not None),
+                         default=0.0),
+            "services": self.timeline,
+            "critical_path": self.critical_path(),
+        }
+        TIMELINE_FILE.write_text(json.dumps(report, indent=2))
+
+    def print_timeline(self, report: dict = None):
+        """Affiche la timeline: une barre par service, puis le chemin critique"""
+        if report is None:
+            report = {"total": max((e["ready"] or 0.0 for e in self.timeline.values()), default=0.0),
+                      "services": self.timeline, "critical_path": self.critical_path()}
+        services = report["services"]
+        total = report["total"] or 1e-9
+        width = 40
+
+        print(f"\n  ⏱  Boot timeline ({report['total']:.2f}s)")
+        for name, e in sorted(services.items(), key=lambda kv: (kv[1]["spawn"] is None, kv[1]["spawn"] or 0)):
+            symbol = SERVICES[name].symbol if name in SERVICES else " "
+            if e["spawn"] is None:
+                print(f"  {symbol} {name:<12} {'':>15}  non demarre")
+                continue
+            end = e["ready"] if e["ready"] is not None else total
+            start_col = int(e["spawn"] / total * width)
+            bar = "█" * max(1, int(end / total * width) - start_col)
+            mark = "" if e["ok"] else "  ECHEC"
+            print(f"  {symbol} {name:<12} {e['spawn']:6.2f} → {end:6.2f}  {' ' * start_col}{bar}{mark}")
+
+        path = report["critical_path"]
+        if path:
+            print(f"\n  Chemin critique: {' → '.join(path)}")
+
+    # ═══ Statut ═══
+
     def status(self):
         """Affiche le statut de tous les services"""
         print("┌" + "─"*58 + "┐")
@@ -624,11 +914,15 @@ class ResurrectionEngine:
         print(line)
 
     def watch(self, interval: int = 30):
-        """Mode gardien: surveille et redemarre les services morts"""
+        """
+        Mode gardien: la mort d'un processus reveille la boucle (pidfd),
+        restart avec backoff exponentiel. Les sondes de sante tournent
+        toutes les `interval` secondes (services bloques, pas de pidfd).
+        """
         print("\n" + "="*60)
         print("  👁️  GAIA GUARDIAN - Mode surveillance")
         print("="*60)
-        print(f"  Intervalle: {interval}s")
+        print(f"  Sondes: {interval}s")
         print("  Ctrl+C pour arreter\n")
 
         def signal_handler(sig, frame):
@@ -639,23 +933,100 @@ class ResurrectionEngine:
         signal.signal(signal.SIGINT, signal_handler)
         signal.signal(signal.SIGTERM, signal_handler)
 
+        self._sel = selectors.DefaultSelector()
+        wake_r, wake_w = os.pipe()
+        os.set_blocking(wake_r, False)
+        self._sel.register(wake_r, selectors.EVENT_READ, None)
+
+        watched: set = set()                 # services dont le pidfd est enregistre
+        up_since: Dict[str, float] = {}
+        restart_at: Dict[str, float] = {}
+        restarting: set = set()
+        finished: Dict[str, bool] = {}       # resultats des threads de restart
+        abandoned: set = set()
+        guard = threading.Lock()
+
+        def restart(name: str):
+            ok = False
+            try:
+                ok = self.start_service(name)
+            finally:
+                with guard:
+                    finished[name] = ok
+                os.write(wake_w, b"x")
+
+        def on_death(name: str, why: str):
+            config = SERVICES[name]
+            watched.discard(name)
+            up_since.pop(name, None)
+            if not self._exited(name):
+                self.stop_service(name)  # vivant mais ne repond plus
+            self._forget(name)
+
+            restarts = self.restart_counts.get(name, 0)
+            if not config.restart_on_failure:
+                self.log.warning(f"  {config.symbol} {config.name} mort ({why}), pas de restart")
+                abandoned.add(name)
+                return
+            if restarts >= config.max_restarts:
+                self.log.error(f"  {config.symbol} {config.name} trop de restarts ({restarts}), abandon")
+                abandoned.add(name)
+                return
+            delay = min(config.backoff_initial * 2 ** restarts, config.backoff_max)
+            self.restart_counts[name] = restarts + 1
+            restart_at[name] = time.monotonic() + delay
+            self.log.warning(f"  {config.symbol} {config.name} mort ({why}), resurrection dans {delay:.1f}s...")
+
+        next_probe = time.monotonic()
         while self.running:
-            for name, config in SERVICES.items():
-                if not self.is_alive(name):
-                    # Service mort
-                    restarts = self.restart_counts.get(name, 0)
-
-                    if restarts < config.max_restarts:
-                        self.log.warning(f"  {config.symbol} {config.name} mort, resurrection...")
-                        self.start_service(name)
-                        self.restart_counts[name] = restarts + 1
-                    else:
-                        self.log.error(f"  {config.symbol} {config.name} trop de restarts ({restarts})")
-                else:
-                    # Reset compteur si vivant
-                    self.restart_counts[name] = 0
-
-            time.sleep(interval)
+            # enregistrer les processus vivants qui ne sont pas encore surveilles
+            for name in SERVICES:
+                if name in abandoned or name in restarting or name in restart_at:
+                    continue
+                if name in watched and name in self.pidfds:
+                    continue
+                watched.discard(name)
+                fd = self._pidfd(name)
+                if fd is not None:
+                    self._sel.register(fd, selectors.EVENT_READ, name)
+                    watched.add(name)
+                    up_since.setdefault(name, time.monotonic())
+
+            deadline = min([next_probe] + list(restart_at.values()))
+            for key, _ in self._sel.select(max(0.0, deadline - time.monotonic())):
+                if key.data is None:
+                    try:
+                        os.read(wake_r, 4096)
+                    except BlockingIOError:
+                        pass
+                elif key.data in watched:
+                    name = key.data
+                    on_death(name, f"code {self._exit_code(name)}")
+
+            with guard:
+                done = dict(finished)
+                finished.clear()
+            for name, ok in done.items():
+                restarting.discard(name)
+                if not ok:
+                    on_death(name, "echec du demarrage")
+
+            now = time.monotonic()
+            for name, t in list(restart_at.items()):
+                if t <= now:
+                    del restart_at[name]
+                    restarting.add(name)
+                    threading.Thread(target=restart, args=(name,), name=f"restart-{name}", daemon=True).start()
+
+            if now >= next_probe:
+                next_probe = now + interval
+                for name in SERVICES:
+                    if name in abandoned or name in restarting or name in restart_at:
+                        continue
+                    if not self.is_alive(name):
+                        on_death(name, "sonde")
+                    elif now - up_since.setdefault(name, now) >= STABLE_AFTER:
+                        self.restart_counts[name] = 0
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # CLI
@@ -672,11 +1043,12 @@ Exemples:
   python resurrection.py status    # Affiche l'etat
   python resurrection.py watch     # Mode gardien (auto-restart)
   python resurrection.py restart   # Redemarre tout
+  python resurrection.py timeline  # Timeline du dernier boot
         """
     )
 
     parser.add_argument("command",
-                        choices=["start", "stop", "status", "restart", "watch"],
+                        choices=["start", "stop", "status", "restart", "watch", "timeline"],
                         help="Commande a executer")
     parser.add_argument("--service", "-s",
                         help="Service specifique (optionnel)")
@@ -710,6 +1082,12 @@ Exemples:
     elif args.command == "status":
         engine.status()
 
+    elif args.command == "timeline":
+        if TIMELINE_FILE.exists():
+            engine.print_timeline(json.loads(TIMELINE_FILE.read_text()))
+        else:
+            print("  Aucun boot enregistre")
+
     elif args.command == "watch":
         engine.start_all()
         engine.watch(args.interval)
@@ -3,52 +3,315 @@
 ssd = storage as compute
 cpu worker con → ssd mémoire intelligente
 précompute tout, stocke, cpu juste lit
+
+cache adressé par contenu:
+- clé = hash structurel canonique des arguments (numpy par buffer)
+- taille bornée (MAX_CACHE_GB), éviction lru ou lfu via un index sqlite
+- écritures atomiques (tmp + rename)
+- numpy → .npy relu en mmap, le reste → .pkl
+- single-flight: une seule exécution par clé en parallèle
+- compteurs hit/miss/octets: cache_stats()
 """
 
 import os
-import json
-import hashlib
+import time
 import pickle
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import Future
 from pathlib import Path
 from phi import PHI
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 CACHE_DIR = Path("/home/ego-bash/good-girl/cache")
 CACHE_DIR.mkdir(exist_ok=True)
+INDEX_PATH = CACHE_DIR / "index.sqlite"
 
 MAX_CACHE_GB = 1400  # 80% of 1.8TB
+LOW_WATERMARK = 0.9  # l'éviction redescend à 90% du max
+EVICTION = "lru"     # "lru" ou "lfu"
+
+_MISS = object()
+
+STATS = {
+    "hits": 0,
+    "misses": 0,
+    "coalesced": 0,
+    "bytes_read": 0,
+    "bytes_written": 0,
+    "evictions": 0,
+    "bytes_evicted": 0,
+}
+
+# === HASH CANONIQUE ===
+
+def _feed(h, obj):
+    """nourrit h avec une forme canonique typée de obj"""
+    if obj is None:
+        h.update(b"N")
+    elif isinstance(obj, bool):
+        h.update(b"T" if obj else b"F")
+    elif isinstance(obj, int):
+        h.update(b"i%d;" % obj)
+    elif isinstance(obj, float):
+        h.update(b"f" + repr(obj).encode() + b";")
+    elif isinstance(obj, str):
+        b = obj.encode("utf-8")
+        h.update(b"s%d:" % len(b) + b)
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        b = bytes(obj)
+        h.update(b"b%d:" % len(b) + b)
+    elif np is not None and isinstance(obj, np.ndarray):
+        arr = np.ascontiguousarray(obj)
+        h.update(b"a" + arr.dtype.str.encode() + repr(arr.shape).encode())
+        if arr.dtype.hasobject:
+            for item in arr.ravel():
+                _feed(h, item)
+        else:
+            h.update(memoryview(arr).cast("B"))
+    elif np is not None and isinstance(obj, np.generic):
+        h.update(b"g" + obj.dtype.str.encode())
+        h.update(obj.tobytes())
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"l" if isinstance(obj, list) else b"t")
+        h.update(b"%d[" % len(obj))
+        for item in obj:
+            _feed(h, item)
+        h.update(b"]")
+    elif isinstance(obj, dict):
+        # ordre indépendant de l'insertion: trié par hash de clé
+        items = sorted((_digest(k), v) for k, v in obj.items())
+        h.update(b"d%d{" % len(items))
+        for kd, v in items:
+            h.update(kd)
+            _feed(h, v)
+        h.update(b"}")
+    elif isinstance(obj, (set, frozenset)):
+        digests = sorted(_digest(item) for item in obj)
+        h.update(b"S%d{" % len(digests) + b"".join(digests) + b"}")
+    elif callable(obj) and hasattr(obj, "__qualname__"):
+        h.update(b"c" + f"{getattr(obj, '__module__', '')}.{obj.__qualname__}".encode() + b";")
+    else:
+        # objet quelconque: type + état pickle (déterministe pour les cas simples)
+        t = type(obj)
+        h.update(b"o" + f"{t.__module__}.{t.__qualname__}".encode() + b":")
+        try:
+            h.update(pickle.dumps(obj, protocol=4))
+        except Exception:
+            h.update(repr(obj).encode())
+
+
+def _digest(obj):
+    h = hashlib.sha256()
+    _feed(h, obj)
+    return h.digest()
+
 
 def cache_key(data):
-    """hash pour clé cache"""
-    return hashlib.sha256(str(data).encode()).hexdigest()[:16]
+    """hash pour clé cache (structurel, stable entre process)"""
+    return _digest(data).hex()[:32]
+
+# === INDEX ===
+
+_lock = threading.RLock()
+_index = None
+
+
+def _db():
+    """index sqlite: clé → fichier, taille, accès (créé à la demande)"""
+    global _index
+    if _index is None:
+        _index = sqlite3.connect(str(INDEX_PATH), check_same_thread=False)
+        _index.execute("PRAGMA journal_mode=WAL")
+        _index.execute("PRAGMA synchronous=NORMAL")
+        _index.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                file TEXT,
+                size INTEGER,
+                hits INTEGER DEFAULT 0,
+                last_access REAL
+            )
+        """)
+        _index.execute("CREATE INDEX IF NOT EXISTS idx_lru ON entries(last_access)")
+        _index.execute("CREATE INDEX IF NOT EXISTS idx_lfu ON entries(hits, last_access)")
+        _index.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        _index.commit()
+        _adopt_orphans(_index)
+    return _index
+
+
+def _adopt_orphans(db):
+    """une fois: indexe les fichiers déjà présents (ancien cache sans index)"""
+    if db.execute("SELECT 1 FROM meta WHERE key = 'adopted'").fetchone():
+        return
+    rows = []
+    for f in CACHE_DIR.iterdir():
+        if f.suffix == ".tmp":
+            f.unlink()  # écriture interrompue
+        elif f.suffix in (".pkl", ".npy"):
+            st = f.stat()
+            rows.append((f.stem, f.name, st.st_size, st.st_mtime))
+    db.executemany("INSERT OR IGNORE INTO entries (key, file, size, last_access) VALUES (?, ?, ?, ?)", rows)
+    db.execute("INSERT OR REPLACE INTO meta VALUES ('adopted', '1')")
+    db.commit()
+
+
+def _total_bytes(db):
+    return db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
 
-def cache_path(key):
+def _evict(db):
+    """évince jusqu'au low watermark si le max est dépassé"""
+    limit = MAX_CACHE_GB * 1024 ** 3
+    total = _total_bytes(db)
+    if total <= limit:
+        return
+    target = limit * LOW_WATERMARK
+    order = "hits, last_access" if EVICTION == "lfu" else "last_access"
+    victims = []
+    for key, name, size in db.execute(f"SELECT key, file, size FROM entries ORDER BY {order}"):
+        if total <= target:
+            break
+        victims.append((key, name, size))
+        total -= size
+    for key, name, size in victims:
+        try:
+            (CACHE_DIR / name).unlink()  # un mmap ouvert reste valide (unix)
+        except FileNotFoundError:
+            pass
+        STATS["evictions"] += 1
+        STATS["bytes_evicted"] += size
+    db.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k, _, _ in victims])
+    db.commit()
+
+# === STOCKAGE ===
+
+def _is_array(value):
+    return np is not None and isinstance(value, np.ndarray) and not value.dtype.hasobject
+
+
+def cache_path(key, array=False):
     """chemin fichier cache"""
-    return CACHE_DIR / f"{key}.pkl"
+    return CACHE_DIR / f"{key}.{'npy' if array else 'pkl'}"
+
 
 def store(key, value):
-    """stocke sur ssd"""
-    path = cache_path(key)
-    with open(path, 'wb') as f:
-        pickle.dump(value, f)
+    """stocke sur ssd (écriture atomique)"""
+    array = _is_array(value)
+    path = cache_path(key, array)
+    fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, prefix=f".{key}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if array:
+                np.save(f, value, allow_pickle=False)
+            else:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+    size = path.stat().st_size
+    STATS["bytes_written"] += size
+    with _lock:
+        db = _db()
+        old = db.execute("SELECT file FROM entries WHERE key = ?", (key,)).fetchone()
+        if old and old[0] != path.name:
+            (CACHE_DIR / old[0]).unlink(missing_ok=True)  # type de valeur changé
+        db.execute(
+            "INSERT OR REPLACE INTO entries (key, file, size, hits, last_access) VALUES (?, ?, ?, 0, ?)",
+            (key, path.name, size, time.time())
+        )
+        db.commit()
+        _evict(db)
     return path
 
+
+def _lookup(key, count_miss=True):
+    """valeur ou _MISS; les .npy sont mappés (lecture seule), pas copiés"""
+    with _lock:
+        db = _db()
+        row = db.execute("SELECT file, size FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            STATS["misses"] += count_miss
+            return _MISS
+        name, size = row
+        db.execute(
+            "UPDATE entries SET hits = hits + 1, last_access = ? WHERE key = ?", (time.time(), key)
+        )
+        db.commit()
+
+    path = CACHE_DIR / name
+    try:
+        if path.suffix == ".npy":
+            value = np.load(path, mmap_mode="r")
+        else:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+    except FileNotFoundError:
+        with _lock:
+            _db().execute("DELETE FROM entries WHERE key = ?", (key,))
+            _db().commit()
+        STATS["misses"] += count_miss
+        return _MISS
+    STATS["hits"] += 1
+    STATS["bytes_read"] += size
+    return value
+
+
 def load(key):
     """charge depuis ssd"""
-    path = cache_path(key)
-    if path.exists():
-        with open(path, 'rb') as f:
-            return pickle.load(f)
-    return None
+    value = _lookup(key)
+    return None if value is _MISS else value
+
+# === COMPUTE ===
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
 
 def compute_and_store(fn, *args, **kwargs):
-    """compute once, store forever"""
-    key = cache_key((fn.__name__, args, tuple(kwargs.items())))
-    cached = load(key)
-    if cached is not None:
-        return cached
-    result = fn(*args, **kwargs)
-    store(key, result)
-    return result
+    """compute once, store (borné par MAX_CACHE_GB)"""
+    key = cache_key((fn, args, kwargs))
+    value = _lookup(key)
+    if value is not _MISS:
+        return value
+
+    # single-flight: les appels concurrents sur la même clé attendent le premier
+    with _inflight_lock:
+        fut = _inflight.get(key)
+        leader = fut is None
+        if leader:
+            fut = _inflight[key] = Future()
+    if not leader:
+        STATS["coalesced"] += 1
+        return fut.result()
+
+    try:
+        # un leader précédent a pu stocker et quitter _inflight entre notre
+        # lookup et notre entrée: il stocke avant de sortir, on relit
+        result = _lookup(key, count_miss=False)
+        if result is not _MISS:
+            fut.set_result(result)
+            return result
+        result = fn(*args, **kwargs)
+        store(key, result)
+        fut.set_result(result)
+        return result
+    except BaseException as e:
+        fut.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
 
 def precompute_phi_powers(max_power=1000):
     """précompute φ^n"""
@@ -61,14 +324,35 @@ def precompute_phi_powers(max_power=1000):
     return powers
 
 def cache_size_gb():
-    """taille cache en GB"""
-    total = sum(f.stat().st_size for f in CACHE_DIR.glob("*.pkl"))
-    return total / (1024 ** 3)
+    """taille cache en GB (depuis l'index)"""
+    with _lock:
+        return _total_bytes(_db()) / (1024 ** 3)
+
+def cache_stats():
+    """compteurs pour régler taille et politique"""
+    lookups = STATS["hits"] + STATS["misses"]
+    with _lock:
+        db = _db()
+        entries = db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        total = _total_bytes(db)
+    return {
+        **STATS,
+        "hit_rate": STATS["hits"] / lookups if lookups else 0.0,
+        "entries": entries,
+        "bytes": total,
+        "max_bytes": MAX_CACHE_GB * 1024 ** 3,
+        "eviction": EVICTION,
+    }
 
 def clear_cache():
     """vide cache"""
-    for f in CACHE_DIR.glob("*.pkl"):
-        f.unlink()
+    with _lock:
+        for f in CACHE_DIR.iterdir():
+            if f.suffix in (".pkl", ".npy"):
+                f.unlink()
+        db = _db()
+        db.execute("DELETE FROM entries")
+        db.commit()
 
 class SSDCompute:
     """CPU lit, SSD pense"""
@@ -88,6 +372,9 @@ class SSDCompute:
             return compute_and_store(fn, *args, **kwargs)
         return wrapper
 
+    def stats(self):
+        return cache_stats()
+
 SSD = SSDCompute()
 
 if __name__ == "__main__":
@@ -95,3 +382,4 @@ if __name__ == "__main__":
     print(f"cache size: {cache_size_gb():.2f} GB")
     print(f"max cache: {MAX_CACHE_GB} GB")
     print(f"φ^100 = {SSD.phi(100)}")
+    print(f"stats: {cache_stats()}")